@@ -0,0 +1,84 @@
+"""
+Object Footprint Benchmarks
+Bytes per ModelCapabilities, TaskRequirements and APIResponse with the
+slotted types, against the plain-dataclass layout they replaced (rebuilt
+here from the same fields). Responses are measured as the clients build
+them by default: with the parsed raw_response dict before, without it now
+that retention is opt-in.
+"""
+
+import dataclasses
+import tracemalloc
+from typing import Any, Callable, Dict
+
+from model_orchestrator import ModelCapabilities, ModelProvider, TaskRequirements, TaskType
+from model_orchestrator.types import APIResponse
+from model_orchestrator.wire import decode_completion
+
+from harness import benchmark
+from bench_parsing import _COMPLETION
+
+COUNT = 2_000
+
+
+def _legacy(cls: type) -> type:
+    """Unslotted dataclass with the same fields as `cls`"""
+    specs = []
+    for f in dataclasses.fields(cls):
+        if f.default is not dataclasses.MISSING:
+            specs.append((f.name, f.type, dataclasses.field(default=f.default)))
+        else:
+            specs.append((f.name, f.type))
+    return dataclasses.make_dataclass(f"Legacy{cls.__name__}", specs)
+
+
+_LegacyModelCapabilities = _legacy(ModelCapabilities)
+_LegacyTaskRequirements = _legacy(TaskRequirements)
+_LegacyAPIResponse = _legacy(APIResponse)
+
+
+def _bytes_per_object(build: Callable[[int], Any]) -> int:
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    kept = [build(i) for i in range(COUNT)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return (current - baseline) // COUNT
+
+
+def _model(cls: type) -> Callable[[int], Any]:
+    return lambda i: cls("model", "api-model", ModelProvider.OPENAI, 128_000, 2.5, 10.0, 90.0, 88.0, 7.0,
+                         supports_vision=True, supports_function_calling=True)
+
+
+def _requirements(cls: type) -> Callable[[int], Any]:
+    return lambda i: cls(TaskType.CODE_GENERATION, min_context=8000, min_coding=80.0, priority="quality")
+
+
+def _legacy_response(i: int):
+    body = bytes(bytearray(_COMPLETION))  # A fresh body, as read from the network
+    completion, raw = decode_completion(body, "openai", keep_raw=True)
+    return _LegacyAPIResponse(completion.content, "gpt-4o-mini", "openai",
+                              {"input_tokens": completion.input_tokens,
+                               "output_tokens": completion.output_tokens}, 100, raw_response=raw)
+
+
+def _slotted_response(i: int):
+    body = bytes(bytearray(_COMPLETION))
+    completion, _ = decode_completion(body, "openai")
+    return APIResponse(completion.content, "gpt-4o-mini", "openai",
+                       {"input_tokens": completion.input_tokens,
+                        "output_tokens": completion.output_tokens}, 100)
+
+
+@benchmark(name="memory_per_object", group="metrics")
+def bench_object_memory() -> Dict[str, Any]:
+    return {
+        "model_capabilities_before": _bytes_per_object(_model(_LegacyModelCapabilities)),
+        "model_capabilities_after": _bytes_per_object(_model(ModelCapabilities)),
+        "task_requirements_before": _bytes_per_object(_requirements(_LegacyTaskRequirements)),
+        "task_requirements_after": _bytes_per_object(_requirements(TaskRequirements)),
+        "api_response_before": _bytes_per_object(_legacy_response),
+        "api_response_after": _bytes_per_object(_slotted_response),
+    }
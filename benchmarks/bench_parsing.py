@@ -0,0 +1,105 @@
+"""
+Parsing Benchmarks
+Completion-body decoding and SSE stream framing with the shared wire layer,
+against the json-module baseline the clients used before (full parse of
+every body, one json.loads per decoded SSE line), plus memory retained per
+response with and without raw_response.
+"""
+
+import json
+import tracemalloc
+from typing import Dict, Any
+
+from model_orchestrator import wire
+from model_orchestrator.wire import SSEFramer, decode_completion, delta_decoder
+
+from harness import benchmark
+
+STREAM_TOKENS = 500
+
+# A realistic completion: long content plus the metadata we do not use
+_COMPLETION = json.dumps({
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 1700000000,
+    "model": "gpt-4o-mini",
+    "system_fingerprint": "fp_bench",
+    "choices": [{"index": 0, "logprobs": None, "finish_reason": "stop",
+                 "message": {"role": "assistant", "content": "word " * 2000, "refusal": None}}],
+    "usage": {"prompt_tokens": 1200, "completion_tokens": 2000, "total_tokens": 3200,
+              "prompt_tokens_details": {"cached_tokens": 0}, "completion_tokens_details": {"reasoning_tokens": 0}},
+}).encode()
+
+
+def _sse_stream(tokens: int) -> bytes:
+    events = []
+    for i in range(tokens):
+        chunk = {"id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": 1700000000,
+                 "model": "gpt-4o-mini", "choices": [{"index": 0, "delta": {"content": f"tok{i} "},
+                                                      "finish_reason": None}]}
+        events.append(f"data: {json.dumps(chunk)}\n\n".encode())
+    return b"".join(events) + b"data: [DONE]\n\n"
+
+
+_STREAM = _sse_stream(STREAM_TOKENS)
+# Network reads arrive in arbitrary slices, not line by line
+_NETWORK_CHUNKS = [_STREAM[i:i + 1400] for i in range(0, len(_STREAM), 1400)]
+
+
+@benchmark(name="decode_completion[json_baseline]")
+def bench_decode_baseline():
+    data = json.loads(_COMPLETION)
+    return data["choices"][0]["message"]["content"], data["usage"]["prompt_tokens"]
+
+
+@benchmark(name="decode_completion[wire]")
+def bench_decode_wire():
+    return decode_completion(_COMPLETION, "openai")
+
+
+@benchmark(name=f"sse_stream[json_baseline,tokens={STREAM_TOKENS}]")
+def bench_sse_baseline():
+    buffer = b""
+    text = []
+    for chunk in _NETWORK_CHUNKS:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line = line.decode("utf-8").strip()
+            if line.startswith("data: ") and line != "data: [DONE]":
+                text.append(json.loads(line[6:])["choices"][0]["delta"].get("content", ""))
+    return text
+
+
+_DECODE_DELTA = delta_decoder("openai")
+
+
+@benchmark(name=f"sse_stream[wire,tokens={STREAM_TOKENS}]")
+def bench_sse_wire():
+    framer = SSEFramer()
+    text = []
+    for chunk in _NETWORK_CHUNKS:
+        for data in framer.feed(chunk):
+            if data != b"[DONE]":
+                text.append(_DECODE_DELTA(data))
+    return text
+
+
+@benchmark(name="memory_per_response", group="metrics")
+def bench_response_memory() -> Dict[str, Any]:
+    count = 200
+
+    def retained(keep_raw: bool) -> int:
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        kept = [decode_completion(_COMPLETION, "openai", keep_raw=keep_raw) for _ in range(count)]
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del kept
+        return (current - baseline) // count
+
+    return {
+        "backend": "msgspec" if wire.msgspec else "orjson" if wire.orjson else "json",
+        "bytes_with_raw_response": retained(True),
+        "bytes_without_raw_response": retained(False),
+    }
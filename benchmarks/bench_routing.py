@@ -0,0 +1,288 @@
+"""
+Routing Benchmarks
+Covers task analysis, model selection across registry sizes, MODELS.md
+guide loading and lookups, end-to-end route_request against the local mock
+provider server, request coalescing in the orchestrator server, and memory
+per in-flight request.
+"""
+
+import os
+import time
+import random
+import asyncio
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Any
+
+import aiohttp
+
+from model_orchestrator import ModelOrchestrator, TaskType, ModelProvider, ModelCapabilities, TaskRequirements
+from model_orchestrator import guide as guide_module
+from model_orchestrator.guide import ModelGuideParser, load_guide
+from model_orchestrator.scorer import TaskAnalyzer
+from model_orchestrator.api_clients import (
+    GrokAPIClient, OpenAIAPIClient, GoogleAPIClient, AnthropicAPIClient, LocalModelClient,
+)
+from model_orchestrator.mock_server import MockProviderServer, ModelProfile
+from model_orchestrator.server import OrchestratorServer
+from model_orchestrator.workflow import ResourceLimiter
+
+from harness import benchmark
+
+PROMPT_SIZES = [100, 1_000, 10_000, 100_000]
+REGISTRY_SIZES = [10, 100, 1_000, 10_000]
+# name -> (latency seconds, error rate)
+LATENCY_PROFILES = {
+    "instant": (0.0, 0.0),
+    "latency_20ms": (0.02, 0.0),
+    "latency_20ms_errors_5pct": (0.02, 0.05),
+}
+
+_BASE_PROMPT = "Write a Python function that parses the log file, fixes the error handling and adds tests. "
+
+
+def make_prompt(size: int) -> str:
+    """Prompt of approximately `size` characters"""
+    return (_BASE_PROMPT * (size // len(_BASE_PROMPT) + 1))[:size]
+
+
+def make_models(count: int, seed: int = 7) -> Dict[str, ModelCapabilities]:
+    """Deterministic synthetic registry of `count` models"""
+    rng = random.Random(seed)
+    providers = [p for p in ModelProvider if p != ModelProvider.BEDROCK]
+    models = {}
+    for i in range(count):
+        model_id = f"synthetic-{i}"
+        models[model_id] = ModelCapabilities(
+            name=model_id,
+            api_name=model_id,
+            provider=providers[i % len(providers)],
+            context_window=rng.choice([8192, 32768, 128000, 1000000]),
+            input_cost=round(rng.uniform(0, 20), 3),
+            output_cost=round(rng.uniform(0, 60), 3),
+            reasoning_score=rng.uniform(50, 99),
+            coding_score=rng.uniform(50, 99),
+            speed_rating=rng.uniform(1, 10),
+            supports_vision=rng.random() < 0.3,
+            supports_function_calling=rng.random() < 0.6,
+        )
+    return models
+
+
+async def make_orchestrator(latency: float = 0.0, error_rate: float = 0.0) -> ModelOrchestrator:
+    """Orchestrator whose providers are all served by a fresh MockProviderServer"""
+    profile = ModelProfile(ttft_ms=latency * 1000, tokens_per_second=0, output_tokens=50, error_rate=error_rate)
+    server = await MockProviderServer(default_profile=profile, seed=7).start()
+    os.environ["OLLAMA_HOST"] = server.base_url("ollama")
+
+    orchestrator = ModelOrchestrator()
+    clients = {
+        "xai": GrokAPIClient(api_key="bench"),
+        "openai": OpenAIAPIClient(api_key="bench"),
+        "google": GoogleAPIClient(api_key="bench"),
+        "anthropic": AnthropicAPIClient(api_key="bench"),
+        "ollama": LocalModelClient(),
+    }
+    for provider, client in clients.items():
+        client.base_url = server.base_url("local" if provider == "ollama" else provider)
+        orchestrator.clients[provider] = client
+    await orchestrator.start_local_discovery()
+    orchestrator._mock_server = server
+    return orchestrator
+
+
+async def close_orchestrator(orchestrator: ModelOrchestrator):
+    """Close client sessions and stop the mock server"""
+    for client in orchestrator.clients.values():
+        if client.session:
+            await client.session.close()
+    await orchestrator._mock_server.stop()
+
+
+# ---------------------------------------------------------------------------
+# TaskAnalyzer.analyze across prompt sizes
+# ---------------------------------------------------------------------------
+
+def _register_analyze(size: int):
+    prompt = make_prompt(size)
+    analyzer = TaskAnalyzer()
+
+    @benchmark(name=f"analyze[prompt={size}]")
+    def bench_analyze():
+        analyzer.analyze(prompt)
+
+
+for _size in PROMPT_SIZES:
+    _register_analyze(_size)
+
+
+# ---------------------------------------------------------------------------
+# _select_best_model across registry sizes
+# ---------------------------------------------------------------------------
+
+def _register_select(count: int):
+    def setup():
+        orchestrator = ModelOrchestrator()
+        orchestrator.registry.models = make_models(count)
+        return orchestrator
+
+    # GENERAL has no guide recommendation, so every model is scored
+    requirements = TaskRequirements(task_type=TaskType.GENERAL, min_context=8000)
+
+    @benchmark(name=f"select_best_model[models={count}]", setup=setup)
+    def bench_select(orchestrator):
+        orchestrator._select_best_model(requirements)
+
+
+for _count in REGISTRY_SIZES:
+    _register_select(_count)
+
+
+# ---------------------------------------------------------------------------
+# MODELS.md guide: load (parse, on-disk snapshot, in-process memo) and lookups
+# ---------------------------------------------------------------------------
+
+GUIDE_ENTRIES = 200
+
+
+def make_guide(entries: int = GUIDE_ENTRIES) -> str:
+    """Synthetic MODELS.md with `entries` task mappings, blocked models and fallback chains"""
+    tasks = "\n".join(f"- **Task {i}**: synthetic-{i} > synthetic-{i + 1}" for i in range(entries))
+    blocked = "\n".join(f"- blocked-{i}: retired" for i in range(entries))
+    chains = "\n".join(f"- task_{i}: synthetic-{i} → synthetic-{i + 2}" for i in range(entries))
+    return (f"### Code Tasks\n{tasks}\n\n### Blocked Models\n{blocked}\n\n"
+            f"## Chains\n\n### Fallback Chains\n{chains}\n\n### End\n")
+
+
+_guide_dir = Path(tempfile.mkdtemp(prefix="bench_guide_"))
+_guide_path = _guide_dir / "MODELS.md"
+_guide_path.write_text(make_guide(), encoding="utf-8")
+_guide_cache = _guide_dir / "guide.snapshot"
+
+
+@benchmark(name=f"guide_load[parse,entries={GUIDE_ENTRIES}]")
+def bench_guide_parse():
+    guide_module._loaded.clear()
+    _guide_cache.unlink(missing_ok=True)
+    load_guide(_guide_path, _guide_cache)
+
+
+@benchmark(name=f"guide_load[snapshot,entries={GUIDE_ENTRIES}]")
+def bench_guide_snapshot():
+    guide_module._loaded.clear()
+    load_guide(_guide_path, _guide_cache)
+
+
+@benchmark(name=f"guide_load[memory,entries={GUIDE_ENTRIES}]")
+def bench_guide_memory():
+    load_guide(_guide_path, _guide_cache)
+
+
+def _register_blocked(count: int):
+    model_names = [m.api_name for m in make_models(count).values()]
+
+    def setup():
+        return ModelGuideParser(str(_guide_path), str(_guide_cache))
+
+    @benchmark(name=f"is_model_blocked[models={count}]", setup=setup)
+    def bench_blocked(parser):
+        for name in model_names:
+            parser.is_model_blocked(name)
+
+
+for _count in REGISTRY_SIZES:
+    _register_blocked(_count)
+
+
+# ---------------------------------------------------------------------------
+# route_request end to end against the mock backend
+# ---------------------------------------------------------------------------
+
+def _register_route(profile: str, latency: float, error_rate: float):
+    async def setup():
+        return await make_orchestrator(latency, error_rate)
+
+    @benchmark(name=f"route_request[{profile}]", setup=setup, teardown=close_orchestrator, samples=20)
+    async def bench_route(orchestrator):
+        await orchestrator.route_request("Explain the difference between a list and a tuple")
+
+    @benchmark(name=f"route_request_x50_concurrent[{profile}]", setup=setup,
+               teardown=close_orchestrator, samples=5)
+    async def bench_route_concurrent(orchestrator):
+        await asyncio.gather(*(
+            orchestrator.route_request(f"Explain item {i}") for i in range(50)
+        ))
+
+
+for _profile, (_latency, _error_rate) in LATENCY_PROFILES.items():
+    _register_route(_profile, _latency, _error_rate)
+
+
+# ---------------------------------------------------------------------------
+# Orchestrator server: identical concurrent requests with and without coalescing
+# ---------------------------------------------------------------------------
+
+async def _server_setup():
+    return await make_orchestrator(latency=0.1)
+
+
+async def _identical_burst(orchestrator: ModelOrchestrator, coalesce: bool, clients: int) -> Dict[str, Any]:
+    server = await OrchestratorServer(orchestrator, limiter=ResourceLimiter(64.0), coalesce=coalesce,
+                                      watch_interval=None).start()
+    stats = orchestrator._mock_server.stats
+    before = sum(stats.models.values())
+    body = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "Summarise the release notes"}]}
+    try:
+        async with aiohttp.ClientSession() as session:
+            async def post():
+                async with session.post(f"{server.url}/v1/chat/completions", json=body) as resp:
+                    await resp.read()
+
+            start = time.perf_counter()
+            await asyncio.gather(*(post() for _ in range(clients)))
+            elapsed = time.perf_counter() - start
+    finally:
+        await server.stop()
+    return {"upstream_calls": sum(stats.models.values()) - before, "seconds": round(elapsed, 3)}
+
+
+@benchmark(name="server_identical_requests_x50", setup=_server_setup,
+           teardown=close_orchestrator, group="metrics")
+async def bench_server_coalescing(orchestrator) -> Dict[str, Any]:
+    result = {}
+    for coalesce in (False, True):
+        burst = await _identical_burst(orchestrator, coalesce, clients=50)
+        label = "coalesced" if coalesce else "uncoalesced"
+        result.update({f"{label}_{k}": v for k, v in burst.items()})
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Memory per in-flight request
+# ---------------------------------------------------------------------------
+
+async def _memory_setup():
+    return await make_orchestrator(latency=0.2)
+
+
+@benchmark(name="memory_per_inflight_request", setup=_memory_setup,
+           teardown=close_orchestrator, group="metrics")
+async def bench_memory(orchestrator) -> Dict[str, Any]:
+    in_flight = 200
+    await orchestrator.route_request("warm up")
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tasks = [asyncio.create_task(orchestrator.route_request(f"Explain item {i}")) for i in range(in_flight)]
+    await asyncio.sleep(0.1)  # All requests are now waiting on the backend
+    current, _ = tracemalloc.get_traced_memory()
+    await asyncio.gather(*tasks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "in_flight": in_flight,
+        "bytes_per_request": (current - baseline) // in_flight,
+        "peak_bytes_per_request": (peak - baseline) // in_flight,
+    }
@@ -0,0 +1,232 @@
+"""
+Benchmark Harness
+Minimal asv-style runner: registered benchmarks are timed with automatic
+loop calibration, summarised as JSON and compared against a previous run.
+"""
+
+import gc
+import time
+import asyncio
+import platform
+import statistics
+import subprocess
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, List, Optional, Any
+
+# Each timed sample runs the benchmark enough times to last at least this long
+MIN_SAMPLE_SECONDS = 0.02
+
+
+@dataclass
+class BenchmarkResult:
+    """Timing summary for one benchmark (all times in microseconds per call)"""
+    name: str
+    samples: int
+    loops: int
+    min_us: float
+    median_us: float
+    mean_us: float
+    stdev_us: float
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def ops_per_sec(self) -> float:
+        return 1e6 / self.median_us if self.median_us else 0.0
+
+
+@dataclass
+class Benchmark:
+    """A registered benchmark"""
+    name: str
+    func: Callable
+    is_async: bool
+    setup: Optional[Callable] = None
+    teardown: Optional[Callable] = None
+    samples: int = 7
+    group: str = "default"
+
+
+_REGISTRY: List[Benchmark] = []
+
+
+def benchmark(name: Optional[str] = None, setup: Optional[Callable] = None,
+              teardown: Optional[Callable] = None, samples: int = 7, group: str = "default"):
+    """
+    Register a benchmark.
+
+    The decorated callable is timed as-is; if `setup` is given, its return
+    value is passed to the benchmark (and to `teardown` afterwards) and
+    setup time is excluded.
+    Functions returning a dict of metrics instead of being timed can be
+    registered with `group="metrics"`.
+    """
+    def decorator(func: Callable) -> Callable:
+        _REGISTRY.append(Benchmark(
+            name=name or func.__name__,
+            func=func,
+            is_async=asyncio.iscoroutinefunction(func),
+            setup=setup,
+            teardown=teardown,
+            samples=samples,
+            group=group,
+        ))
+        return func
+    return decorator
+
+
+def registered(pattern: Optional[str] = None) -> List[Benchmark]:
+    """Registered benchmarks, optionally filtered by substring"""
+    return [b for b in _REGISTRY if not pattern or pattern in b.name]
+
+
+def _summarise(name: str, timings: List[float], loops: int) -> BenchmarkResult:
+    per_call = [t / loops * 1e6 for t in timings]
+    return BenchmarkResult(
+        name=name,
+        samples=len(per_call),
+        loops=loops,
+        min_us=min(per_call),
+        median_us=statistics.median(per_call),
+        mean_us=statistics.mean(per_call),
+        stdev_us=statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+    )
+
+
+def _time_sync(bench: Benchmark) -> BenchmarkResult:
+    arg = bench.setup() if bench.setup else None
+    call = (lambda: bench.func(arg)) if bench.setup else bench.func
+
+    # Calibrate loop count so each sample is long enough to time reliably
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            call()
+        if time.perf_counter() - start >= MIN_SAMPLE_SECONDS or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(bench.samples):
+            start = time.perf_counter()
+            for _ in range(loops):
+                call()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+        if bench.teardown:
+            bench.teardown(arg)
+    return _summarise(bench.name, timings, loops)
+
+
+async def _teardown(bench: Benchmark, arg: Any) -> None:
+    if bench.teardown:
+        result = bench.teardown(arg)
+        if asyncio.iscoroutine(result):
+            await result
+
+
+async def _time_async(bench: Benchmark) -> BenchmarkResult:
+    arg = bench.setup() if bench.setup else None
+    if asyncio.iscoroutine(arg):
+        arg = await arg
+    call = (lambda: bench.func(arg)) if bench.setup else bench.func
+
+    try:
+        await call()  # Warm-up (connection setup, lazy imports)
+        timings = []
+        for _ in range(bench.samples):
+            start = time.perf_counter()
+            await call()
+            timings.append(time.perf_counter() - start)
+    finally:
+        await _teardown(bench, arg)
+    return _summarise(bench.name, timings, 1)
+
+
+async def _run_metrics(bench: Benchmark) -> BenchmarkResult:
+    arg = bench.setup() if bench.setup else None
+    if asyncio.iscoroutine(arg):
+        arg = await arg
+    try:
+        metrics = bench.func(arg) if bench.setup else bench.func()
+        if asyncio.iscoroutine(metrics):
+            metrics = await metrics
+    finally:
+        await _teardown(bench, arg)
+    return BenchmarkResult(name=bench.name, samples=1, loops=1, min_us=0.0,
+                           median_us=0.0, mean_us=0.0, stdev_us=0.0, extra=metrics)
+
+
+def run(benchmarks: List[Benchmark], progress: Callable[[str], None] = print) -> List[BenchmarkResult]:
+    """Run benchmarks sequentially in one event loop"""
+    async def _run_all() -> List[BenchmarkResult]:
+        results = []
+        for bench in benchmarks:
+            if bench.group == "metrics":
+                result = await _run_metrics(bench)
+            elif bench.is_async:
+                result = await _time_async(bench)
+            else:
+                result = _time_sync(bench)
+            progress(format_result(result))
+            results.append(result)
+        return results
+
+    return asyncio.run(_run_all())
+
+
+def format_result(result: BenchmarkResult) -> str:
+    if result.extra and not result.median_us:
+        metrics = ", ".join(f"{k}={v}" for k, v in result.extra.items())
+        return f"{result.name:<55} {metrics}"
+    return (f"{result.name:<55} median {result.median_us:>12.2f} us "
+            f"(min {result.min_us:.2f}, ±{result.stdev_us:.2f}, {result.ops_per_sec:,.0f} ops/s)")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=Path(__file__).parent).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def to_json(results: List[BenchmarkResult]) -> Dict[str, Any]:
+    """Serialise a run together with its environment"""
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {r.name: asdict(r) for r in results},
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            threshold: float = 1.10) -> List[Dict[str, Any]]:
+    """
+    Compare two runs by median time.
+
+    Returns one row per benchmark present in both runs, flagging a
+    regression when current/baseline exceeds `threshold`.
+    """
+    rows = []
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old or not old["median_us"] or not new["median_us"]:
+            continue
+        ratio = new["median_us"] / old["median_us"]
+        rows.append({
+            "name": name,
+            "baseline_us": old["median_us"],
+            "current_us": new["median_us"],
+            "ratio": ratio,
+            "regression": ratio > threshold,
+        })
+    return rows
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark Runner
+Runs the routing and parsing benchmark suites, writes JSON results and optionally
+compares them against a previous run (e.g. from another commit).
+
+Usage:
+    python benchmarks/run_benchmarks.py                        # run all, save results
+    python benchmarks/run_benchmarks.py -k select_best_model   # filter by name
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/abc1234.json
+"""
+
+import sys
+import json
+import logging
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import harness
+import bench_routing  # noqa: F401  (registers benchmarks)
+import bench_parsing  # noqa: F401
+import bench_objects  # noqa: F401
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model orchestrator benchmarks")
+    parser.add_argument("-k", "--filter", help="Only run benchmarks whose name contains this")
+    parser.add_argument("-o", "--output", help="Results file (default: results/<commit>.json)")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="Slowdown ratio reported as a regression (default: 1.10)")
+    parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+    args = parser.parse_args()
+
+    # Injected backend failures are expected; keep the report readable
+    logging.disable(logging.ERROR)
+
+    benchmarks = harness.registered(args.filter)
+    if args.list:
+        for bench in benchmarks:
+            print(bench.name)
+        return
+
+    results = harness.run(benchmarks)
+    payload = harness.to_json(results)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{payload['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(payload, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = harness.compare(baseline, payload, args.threshold)
+        print(f"\nComparison against {baseline['commit']} (threshold {args.threshold:.2f}x):")
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"  {row['name']:<55} {row['baseline_us']:>12.2f} -> {row['current_us']:>12.2f} us "
+                  f"({row['ratio']:.2f}x) {flag}")
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
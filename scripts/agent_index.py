@@ -0,0 +1,387 @@
+"""
+Agent Definition Index
+Compiles agent and subagent definitions (agent_definitions/**.yaml) into a
+single indexed snapshot so delegation and routing never parse YAML at
+runtime. Lookups by agent id or unique agent name are dictionary hits and
+scope rules are pre-compiled into one regular expression per rule list.
+"""
+
+import os
+import re
+import pickle
+import fnmatch
+import hashlib
+import logging
+import dataclasses
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Any
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+DEFAULT_AGENT_DIR = Path(__file__).resolve().parent.parent / "agent_definitions"
+DEFAULT_INDEX_PATH = Path.home() / ".cache" / "model_orchestrator" / "agent_index.snapshot"
+SCOPE_RULES = ("can_access", "can_modify", "cannot_access", "cannot_modify")
+
+
+class AgentIndexError(ValueError):
+    """Raised when an agent definition cannot be indexed."""
+
+
+@dataclass
+class ModelStrategy:
+    """One entry of model_selection.strategies"""
+    primary: str
+    fallback: Optional[str] = None
+    selection_criteria: str = ""
+
+
+@dataclass
+class AgentEntry:
+    """Runtime view of one agent or subagent definition"""
+    id: str
+    name: str
+    path: str
+    parent: Optional[str] = None
+    role: str = ""
+    description: str = ""
+    subagents: Tuple[str, ...] = ()
+    unresolved_subagents: Tuple[str, ...] = ()
+    default_provider: Optional[str] = None
+    default_model: Optional[str] = None
+    strategies: Dict[str, ModelStrategy] = field(default_factory=dict)
+    force_local_if_offline: bool = False
+    force_cloud_if_complex: bool = False
+    cost_limits: Dict[str, float] = field(default_factory=dict)
+    delegation_enabled: bool = False
+    max_delegation_depth: int = 0
+    scope: Dict[str, str] = field(default_factory=dict)  # rule -> regex source
+    _patterns: Dict[str, Optional["re.Pattern"]] = field(default_factory=dict, repr=False, compare=False)
+
+    def _scope_regex(self, rule: str) -> Optional["re.Pattern"]:
+        try:
+            return self._patterns[rule]
+        except KeyError:
+            source = self.scope.get(rule)
+            pattern = self._patterns[rule] = re.compile(source) if source else None
+            return pattern
+
+    def can_access(self, path: str) -> bool:
+        """Apply scope.can_access / cannot_access to a resource path"""
+        denied = self._scope_regex("cannot_access")
+        if denied and denied.match(path):
+            return False
+        allowed = self._scope_regex("can_access")
+        return bool(allowed and allowed.match(path))
+
+    def can_modify(self, path: str) -> bool:
+        """Apply scope.can_modify / cannot_modify (and access denials) to a resource path"""
+        for rule in ("cannot_modify", "cannot_access"):
+            denied = self._scope_regex(rule)
+            if denied and denied.match(path):
+                return False
+        allowed = self._scope_regex("can_modify")
+        return bool(allowed and allowed.match(path))
+
+
+@dataclass
+class AgentIndex:
+    """All agent entries keyed by id, plus a name -> id lookup"""
+    agents: Dict[str, AgentEntry]
+    names: Dict[str, str] = field(default_factory=dict)
+    fingerprint: str = ""
+
+    def get(self, agent: str) -> Optional[AgentEntry]:
+        """Get an agent by id ('parent/child') or by unique name"""
+        entry = self.agents.get(agent)
+        if entry is None:
+            agent_id = self.names.get(agent)
+            entry = self.agents.get(agent_id) if agent_id else None
+        return entry
+
+    def subagents_of(self, agent: str) -> List[AgentEntry]:
+        entry = self.get(agent)
+        return [self.agents[s] for s in entry.subagents] if entry else []
+
+    def can_delegate(self, parent: str, child: str) -> bool:
+        """Whether parent may hand work to child (delegation enabled and child allowed)"""
+        entry = self.get(parent)
+        target = self.get(child) if entry else None
+        return bool(entry and target and entry.delegation_enabled and target.id in entry.subagents)
+
+
+def schema_hash() -> str:
+    """Hash of the AgentEntry layout; snapshots from other layouts are discarded."""
+    layout = ",".join(f"{f.name}:{f.type}"
+                      for cls in (AgentEntry, ModelStrategy) for f in dataclasses.fields(cls))
+    return hashlib.sha256(f"v{INDEX_VERSION}|{layout}".encode()).hexdigest()[:16]
+
+
+def compile_scope_patterns(patterns: List[str]) -> str:
+    """
+    Compile scope entries into one anchored regex.
+
+    '/src' matches '/src' and everything below it; glob characters are
+    honoured ('/src/**/*.py').
+    """
+    parts = []
+    for pattern in patterns:
+        if not isinstance(pattern, str) or not pattern:
+            continue
+        pattern = pattern.rstrip("/") or "/"
+        if any(c in pattern for c in "*?["):
+            parts.append(fnmatch.translate(pattern).replace(r"\Z", "").rstrip("$").replace("(?s:", "(?:"))
+        else:
+            parts.append(re.escape(pattern) + r"(?:/.*)?")
+    return "(?s:" + "|".join(f"(?:{p})" for p in parts) + r")\Z" if parts else ""
+
+
+def list_agent_files(agent_dir: Path) -> List[Path]:
+    """All YAML definition files below agent_dir in a stable order"""
+    if not agent_dir.is_dir():
+        return []
+    return sorted(p for p in agent_dir.rglob("*") if p.suffix in (".yaml", ".yml") and p.is_file())
+
+
+def source_fingerprint(agent_dir: Path) -> str:
+    """Fingerprint sources by relative path, size and mtime (stat only, no parsing)"""
+    digest = hashlib.sha256()
+    for path in list_agent_files(agent_dir):
+        stat = path.stat()
+        digest.update(f"{path.relative_to(agent_dir)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+
+def _parent_file(path: Path) -> Optional[Path]:
+    """Definition file of the agent owning a file in a 'subagents' directory"""
+    for ancestor in path.parents:
+        if ancestor.name == "subagents":
+            owner_dir = ancestor.parent
+            candidates = sorted(p for p in owner_dir.iterdir() if p.suffix in (".yaml", ".yml"))
+            preferred = [p for p in candidates if p.stem == owner_dir.name]
+            return (preferred or candidates or [None])[0]
+    return None
+
+
+def _sections(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Top-level sections; tolerate files that nest them under 'agent:'"""
+    if "model_selection" not in data and isinstance(data.get("agent"), dict):
+        return {**data["agent"], **{k: v for k, v in data.items() if k != "agent"}}
+    return data
+
+
+def _mapping(container: Dict[str, Any], key: str, where: str) -> Dict[str, Any]:
+    """A section that must be a mapping when present"""
+    value = container.get(key) or {}
+    if not isinstance(value, dict):
+        raise AgentIndexError(f"{where} must be a mapping")
+    return value
+
+
+def _float_map(values: Any) -> Dict[str, float]:
+    if not isinstance(values, dict):
+        return {}
+    return {k: float(v) for k, v in values.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+
+
+def _build_entry(path: Path, agent_dir: Path, data: Dict[str, Any]) -> AgentEntry:
+    identity = _mapping(_mapping(data, "agent", "agent"), "identity", "agent.identity")
+    name = identity.get("name")
+    if not isinstance(name, str) or not name:
+        raise AgentIndexError("agent.identity.name must be a string")
+
+    sections = _sections(data)
+    selection = _mapping(sections, "model_selection", "model_selection")
+    strategies = {}
+    for task, strategy in _mapping(selection, "strategies", "model_selection.strategies").items():
+        if isinstance(strategy, dict) and isinstance(strategy.get("primary"), str):
+            fallback = strategy.get("fallback")
+            strategies[task] = ModelStrategy(
+                primary=strategy["primary"],
+                fallback=fallback if isinstance(fallback, str) else None,
+                selection_criteria=str(strategy.get("selection_criteria", "")),
+            )
+    overrides = _mapping(selection, "overrides", "model_selection.overrides")
+    delegation = _mapping(sections, "delegation", "delegation")
+    max_depth = delegation.get("max_depth", 0) or 0
+    if not isinstance(max_depth, int) or isinstance(max_depth, bool) or max_depth < 0:
+        raise AgentIndexError("delegation.max_depth must be a non-negative integer")
+    scope = _mapping(sections, "scope", "scope")
+    for rule in SCOPE_RULES:
+        if not isinstance(scope.get(rule) or [], list):
+            raise AgentIndexError(f"scope.{rule} must be a list")
+
+    return AgentEntry(
+        id=name,
+        name=name,
+        path=str(path.relative_to(agent_dir)),
+        role=identity.get("role", ""),
+        description=identity.get("description", ""),
+        default_provider=selection.get("default_provider"),
+        default_model=selection.get("default_model"),
+        strategies=strategies,
+        force_local_if_offline=bool(overrides.get("force_local_if_offline", False)),
+        force_cloud_if_complex=bool(overrides.get("force_cloud_if_complex", False)),
+        cost_limits=_float_map(_mapping(sections, "estimation", "estimation").get("cost_limits")),
+        delegation_enabled=bool(delegation.get("enabled", False)),
+        max_delegation_depth=max_depth,
+        scope={rule: compile_scope_patterns(scope.get(rule) or []) for rule in SCOPE_RULES},
+    )
+
+
+def compile_agents(agent_dir: Path = DEFAULT_AGENT_DIR) -> AgentIndex:
+    """Parse all agent definitions and link agents to their subagents"""
+    agent_dir = Path(agent_dir).resolve()
+    index = AgentIndex(agents={}, fingerprint=source_fingerprint(agent_dir))
+
+    by_file: Dict[Path, AgentEntry] = {}
+    raw: Dict[Path, Dict[str, Any]] = {}
+    for path in list_agent_files(agent_dir):
+        try:
+            with open(path, "rb") as f:
+                data = yaml.load(f, Loader=SafeLoader)
+            if not isinstance(data, dict):
+                raise AgentIndexError("not a mapping")
+            by_file[path] = _build_entry(path, agent_dir, data)
+            raw[path] = _sections(data)
+        except (yaml.YAMLError, AgentIndexError) as e:
+            logger.warning(f"Skipping agent definition {path.relative_to(agent_dir)}: {e}")
+
+    # Qualify subagent ids with their parent
+    for path, entry in by_file.items():
+        parent_path = _parent_file(path)
+        parent = by_file.get(parent_path) if parent_path else None
+        if parent is not None and parent is not entry:
+            entry.parent = parent.name
+            entry.id = f"{parent.name}/{entry.name}"
+
+    for entry in by_file.values():
+        if entry.id in index.agents:
+            raise AgentIndexError(f"Duplicate agent id '{entry.id}' ({entry.path})")
+        index.agents[entry.id] = entry
+
+    # Resolve delegation.allowed_subagents to agent ids
+    for path, entry in by_file.items():
+        delegation = raw[path].get("delegation") or {}
+        children = {e.name: e.id for e in by_file.values() if e.parent == entry.name}
+        resolved, unresolved = [], []
+        for ref in delegation.get("allowed_subagents") or []:
+            if not isinstance(ref, dict):
+                continue
+            target = None
+            if isinstance(ref.get("file"), str):
+                target = by_file.get((path.parent / ref["file"]).resolve())
+            target_id = target.id if target else children.get(ref.get("name"))
+            if target_id:
+                if target_id not in resolved:
+                    resolved.append(target_id)
+            elif ref.get("name"):
+                unresolved.append(str(ref["name"]))
+        entry.subagents = tuple(resolved)
+        entry.unresolved_subagents = tuple(unresolved)
+
+    counts: Dict[str, int] = {}
+    for entry in index.agents.values():
+        counts[entry.name] = counts.get(entry.name, 0) + 1
+    index.names = {e.name: e.id for e in index.agents.values() if counts[e.name] == 1 and e.name != e.id}
+    return index
+
+
+def _entry_row(entry: AgentEntry) -> Dict[str, Any]:
+    row = {f.name: getattr(entry, f.name) for f in dataclasses.fields(AgentEntry) if not f.name.startswith("_")}
+    row["strategies"] = {k: dataclasses.astuple(v) for k, v in entry.strategies.items()}
+    return row
+
+
+def write_index(index: AgentIndex, path: Path = DEFAULT_INDEX_PATH) -> None:
+    """Atomically write the compiled index as plain data (no class pickling)"""
+    path = Path(path)
+    payload = {
+        "schema": schema_hash(),
+        "fingerprint": index.fingerprint,
+        "agents": [_entry_row(e) for e in index.agents.values()],
+        "names": index.names,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def read_index(path: Path, fingerprint: Optional[str] = None) -> Optional[AgentIndex]:
+    """Load a compiled index; returns None if missing, stale or from another schema"""
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if not isinstance(payload, dict) or payload.get("schema") != schema_hash():
+        return None
+    if fingerprint is not None and payload.get("fingerprint") != fingerprint:
+        return None
+
+    agents = {}
+    for row in payload["agents"]:
+        row["strategies"] = {k: ModelStrategy(*v) for k, v in row["strategies"].items()}
+        entry = AgentEntry(**row)
+        agents[entry.id] = entry
+    return AgentIndex(agents=agents, names=payload["names"], fingerprint=payload["fingerprint"])
+
+
+_loaded: Dict[Tuple[str, str], AgentIndex] = {}
+
+
+def load_agent_index(agent_dir: Optional[Path] = None,
+                     index_path: Optional[Path] = None) -> AgentIndex:
+    """
+    Load the agent index from the compiled snapshot, recompiling only when
+    a definition file changed. Repeated calls in one process are served
+    from memory while the sources are unchanged.
+    """
+    agent_dir = Path(agent_dir).resolve() if agent_dir else DEFAULT_AGENT_DIR
+    index_path = Path(index_path) if index_path else DEFAULT_INDEX_PATH
+
+    fingerprint = source_fingerprint(agent_dir)
+    key = (str(agent_dir), str(index_path))
+    index = _loaded.get(key)
+    if index is not None and index.fingerprint == fingerprint:
+        return index
+
+    index = read_index(index_path, fingerprint)
+    if index is None:
+        logger.info(f"Compiling agent index from {agent_dir}")
+        index = compile_agents(agent_dir)
+        try:
+            write_index(index, index_path)
+        except OSError as e:
+            logger.warning(f"Could not write agent index to {index_path}: {e}")
+    _loaded[key] = index
+    return index
+
+
+def main():
+    """CLI: compile agent definitions into an index snapshot"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile agent definitions into an index snapshot")
+    parser.add_argument("--source", default=str(DEFAULT_AGENT_DIR), help="Agent definitions directory")
+    parser.add_argument("--output", default=str(DEFAULT_INDEX_PATH), help="Index path")
+    args = parser.parse_args()
+
+    index = compile_agents(Path(args.source))
+    write_index(index, Path(args.output))
+    unresolved = sum(len(e.unresolved_subagents) for e in index.agents.values())
+    print(f"Indexed {len(index.agents)} agents ({unresolved} unresolved subagent references) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,68 +8,226 @@ import os
 import json
 import time
 import asyncio
-from typing import Dict, List, Optional, Any, Union, AsyncIterator
+from typing import Dict, List, Optional, Any, Union, AsyncIterator, Tuple, Callable
 import aiohttp
 import requests
-from tenacity import retry, stop_after_attempt, wait_exponential
 import logging
 
 from .types import APIResponse
+from .retry import APIError, Attempt, RetryPolicy, call_with_retry, retry_after_from_headers
+from .deadline import current as current_deadline
+from .vision import ImagePreparer, StreamedJSON, attach_image
+from . import wire
+from . import tracing
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
 class BaseAPIClient:
     """Base class for all API clients"""
+    streaming = False  # chat_completion(stream=True) returns an async iterator of text chunks
     
     def __init__(self, api_key: str, base_url: str):
         self.api_key = api_key
         self.base_url = base_url
         self.session = None
+        # Whole parsed responses are only kept on APIResponse.raw_response when asked for
+        self.keep_raw_response = os.getenv("ORCHESTRATOR_RAW_RESPONSES", "").lower() in ("1", "true", "yes")
+        self.retry_policy = RetryPolicy()
         
+    def _new_session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(trace_configs=tracing.aiohttp_trace_configs())
+
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        self.session = self._new_session()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     async def _make_request(self, 
                            method: str, 
                            endpoint: str, 
                            headers: Dict, 
-                           payload: Dict) -> Dict:
-        """Make API request with retry logic"""
+                           payload: Union[Dict, StreamedJSON]) -> Tuple[bytes, int]:
+        """Make API request, retrying per `retry_policy`; returns the raw body and latency"""
         if not self.session:
-            self.session = aiohttp.ClientSession()
-            
-        url = f"{self.base_url}/{endpoint}"
-        start_time = time.time()
-        
+            self.session = self._new_session()
         try:
-            async with self.session.request(method, url, headers=headers, json=payload) as response:
-                latency_ms = int((time.time() - start_time) * 1000)
-                
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"API Error {response.status}: {error_text}")
-                
-                data = await response.json()
-                return data, latency_ms
-                
+            return await call_with_retry(lambda: self._request_once(method, endpoint, headers, payload),
+                                         self.retry_policy, on_attempt=self._report_attempt(tracing.current_span()))
         except Exception as e:
             logger.error(f"Request failed: {e}")
             raise
 
+    async def _request_once(self,
+                            method: str,
+                            endpoint: str,
+                            headers: Dict,
+                            payload: Union[Dict, StreamedJSON]) -> Tuple[bytes, int]:
+        """One attempt of a request"""
+        url = f"{self.base_url}/{endpoint}"
+        start_time = time.time()
+        client = type(self).__name__
+        status = "error"
+        try:
+            if isinstance(payload, StreamedJSON):
+                # A fresh chunk stream per attempt, so retries resend the whole body
+                body = {"data": payload.chunks(), "headers": {**headers, "Content-Length": str(payload.size)}}
+            else:
+                body = {"data": wire.dumps(payload), "headers": {"Content-Type": "application/json", **headers}}
+            # Without the query string: some providers (Gemini) take the API key there
+            with tracing.span("http.request", {"http.method": method, "http.url": url.split("?", 1)[0]}) as span:
+                async with self.session.request(method, url, **body, **self._timeout()) as response:
+                    latency_ms = int((time.time() - start_time) * 1000)
+                    status = str(response.status)
+                    span.set_attributes({"http.status_code": response.status, "http.ttfb_ms": latency_ms})
+
+                    if response.status != 200:
+                        raise await self._api_error(response)
+
+                    return await response.read(), latency_ms
+        finally:
+            metrics.HTTP_REQUESTS.inc(client=client, status=status)
+            metrics.HTTP_LATENCY.observe(time.time() - start_time, client=client)
+
+    @staticmethod
+    def _timeout() -> Dict[str, aiohttp.ClientTimeout]:
+        """Per-attempt aiohttp timeout: whatever is left of the request's deadline"""
+        bound = current_deadline()
+        if bound is None:
+            return {}
+        if bound.expired:
+            raise bound.exceeded()
+        return {"timeout": aiohttp.ClientTimeout(total=bound.remaining)}
+
+    @staticmethod
+    async def _api_error(response: aiohttp.ClientResponse) -> APIError:
+        """Error for a non-200 response, with any wait the provider asked for"""
+        return APIError(response.status, await response.text(),
+                        retry_after_from_headers(response.headers, rate_limited=response.status == 429))
+
+    def _report_attempt(self, span) -> Callable[[Attempt], None]:
+        """Record each attempt on the call's span and count retries"""
+        client = type(self).__name__
+
+        def report(attempt: Attempt):
+            span.set_attribute("retry.count", span.attributes.get("retry.count", -1) + 1)
+            if attempt.error is not None:
+                span.add_event("attempt_failed", attempt=attempt.number, error=attempt.error,
+                               retry_in_s=round(attempt.delay_s, 3))
+                if attempt.delay_s:
+                    metrics.HTTP_RETRIES.inc(client=client, status=str(attempt.status or "error"))
+        return report
+
+    async def stream_completion(self,
+                                model: str,
+                                messages: List[Dict[str, str]],
+                                temperature: float = 0.7,
+                                max_tokens: Optional[int] = None,
+                                **kwargs) -> AsyncIterator[str]:
+        """Yield the reply as it is generated (a single chunk for providers without streaming)"""
+        if not self.streaming:
+            response = await self.chat_completion(model=model, messages=messages, temperature=temperature,
+                                                  max_tokens=max_tokens, **kwargs)
+            yield response.content
+            return
+        stream = await self.chat_completion(model=model, messages=messages, temperature=temperature,
+                                            max_tokens=max_tokens, stream=True, **kwargs)
+        async for chunk in stream:
+            yield chunk
+
+    async def _stream_sse(self,
+                          endpoint: str,
+                          headers: Dict,
+                          payload: Dict,
+                          fmt: str) -> AsyncIterator[str]:
+        """POST a streaming request and yield the text of each SSE event (`fmt` is a wire format)"""
+        if not self.session:
+            self.session = self._new_session()
+
+        # Not entered as a context manager: the span must not leak into the consumer between yields
+        span = tracing.span("http.stream", {"http.method": "POST", "model": payload.get("model")})
+        client = type(self).__name__
+        status = "error"
+        start_time = time.time()
+        first_token = True
+        error = None
+        decode = wire.delta_decoder(fmt)
+        framer = wire.SSEFramer()
+        try:
+            response = await call_with_retry(lambda: self._open_stream(endpoint, headers, payload),
+                                             self.retry_policy, on_attempt=self._report_attempt(span))
+            async with response:
+                status = str(response.status)
+                span.set_attribute("http.status_code", response.status)
+                async for data in framer.events(response.content.iter_any()):
+                    if data == b"[DONE]":
+                        continue
+                    try:
+                        text = decode(data)
+                    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                        continue
+                    if text:
+                        if first_token:
+                            first_token = False
+                            span.set_attribute("ttft_ms", int((time.time() - start_time) * 1000))
+                            span.add_event("first_token")
+                        yield text
+        except GeneratorExit:
+            span.set_attribute("stream.closed_early", True)
+            raise
+        except BaseException as e:
+            error = e
+            if isinstance(e, APIError):
+                status = str(e.status)
+            raise
+        finally:
+            span.end(error)
+            metrics.HTTP_REQUESTS.inc(client=client, status=status)
+            metrics.HTTP_LATENCY.observe(time.time() - start_time, client=client)
+
+    async def _open_stream(self, endpoint: str, headers: Dict, payload: Dict) -> aiohttp.ClientResponse:
+        """One attempt at starting a streaming response"""
+        response = await self.session.post(f"{self.base_url}/{endpoint}", data=wire.dumps(payload),
+                                           headers={"Content-Type": "application/json", **headers},
+                                           **self._timeout())
+        if response.status != 200:
+            error = await self._api_error(response)
+            response.release()
+            raise error
+        return response
+
+    def _completion(self, body: bytes, fmt: str, model: str, provider: str, latency_ms: int) -> APIResponse:
+        """APIResponse from a completion body in the given wire format"""
+        completion, raw = wire.decode_completion(body, fmt, keep_raw=self.keep_raw_response)
+        return APIResponse(
+            content=completion.content,
+            model=model,
+            provider=provider,
+            usage={'input_tokens': completion.input_tokens, 'output_tokens': completion.output_tokens},
+            latency_ms=latency_ms,
+            raw_response=raw
+        )
+
+
 class GrokAPIClient(BaseAPIClient):
-    """xAI Grok API client with all models support"""
+    """xAI Grok API client: chat, vision, image generation and streaming"""
+    streaming = True
     
     def __init__(self, api_key: Optional[str] = None):
         api_key = api_key or os.getenv('XAI_API_KEY')
         if not api_key:
             raise ValueError("XAI_API_KEY not found")
         super().__init__(api_key, "https://api.x.ai/v1")
+        self.images = ImagePreparer()
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
         
     async def chat_completion(self, 
                              model: str,
@@ -80,10 +238,7 @@ class GrokAPIClient(BaseAPIClient):
                              **kwargs) -> APIResponse:
         """Send chat completion request to Grok"""
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        headers = self._headers()
         
         payload = {
             "model": model,
@@ -99,44 +254,55 @@ class GrokAPIClient(BaseAPIClient):
         if stream:
             return self._stream_completion(headers, payload)
         
-        data, latency_ms = await self._make_request("POST", "chat/completions", headers, payload)
-        
-        return APIResponse(
-            content=data['choices'][0]['message']['content'],
-            model=model,
-            provider="xai",
-            usage={
-                'input_tokens': data['usage']['prompt_tokens'],
-                'output_tokens': data['usage']['completion_tokens']
-            },
-            latency_ms=latency_ms,
-            raw_response=data
-        )
+        body, latency_ms = await self._make_request("POST", "chat/completions", headers, payload)
+        return self._completion(body, "openai", model, "xai", latency_ms)
+
+    async def vision_completion(self,
+                                model: str,
+                                messages: List[Dict[str, Any]],
+                                image_path: Optional[str] = None,
+                                temperature: float = 0.7,
+                                max_tokens: Optional[int] = None,
+                                **kwargs) -> APIResponse:
+        """
+        Chat completion with an image attached to the last user message.
+
+        The image is hashed and downsized in a worker thread, then base64
+        encoded from the mapped file while the request body is sent.
+        """
+        if not image_path:
+            return await self.chat_completion(model, messages, temperature, max_tokens, **kwargs)
+        image = await asyncio.to_thread(self.images.prepare, image_path)
+        payload = {
+            "model": model,
+            "messages": attach_image(messages, image.url_template),
+            "temperature": temperature,
+            **kwargs
+        }
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        body = StreamedJSON(payload, [image])
+        response, latency_ms = await self._make_request("POST", "chat/completions", self._headers(), body)
+        return self._completion(response, "openai", model, "xai", latency_ms)
+
+    async def image_generation(self,
+                               prompt: str,
+                               model: str = "grok-2-image-1212",
+                               **kwargs) -> Dict[str, Any]:
+        """Generate images; returns the raw response ({"data": [{"url": ...}, ...]})"""
+        payload = {"model": model, "prompt": prompt, **kwargs}
+        body, _ = await self._make_request("POST", "images/generations", self._headers(), payload)
+        return wire.loads(body)
     
-    async def _stream_completion(self, headers: Dict, payload: Dict) -> AsyncIterator[str]:
+    def _stream_completion(self, headers: Dict, payload: Dict) -> AsyncIterator[str]:
         """Stream completion responses"""
         payload['stream'] = True
-        
-        async with self.session.post(
-            f"{self.base_url}/chat/completions",
-            headers=headers,
-            json=payload
-        ) as response:
-            async for line in response.content:
-                if line:
-                    line = line.decode('utf-8').strip()
-                    if line.startswith("data: ") and line != "data: [DONE]":
-                        try:
-                            chunk = json.loads(line[6:])
-                            if 'choices' in chunk and chunk['choices']:
-                                delta = chunk['choices'][0].get('delta', {})
-                                if 'content' in delta:
-                                    yield delta['content']
-                        except json.JSONDecodeError:
-                            continue
+        return self._stream_sse("chat/completions", headers, payload, "openai")
+
 
 class OpenAIAPIClient(BaseAPIClient):
     """OpenAI API client"""
+    streaming = True
     
     def __init__(self, api_key: Optional[str] = None):
         api_key = api_key or os.getenv('OPENAI_API_KEY')
@@ -168,22 +334,16 @@ class OpenAIAPIClient(BaseAPIClient):
         if max_tokens:
             payload["max_tokens"] = max_tokens
             
-        data, latency_ms = await self._make_request("POST", "chat/completions", headers, payload)
+        if stream:
+            payload["stream"] = True
+            return self._stream_sse("chat/completions", headers, payload, "openai")
         
-        return APIResponse(
-            content=data['choices'][0]['message']['content'],
-            model=model,
-            provider="openai",
-            usage={
-                'input_tokens': data['usage']['prompt_tokens'],
-                'output_tokens': data['usage']['completion_tokens']
-            },
-            latency_ms=latency_ms,
-            raw_response=data
-        )
+        body, latency_ms = await self._make_request("POST", "chat/completions", headers, payload)
+        return self._completion(body, "openai", model, "openai", latency_ms)
 
 class GoogleAPIClient(BaseAPIClient):
     """Google Gemini API client"""
+    streaming = True
     
     def __init__(self, api_key: Optional[str] = None):
         api_key = api_key or os.getenv('GOOGLE_API_KEY')
@@ -196,6 +356,7 @@ class GoogleAPIClient(BaseAPIClient):
                              messages: List[Dict[str, str]],
                              temperature: float = 0.7,
                              max_tokens: Optional[int] = None,
+                             stream: bool = False,
                              **kwargs) -> APIResponse:
         """Send chat completion request to Google Gemini"""
         
@@ -222,23 +383,17 @@ class GoogleAPIClient(BaseAPIClient):
         if max_tokens:
             payload["generationConfig"]["maxOutputTokens"] = max_tokens
             
-        endpoint = f"models/{model}:generateContent?key={self.api_key}"
-        data, latency_ms = await self._make_request("POST", endpoint, headers, payload)
+        if stream:
+            endpoint = f"models/{model}:streamGenerateContent?alt=sse&key={self.api_key}"
+            return self._stream_sse(endpoint, headers, payload, "gemini")
         
-        return APIResponse(
-            content=data['candidates'][0]['content']['parts'][0]['text'],
-            model=model,
-            provider="google",
-            usage={
-                'input_tokens': data['usageMetadata']['promptTokenCount'],
-                'output_tokens': data['usageMetadata']['candidatesTokenCount']
-            },
-            latency_ms=latency_ms,
-            raw_response=data
-        )
+        endpoint = f"models/{model}:generateContent?key={self.api_key}"
+        body, latency_ms = await self._make_request("POST", endpoint, headers, payload)
+        return self._completion(body, "gemini", model, "google", latency_ms)
 
 class AnthropicAPIClient(BaseAPIClient):
     """Anthropic Claude API client (via DIAL or direct)"""
+    streaming = True
     
     def __init__(self, api_key: Optional[str] = None, use_dial: bool = False):
         if use_dial:
@@ -260,6 +415,7 @@ class AnthropicAPIClient(BaseAPIClient):
                              messages: List[Dict[str, str]],
                              temperature: float = 0.7,
                              max_tokens: Optional[int] = None,
+                             stream: bool = False,
                              **kwargs) -> APIResponse:
         """Send chat completion request to Anthropic/DIAL"""
         
@@ -280,19 +436,12 @@ class AnthropicAPIClient(BaseAPIClient):
             if max_tokens:
                 payload["max_tokens"] = max_tokens
                 
-            data, latency_ms = await self._make_request("POST", "chat/completions", headers, payload)
+            if stream:
+                payload["stream"] = True
+                return self._stream_sse("chat/completions", headers, payload, "openai")
             
-            return APIResponse(
-                content=data['choices'][0]['message']['content'],
-                model=model,
-                provider="dial",
-                usage={
-                    'input_tokens': data['usage']['prompt_tokens'],
-                    'output_tokens': data['usage']['completion_tokens']
-                },
-                latency_ms=latency_ms,
-                raw_response=data
-            )
+            body, latency_ms = await self._make_request("POST", "chat/completions", headers, payload)
+            return self._completion(body, "openai", model, "dial", latency_ms)
         else:
             # Direct Anthropic API
             headers = {
@@ -325,22 +474,16 @@ class AnthropicAPIClient(BaseAPIClient):
             if system_msg:
                 payload["system"] = system_msg
                 
-            data, latency_ms = await self._make_request("POST", "messages", headers, payload)
+            if stream:
+                payload["stream"] = True
+                return self._stream_sse("messages", headers, payload, "anthropic")
             
-            return APIResponse(
-                content=data['content'][0]['text'],
-                model=model,
-                provider="anthropic",
-                usage={
-                    'input_tokens': data['usage']['input_tokens'],
-                    'output_tokens': data['usage']['output_tokens']
-                },
-                latency_ms=latency_ms,
-                raw_response=data
-            )
+            body, latency_ms = await self._make_request("POST", "messages", headers, payload)
+            return self._completion(body, "anthropic", model, "anthropic", latency_ms)
 
 class AzureOpenAIClient(BaseAPIClient):
     """Azure OpenAI Service API client"""
+    streaming = True
     
     def __init__(self, api_key: Optional[str] = None, endpoint: Optional[str] = None):
         api_key = api_key or os.getenv('AZURE_OPENAI_API_KEY')
@@ -354,6 +497,7 @@ class AzureOpenAIClient(BaseAPIClient):
                              messages: List[Dict[str, str]],
                              temperature: float = 0.7,
                              max_tokens: Optional[int] = None,
+                             stream: bool = False,
                              **kwargs) -> APIResponse:
         """Send chat completion request to Azure OpenAI"""
         
@@ -373,19 +517,11 @@ class AzureOpenAIClient(BaseAPIClient):
             
         # Azure OpenAI uses deployment names in the endpoint
         endpoint = f"openai/deployments/{model}/chat/completions?api-version=2024-02-15-preview"
-        data, latency_ms = await self._make_request("POST", endpoint, headers, payload)
-        
-        return APIResponse(
-            content=data['choices'][0]['message']['content'],
-            model=model,
-            provider="azure",
-            usage={
-                'input_tokens': data['usage']['prompt_tokens'],
-                'output_tokens': data['usage']['completion_tokens']
-            },
-            latency_ms=latency_ms,
-            raw_response=data
-        )
+        if stream:
+            payload["stream"] = True
+            return self._stream_sse(endpoint, headers, payload, "openai")
+        body, latency_ms = await self._make_request("POST", endpoint, headers, payload)
+        return self._completion(body, "openai", model, "azure", latency_ms)
 
 class BedrockAPIClient(BaseAPIClient):
     """Amazon Bedrock API client"""
@@ -445,6 +581,7 @@ class BedrockAPIClient(BaseAPIClient):
 
 class LocalModelClient(BaseAPIClient):
     """Local model client (Ollama/vLLM compatible)"""
+    streaming = True
     
     def __init__(self, base_url: Optional[str] = None):
         base_url = base_url or os.getenv('CUSTOM_API_URL', 'http://localhost:11434/v1')
@@ -456,6 +593,7 @@ class LocalModelClient(BaseAPIClient):
                              messages: List[Dict[str, str]],
                              temperature: float = 0.7,
                              max_tokens: Optional[int] = None,
+                             stream: bool = False,
                              **kwargs) -> APIResponse:
         """Send chat completion request to local model"""
         
@@ -471,20 +609,13 @@ class LocalModelClient(BaseAPIClient):
         if max_tokens:
             payload["max_tokens"] = max_tokens
             
+        if stream:
+            payload["stream"] = True
+            return self._stream_sse("chat/completions", headers, payload, "openai")
+        
         try:
-            data, latency_ms = await self._make_request("POST", "chat/completions", headers, payload)
-            
-            return APIResponse(
-                content=data['choices'][0]['message']['content'],
-                model=model,
-                provider="local",
-                usage={
-                    'input_tokens': data.get('usage', {}).get('prompt_tokens', 0),
-                    'output_tokens': data.get('usage', {}).get('completion_tokens', 0)
-                },
-                latency_ms=latency_ms,
-                raw_response=data
-            )
+            body, latency_ms = await self._make_request("POST", "chat/completions", headers, payload)
+            return self._completion(body, "openai", model, "local", latency_ms)
         except Exception as e:
             # Fallback for Ollama format
             try:
@@ -494,17 +625,11 @@ class LocalModelClient(BaseAPIClient):
                     "temperature": temperature,
                 }
                 
-                async with self.session.post(f"{self.base_url}/api/generate", json=ollama_payload) as response:
-                    data = await response.json()
+                async with self.session.post(f"{self.base_url}/api/generate", json=ollama_payload,
+                                             **self._timeout()) as response:
+                    body = await response.read()
                     
-                return APIResponse(
-                    content=data['response'],
-                    model=model,
-                    provider="local",
-                    usage={'input_tokens': 0, 'output_tokens': 0},
-                    latency_ms=0,
-                    raw_response=data
-                )
+                return self._completion(body, "ollama", model, "local", 0)
             except:
                 raise e
 
@@ -519,6 +644,7 @@ def get_api_client(provider: str, **kwargs) -> BaseAPIClient:
         'anthropic': AnthropicAPIClient,
         'dial': lambda: AnthropicAPIClient(use_dial=True),
         'local': LocalModelClient,
+        'ollama': LocalModelClient,
     }
     
     if provider not in clients:
@@ -0,0 +1,273 @@
+"""
+Cascade Routing
+Cheap-model-first routing. The first rung of a model ladder answers, a
+verifier (Sheriff AST check, a test command or a judge model) scores the
+answer, and the request climbs the ladder only when verification fails.
+Acceptance rates per (task type, model) are persisted so rungs that rarely
+pass for a task type are skipped, with an occasional probe to keep the
+statistics current.
+"""
+
+import os
+import re
+import sys
+import json
+import asyncio
+import logging
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from .types import APIResponse, TaskType
+from .sheriff import Rule, Sheriff, SheriffConfig
+from .mason import extract_code
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATS_PATH = Path.home() / ".cache" / "model_orchestrator" / "cascade_stats.json"
+
+_CODE_LADDER = ["deepseek-coder:1.3b", "gemini-2.5-flash", "claude-3-5-sonnet", "o1-pro"]
+
+# Cheapest first; rungs missing from the registry (e.g. uninstalled local models) are skipped
+DEFAULT_LADDERS: Dict[TaskType, List[str]] = {
+    TaskType.CODE_GENERATION: _CODE_LADDER,
+    TaskType.DEBUGGING: _CODE_LADDER,
+    TaskType.TESTING: _CODE_LADDER,
+    TaskType.REASONING: ["gemini-2.5-flash", "claude-3-5-sonnet", "o1-pro"],
+    TaskType.ARCHITECTURAL_DESIGN: ["gemini-2.5-flash", "claude-3-5-sonnet", "o1-pro"],
+    TaskType.DATA_ANALYSIS: ["gemini-2.5-flash", "claude-3-5-sonnet"],
+    TaskType.DOCUMENTATION: ["gemini-2.5-flash", "claude-3-5-sonnet"],
+    TaskType.GENERAL: ["gemini-2.5-flash", "claude-3-5-sonnet"],
+}
+
+_SCORE = re.compile(r"SCORE:\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+@dataclass
+class Verdict:
+    """Verifier outcome for one answer"""
+    passed: bool
+    score: float  # 0-1
+    feedback: str = ""
+    verifier: str = ""
+
+
+@dataclass
+class CascadeAttempt:
+    """One rung tried"""
+    model_id: str
+    verdict: Optional[Verdict] = None
+    cost: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class CascadeResult:
+    """Answer of a cascade and the rungs it took"""
+    response: APIResponse
+    model_id: str
+    accepted: bool
+    attempts: List[CascadeAttempt] = field(default_factory=list)
+
+    @property
+    def cost(self) -> float:
+        return sum(a.cost for a in self.attempts)
+
+
+class Verifier(ABC):
+    """Base class: scores a model answer for the prompt it was given"""
+    name = "verifier"
+
+    @abstractmethod
+    async def verify(self, prompt: str, response: APIResponse) -> Verdict:
+        """Verdict on `response`; errors are recorded by the cascade as a failed verdict"""
+
+
+class SheriffVerifier(Verifier):
+    """Parses the answer's code and runs Sheriff rules over it (syntax only by default)"""
+    name = "sheriff"
+
+    def __init__(self, config: Optional[SheriffConfig] = None, rules: Sequence[Type[Rule]] = ()):
+        self.sheriff = Sheriff(config or SheriffConfig(generated_module=""), rules)
+
+    async def verify(self, prompt: str, response: APIResponse) -> Verdict:
+        result = self.sheriff.check_source(extract_code(response.content), "answer.py")
+        return Verdict(result.passed, 1.0 if result.passed else max(0.0, 1 - 0.25 * len(result.violations)),
+                       result.feedback(), self.name)
+
+
+class TestVerifier(Verifier):
+    """
+    Writes the answer's code to a scratch directory and runs a test command there.
+
+    "{file}" in the command is replaced by the code file's path. Passes on exit status 0.
+    """
+    name = "tests"
+
+    def __init__(self, command: Sequence[str], filename: str = "solution.py",
+                 support_files: Optional[Dict[str, str]] = None, timeout: float = 60.0):
+        self.command = list(command)
+        self.filename = filename
+        self.support_files = support_files or {}
+        self.timeout = timeout
+
+    async def verify(self, prompt: str, response: APIResponse) -> Verdict:
+        with tempfile.TemporaryDirectory(prefix="cascade-") as tmp:
+            target = Path(tmp) / self.filename
+            target.write_text(extract_code(response.content))
+            for name, text in self.support_files.items():
+                (Path(tmp) / name).write_text(text)
+            argv = [arg.replace("{file}", str(target)) for arg in self.command]
+            proc = await asyncio.create_subprocess_exec(
+                *argv, cwd=tmp, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+            try:
+                output, _ = await asyncio.wait_for(proc.communicate(), self.timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                return Verdict(False, 0.0, f"Tests timed out after {self.timeout:.0f}s", self.name)
+        passed = proc.returncode == 0
+        tail = output.decode("utf-8", errors="replace")[-2000:]
+        return Verdict(passed, 1.0 if passed else 0.0, "" if passed else tail, self.name)
+
+
+class JudgeVerifier(Verifier):
+    """Asks a judge model to grade the answer 0-10"""
+    name = "judge"
+
+    PROMPT = ("Grade the answer below for correctness and completeness on a 0-10 scale.\n"
+              "Reply with 'SCORE: <n>' on the first line, then one line of justification.\n\n"
+              "## Task\n{prompt}\n\n## Answer\n{answer}\n")
+
+    def __init__(self, orchestrator, model_id: str, threshold: float = 0.7):
+        self.orchestrator = orchestrator
+        self.model_id = model_id
+        self.threshold = threshold
+
+    async def verify(self, prompt: str, response: APIResponse) -> Verdict:
+        judged = await self.orchestrator.route_request(
+            self.PROMPT.format(prompt=prompt, answer=response.content),
+            model_id=self.model_id, task_type=TaskType.REASONING)
+        match = _SCORE.search(judged.content)
+        if not match:
+            return Verdict(False, 0.0, f"Judge reply had no score: {judged.content[:200]}", self.name)
+        score = min(float(match.group(1)), 10.0) / 10
+        return Verdict(score >= self.threshold, score, judged.content.strip(), self.name)
+
+
+class AllOf(Verifier):
+    """Passes when every verifier passes; stops at the first failure"""
+    name = "all"
+
+    def __init__(self, *verifiers: Verifier):
+        self.verifiers = verifiers
+
+    async def verify(self, prompt: str, response: APIResponse) -> Verdict:
+        score = 1.0
+        for verifier in self.verifiers:
+            verdict = await verifier.verify(prompt, response)
+            if not verdict.passed:
+                return verdict
+            score = min(score, verdict.score)
+        return Verdict(True, score, "", self.name)
+
+
+class AcceptanceTracker:
+    """
+    Per (task type, model) acceptance counts, persisted as JSON.
+
+    A rung is skipped once it has min_samples attempts and an acceptance rate
+    below min_rate; every explore_every-th skip it is tried anyway.
+    """
+
+    def __init__(self, path: Optional[Path] = DEFAULT_STATS_PATH, min_samples: int = 20,
+                 min_rate: float = 0.2, explore_every: int = 10):
+        self.path = Path(path) if path else None
+        self.min_samples = min_samples
+        self.min_rate = min_rate
+        self.explore_every = explore_every
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # Orders concurrent saves from worker threads
+        self._stats: Dict[str, Dict[str, List[int]]] = {}  # task -> model -> [attempts, accepted, skips]
+        self._load()
+
+    def _load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+            self._stats = {task: {mid: list(v) for mid, v in models.items()}
+                           for task, models in data.get("stats", {}).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable cascade stats {self.path}: {e}")
+
+    def save(self):
+        """Write the statistics atomically (safe to call from worker threads)"""
+        if not self.path:
+            return
+        with self._lock:
+            payload = json.dumps({"stats": self._stats}, separators=(",", ":"))
+        with self._save_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(payload)
+            os.replace(tmp, self.path)
+
+    def _entry(self, task_type: TaskType, model_id: str) -> List[int]:
+        return self._stats.setdefault(task_type.name, {}).setdefault(model_id, [0, 0, 0])
+
+    def record(self, task_type: TaskType, model_id: str, accepted: bool):
+        with self._lock:
+            entry = self._entry(task_type, model_id)
+            entry[0] += 1
+            entry[1] += int(accepted)
+
+    def rate(self, task_type: TaskType, model_id: str) -> Optional[float]:
+        """Acceptance rate, or None before min_samples attempts"""
+        entry = self._stats.get(task_type.name, {}).get(model_id)
+        if not entry or entry[0] < self.min_samples:
+            return None
+        return entry[1] / entry[0]
+
+    def should_skip(self, task_type: TaskType, model_id: str) -> bool:
+        rate = self.rate(task_type, model_id)
+        if rate is None or rate >= self.min_rate:
+            return False
+        with self._lock:
+            entry = self._entry(task_type, model_id)
+            entry[2] += 1
+            return entry[2] % self.explore_every != 0
+
+    def tune(self, task_type: TaskType, ladder: Sequence[str]) -> List[str]:
+        """Ladder without the rungs that rarely pass (the top rung is always kept)"""
+        if not ladder:
+            return []
+        kept = [mid for mid in ladder[:-1] if not self.should_skip(task_type, mid)]
+        return kept + [ladder[-1]]
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        with self._lock:
+            return {task: {mid: {"attempts": a, "accepted": ok, "rate": round(ok / a, 3) if a else None}
+                           for mid, (a, ok, _) in models.items()}
+                    for task, models in self._stats.items()}
+
+
+def default_verifier(task_type: TaskType) -> Optional[Verifier]:
+    """Syntax check for code tasks; other task types accept the first answer unless given a verifier"""
+    if task_type in (TaskType.CODE_GENERATION, TaskType.DEBUGGING, TaskType.TESTING):
+        return SheriffVerifier()
+    return None
+
+
+def pytest_verifier(test_source: str, timeout: float = 60.0) -> TestVerifier:
+    """Run the given pytest module against the answer, saved as solution.py"""
+    return TestVerifier([sys.executable, "-m", "pytest", "-q", "-x", "test_solution.py"],
+                        support_files={"test_solution.py": test_source}, timeout=timeout)
+
+
+def best_attempt(attempts: Sequence[Tuple[CascadeAttempt, APIResponse]]) -> Tuple[CascadeAttempt, APIResponse]:
+    """Highest-scoring answer, preferring the later (stronger) rung on ties"""
+    return max(reversed(attempts), key=lambda pair: pair[0].verdict.score if pair[0].verdict else 0.0)
@@ -0,0 +1,241 @@
+"""
+Model Chain Pipeline
+Runs a chain of model stages (e.g. a fast drafter feeding a reviewer) as a
+streaming pipeline. Each stage streams its output into a bounded queue read
+by the next stage, so a slow consumer pauses its producer (back-pressure).
+A stage either waits for its whole input or, with `segment` set, starts a
+call per segment (e.g. per paragraph) as soon as that segment has streamed
+in, so stage latencies overlap instead of adding up. Closing the output
+stream, or any stage failing, cancels every stage.
+"""
+
+import time
+import asyncio
+import logging
+from contextlib import aclosing
+from dataclasses import dataclass, field, asdict
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .types import TaskType
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 32  # Chunks buffered between two stages
+
+_END = object()
+
+
+@dataclass
+class ChainStage:
+    """One model step; "{input}" in the prompt is replaced by the upstream output"""
+    name: str
+    prompt: str = "{input}"
+    model_id: Optional[str] = None
+    task_type: Optional[TaskType] = None
+    agent: Optional[str] = None
+    segment: Optional[str] = None  # Delimiter: call the model per input segment as it arrives
+    concurrency: int = 2           # Segment calls in flight
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+    def render(self, text: str) -> str:
+        if "{input}" in self.prompt:
+            return self.prompt.replace("{input}", text)
+        return f"{self.prompt}\n\n{text}"
+
+
+@dataclass
+class StageStats:
+    """Timings of one stage, in seconds from the start of the run"""
+    name: str
+    model_id: Optional[str] = None
+    calls: int = 0
+    chars_in: int = 0
+    chars_out: int = 0
+    call_s: float = 0.0  # Summed duration of the stage's model calls
+    started_at: Optional[float] = None
+    first_output_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+@dataclass
+class ChainResult:
+    """Output of a chain run"""
+    output: str
+    stages: List[StageStats]
+    elapsed_s: float
+
+    @property
+    def serial_s(self) -> float:
+        """Approximate latency if every call ran one after another"""
+        return sum(s.call_s for s in self.stages)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "output": self.output,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "serial_s": round(self.serial_s, 3),
+            "stages": [asdict(s) for s in self.stages],
+        }
+
+
+class ChainPipeline:
+    """Streams a prompt through a sequence of model stages"""
+
+    def __init__(self, orchestrator, stages: List[ChainStage], queue_size: int = DEFAULT_QUEUE_SIZE):
+        if not stages:
+            raise ValueError("A chain needs at least one stage")
+        self.orchestrator = orchestrator
+        self.stages = stages
+        self.queue_size = queue_size
+
+    async def stream(self, prompt: str, stats: Optional[List[StageStats]] = None) -> AsyncIterator[str]:
+        """Yield the last stage's output as it is produced"""
+        if stats is None:
+            stats = []
+        await self.orchestrator.start_local_discovery()
+        stats[:] = [StageStats(stage.name, self._select(stage, prompt if i == 0 else ""))
+                    for i, stage in enumerate(self.stages)]
+
+        # The first queue only holds the prompt and the end marker
+        queues = [asyncio.Queue()] + [asyncio.Queue(self.queue_size) for _ in self.stages]
+        queues[0].put_nowait(prompt)
+        queues[0].put_nowait(_END)
+        start = time.perf_counter()
+        running = [asyncio.create_task(self._run_stage(stage, stats[i], queues[i], queues[i + 1], start))
+                   for i, stage in enumerate(self.stages)]
+        final = queues[-1]
+        getter = None
+        try:
+            while True:
+                getter = getter or asyncio.ensure_future(final.get())
+                done, _ = await asyncio.wait([getter, *running], return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task is not getter and task.exception():
+                        raise task.exception()
+                running = [task for task in running if not task.done()]
+                if getter in done:
+                    item, getter = getter.result(), None
+                    if item is _END:
+                        return
+                    yield item
+        finally:
+            outstanding = [t for t in [getter, *running] if t is not None and not t.done()]
+            for task in outstanding:
+                task.cancel()
+            if outstanding:
+                await asyncio.gather(*outstanding, return_exceptions=True)
+
+    async def run(self, prompt: str) -> ChainResult:
+        """Run the chain and collect the final output with per-stage timings"""
+        stats: List[StageStats] = []
+        with tracing.span("chain", {"stages": len(self.stages)}) as span:
+            start = time.perf_counter()
+            output = "".join([chunk async for chunk in self.stream(prompt, stats)])
+            result = ChainResult(output, stats, time.perf_counter() - start)
+            span.set_attributes({"elapsed_s": result.elapsed_s, "serial_s": result.serial_s})
+        logger.info(f"Chain of {len(stats)} stages finished in {result.elapsed_s:.2f}s "
+                    f"(calls took {result.serial_s:.2f}s in total)")
+        return result
+
+    def _select(self, stage: ChainStage, text: str) -> Optional[str]:
+        """Stage model: fixed, or selected once from the stage prompt"""
+        if stage.model_id:
+            return stage.model_id
+        return self.orchestrator.select_model(stage.render(text), stage.task_type, stage.agent)
+
+    async def _call(self, stage: ChainStage, stats: StageStats, text: str,
+                    outbox: asyncio.Queue, start: float):
+        """Stream one model call into a queue"""
+        call_start = time.perf_counter()
+        if stats.started_at is None:
+            stats.started_at = round(call_start - start, 4)
+        stats.calls += 1
+        stats.chars_in += len(text)
+        stream = self.orchestrator.stream_request(stage.render(text), model_id=stats.model_id,
+                                                  task_type=stage.task_type, agent=stage.agent, **stage.kwargs)
+        try:
+            # aclosing: a cancelled stage closes its HTTP stream now, not at garbage collection
+            async with aclosing(stream):
+                async for chunk in stream:
+                    if stats.first_output_at is None:
+                        stats.first_output_at = round(time.perf_counter() - start, 4)
+                    stats.chars_out += len(chunk)
+                    await outbox.put(chunk)
+        finally:
+            stats.call_s += time.perf_counter() - call_start
+
+    async def _run_stage(self, stage: ChainStage, stats: StageStats,
+                         inbox: asyncio.Queue, outbox: asyncio.Queue, start: float):
+        try:
+            if stage.segment is None:
+                parts = []
+                while (item := await inbox.get()) is not _END:
+                    parts.append(item)
+                await self._call(stage, stats, "".join(parts), outbox, start)
+            else:
+                await self._run_segmented(stage, stats, inbox, outbox, start)
+            await outbox.put(_END)
+        finally:
+            stats.finished_at = round(time.perf_counter() - start, 4)
+
+    async def _run_segmented(self, stage: ChainStage, stats: StageStats,
+                             inbox: asyncio.Queue, outbox: asyncio.Queue, start: float):
+        """Call the model per segment as segments arrive; emit their outputs in input order"""
+        slots = asyncio.Semaphore(stage.concurrency)
+        # Bounded, so reading input pauses once enough segments are queued ahead of the output
+        order: asyncio.Queue = asyncio.Queue(stage.concurrency)
+        tasks: List[asyncio.Task] = []
+        stage_task = asyncio.current_task()
+        failures: List[BaseException] = []
+
+        async def guarded(coro):
+            # A failed child cancels the stage, which may be blocked on a full queue
+            try:
+                await coro
+            except Exception as e:
+                if not failures:
+                    failures.append(e)
+                    stage_task.cancel()
+                raise
+
+        async def segment_call(text: str, results: asyncio.Queue):
+            async with slots:
+                await self._call(stage, stats, text, results, start)
+            await results.put(_END)
+
+        async def emit():
+            first = True
+            while (results := await order.get()) is not _END:
+                if not first:
+                    await outbox.put(stage.segment)
+                first = False
+                while (chunk := await results.get()) is not _END:
+                    await outbox.put(chunk)
+
+        async def launch(text: str):
+            results: asyncio.Queue = asyncio.Queue(self.queue_size)
+            tasks.append(asyncio.create_task(guarded(segment_call(text, results))))
+            await order.put(results)
+
+        emitter = asyncio.create_task(guarded(emit()))
+        try:
+            buffer = ""
+            while (item := await inbox.get()) is not _END:
+                buffer += item
+                while stage.segment in buffer:
+                    text, buffer = buffer.split(stage.segment, 1)
+                    if text.strip():
+                        await launch(text)
+            if buffer.strip():
+                await launch(buffer)
+            await order.put(_END)
+            await emitter
+        except asyncio.CancelledError:
+            if failures:
+                raise failures[0] from None
+            raise
+        finally:
+            for task in [emitter, *tasks]:
+                task.cancel()
+            await asyncio.gather(emitter, *tasks, return_exceptions=True)
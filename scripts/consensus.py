@@ -0,0 +1,284 @@
+"""
+Consensus Engine
+Fans a prompt out to several diverse models concurrently and groups their
+answers as they arrive. Answers agree when their normalized final answers
+match or are similar enough (token overlap, or cosine similarity when an
+embedding function is given). Once a quorum agrees, or a quorum is no
+longer reachable, the outstanding calls are cancelled so they stop spending
+tokens. The result compares cost and latency with asking the top-ranked
+model alone.
+"""
+
+import re
+import math
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from .types import APIResponse
+from . import tracing
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+ANSWER_INSTRUCTION = "\n\nEnd your reply with a final line of the form 'ANSWER: <your final answer>'."
+
+_ANSWER_LINE = re.compile(r"^\W*(?:final\s+)?answer\s*[:\-]\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+_PUNCT = re.compile(r"[^\w\s.]|(?<!\d)\.|\.(?!\d)")
+_ARTICLES = {"a", "an", "the"}
+
+EmbedFn = Callable[[str], Awaitable[Sequence[float]]]
+
+
+def normalize_answer(text: str) -> str:
+    """Final answer in canonical form: last 'ANSWER:' line if present, lowercased, no punctuation or articles"""
+    matches = _ANSWER_LINE.findall(text)
+    answer = matches[-1] if matches else text
+    words = _PUNCT.sub(" ", answer.lower()).split()
+    # Keep a lone article: it may be the answer itself (multiple choice "A")
+    return " ".join([w for w in words if w not in _ARTICLES] or words)
+
+
+def token_similarity(a: str, b: str) -> float:
+    """Jaccard overlap of the words of two normalized answers"""
+    left, right = set(a.split()), set(b.split())
+    if not left or not right:
+        return 1.0 if left == right else 0.0
+    return len(left & right) / len(left | right)
+
+
+def cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+@dataclass
+class ModelAnswer:
+    """One model's contribution"""
+    model_id: str
+    status: str = "pending"  # answered | error | cancelled
+    content: str = ""
+    normalized: str = ""
+    cluster: Optional[int] = None
+    latency_s: Optional[float] = None
+    cost: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    error: Optional[str] = None
+    response: Optional[APIResponse] = field(default=None, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: v for k, v in self.__dict__.items() if k != "response"}
+
+
+@dataclass
+class ConsensusEvent:
+    """Emitted as each model finishes"""
+    answer: ModelAnswer
+    leading: Optional[str]  # Normalized answer of the largest cluster
+    votes: int              # Size of the largest cluster
+    quorum: int
+    pending: int
+    done: bool = False
+
+
+@dataclass
+class ConsensusResult:
+    """Outcome of a consensus run"""
+    agreed: bool
+    answer: Optional[str]             # Normalized winning answer
+    response: Optional[APIResponse]   # First response in the winning cluster
+    votes: int
+    quorum: int
+    answers: List[ModelAnswer] = field(default_factory=list)
+    elapsed_s: float = 0.0
+    single_model: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def cost(self) -> float:
+        return sum(a.cost for a in self.answers)
+
+    @property
+    def cancelled(self) -> int:
+        return sum(1 for a in self.answers if a.status == "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        single_cost = self.single_model.get("cost")
+        single_latency = self.single_model.get("latency_s")
+        return {
+            "agreed": self.agreed,
+            "answer": self.answer,
+            "content": self.response.content if self.response else None,
+            "votes": self.votes,
+            "quorum": self.quorum,
+            "cancelled": self.cancelled,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "cost": round(self.cost, 6),
+            "single_model": self.single_model,
+            "cost_ratio": round(self.cost / single_cost, 2) if single_cost else None,
+            "latency_ratio": round(self.elapsed_s / single_latency, 2) if single_latency else None,
+            "answers": [a.to_dict() for a in self.answers],
+        }
+
+
+class ConsensusEngine:
+    """Concurrent multi-model voting with early termination"""
+
+    def __init__(self,
+                 orchestrator,
+                 quorum: Optional[int] = None,
+                 similarity_threshold: float = 0.8,
+                 embed: Optional[EmbedFn] = None,
+                 instruct: bool = True,
+                 timeout: Optional[float] = None):
+        self.orchestrator = orchestrator
+        self.quorum = quorum
+        self.similarity_threshold = similarity_threshold
+        self.embed = embed
+        self.instruct = instruct
+        self.timeout = timeout
+
+    async def stream(self,
+                     prompt: str,
+                     models: Optional[Sequence[str]] = None,
+                     num_models: int = 3,
+                     **kwargs) -> AsyncIterator[ConsensusEvent]:
+        """
+        Yield an event as each model answers; stops early once the vote is decided.
+
+        Outstanding calls are cancelled when the vote is decided or the
+        consumer stops iterating.
+        """
+        if models is None:
+            models = [mid for mid, _ in self.orchestrator.create_consensus_group(prompt, num_models)]
+        if not models:
+            raise ValueError("No models available for consensus")
+        quorum = self.quorum or len(models) // 2 + 1
+        full_prompt = prompt + ANSWER_INSTRUCTION if self.instruct else prompt
+
+        answers = {mid: ModelAnswer(mid) for mid in models}
+        clusters: List[List[ModelAnswer]] = []
+        vectors: List[Optional[Sequence[float]]] = []
+        start = time.perf_counter()
+        pending = {asyncio.create_task(self._ask(answers[mid], full_prompt, start, **kwargs)): mid
+                   for mid in models}
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED, timeout=self.timeout)
+                if not done:
+                    logger.warning(f"Consensus timed out with {len(pending)} models outstanding")
+                    break
+                decided = False
+                for answer in [answers[pending.pop(task)] for task in done]:
+                    if answer.status == "answered":
+                        await self._cluster(answer, clusters, vectors)
+                    leader = max(clusters, key=len, default=[])
+                    decided = len(leader) >= quorum or len(leader) + len(pending) < quorum
+                    yield ConsensusEvent(answer, leader[0].normalized if leader else None, len(leader),
+                                         quorum, len(pending), done=decided or not pending)
+                if decided:
+                    return
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                metrics.CONSENSUS_CALLS.inc(len(pending), status="cancelled")
+
+    async def run(self,
+                  prompt: str,
+                  models: Optional[Sequence[str]] = None,
+                  num_models: int = 3,
+                  **kwargs) -> ConsensusResult:
+        """Run a vote to completion (or early termination)"""
+        if models is None:
+            models = [mid for mid, _ in self.orchestrator.create_consensus_group(prompt, num_models)]
+        with tracing.span("consensus", {"models": len(models)}) as span:
+            start = time.perf_counter()
+            event = None
+            seen: List[ModelAnswer] = []
+            async for event in self.stream(prompt, models, **kwargs):
+                seen.append(event.answer)
+            elapsed = time.perf_counter() - start
+
+            by_id = {a.model_id: a for a in seen}
+            answers = [by_id.get(mid) or ModelAnswer(mid, status="cancelled") for mid in models]
+            quorum = event.quorum if event else (self.quorum or len(models) // 2 + 1)
+            votes = event.votes if event else 0
+            agreed = votes >= quorum
+            winner = next((a for a in seen if a.status == "answered" and a.normalized == event.leading), None) \
+                if event else None
+            result = ConsensusResult(agreed, event.leading if event else None,
+                                     winner.response if winner else None, votes, quorum, answers, elapsed,
+                                     self._single_model(models[0], answers))
+            metrics.CONSENSUS_RUNS.inc(outcome="agreed" if agreed else "split")
+            span.set_attributes({"agreed": agreed, "votes": votes, "quorum": quorum,
+                                 "cancelled": result.cancelled, "cost": result.cost})
+        logger.info(f"Consensus {'reached' if agreed else 'not reached'} ({votes}/{quorum} votes, "
+                    f"{result.cancelled} cancelled) in {elapsed:.2f}s for ${result.cost:.4f}")
+        return result
+
+    async def _ask(self, answer: ModelAnswer, prompt: str, start: float, **kwargs):
+        model = self.orchestrator.registry.get_model(answer.model_id)
+        try:
+            if model is None:
+                raise ValueError(f"Model {answer.model_id} not found in registry")
+            response = await self.orchestrator._call_model(model, prompt, **kwargs)
+        except asyncio.CancelledError:
+            answer.status = "cancelled"
+            raise
+        except Exception as e:
+            logger.warning(f"Consensus model {answer.model_id} failed: {e}")
+            answer.status, answer.error = "error", str(e)
+            metrics.CONSENSUS_CALLS.inc(status="error")
+            return
+        answer.status = "answered"
+        answer.response = response
+        answer.content = response.content
+        answer.normalized = normalize_answer(response.content)
+        answer.latency_s = round(time.perf_counter() - start, 4)
+        answer.input_tokens = response.usage.get("input_tokens") or 0
+        answer.output_tokens = response.usage.get("output_tokens") or 0
+        answer.cost = model.cost(answer.input_tokens, answer.output_tokens)
+        metrics.CONSENSUS_CALLS.inc(status="answered")
+
+    async def _cluster(self, answer: ModelAnswer, clusters: List[List[ModelAnswer]],
+                       vectors: List[Optional[Sequence[float]]]):
+        """Add an answer to the first cluster it agrees with, or start a new one"""
+        vector = None
+        for i, cluster in enumerate(clusters):
+            head = cluster[0]
+            if answer.normalized == head.normalized:
+                break
+            if self.embed is not None:
+                if vector is None:
+                    vector = await self.embed(answer.normalized)
+                if vectors[i] is not None and cosine(vector, vectors[i]) >= self.similarity_threshold:
+                    break
+            elif token_similarity(answer.normalized, head.normalized) >= self.similarity_threshold:
+                break
+        else:
+            if self.embed is not None and vector is None:
+                vector = await self.embed(answer.normalized)
+            clusters.append([])
+            vectors.append(vector)
+            i = len(clusters) - 1
+        clusters[i].append(answer)
+        answer.cluster = i
+
+    def _single_model(self, model_id: str, answers: List[ModelAnswer]) -> Dict[str, Any]:
+        """Cost and latency of asking only the top-ranked model (estimated if it did not finish)"""
+        top = next(a for a in answers if a.model_id == model_id)
+        if top.status == "answered":
+            return {"model": model_id, "cost": round(top.cost, 6), "latency_s": top.latency_s, "estimated": False}
+        answered = [a for a in answers if a.status == "answered"]
+        model = self.orchestrator.registry.get_model(model_id)
+        if not answered or model is None:
+            return {"model": model_id, "cost": None, "latency_s": None, "estimated": True}
+        input_tokens = sum(a.input_tokens for a in answered) / len(answered)
+        output_tokens = sum(a.output_tokens for a in answered) / len(answered)
+        return {"model": model_id, "cost": round(model.cost(input_tokens, output_tokens), 6),
+                "latency_s": None, "estimated": True}
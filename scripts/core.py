@@ -1,31 +1,80 @@
+import os
+import time
 import logging
 import asyncio
-from typing import Optional, Dict, List, Any
-from .types import TaskType, TaskRequirements, APIResponse, ModelCapabilities
+import contextlib
+import dataclasses
+from typing import Optional, Dict, List, Any, AsyncContextManager, AsyncIterator, Callable, Tuple
+from .types import TaskType, TaskRequirements, APIResponse, ModelCapabilities, ModelProvider
 from .registry import ModelRegistry
 from .scorer import TaskAnalyzer, ModelScorer
 from .guide import ModelGuideParser
 from .api_clients import get_api_client
+from .agent_index import AgentEntry, AgentIndex, load_agent_index
+from .cascade import (DEFAULT_LADDERS, AcceptanceTracker, CascadeAttempt, CascadeResult, Verdict,
+                      Verifier, best_attempt, default_verifier)
+from .deadline import DeadlineExceeded
+from . import deadline
+from . import tracing
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
+# model_selection.strategies key used for each task type in agent definitions
+AGENT_STRATEGY_KEYS = {
+    TaskType.CODE_GENERATION: "code_generation",
+    TaskType.DEBUGGING: "code_generation",
+    TaskType.TESTING: "code_generation",
+    TaskType.REASONING: "reasoning",
+    TaskType.ARCHITECTURAL_DESIGN: "reasoning",
+    TaskType.DATA_ANALYSIS: "reasoning",
+    TaskType.DOCUMENTATION: "quick_response",
+    TaskType.GENERAL: "quick_response",
+}
+
+# Output length assumed for cost-limit checks when max_tokens is not given
+DEFAULT_OUTPUT_TOKENS = 1024
+
+# Admission hook held around each model attempt: (model_id, model, size_gb) -> async context manager
+Admission = Callable[[str, ModelCapabilities, Optional[float]], AsyncContextManager]
+
 class ModelOrchestrator:
     """
     Intelligent model orchestration system.
     Routes requests to the best model based on task requirements, cost, and performance.
     """
 
-    def __init__(self, guide_path: Optional[str] = None):
+    def __init__(self, guide_path: Optional[str] = None, agent_dir: Optional[str] = None):
         self.registry = ModelRegistry()
         self.analyzer = TaskAnalyzer()
         self.scorer = ModelScorer()
         self.guide = ModelGuideParser(guide_path)
         self.clients = {}
+        self._discovery_task: Optional[asyncio.Task] = None
+        self.agent_dir = agent_dir
+        self._agent_index: Optional[AgentIndex] = None
+        self._agent_routes: Dict[Tuple[str, Optional[str]], Tuple[Dict, List[str]]] = {}
+        # Set when cloud providers are unreachable; agents with force_local_if_offline stay local
+        self.offline = os.getenv("ORCHESTRATOR_OFFLINE", "").lower() in ("1", "true", "yes")
+        self.ladders: Dict[TaskType, List[str]] = dict(DEFAULT_LADDERS)
+        self.acceptance = AcceptanceTracker()
+        tracing.configure_from_env()
+
+    def start_local_discovery(self) -> asyncio.Task:
+        """Start (once per event loop) background discovery of installed Ollama models"""
+        task = self._discovery_task
+        # A task from an earlier event loop was cancelled when that loop shut down
+        if task is None or task.cancelled() or task.get_loop() is not asyncio.get_running_loop():
+            self._discovery_task = asyncio.create_task(self.registry.discover_local_models())
+        return self._discovery_task
 
     async def route_request(self, 
                           prompt: str, 
                           model_id: Optional[str] = None, 
                           task_type: Optional[TaskType] = None,
+                          agent: Optional[str] = None,
+                          deadline_s: Optional[float] = None,
+                          admit: Optional[Admission] = None,
                           **kwargs) -> APIResponse:
         """
         Route a request to the appropriate model.
@@ -34,38 +83,452 @@ class ModelOrchestrator:
             prompt: The user prompt.
             model_id: Optional specific model ID to force use.
             task_type: Optional manual task type override.
+            agent: Optional agent name or id; routes by the agent's
+                model_selection strategies and enforces its cost limits.
+            deadline_s: Optional time limit for the whole request, including
+                retries and fallback; raises DeadlineExceeded when it passes.
+            admit: Optional admission hook, called as admit(model_id, model,
+                size_gb) and held around each model attempt (the primary and
+                every fallback), e.g. ResourceLimiter.slot.
             **kwargs: Additional arguments passed to the API client.
         """
         
-        # 1. Analyze Task
-        requirements = self.analyzer.analyze(prompt)
-        if task_type:
-            requirements.task_type = task_type
-            
-        logger.info(f"Analyzed task: {requirements.task_type.name}, Priority: {requirements.priority}")
+        start_time = time.perf_counter()
+        status = "error"
+        bound = deadline.start(deadline_s)
+        try:
+            with tracing.span("route_request", {"model.requested": model_id, "agent": agent}) as root:
+                discovery = self.start_local_discovery()
 
-        # 2. Select Model
-        selected_model_id = model_id
-        if not selected_model_id:
-            selected_model_id = self._select_best_model(requirements)
-        
-        if not selected_model_id:
-            raise ValueError("No suitable model found for request")
+                agent_entry = self.get_agent(agent) if agent else None
+                model_filter = self._agent_model_filter(agent_entry, prompt, kwargs) if agent_entry else None
 
-        model_cap = self.registry.get_model(selected_model_id)
-        if not model_cap:
-             raise ValueError(f"Model {selected_model_id} not found in registry")
+                # 1. Analyze Task (agent strategies only need it to pick a strategy)
+                requirements = None
+                if not agent_entry:
+                    requirements = self._analyze(prompt, task_type)
 
-        logger.info(f"Selected model: {selected_model_id} ({model_cap.provider.value})")
+                # 2. Select Model
+                selected_model_id, agent_chain = model_id, []
+                if not selected_model_id:
+                    selected_model_id, agent_chain, requirements = self._select_for_request(
+                        prompt, task_type, agent_entry, model_filter, requirements)
+                else:
+                    with tracing.span("select", {"model": selected_model_id}):
+                        if model_filter and not model_filter(self.registry.get_model(selected_model_id)):
+                            raise ValueError(f"Model {selected_model_id} is not allowed for agent "
+                                             f"{agent_entry.id} (cost hard limit or offline policy)")
 
-        # 3. Execute Request
+                # Don't route to a local model before discovery confirms it is installed
+                if not discovery.done() and selected_model_id:
+                    candidate = self.registry.get_model(selected_model_id)
+                    if candidate and candidate.provider == ModelProvider.OLLAMA:
+                        with tracing.span("local_discovery.wait"):
+                            async with deadline.enforce(bound):
+                                await asyncio.shield(discovery)
+                        if not model_id:
+                            selected_model_id, agent_chain, requirements = self._select_for_request(
+                                prompt, task_type, agent_entry, model_filter, requirements)
+
+                if not selected_model_id:
+                    raise ValueError("No suitable model found for request")
+
+                model_cap = self.registry.get_model(selected_model_id)
+                if not model_cap:
+                     raise ValueError(f"Model {selected_model_id} not found in registry")
+
+                logger.info(f"Selected model: {selected_model_id} ({model_cap.provider.value})")
+                root.set_attributes({"model": selected_model_id, "provider": model_cap.provider.value})
+
+                # 3. Execute Request
+                try:
+                    async with deadline.enforce(bound), self._admitted(admit, selected_model_id, model_cap):
+                        response = await self._call_model(model_cap, prompt, **kwargs)
+                    root.set_attribute("fallback.used", False)
+                    status = "success"
+                    return response
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    logger.error(f"Primary model failed: {e}. Attempting fallback...")
+                    root.set_attribute("fallback.used", True)
+                    if requirements is None:
+                        requirements = self._analyze(prompt, task_type)
+                    async with deadline.enforce(bound):
+                        response = await self._handle_fallback(requirements, prompt,
+                                                               failed_model=selected_model_id,
+                                                               agent_chain=agent_chain, model_filter=model_filter,
+                                                               admit=admit, **kwargs)
+                    status = "fallback"
+                    return response
+        except DeadlineExceeded:
+            status = "timeout"
+            raise
+        finally:
+            metrics.ROUTE_REQUESTS.inc(status=status)
+            metrics.ROUTE_LATENCY.observe(time.perf_counter() - start_time)
+
+    async def stream_request(self,
+                             prompt: str,
+                             model_id: Optional[str] = None,
+                             task_type: Optional[TaskType] = None,
+                             agent: Optional[str] = None,
+                             deadline_s: Optional[float] = None,
+                             admit: Optional[Admission] = None,
+                             **kwargs) -> AsyncIterator[str]:
+        """
+        Route a request and yield the reply as it is generated.
+
+        If the model fails before producing output, the request goes through
+        the fallback chain and the fallback reply is yielded whole; a failure
+        after output has started is raised. When `deadline_s` passes, the
+        stream is closed and DeadlineExceeded is raised with the text yielded
+        so far as its `partial`. `admit` is held around each model attempt,
+        as in route_request.
+        """
+        bound = deadline.start(deadline_s)
+        discovery = self.start_local_discovery()
+        agent_entry = self.get_agent(agent) if agent else None
+        model_filter = self._agent_model_filter(agent_entry, prompt, kwargs) if agent_entry else None
+        requirements: Optional[TaskRequirements] = None
+        agent_chain: List[str] = []
+        if not model_id:
+            model_id, agent_chain, requirements = self._select_for_request(
+                prompt, task_type, agent_entry, model_filter, requirements)
+            candidate = self.registry.get_model(model_id) if model_id else None
+            if not discovery.done() and (candidate is None or candidate.provider == ModelProvider.OLLAMA):
+                async with deadline.enforce(bound):
+                    await asyncio.shield(discovery)
+                model_id, agent_chain, requirements = self._select_for_request(
+                    prompt, task_type, agent_entry, model_filter, requirements)
+        elif not discovery.done() and self.registry.get_model(model_id) is None:
+            async with deadline.enforce(bound):
+                await asyncio.shield(discovery)
+        if not model_id:
+            raise ValueError("No suitable model found for request")
+        model_cap = self.registry.get_model(model_id)
+        if not model_cap:
+            raise ValueError(f"Model {model_id} not found in registry")
+        if model_filter and not model_filter(model_cap):
+            raise ValueError(f"Model {model_id} is not allowed for agent "
+                             f"{agent_entry.id} (cost hard limit or offline policy)")
+
+        client = self._get_client(model_cap.provider.value)
+        messages = kwargs.pop("messages", None) or [{"role": "user", "content": prompt}]
+        labels = {"model": model_cap.api_name, "provider": model_cap.provider.value}
+        start_time = time.perf_counter()
+        produced = 0
+        parts: List[str] = []  # Kept only for a deadline's partial result
+        status = "error"
+        failure = None
         try:
-            return await self._call_model(model_cap, prompt, **kwargs)
+            async with self._admitted(admit, model_id, model_cap):
+                stream = client.stream_completion(model=model_cap.api_name, messages=messages, **kwargs)
+                async for chunk in deadline.bounded(stream, bound):
+                    produced += len(chunk)
+                    if bound:
+                        parts.append(chunk)
+                    yield chunk
+            status = "success"
+        except (GeneratorExit, asyncio.CancelledError):
+            status = "cancelled"
+            raise
+        except DeadlineExceeded as e:
+            status = "timeout"
+            e.partial = "".join(parts)
+            raise
         except Exception as e:
-            logger.error(f"Primary model failed: {e}. Attempting fallback...")
-            return await self._handle_fallback(requirements, prompt, failed_model=selected_model_id, **kwargs)
+            if produced:
+                raise
+            failure = e
+        finally:
+            metrics.MODEL_CALLS.inc(status=status, **labels)
+            metrics.MODEL_LATENCY.observe(time.perf_counter() - start_time, **labels)
+            # Streams carry no usage block; estimate at 4 characters per token
+            input_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+            output_tokens = produced // 4
+            metrics.TOKENS.inc(input_tokens, model=model_cap.api_name, direction="input")
+            metrics.TOKENS.inc(output_tokens, model=model_cap.api_name, direction="output")
+            metrics.COST.inc(model_cap.cost(input_tokens, output_tokens), model=model_cap.api_name)
+
+        if failure is not None:
+            logger.error(f"Streaming from {model_id} failed: {failure}. Attempting fallback...")
+            if requirements is None:
+                requirements = self._analyze(prompt, task_type)
+            async with deadline.enforce(bound):
+                response = await self._handle_fallback(requirements, prompt, failed_model=model_id,
+                                                       agent_chain=agent_chain, model_filter=model_filter,
+                                                       admit=admit, messages=messages, **kwargs)
+            yield response.content
+
+    async def route_cascade(self,
+                            prompt: str,
+                            task_type: Optional[TaskType] = None,
+                            ladder: Optional[List[str]] = None,
+                            verifier: Optional[Verifier] = None,
+                            deadline_s: Optional[float] = None,
+                            **kwargs) -> CascadeResult:
+        """
+        Answer with the cheapest ladder rung whose answer passes verification.
+
+        Args:
+            prompt: The user prompt.
+            task_type: Optional manual task type override.
+            ladder: Model ids, cheapest first (default: self.ladders for the task type).
+            verifier: Scores each answer (default: default_verifier for the task type);
+                without one the first successful answer is accepted.
+            deadline_s: Optional time limit for the whole cascade, including
+                verification; raises DeadlineExceeded when it passes.
+            **kwargs: Additional arguments passed to the API client.
+
+        Returns the best-scoring answer with accepted=False if no rung passes.
+        """
+        bound = deadline.start(deadline_s)
+        with tracing.span("cascade") as root:
+            task = self._analyze(prompt, task_type).task_type
+            ladder = list(ladder or self.ladders.get(task) or self.ladders[TaskType.GENERAL])
+            if verifier is None:
+                verifier = default_verifier(task)
+
+            discovery = self.start_local_discovery()
+            if not discovery.done() and any(self.registry.resolve_id(name) is None for name in ladder):
+                with tracing.span("local_discovery.wait"):
+                    async with deadline.enforce(bound):
+                        await asyncio.shield(discovery)
+            rungs = []
+            for name in ladder:
+                model_id = self.registry.resolve_id(name)
+                if model_id and model_id not in rungs:
+                    rungs.append(model_id)
+            if not rungs:
+                raise ValueError(f"No model in the cascade ladder is available: {ladder}")
+            rungs = self.acceptance.tune(task, rungs)
+            root.set_attributes({"task_type": task.name, "ladder": ",".join(rungs)})
+
+            tried: List[Tuple[CascadeAttempt, APIResponse]] = []
+            attempts: List[CascadeAttempt] = []
+            try:
+                for model_id in rungs:
+                    model_cap = self.registry.models[model_id]
+                    attempt = CascadeAttempt(model_id)
+                    attempts.append(attempt)
+                    with tracing.span("cascade.rung", {"model": model_id}) as span:
+                        try:
+                            async with deadline.enforce(bound):
+                                response = await self._call_model(model_cap, prompt, **kwargs)
+                        except DeadlineExceeded:
+                            metrics.CASCADE_ATTEMPTS.inc(task_type=task.name, model=model_id, outcome="timeout")
+                            raise
+                        except Exception as e:
+                            logger.warning(f"Cascade model {model_id} failed: {e}")
+                            attempt.error = str(e)
+                            metrics.CASCADE_ATTEMPTS.inc(task_type=task.name, model=model_id, outcome="error")
+                            continue
+                        attempt.cost = model_cap.cost(response.usage.get("input_tokens") or 0,
+                                                      response.usage.get("output_tokens") or 0)
+                        outcome = None
+                        if verifier is None:
+                            attempt.verdict = Verdict(True, 1.0)
+                        else:
+                            try:
+                                async with deadline.enforce(bound):
+                                    attempt.verdict = await verifier.verify(prompt, response)
+                            except DeadlineExceeded:
+                                metrics.CASCADE_ATTEMPTS.inc(task_type=task.name, model=model_id, outcome="timeout")
+                                raise
+                            except Exception as e:
+                                # Not the answer's fault: keep it as a candidate, leave acceptance stats alone
+                                logger.warning(f"Cascade verifier {verifier.name} failed on {model_id}: {e}")
+                                attempt.verdict = Verdict(False, 0.0, f"Verifier error: {type(e).__name__}: {e}",
+                                                          verifier.name)
+                                outcome = "verifier_error"
+                            else:
+                                self.acceptance.record(task, model_id, attempt.verdict.passed)
+                        outcome = outcome or ("accepted" if attempt.verdict.passed else "rejected")
+                        metrics.CASCADE_ATTEMPTS.inc(task_type=task.name, model=model_id, outcome=outcome)
+                        span.set_attributes({"outcome": outcome, "score": attempt.verdict.score})
+                    tried.append((attempt, response))
+                    if attempt.verdict.passed:
+                        root.set_attributes({"model": model_id, "accepted": True})
+                        return CascadeResult(response, model_id, True, attempts)
+                    logger.info(f"Cascade: {model_id} rejected by {attempt.verdict.verifier}; escalating")
+            finally:
+                if verifier is not None:
+                    await asyncio.to_thread(self.acceptance.save)
+
+            if not tried:
+                raise RuntimeError("All cascade models failed")
+            best, response = best_attempt(tried)
+            root.set_attributes({"model": best.model_id, "accepted": False})
+            return CascadeResult(response, best.model_id, False, attempts)
+
+    def select_model(self,
+                     prompt: str,
+                     task_type: Optional[TaskType] = None,
+                     agent: Optional[str] = None,
+                     **kwargs) -> Optional[str]:
+        """Model id route_request would pick for a request, without calling it"""
+        agent_entry = self.get_agent(agent) if agent else None
+        model_filter = self._agent_model_filter(agent_entry, prompt, kwargs) if agent_entry else None
+        requirements = None if agent_entry else self._analyze(prompt, task_type)
+        model_id, _, _ = self._select_for_request(prompt, task_type, agent_entry, model_filter, requirements)
+        return model_id
+
+    def create_consensus_group(self,
+                               prompt: str,
+                               num_models: int = 3,
+                               diverse: bool = True,
+                               task_type: Optional[TaskType] = None) -> List[Tuple[str, ModelCapabilities]]:
+        """
+        Top-scoring models for a prompt, for a consensus vote.
+
+        With diverse=True each provider contributes one model before any
+        provider contributes a second, so the voters fail independently.
+        """
+        requirements = self._analyze(prompt, task_type)
+        scored = []
+        for model_id, model in self.registry.models.items():
+            if self.guide.is_model_blocked(model.api_name):
+                continue
+            score = self.scorer.score(model, requirements)
+            if score > 0:
+                scored.append((score, model_id, model))
+        scored.sort(key=lambda x: x[0], reverse=True)
+        if not diverse:
+            return [(mid, model) for _, mid, model in scored[:num_models]]
+
+        group, providers = [], set()
+        for _, model_id, model in scored:
+            if model.provider not in providers:
+                group.append((model_id, model))
+                providers.add(model.provider)
+        chosen = {mid for mid, _ in group}
+        group += [(mid, model) for _, mid, model in scored if mid not in chosen]
+        return group[:num_models]
+
+    def create_model_chain(self,
+                           tasks: List[str],
+                           task_type: Optional[TaskType] = None) -> List[Tuple[str, ModelCapabilities]]:
+        """Model selected for each step of a chain"""
+        chain = []
+        for task in tasks:
+            model_id = self.select_model(task, task_type)
+            if not model_id:
+                raise ValueError(f"No suitable model found for chain step: {task[:60]}")
+            chain.append((model_id, self.registry.get_model(model_id)))
+        return chain
+
+    def _analyze(self, prompt: str, task_type: Optional[TaskType] = None) -> TaskRequirements:
+        """Analyze the prompt, honouring a manual task type override"""
+        with tracing.span("analyze", {"prompt.chars": len(prompt)}) as span:
+            requirements = self.analyzer.analyze(prompt)
+            if task_type:
+                requirements = dataclasses.replace(requirements, task_type=task_type)
+            span.set_attributes({"task_type": requirements.task_type.name,
+                                 "priority": requirements.priority})
+
+        logger.info(f"Analyzed task: {requirements.task_type.name}, Priority: {requirements.priority}")
+        return requirements
+
+    def _select_for_request(self,
+                            prompt: str,
+                            task_type: Optional[TaskType],
+                            agent_entry: Optional[AgentEntry],
+                            model_filter: Optional[Callable[[ModelCapabilities], bool]],
+                            requirements: Optional[TaskRequirements]
+                            ) -> Tuple[Optional[str], List[str], Optional[TaskRequirements]]:
+        """
+        Pick a model from the agent's strategy, falling back to scoring.
+
+        Returns:
+            (model id, remaining agent candidates in order, requirements if analyzed)
+        """
+        if agent_entry:
+            strategy_key = None
+            if task_type or requirements or len(agent_entry.strategies) == 1:
+                strategy_key = self._agent_strategy_key(agent_entry, task_type or
+                                                        (requirements.task_type if requirements else None))
+            else:
+                requirements = self._analyze(prompt, task_type)
+                strategy_key = self._agent_strategy_key(agent_entry, requirements.task_type)
+
+            with tracing.span("select.agent", {"agent": agent_entry.id, "strategy": strategy_key}) as span:
+                chain = [mid for mid in self._agent_candidates(agent_entry, strategy_key)
+                         if model_filter is None or model_filter(self.registry.models[mid])]
+                span.set_attribute("model", chain[0] if chain else None)
+            if chain:
+                return chain[0], chain, requirements
+            logger.info(f"No strategy model usable for agent {agent_entry.id}; scoring all models")
+
+        if requirements is None:
+            requirements = self._analyze(prompt, task_type)
+        with tracing.span("select") as span:
+            selected_model_id = self._select_best_model(requirements, model_filter)
+            span.set_attribute("model", selected_model_id)
+        return selected_model_id, [], requirements
+
+    def get_agent(self, agent: str) -> AgentEntry:
+        """Look up an agent in the compiled agent index (loaded once)"""
+        if self._agent_index is None:
+            self._agent_index = load_agent_index(self.agent_dir)
+        entry = self._agent_index.get(agent)
+        if entry is None:
+            raise ValueError(f"Unknown agent: {agent}")
+        return entry
+
+    @staticmethod
+    def _agent_strategy_key(agent_entry: AgentEntry, task_type: Optional[TaskType]) -> Optional[str]:
+        """Strategy name in the agent's model_selection for a task type"""
+        if len(agent_entry.strategies) == 1:
+            return next(iter(agent_entry.strategies))
+        key = AGENT_STRATEGY_KEYS.get(task_type)
+        return key if key in agent_entry.strategies else None
+
+    def _agent_candidates(self, agent_entry: AgentEntry, strategy_key: Optional[str]) -> List[str]:
+        """Registry ids for a strategy (primary, fallback, agent default), cached per registry state"""
+        cache_key = (agent_entry.id, strategy_key)
+        cached = self._agent_routes.get(cache_key)
+        if cached is not None and cached[0] is self.registry.models:
+            return cached[1]
+
+        strategy = agent_entry.strategies.get(strategy_key) if strategy_key else None
+        names = [strategy.primary, strategy.fallback] if strategy else []
+        names.append(agent_entry.default_model)
 
-    def _select_best_model(self, requirements: TaskRequirements) -> Optional[str]:
+        candidates = []
+        for name in names:
+            model_id = self.registry.resolve_id(name) if name else None
+            if model_id and model_id not in candidates:
+                candidates.append(model_id)
+            elif name and not model_id:
+                logger.debug(f"Agent {agent_entry.id}: model {name} is not available")
+
+        self._agent_routes[cache_key] = (self.registry.models, candidates)
+        return candidates
+
+    def _agent_model_filter(self, agent_entry: AgentEntry, prompt: str,
+                            kwargs: Dict[str, Any]) -> Callable[[ModelCapabilities], bool]:
+        """Predicate enforcing the agent's cost hard limit and offline policy"""
+        hard_limit = agent_entry.cost_limits.get("hard_limit")
+        local_only = self.offline and agent_entry.force_local_if_offline
+        messages = kwargs.get("messages") or [{"content": prompt}]
+        input_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        output_tokens = kwargs.get("max_tokens") or DEFAULT_OUTPUT_TOKENS
+
+        def allowed(model: Optional[ModelCapabilities]) -> bool:
+            if model is None:
+                return False
+            if local_only and model.provider != ModelProvider.OLLAMA:
+                return False
+            if hard_limit is not None:
+                estimate = model.cost(input_tokens, output_tokens)
+                if estimate > hard_limit:
+                    return False
+            return True
+        return allowed
+
+    def _select_best_model(self, requirements: TaskRequirements,
+                           model_filter: Optional[Callable[[ModelCapabilities], bool]] = None) -> Optional[str]:
         """Select the best model based on requirements and guide"""
         
         # 1. Check Guide Recommendations first
@@ -75,6 +538,8 @@ class ModelOrchestrator:
             valid_recs = []
             for mid in guide_recs:
                 model = self.registry.get_model(mid)
+                if model_filter and not model_filter(model):
+                    continue
                 if model and self.scorer.score(model, requirements) > 0:
                     valid_recs.append(mid)
             
@@ -83,13 +548,15 @@ class ModelOrchestrator:
 
         # 2. Score all models
         candidates = []
-        for model in self.registry.get_all_models():
+        for model_id, model in self.registry.models.items():
             if self.guide.is_model_blocked(model.api_name):
                 continue
+            if model_filter and not model_filter(model):
+                continue
                 
             score = self.scorer.score(model, requirements)
             if score > 0:
-                candidates.append((model.api_name, score))
+                candidates.append((model_id, score))
         
         if not candidates:
             return None
@@ -106,46 +573,90 @@ class ModelOrchestrator:
         if "messages" in kwargs:
             messages = kwargs.pop("messages")
             
-        return await client.chat_completion(
-            model=model.api_name,
-            messages=messages,
-            **kwargs
-        )
-
-    async def _handle_fallback(self, requirements: TaskRequirements, prompt: str, failed_model: str, **kwargs) -> APIResponse:
-        """Handle fallback logic"""
-        # Get fallback chain from guide
-        chain = self.guide.get_fallback_chain(requirements.task_type.name)
+        labels = {"model": model.api_name, "provider": model.provider.value}
+        start_time = time.perf_counter()
+        with tracing.span("model.call", labels) as span:
+            try:
+                response = await client.chat_completion(
+                    model=model.api_name,
+                    messages=messages,
+                    **kwargs
+                )
+            except Exception:
+                metrics.MODEL_CALLS.inc(status="error", **labels)
+                raise
+            finally:
+                metrics.MODEL_LATENCY.observe(time.perf_counter() - start_time, **labels)
+            metrics.MODEL_CALLS.inc(status="success", **labels)
+
+            if isinstance(response, APIResponse):
+                input_tokens = response.usage.get("input_tokens") or 0
+                output_tokens = response.usage.get("output_tokens") or 0
+                metrics.TOKENS.inc(input_tokens, model=model.api_name, direction="input")
+                metrics.TOKENS.inc(output_tokens, model=model.api_name, direction="output")
+                metrics.COST.inc(model.cost(input_tokens, output_tokens), model=model.api_name)
+                span.set_attributes({
+                    "tokens.input": input_tokens,
+                    "tokens.output": output_tokens,
+                    "latency_ms": response.latency_ms,
+                })
+            return response
+
+    def _admitted(self, admit: Optional[Admission], model_id: str, model: ModelCapabilities) -> AsyncContextManager:
+        """Admission held around one model attempt (a no-op without a hook)"""
+        if admit is None:
+            return contextlib.nullcontext()
+        return admit(model_id, model, self.registry.local_sizes.get(model_id))
+
+    async def _handle_fallback(self, requirements: TaskRequirements, prompt: str, failed_model: str,
+                               agent_chain: Optional[List[str]] = None,
+                               model_filter: Optional[Callable[[ModelCapabilities], bool]] = None,
+                               admit: Optional[Admission] = None,
+                               **kwargs) -> APIResponse:
+        """Handle fallback logic (agent strategy candidates first)"""
+        with tracing.span("fallback", {"model.failed": failed_model}) as span:
+            # Get fallback chain from guide
+            chain = self.guide.get_fallback_chain(requirements.task_type.name)
         
-        # If no chain, or failed model was last in chain, try to find next best scorer
-        if not chain:
-             # Simple fallback: try next best model from registry
-             candidates = []
-             for model in self.registry.get_all_models():
-                if model.api_name == failed_model: 
-                    continue
-                score = self.scorer.score(model, requirements)
-                if score > 0:
-                    candidates.append((model.api_name, score))
-             candidates.sort(key=lambda x: x[1], reverse=True)
-             chain = [c[0] for c in candidates[:3]] # Try top 3
+            # If no chain, or failed model was last in chain, try to find next best scorer
+            if not chain:
+                 # Simple fallback: try next best model from registry
+                 candidates = []
+                 for model_id, model in self.registry.models.items():
+                    if model_id == failed_model: 
+                        continue
+                    score = self.scorer.score(model, requirements)
+                    if score > 0:
+                        candidates.append((model_id, score))
+                 candidates.sort(key=lambda x: x[1], reverse=True)
+                 chain = [c[0] for c in candidates[:3]] # Try top 3
+            chain = list(agent_chain or []) + [m for m in chain if m not in (agent_chain or [])]
         
-        for model_id in chain:
-            if model_id == failed_model:
-                continue
+            for model_id in chain:
+                if model_id == failed_model:
+                    continue
                 
-            logger.info(f"Fallback to: {model_id}")
-            model_cap = self.registry.get_model(model_id)
-            if not model_cap:
-                continue
+                logger.info(f"Fallback to: {model_id}")
+                span.add_event("fallback.attempt", model=model_id)
+                model_cap = self.registry.get_model(model_id)
+                if not model_cap or (model_filter and not model_filter(model_cap)):
+                    continue
                 
-            try:
-                return await self._call_model(model_cap, prompt, **kwargs)
-            except Exception as e:
-                logger.warning(f"Fallback model {model_id} failed: {e}")
-                continue
+                try:
+                    async with self._admitted(admit, model_id, model_cap):
+                        response = await self._call_model(model_cap, prompt, **kwargs)
+                    span.set_attribute("model", model_id)
+                    metrics.FALLBACKS.inc(failed_model=failed_model, outcome="success")
+                    return response
+                except DeadlineExceeded:
+                    metrics.FALLBACKS.inc(failed_model=failed_model, outcome="timeout")
+                    raise
+                except Exception as e:
+                    logger.warning(f"Fallback model {model_id} failed: {e}")
+                    continue
                 
-        raise RuntimeError("All fallback models failed")
+            metrics.FALLBACKS.inc(failed_model=failed_model, outcome="exhausted")
+            raise RuntimeError("All fallback models failed")
 
     def _get_client(self, provider: str):
         """Get or create API client"""
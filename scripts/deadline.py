@@ -0,0 +1,120 @@
+"""
+Request Deadlines
+A request's deadline is fixed once, where the request enters the
+orchestrator, and is visible to every layer below it through a context
+variable: discovery waits, resource-limiter slots, retries and their
+backoff, fallback, streaming and the HTTP calls themselves all see the time
+left without it being passed down. A nested deadline can only be earlier.
+
+`enforce` makes the current task stop at the deadline: in-flight awaits
+(including HTTP requests) are cancelled and DeadlineExceeded is raised in
+their place.
+"""
+
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """A request ran past its deadline; `partial` holds any streamed output"""
+
+    def __init__(self, message: str, partial: str = ""):
+        super().__init__(message)
+        self.partial = partial
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Absolute deadline on the time.monotonic() clock"""
+    expires_at: float
+    started_at: float
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def exceeded(self, partial: str = "") -> DeadlineExceeded:
+        budget = self.expires_at - self.started_at
+        return DeadlineExceeded(f"Deadline of {budget:.2f}s exceeded after "
+                                f"{time.monotonic() - self.started_at:.2f}s", partial)
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("orchestrator_deadline", default=None)
+
+
+def current() -> Optional[Deadline]:
+    """The deadline bound for the running request, if any"""
+    return _current.get()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (None without one)"""
+    bound = _current.get()
+    return bound.remaining if bound else None
+
+
+def start(timeout_s: Optional[float]) -> Optional[Deadline]:
+    """Deadline `timeout_s` from now, or the current one if that is earlier (or None is given)"""
+    outer = _current.get()
+    if timeout_s is None:
+        return outer
+    now = time.monotonic()
+    if outer is not None and outer.expires_at <= now + timeout_s:
+        return outer
+    return Deadline(now + timeout_s, now)
+
+
+@asynccontextmanager
+async def enforce(bound: Optional[Deadline] = None) -> AsyncIterator[Optional[Deadline]]:
+    """
+    Run the enclosed awaits under `bound` (default: the current deadline),
+    cancelling them when it passes and raising DeadlineExceeded instead.
+    Only wrap awaits, never the `yield` of an async generator: the timeout
+    cancels whichever task is running when it fires.
+    """
+    outer = _current.get()
+    if bound is None or (outer is not None and outer.expires_at < bound.expires_at):
+        bound = outer
+    if bound is None:
+        yield None
+        return
+    if bound.expired:
+        raise bound.exceeded()
+    token = _current.set(bound)
+    timeout = asyncio.timeout(bound.remaining)
+    try:
+        async with timeout:
+            yield bound
+    except TimeoutError as e:
+        # Leave other timeouts (and an inner enforce's error) as they are
+        if isinstance(e, DeadlineExceeded) or not (timeout.expired() or bound.expired):
+            raise
+        raise bound.exceeded() from None
+    finally:
+        _current.reset(token)
+
+
+async def bounded(iterator: AsyncIterator[T], bound: Optional[Deadline] = None) -> AsyncIterator[T]:
+    """Items of `iterator`, each awaited under `bound` (see enforce); closes it on exit"""
+    try:
+        while True:
+            async with enforce(bound):
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+            yield item
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -20,7 +20,8 @@ fi
 
 # Script directory
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
-PYTHON_SCRIPT="$SCRIPT_DIR/grok_api.py"
+# grok_api imports the shared async clients, so it runs as a package module
+GROK_MODULE="model_orchestrator.grok_api"
 
 # Function to display help
 show_help() {
@@ -87,7 +88,7 @@ EOF
 # Function to list models with formatting
 list_models() {
     echo -e "${CYAN}Available Grok Models:${NC}"
-    python3 "$PYTHON_SCRIPT" list --category "$1"
+    python3 -m "$GROK_MODULE" list --category "$1"
 }
 
 # Parse command
@@ -97,49 +98,49 @@ case "$1" in
         ;;
     list-code)
         echo -e "${CYAN}Code-Focused Models:${NC}"
-        python3 "$PYTHON_SCRIPT" list | grep -E "(code|Code)"
+        python3 -m "$GROK_MODULE" list | grep -E "(code|Code)"
         ;;
     list-vision)
         echo -e "${CYAN}Vision Models:${NC}"
-        python3 "$PYTHON_SCRIPT" list --category vision
+        python3 -m "$GROK_MODULE" list --category vision
         ;;
     list-large)
         echo -e "${CYAN}Large Context Models (>1M tokens):${NC}"
-        python3 "$PYTHON_SCRIPT" list | grep -E "2000000|1000000"
+        python3 -m "$GROK_MODULE" list | grep -E "2000000|1000000"
         ;;
     chat)
         shift
-        python3 "$PYTHON_SCRIPT" chat "$@"
+        python3 -m "$GROK_MODULE" chat "$@"
         ;;
     vision)
         shift
-        python3 "$PYTHON_SCRIPT" vision "$@"
+        python3 -m "$GROK_MODULE" vision "$@"
         ;;
     generate)
         shift
-        python3 "$PYTHON_SCRIPT" image "$@"
+        python3 -m "$GROK_MODULE" image "$@"
         ;;
     info)
         shift
-        python3 "$PYTHON_SCRIPT" info "$@"
+        python3 -m "$GROK_MODULE" info "$@"
         ;;
     quick)
         shift
         prompt="${1:-Hello, what can you help with today?}"
         echo -e "${BLUE}Using Grok-3 (standard model)...${NC}"
-        python3 "$PYTHON_SCRIPT" chat -m grok-3 -p "$prompt"
+        python3 -m "$GROK_MODULE" chat -m grok-3 -p "$prompt"
         ;;
     code)
         shift
         prompt="${1:-Write a hello world program}"
         echo -e "${BLUE}Using Grok Code Fast model...${NC}"
-        python3 "$PYTHON_SCRIPT" chat -m grok-code-fast-1 -p "$prompt"
+        python3 -m "$GROK_MODULE" chat -m grok-code-fast-1 -p "$prompt"
         ;;
     reason)
         shift
         prompt="${1:-Provide a thoughtful analysis}"
         echo -e "${BLUE}Using Grok-4 Fast Reasoning (2M context)...${NC}"
-        python3 "$PYTHON_SCRIPT" chat -m grok-4-fast-reasoning -p "$prompt"
+        python3 -m "$GROK_MODULE" chat -m grok-4-fast-reasoning -p "$prompt"
         ;;
     -h|--help|help)
         show_help
@@ -4,175 +4,136 @@ Direct xAI Grok API Integration
 Supports all Grok models including vision and image generation
 """
 
-import os
 import sys
-import json
-import yaml
-import base64
-import requests
-from pathlib import Path
-from typing import Optional, Dict, Any, List
-from datetime import datetime
+import asyncio
+import functools
+from typing import Optional, Dict, Iterator, List
+
+from .api_clients import GrokAPIClient
+from .registry import ModelRegistry
+from .types import ModelProvider
+
+
+class GrokCatalog:
+    """Grok models and aliases from the registry's xAI definitions (model_definitions/xai.yaml)"""
+
+    def __init__(self, registry: ModelRegistry):
+        self.registry = registry
+
+    def resolve(self, model_id: str) -> str:
+        """API model name for a registry ID or alias (unknown names pass through)"""
+        return self.registry.api_name(model_id)
+
+    def list_models(self, category: Optional[str] = None) -> List[Dict]:
+        """List available models, optionally filtered by category"""
+        return self.registry.get_catalog(ModelProvider.XAI, category)
+
+    def get_model_info(self, model_id: str) -> Optional[Dict]:
+        """Get detailed information about a model by ID or alias"""
+        entry = self.registry.catalog_entry(model_id)
+        return entry if entry and entry["provider"] == ModelProvider.XAI.value else None
+
+
+@functools.lru_cache(maxsize=None)
+def load_catalog() -> GrokCatalog:
+    """Catalog over the default registry, loaded once per process"""
+    return GrokCatalog(ModelRegistry())
+
 
 class GrokAPI:
-    def __init__(self, api_key: Optional[str] = None, config_path: Optional[str] = None):
-        """Initialize Grok API client with configuration"""
-        self.api_key = api_key or os.getenv('XAI_API_KEY')
-        if not self.api_key:
-            raise ValueError("XAI_API_KEY environment variable not set")
-        
-        # Load configuration
-        self.config_path = config_path or Path(__file__).parent / "grok_models_config.yaml"
-        self.config = self._load_config()
-        self.base_url = self.config['api']['base_url']
-        
-    def _load_config(self) -> Dict:
-        """Load model configuration from YAML"""
-        if not os.path.exists(self.config_path):
-            raise FileNotFoundError(f"Config file not found: {self.config_path}")
-        
-        with open(self.config_path, 'r') as f:
-            return yaml.safe_load(f)
-    
+    """
+    Blocking facade over the async GrokAPIClient for the CLI and scripts.
+
+    Calls run on a private event loop, so the client's pooled session is
+    reused across calls. Async code should use GrokAPIClient directly;
+    calling the facade from a running event loop raises RuntimeError.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, registry: Optional[ModelRegistry] = None):
+        """Initialize Grok API client; the catalog comes from `registry` (default registry if None)"""
+        self.client = GrokAPIClient(api_key)
+        self.client.keep_raw_response = True  # The facade returns raw response dicts
+        self.catalog = GrokCatalog(registry) if registry is not None else load_catalog()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def base_url(self) -> str:
+        return self.client.base_url
+
+    def _run(self, coro):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coro.close()
+            raise RuntimeError("GrokAPI blocks the event loop; use GrokAPIClient from async code")
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+
+    def close(self):
+        """Close the HTTP session and the private event loop"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        if self.client.session:
+            self._loop.run_until_complete(self.client.session.close())
+            self.client.session = None
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     def list_models(self, category: Optional[str] = None) -> List[Dict]:
         """List available models, optionally filtered by category"""
-        models = []
-        
-        for cat, model_list in self.config['models'].items():
-            if category and cat != category:
-                continue
-            models.extend(model_list)
-        
-        return models
-    
+        return self.catalog.list_models(category)
+
     def get_model_info(self, model_id: str) -> Optional[Dict]:
         """Get detailed information about a specific model"""
-        # Check aliases first
-        if model_id in self.config['aliases']:
-            model_id = self.config['aliases'][model_id]
-        
-        for category in self.config['models'].values():
-            for model in category:
-                if model['id'] == model_id:
-                    return model
-        return None
-    
-    def chat_completion(self, 
-                        model_id: str, 
-                        messages: List[Dict[str, str]], 
+        return self.catalog.get_model_info(model_id)
+
+    def chat_completion(self,
+                        model_id: str,
+                        messages: List[Dict[str, str]],
                         **kwargs) -> Dict:
-        """Send chat completion request to Grok API"""
-        # Resolve aliases
-        if model_id in self.config['aliases']:
-            model_id = self.config['aliases'][model_id]
-        
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": model_id,
-            "messages": messages,
-            **kwargs
-        }
-        
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=headers,
-            json=payload
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"API Error: {response.status_code} - {response.text}")
-        
-        return response.json()
-    
-    def vision_completion(self, 
-                         model_id: str, 
-                         messages: List[Dict], 
-                         image_path: Optional[str] = None,
+        """Send chat completion request to Grok API; returns the raw response"""
+        response = self._run(self.client.chat_completion(self.catalog.resolve(model_id), messages, **kwargs))
+        return response.raw_response
+
+    def vision_completion(self,
+                          model_id: str,
+                          messages: List[Dict],
+                          image_path: Optional[str] = None,
+                          **kwargs) -> Dict:
+        """Send vision completion request with image input; returns the raw response"""
+        response = self._run(self.client.vision_completion(self.catalog.resolve(model_id), messages,
+                                                           image_path, **kwargs))
+        return response.raw_response
+
+    def image_generation(self,
+                         prompt: str,
+                         model_id: str = "grok-2-image-1212",
                          **kwargs) -> Dict:
-        """Send vision completion request with image input"""
-        if image_path:
-            # Encode image to base64
-            with open(image_path, 'rb') as img_file:
-                image_data = base64.b64encode(img_file.read()).decode('utf-8')
-            
-            # Add image to the last user message
-            for msg in reversed(messages):
-                if msg['role'] == 'user':
-                    if isinstance(msg['content'], str):
-                        msg['content'] = [
-                            {"type": "text", "text": msg['content']},
-                            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_data}"}}
-                        ]
-                    break
-        
-        return self.chat_completion(model_id, messages, **kwargs)
-    
-    def image_generation(self, 
-                        prompt: str,
-                        model_id: str = "grok-2-image-1212",
-                        **kwargs) -> Dict:
         """Generate image using Grok image generation model"""
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": model_id,
-            "prompt": prompt,
-            **kwargs
-        }
-        
-        response = requests.post(
-            f"{self.base_url}/images/generations",
-            headers=headers,
-            json=payload
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"API Error: {response.status_code} - {response.text}")
-        
-        return response.json()
-    
-    def stream_completion(self, 
-                         model_id: str, 
-                         messages: List[Dict[str, str]], 
-                         **kwargs) -> Any:
-        """Stream chat completion responses"""
-        # Resolve aliases
-        if model_id in self.config['aliases']:
-            model_id = self.config['aliases'][model_id]
-        
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": model_id,
-            "messages": messages,
-            "stream": True,
-            **kwargs
-        }
-        
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=headers,
-            json=payload,
-            stream=True
-        )
-        
-        for line in response.iter_lines():
-            if line:
-                line = line.decode('utf-8')
-                if line.startswith('data: '):
-                    data = line[6:]
-                    if data != '[DONE]':
-                        yield json.loads(data)
+        return self._run(self.client.image_generation(prompt, self.catalog.resolve(model_id), **kwargs))
+
+    def stream_completion(self,
+                          model_id: str,
+                          messages: List[Dict[str, str]],
+                          **kwargs) -> Iterator[str]:
+        """Yield the reply text as it streams in"""
+        stream = self.client.stream_completion(self.catalog.resolve(model_id), messages, **kwargs)
+        try:
+            while True:
+                try:
+                    yield self._run(stream.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._run(stream.aclose())
 
 def main():
     """CLI interface for Grok API"""
@@ -189,6 +150,7 @@ def main():
     
     args = parser.parse_args()
     
+    api = None
     try:
         api = GrokAPI()
         
@@ -226,9 +188,7 @@ def main():
             
             if args.stream:
                 for chunk in api.stream_completion(args.model, messages):
-                    if 'choices' in chunk:
-                        content = chunk['choices'][0].get('delta', {}).get('content', '')
-                        print(content, end='', flush=True)
+                    print(chunk, end='', flush=True)
                 print()
             else:
                 response = api.chat_completion(args.model, messages)
@@ -254,6 +214,9 @@ def main():
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
+    finally:
+        if api is not None:
+            api.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
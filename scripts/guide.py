@@ -1,93 +1,271 @@
+"""
+Model Selection Guide
+Compiles MODELS.md (task recommendations, fallback chains and blocked
+models) into an indexed guide: per-task lookups are dictionary hits keyed
+both by the guide's task names and by TaskType names, and blocked models
+are a set. Compiled guides are cached on disk keyed by the file's stat
+fingerprint (and content hash, so a touched but unchanged file is not
+re-parsed). A parser can watch the file and swap in a recompiled guide as a
+whole, so routing lookups never touch the filesystem.
+"""
+
+import os
 import re
+import pickle
+import asyncio
+import hashlib
 import logging
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, Any, FrozenSet, Optional, Tuple
+
+from .types import TaskType
 
 logger = logging.getLogger(__name__)
 
+GUIDE_CACHE_VERSION = 1
+DEFAULT_GUIDE_PATH = Path.home() / "Obsidian/Power Prompts/gitignore/Claude Context/MODELS.md"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "model_orchestrator"
+MISSING = "missing"  # Fingerprint of a guide file that does not exist
+
+
+@dataclass(frozen=True)
+class CompiledGuide:
+    """Indexed view of one version of MODELS.md"""
+    task_mappings: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    fallback_chains: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    blocked: FrozenSet[str] = frozenset()
+    fingerprint: str = MISSING
+    content_hash: str = ""
+
+    @property
+    def rules(self) -> Dict[str, Any]:
+        """The guide in the parser's original rules-dict form"""
+        return {
+            "task_mappings": {k: list(v) for k, v in self.task_mappings.items() if k == k.lower()},
+            "fallback_chains": {k: list(v) for k, v in self.fallback_chains.items() if k == k.lower()},
+            "blocked_models": sorted(self.blocked),
+        }
+
+
+def parse_guide_text(content: str) -> Dict[str, Any]:
+    """Parse MODELS.md text into a rules dict"""
+    rules = {
+        "task_mappings": {},
+        "fallback_chains": {},
+        "blocked_models": [],
+    }
+
+    # Parse task-to-model mappings
+    task_section = re.search(r'### Code Tasks(.*?)###', content, re.DOTALL)
+    if task_section:
+        lines = task_section.group(1).strip().split('\n')
+        for line in lines:
+            if '**' in line and ':' in line:
+                match = re.match(r'- \*\*(.+?)\*\*: (.+)', line)
+                if match:
+                    task = match.group(1).lower().replace(' ', '_')
+                    models = [m.strip() for m in match.group(2).split('>')]
+                    rules["task_mappings"][task] = models
+
+    # Parse blocked models
+    blocked_section = re.search(r'### Blocked Models(.*?)##', content, re.DOTALL)
+    if blocked_section:
+        lines = blocked_section.group(1).strip().split('\n')
+        for line in lines:
+            if line.startswith('- '):
+                model = line.split(':')[0].replace('- ', '').strip()
+                rules["blocked_models"].append(model)
+
+    # Parse fallback chains
+    fallback_section = re.search(r'### Fallback Chains(.*?)###', content, re.DOTALL)
+    if fallback_section:
+        lines = fallback_section.group(1).strip().split('\n')
+        for line in lines:
+            if '→' in line:
+                parts = line.split(':')
+                if len(parts) == 2:
+                    task = parts[0].replace('- ', '').strip().lower()
+                    chain = [m.strip() for m in parts[1].split('→')]
+                    rules["fallback_chains"][task] = chain
+
+    return rules
+
+
+def default_rules() -> Dict[str, Any]:
+    """Rules used when MODELS.md is not available"""
+    return {
+        "task_mappings": {
+            "code_generation": ["codellama:34b", "magicoder:7b", "grok-code-fast-1"],
+            "reasoning": ["o1-pro", "grok-4-fast-reasoning", "gemini-2.5-pro"],
+            "translation": ["qwen2.5-32b-instruct", "qwen3:8b", "gemini-2.5-flash"]
+        },
+        "fallback_chains": {},
+        "blocked_models": ["llama3.2"],
+    }
+
+
+def _index_by_task_type(table: Dict[str, Tuple[str, ...]]) -> Dict[str, Tuple[str, ...]]:
+    """Add TaskType.name keys (e.g. CODE_GENERATION) for entries named after a task type"""
+    indexed = dict(table)
+    for task_type in TaskType:
+        entry = table.get(task_type.name.lower())
+        if entry is not None:
+            indexed[task_type.name] = entry
+    return indexed
+
+
+def compile_guide(rules: Dict[str, Any], fingerprint: str = MISSING, content_hash: str = "") -> CompiledGuide:
+    """Build the indexed guide from a rules dict"""
+    return CompiledGuide(
+        task_mappings=_index_by_task_type({k: tuple(v) for k, v in rules["task_mappings"].items()}),
+        fallback_chains=_index_by_task_type({k: tuple(v) for k, v in rules["fallback_chains"].items()}),
+        blocked=frozenset(rules["blocked_models"]),
+        fingerprint=fingerprint,
+        content_hash=content_hash,
+    )
+
+
+def guide_fingerprint(path: Path) -> str:
+    """Fingerprint the guide by size and mtime (stat only, no reading)"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return MISSING
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def cache_path_for(guide_path: Path, cache_dir: Path = DEFAULT_CACHE_DIR) -> Path:
+    """Snapshot file for a guide path (one per guide, so several guides can coexist)"""
+    key = hashlib.sha256(str(guide_path).encode()).hexdigest()[:16]
+    return cache_dir / f"guide-{key}.snapshot"
+
+
+def write_snapshot(guide: CompiledGuide, path: Path) -> None:
+    """Atomically write the compiled guide as plain data"""
+    payload = {
+        "version": GUIDE_CACHE_VERSION,
+        "fingerprint": guide.fingerprint,
+        "content_hash": guide.content_hash,
+        "rules": guide.rules,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: Path) -> Optional[Dict[str, Any]]:
+    """Load a snapshot payload; None if missing or from another version"""
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != GUIDE_CACHE_VERSION:
+        return None
+    return payload
+
+
+_loaded: Dict[str, CompiledGuide] = {}
+
+
+def load_guide(guide_path: Path, cache_path: Optional[Path] = None) -> CompiledGuide:
+    """
+    Load the compiled guide, re-parsing MODELS.md only when it changed.
+    Repeated loads in one process are served from memory while the file's
+    fingerprint is unchanged; across processes, from the on-disk snapshot.
+    """
+    fingerprint = guide_fingerprint(guide_path)
+    key = str(guide_path)
+    guide = _loaded.get(key)
+    if guide is not None and guide.fingerprint == fingerprint:
+        return guide
+
+    if fingerprint == MISSING:
+        logger.warning(f"MODELS.md not found at {guide_path}")
+        guide = compile_guide(default_rules())
+        _loaded[key] = guide
+        return guide
+
+    cache_path = cache_path or cache_path_for(guide_path)
+    payload = read_snapshot(cache_path)
+    if payload is not None and payload["fingerprint"] == fingerprint:
+        guide = compile_guide(payload["rules"], fingerprint, payload["content_hash"])
+        _loaded[key] = guide
+        return guide
+
+    try:
+        data = guide_path.read_bytes()
+    except OSError as e:
+        logger.error(f"Failed to read MODELS.md: {e}")
+        return compile_guide(default_rules())
+    content_hash = hashlib.sha256(data).hexdigest()
+
+    if payload is not None and payload["content_hash"] == content_hash:
+        # Touched but unchanged: reuse the compiled rules under the new fingerprint
+        rules = payload["rules"]
+    else:
+        rules = parse_guide_text(data.decode("utf-8", errors="replace"))
+    guide = compile_guide(rules, fingerprint, content_hash)
+    try:
+        write_snapshot(guide, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write guide snapshot {cache_path}: {e}")
+    _loaded[key] = guide
+    return guide
+
+
 class ModelGuideParser:
     """Parse MODELS.md for model selection guidance"""
 
-    def __init__(self, guide_path: Optional[str] = None):
-        default_path = Path.home() / "Obsidian/Power Prompts/gitignore/Claude Context/MODELS.md"
-        self.guide_path = Path(guide_path) if guide_path else default_path
-        self.rules = self._parse_guide()
+    def __init__(self, guide_path: Optional[str] = None, cache_path: Optional[str] = None):
+        self.guide_path = Path(guide_path) if guide_path else DEFAULT_GUIDE_PATH
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._guide = load_guide(self.guide_path, self.cache_path)
 
-    def _parse_guide(self) -> Dict[str, Any]:
-        """Parse the MODELS.md file for rules"""
-        if not self.guide_path.exists():
-            logger.warning(f"MODELS.md not found at {self.guide_path}")
-            return self._get_default_rules()
+    @property
+    def rules(self) -> Dict[str, Any]:
+        """Current guide as a rules dict"""
+        return self._guide.rules
 
+    def reload_if_changed(self) -> bool:
+        """Recompile if MODELS.md changed; returns True on reload"""
+        if guide_fingerprint(self.guide_path) == self._guide.fingerprint:
+            return False
         try:
-            with open(self.guide_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            guide = load_guide(self.guide_path, self.cache_path)
         except Exception as e:
-            logger.error(f"Failed to read MODELS.md: {e}")
-            return self._get_default_rules()
-
-        rules = {
-            "task_mappings": {},
-            "fallback_chains": {},
-            "blocked_models": [],
-        }
+            logger.error(f"Guide reload failed, keeping previous rules: {e}")
+            return False
+        # One attribute swap: lookups see either the old guide or the new one
+        self._guide = guide
+        logger.info(f"Model guide reloaded from {self.guide_path}")
+        return True
 
-        # Parse task-to-model mappings
-        task_section = re.search(r'### Code Tasks(.*?)###', content, re.DOTALL)
-        if task_section:
-            lines = task_section.group(1).strip().split('\n')
-            for line in lines:
-                if '**' in line and ':' in line:
-                    match = re.match(r'- \*\*(.+?)\*\*: (.+)', line)
-                    if match:
-                        task = match.group(1).lower().replace(' ', '_')
-                        models = [m.strip() for m in match.group(2).split('>')]
-                        rules["task_mappings"][task] = models
-
-        # Parse blocked models
-        blocked_section = re.search(r'### Blocked Models(.*?)##', content, re.DOTALL)
-        if blocked_section:
-            lines = blocked_section.group(1).strip().split('\n')
-            for line in lines:
-                if line.startswith('- '):
-                    model = line.split(':')[0].replace('- ', '').strip()
-                    rules["blocked_models"].append(model)
-
-        # Parse fallback chains
-        fallback_section = re.search(r'### Fallback Chains(.*?)###', content, re.DOTALL)
-        if fallback_section:
-            lines = fallback_section.group(1).strip().split('\n')
-            for line in lines:
-                if '→' in line:
-                    parts = line.split(':')
-                    if len(parts) == 2:
-                        task = parts[0].replace('- ', '').strip().lower()
-                        chain = [m.strip() for m in parts[1].split('→')]
-                        rules["fallback_chains"][task] = chain
-
-        return rules
-
-    def _get_default_rules(self) -> Dict[str, Any]:
-        """Get default rules when MODELS.md is not available"""
-        return {
-            "task_mappings": {
-                "code_generation": ["codellama:34b", "magicoder:7b", "grok-code-fast-1"],
-                "reasoning": ["o1-pro", "grok-4-fast-reasoning", "gemini-2.5-pro"],
-                "translation": ["qwen2.5-32b-instruct", "qwen3:8b", "gemini-2.5-flash"]
-            },
-            "fallback_chains": {},
-            "blocked_models": ["llama3.2"],
-        }
+    async def watch(self, interval: float = 2.0):
+        """Poll MODELS.md off the event loop and hot-reload on change"""
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.reload_if_changed)
 
-    def get_recommended_models(self, task_type: str) -> List[str]:
-        """Get recommended models for a task type"""
-        task_key = task_type.lower().replace(' ', '_')
-        return self.rules.get("task_mappings", {}).get(task_key, [])
+    def get_recommended_models(self, task_type: str) -> Tuple[str, ...]:
+        """Get recommended models for a task type (guide task name or TaskType name)"""
+        mappings = self._guide.task_mappings
+        models = mappings.get(task_type)
+        if models is None:
+            models = mappings.get(task_type.lower().replace(' ', '_'), ())
+        return models
 
-    def get_fallback_chain(self, task_type: str) -> List[str]:
+    def get_fallback_chain(self, task_type: str) -> Tuple[str, ...]:
         """Get fallback chain for a task"""
-        return self.rules.get("fallback_chains", {}).get(task_type.lower(), [])
+        chains = self._guide.fallback_chains
+        chain = chains.get(task_type)
+        if chain is None:
+            chain = chains.get(task_type.lower(), ())
+        return chain
 
     def is_model_blocked(self, model_id: str) -> bool:
         """Check if model is blocked"""
-        return model_id in self.rules.get("blocked_models", [])
+        return model_id in self._guide.blocked
@@ -0,0 +1,566 @@
+"""
+Lattice Compiler
+Compiles a Lattice-Lock lattice.yaml (research/lattice_lock_llm_specification.txt)
+into its versioned types module (src/shared/types_vX.py). Every entity, enum
+and interface is a hashed section: only changed sections are re-rendered,
+unchanged ones are reused from the previous output, and the file is left
+untouched when the generated bytes are identical. A manifest next to the
+module records section hashes, dependencies and the files each interface
+locks, so downstream tools can rebuild only what a change affects.
+"""
+
+import os
+import re
+import json
+import time
+import pickle
+import hashlib
+import keyword
+import logging
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+logger = logging.getLogger(__name__)
+
+COMPILER_VERSION = 3
+MANIFEST_VERSION = 1
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "model_orchestrator" / "lattice"
+SECTION_KEYS = ("entities", "interfaces")
+
+SCALAR_TYPES = {
+    "uuid": "UUID",
+    "decimal": "Decimal",
+    "string": "str",
+    "str": "str",
+    "int": "int",
+    "float": "float",
+    "bool": "bool",
+    "datetime": "datetime",
+    "date": "date",
+    "any": "Any",
+}
+
+HEADER = """\
+# ------------------------------------------------------------------
+# AUTO-GENERATED BY LATTICE COMPILER v{compiler}
+# Lattice Version: {version}
+# DO NOT EDIT MANUALLY — WILL BE OVERWRITTEN
+# ------------------------------------------------------------------
+from __future__ import annotations
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional, Literal, Protocol
+from uuid import UUID
+from decimal import Decimal
+from datetime import date, datetime
+from enum import Enum
+
+
+# --- ENTITIES, ENUMS & INTERFACES ---
+"""
+
+FOOTER = """
+
+# --- TYPE ALIASES FOR READABILITY ---
+Money = Decimal
+Quantity = Decimal
+"""
+
+_IDENTIFIER = re.compile(r"[A-Za-z_]\w*")
+
+
+class LatticeError(ValueError):
+    """Raised for a lattice definition that cannot be compiled."""
+
+
+@dataclass
+class Section:
+    """One generated block of the types module"""
+    name: str
+    kind: str  # entity | enum | interface
+    hash: str
+    depends_on: List[str] = field(default_factory=list)
+    file: Optional[str] = None  # Implementation file locked to an interface
+
+
+@dataclass
+class CompileResult:
+    """Outcome of a compile"""
+    output_path: Path
+    manifest_path: Path
+    version: str
+    written: bool                 # Output bytes changed
+    changed: List[str]            # Sections added or re-rendered
+    removed: List[str]
+    affected_files: List[str]     # Interface files whose contract may have changed
+    reused: int = 0               # Sections reused from the previous output
+    elapsed_ms: float = 0.0
+
+
+_TOP_KEY = re.compile(r"^([A-Za-z_][\w-]*):(.*)$")
+_ANCHOR = re.compile(r"(^|[\s\[{,])[&*!][\w-]", re.MULTILINE)
+
+
+def _split_blocks(text: str) -> Optional[Tuple[str, Dict[str, List[str]]]]:
+    """
+    Split lattice.yaml into its top-level text and one block per entity/interface.
+
+    Returns None for layouts this does not handle (flow style sections,
+    anchors, multiple documents), which are parsed as a whole instead.
+    """
+    if _ANCHOR.search(text) or "\t" in text or "\n---" in text:
+        return None
+    rest, sections, section, indent = [], {}, None, None
+    for line in text.splitlines(keepends=True):
+        stripped = line.lstrip(" ")
+        if not stripped.strip() or stripped.startswith("#"):
+            if section and sections[section]:
+                sections[section][-1] += line
+            else:
+                rest.append(line)
+            continue
+        current = len(line) - len(stripped)
+        if current == 0:
+            match = _TOP_KEY.match(line)
+            if not match:
+                return None
+            if match.group(1) in SECTION_KEYS:
+                if match.group(2).split("#")[0].strip():
+                    return None
+                section, indent = match.group(1), None
+                sections[section] = []
+            else:
+                section = None
+                rest.append(line)
+            continue
+        if section is None:
+            rest.append(line)
+            continue
+        if indent is None:
+            indent = current
+        if current == indent:
+            sections[section].append(line[indent:])
+        elif current > indent and sections[section]:
+            sections[section][-1] += line[indent:]
+        else:
+            return None
+    return "".join(rest), sections
+
+
+class _BlockCache:
+    """Parsed YAML blocks keyed by content hash, persisted between runs"""
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.blocks: Dict[str, Any] = {}
+        self.used: Dict[str, Any] = {}
+        if path:
+            try:
+                with open(path, "rb") as f:
+                    cached = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                cached = None
+            if isinstance(cached, dict) and cached.get("version") == COMPILER_VERSION:
+                self.blocks = cached["blocks"]
+
+    def parse(self, text: str) -> Any:
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        if key in self.blocks:
+            value = self.blocks[key]
+        else:
+            value = yaml.load(text, Loader=SafeLoader)
+        self.used[key] = value
+        return value
+
+    def save(self):
+        """Keep only the blocks of the current source"""
+        if not self.path or self.used.keys() == self.blocks.keys():
+            return
+        _write_atomic(self.path, pickle.dumps({"version": COMPILER_VERSION, "blocks": self.used},
+                                              protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _parse(source: bytes, path: Path, cache: Optional[_BlockCache] = None) -> Dict[str, Any]:
+    data = None
+    if cache is not None:
+        text = source.decode("utf-8")
+        split = _split_blocks(text)
+        if split is not None:
+            rest, sections = split
+            data = cache.parse(rest) or {}
+            if not isinstance(data, dict):
+                raise LatticeError(f"{path}: expected a mapping at the top level")
+            # A copy: the merged sections must not end up in the cached block
+            data = dict(data)
+            for section, blocks in sections.items():
+                merged = {}
+                for block in blocks:
+                    value = cache.parse(block)
+                    if not isinstance(value, dict):
+                        raise LatticeError(f"{path}: invalid {section} entry: {block.splitlines()[0]!r}")
+                    merged.update(value)
+                data[section] = merged
+    if data is None:
+        data = yaml.load(source, Loader=SafeLoader) or {}
+    if not isinstance(data, dict):
+        raise LatticeError(f"{path}: expected a mapping at the top level")
+    for key in ("version", "generated_module"):
+        if key not in data:
+            raise LatticeError(f"{path}: missing '{key}'")
+    return data
+
+
+def load_lattice(path: Path) -> Dict[str, Any]:
+    """Parse lattice.yaml"""
+    path = Path(path)
+    return _parse(path.read_bytes(), path)
+
+
+def _digest(value: Any) -> str:
+    # repr of parsed YAML is deterministic for a given source order and much faster than json.dumps
+    return hashlib.sha256(repr(value).encode("utf-8")).hexdigest()[:16]
+
+
+def _member_name(value: Any) -> str:
+    name = re.sub(r"\W", "_", str(value).lower())
+    if not name or name[0].isdigit():
+        name = f"_{name}"
+    return f"{name}_" if keyword.iskeyword(name) else name
+
+
+def _type_expr(spec: str) -> str:
+    """Python annotation for a lattice type string (scalars, entity names, list[T], optional[T])"""
+    spec = spec.strip()
+    match = re.fullmatch(r"(list|optional|dict)\[(.+)\]", spec, re.IGNORECASE)
+    if match:
+        outer, inner = match.group(1).lower(), match.group(2)
+        if outer == "dict":
+            key, _, value = inner.partition(",")
+            return f"Dict[{_type_expr(key)}, {_type_expr(value)}]"
+        return f"{'List' if outer == 'list' else 'Optional'}[{_type_expr(inner)}]"
+    return SCALAR_TYPES.get(spec.lower(), spec)
+
+
+def _render_enum(name: str, values: List[Any]) -> List[str]:
+    if not values:
+        raise LatticeError(f"Enum {name} has no values")
+    lines = [f"class {name}(str, Enum):"]
+    lines += [f"    {_member_name(v)} = {str(v)!r}" for v in values]
+    return lines
+
+
+def _render_entity(name: str, defn: Dict[str, Any]) -> str:
+    if "enum" in defn:
+        return "\n".join(_render_enum(name, defn["enum"]))
+
+    blocks, lines = [], [f"class {name}(BaseModel):"]
+    if defn.get("description"):
+        lines.append(f'    """{defn["description"]}"""')
+    fields = defn.get("fields") or {}
+    for field_name, info in fields.items():
+        default = None
+        if isinstance(info, dict):
+            if "enum" in info:
+                enum_name = f"{name}{field_name.title().replace('_', '')}Enum"
+                blocks.append("\n".join(_render_enum(enum_name, info["enum"])))
+                annotation = enum_name
+                if "default" in info:
+                    default = f"{enum_name}.{_member_name(info['default'])}"
+            elif "list" in info:
+                annotation = f"List[{_type_expr(str(info['list']))}]"
+            else:
+                annotation = _type_expr(str(info.get("type", "any")))
+                if "default" in info:
+                    default = repr(info["default"])
+            if info.get("optional"):
+                annotation = f"Optional[{annotation}]"
+                default = default or "None"
+        else:
+            annotation = _type_expr(str(info))
+        lines.append(f"    {field_name}: {annotation}" + (f" = {default}" if default else ""))
+    if not fields and len(lines) == 1:
+        lines.append("    pass")
+    blocks.append("\n".join(lines))
+    return "\n\n\n".join(blocks)
+
+
+def _params(spec: Any) -> List[Tuple[str, str]]:
+    """Method params from {name: type} or 'name: type, name: type'"""
+    if not spec:
+        return []
+    if isinstance(spec, dict):
+        return [(str(k), str(v)) for k, v in spec.items()]
+    params = []
+    for part in str(spec).split(","):
+        pname, sep, ptype = part.partition(":")
+        if not sep:
+            raise LatticeError(f"Invalid parameter spec: {part.strip()!r}")
+        params.append((pname.strip(), ptype.strip()))
+    return params
+
+
+def _render_interface(name: str, defn: Dict[str, Any]) -> str:
+    lines = [f"class {name}(Protocol):"]
+    if defn.get("description"):
+        lines.append(f'    """{defn["description"]}"""')
+    methods = defn.get("methods") or {}
+    for method, spec in methods.items():
+        spec = spec or {}
+        args = "".join(f", {p}: {_type_expr(t)}" for p, t in _params(spec.get("params")))
+        returns = _type_expr(str(spec.get("returns", "None")))
+        lines.append(f"    def {method}(self{args}) -> {returns}: ...")
+    if not methods and len(lines) == 1:
+        lines.append("    pass")
+    return "\n".join(lines)
+
+
+def _type_refs(values: List[str], names: Set[str]) -> Set[str]:
+    refs = set()
+    for value in values:
+        refs.update(tok for tok in _IDENTIFIER.findall(value) if tok in names)
+    return refs
+
+
+def build_sections(data: Dict[str, Any]) -> Dict[str, Tuple[Section, Dict[str, Any]]]:
+    """Sections in declaration order with their hashes and dependencies"""
+    entities = data.get("entities") or {}
+    interfaces = data.get("interfaces") or {}
+    overlap = set(entities) & set(interfaces)
+    if overlap:
+        raise LatticeError(f"Names defined as both entity and interface: {', '.join(sorted(overlap))}")
+    names = set(entities) | set(interfaces)
+
+    locked_files = {iface: path for path, iface in (data.get("file_structure_lock") or {}).items()}
+    by_file = {path: iface for iface, path in locked_files.items()}
+
+    sections = {}
+    for name, defn in entities.items():
+        defn = defn or {}
+        kind = "enum" if "enum" in defn else "entity"
+        types = []
+        for info in (defn.get("fields") or {}).values():
+            if isinstance(info, dict):
+                types += [str(info[k]) for k in ("type", "list") if k in info]
+            else:
+                types.append(str(info))
+        deps = sorted(_type_refs(types, names) - {name})
+        sections[name] = (Section(name, kind, _digest([COMPILER_VERSION, kind, name, defn]), deps), defn)
+
+    for name, defn in interfaces.items():
+        defn = defn or {}
+        types = []
+        for spec in (defn.get("methods") or {}).values():
+            spec = spec or {}
+            types += [t for _, t in _params(spec.get("params"))] + [str(spec.get("returns", ""))]
+        deps = _type_refs(types, names)
+        for dep in defn.get("depends_on") or []:
+            dep = by_file.get(dep, dep)
+            if dep not in interfaces:
+                raise LatticeError(f"Interface {name} depends on unknown interface {dep}")
+            deps.add(dep)
+        deps.discard(name)
+        digest = _digest([COMPILER_VERSION, "interface", name, defn])
+        sections[name] = (Section(name, "interface", digest, sorted(deps),
+                                  defn.get("file") or locked_files.get(name)), defn)
+    return sections
+
+
+def _dependency_order(sections: Dict[str, Tuple[Section, Dict[str, Any]]]) -> List[str]:
+    """Declaration order, moved so definitions precede their users where the graph allows"""
+    order, state = [], {}
+
+    def visit(name: str):
+        if state.get(name):
+            return  # Done, or a cycle (forward references are fine with postponed annotations)
+        state[name] = 1
+        for dep in sections[name][0].depends_on:
+            visit(dep)
+        state[name] = 2
+        order.append(name)
+
+    for name in sections:
+        visit(name)
+    return order
+
+
+def _dependents(sections: Dict[str, Section]) -> Dict[str, List[str]]:
+    reverse: Dict[str, List[str]] = {name: [] for name in sections}
+    for section in sections.values():
+        for dep in section.depends_on:
+            reverse[dep].append(section.name)
+    return reverse
+
+
+def read_manifest(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("manifest_version") != MANIFEST_VERSION or manifest.get("compiler_version") != COMPILER_VERSION:
+        return None
+    return manifest
+
+
+def _write_atomic(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _previous_sections(manifest: Optional[Dict[str, Any]], output: Optional[bytes]) -> Dict[str, str]:
+    """Section hash -> rendered text from the previous output, if it was not hand-edited"""
+    if not manifest or output is None or hashlib.sha256(output).hexdigest() != manifest.get("output_hash"):
+        return {}
+    text = output.decode("utf-8")
+    return {info["hash"]: text[info["span"][0]:info["span"][1]]
+            for info in manifest["sections"].values()}
+
+
+def compile_lattice(lattice_path: Path,
+                    output_dir: Optional[Path] = None,
+                    force: bool = False,
+                    cache_dir: Optional[Path] = DEFAULT_CACHE_DIR) -> CompileResult:
+    """
+    Compile lattice.yaml into <output_dir>/<generated_module>.py.
+
+    Args:
+        lattice_path: Path to lattice.yaml
+        output_dir: Defaults to src/shared next to lattice.yaml
+        force: Re-parse and re-render every section
+        cache_dir: Where parsed YAML blocks are cached between runs (None disables)
+    """
+    start = time.perf_counter()
+    lattice_path = Path(lattice_path)
+    output_dir = Path(output_dir) if output_dir else lattice_path.parent / "src" / "shared"
+    source = lattice_path.read_bytes()
+    source_hash = hashlib.sha256(source).hexdigest()
+
+    cache = None
+    if not force:
+        cache_name = hashlib.sha1(str(lattice_path.resolve()).encode("utf-8")).hexdigest()[:16]
+        cache = _BlockCache(Path(cache_dir) / f"{cache_name}.pickle" if cache_dir else None)
+    data = _parse(source, lattice_path, cache)
+    if cache is not None:
+        cache.save()
+    output_path = output_dir / f"{data['generated_module']}.py"
+    manifest_path = output_dir / f"{data['generated_module']}.manifest.json"
+
+    manifest = None if force else read_manifest(manifest_path)
+    try:
+        previous_output = output_path.read_bytes()
+    except OSError:
+        previous_output = None
+    if (manifest and manifest["source_hash"] == source_hash and previous_output is not None
+            and hashlib.sha256(previous_output).hexdigest() == manifest["output_hash"]):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return CompileResult(output_path, manifest_path, str(data["version"]), False, [], [], [],
+                             len(manifest["sections"]), elapsed_ms)
+
+    reusable = _previous_sections(manifest, previous_output)
+    old_sections = manifest["sections"] if manifest else {}
+
+    sections = build_sections(data)
+    parts = [HEADER.format(compiler=COMPILER_VERSION, version=data["version"])]
+    offset = len(parts[0])
+    spans, changed, reused = {}, [], 0
+    for name in _dependency_order(sections):
+        section, defn = sections[name]
+        text = reusable.get(section.hash)
+        if text is None:
+            if section.kind == "interface":
+                text = _render_interface(name, defn)
+            else:
+                text = _render_entity(name, defn)
+        else:
+            reused += 1
+        if old_sections.get(name, {}).get("hash") != section.hash:
+            changed.append(name)
+
+        separator = "\n\n\n" if len(parts) > 1 else ""
+        offset += len(separator)
+        spans[name] = (offset, offset + len(text))
+        parts.append(separator + text)
+        offset += len(text)
+    parts.append(FOOTER)
+    output = "".join(parts).encode("utf-8")
+    removed = sorted(set(old_sections) - set(sections))
+
+    # Everything that references a changed or removed section may need regenerating
+    plain = {name: s for name, (s, _) in sections.items()}
+    reverse = _dependents(plain)
+    affected, stack = set(), list(changed)
+    for name in removed:
+        stack += [n for n, s in plain.items() if name in s.depends_on]
+    while stack:
+        name = stack.pop()
+        if name in affected or name not in plain:
+            continue
+        affected.add(name)
+        stack.extend(reverse[name])
+    affected_files = sorted({plain[n].file for n in affected if plain[n].file})
+    affected_files += sorted({old_sections[n]["file"] for n in removed if old_sections[n].get("file")})
+
+    written = output != previous_output
+    if written:
+        _write_atomic(output_path, output)
+
+    new_manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "compiler_version": COMPILER_VERSION,
+        "lattice_version": data["version"],
+        "module": data["generated_module"],
+        "source_hash": source_hash,
+        "output_hash": hashlib.sha256(output).hexdigest(),
+        "sections": {
+            name: {
+                "kind": s.kind,
+                "hash": s.hash,
+                "depends_on": s.depends_on,
+                "dependents": sorted(reverse[name]),
+                "file": s.file,
+                "span": list(spans[name]),
+            }
+            for name, s in plain.items()
+        },
+        "files": {s.file: name for name, s in plain.items() if s.file},
+    }
+    if new_manifest != manifest:
+        _write_atomic(manifest_path, json.dumps(new_manifest, sort_keys=True).encode("utf-8"))
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"Compiled lattice {data['version']}: {len(changed)} changed, {reused} reused sections "
+                f"in {elapsed_ms:.1f}ms")
+    return CompileResult(output_path, manifest_path, str(data["version"]), written, changed, removed,
+                         affected_files, reused, elapsed_ms)
+
+
+def main():
+    """CLI: compile lattice.yaml into its types module"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile lattice.yaml into a versioned types module")
+    parser.add_argument("lattice", nargs="?", default="lattice_project/lattice.yaml", help="Path to lattice.yaml")
+    parser.add_argument("--output-dir", help="Output directory (default: src/shared next to lattice.yaml)")
+    parser.add_argument("--force", action="store_true", help="Re-render every section")
+    args = parser.parse_args()
+
+    result = compile_lattice(Path(args.lattice), Path(args.output_dir) if args.output_dir else None, args.force)
+    status = "written" if result.written else "unchanged"
+    print(f"Compiled lattice {result.version} -> {result.output_path} ({status}, "
+          f"{len(result.changed)} changed, {result.reused} reused, {result.elapsed_ms:.1f}ms)")
+    for path in result.affected_files:
+        print(f"  affected: {path}")
+
+
+if __name__ == "__main__":
+    main()
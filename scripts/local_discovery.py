@@ -0,0 +1,202 @@
+"""
+Ollama Model Discovery
+Discovers installed local models through the Ollama HTTP API and derives
+ModelCapabilities from /api/show metadata. Results are cached in an on-disk
+manifest keyed by model digest so restarts do not re-query unchanged models.
+"""
+
+import os
+import json
+import math
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Any
+
+import aiohttp
+
+from .types import ModelCapabilities, ModelProvider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+DEFAULT_MANIFEST_PATH = Path.home() / ".cache" / "model_orchestrator" / "ollama_manifest.json"
+
+# Name fragments used to recognise specialised models (mirrors LocalModelAutomation)
+CODE_KEYWORDS = ["code", "coder", "magicoder", "starcoder"]
+REASONING_KEYWORDS = ["deepseek-r1", "qwq", "reason", "math"]
+VISION_KEYWORDS = ["vision", "llava", "bakllava"]
+
+
+class OllamaDiscoveryError(RuntimeError):
+    """Raised when the Ollama API cannot be reached or returns garbage."""
+
+
+def _parameter_count_b(parameter_size: str, name: str) -> float:
+    """Parse '7.6B' / '1.3B' / '270M' (or the model tag) into billions of parameters"""
+    for text in (parameter_size, name.split(":")[-1]):
+        text = (text or "").strip().lower()
+        for suffix, scale in (("b", 1.0), ("m", 0.001)):
+            head = text.split("-")[0]
+            if head.endswith(suffix):
+                try:
+                    return float(head[:-1]) * scale
+                except ValueError:
+                    continue
+    return 7.0  # Typical default for untagged models
+
+
+def _summarize_show(show: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the /api/show fields capability derivation needs"""
+    model_info = show.get("model_info") or {}
+    context_length = next(
+        (v for k, v in model_info.items() if k.endswith(".context_length") and isinstance(v, int)),
+        None,
+    )
+    details = show.get("details") or {}
+    return {
+        "context_length": context_length,
+        "quantization": details.get("quantization_level"),
+        "parameter_size": details.get("parameter_size", ""),
+        "family": details.get("family", ""),
+        "capabilities": list(show.get("capabilities") or []),
+    }
+
+
+def build_capabilities(name: str,
+                       entry: Dict[str, Any],
+                       known: Optional[ModelCapabilities] = None) -> ModelCapabilities:
+    """
+    Derive ModelCapabilities for an installed model.
+
+    Scores come from the curated definition when one exists; otherwise they
+    are estimated from parameter count and model family.
+    """
+    meta = entry.get("show", {})
+    size_gb = round(entry.get("size", 0) / (1024 ** 3), 3) or None
+    context_window = meta.get("context_length") or (known.context_window if known else 4096)
+    name_lower = name.lower()
+    capabilities = meta.get("capabilities", [])
+    supports_vision = "vision" in capabilities or any(k in name_lower for k in VISION_KEYWORDS)
+    supports_tools = "tools" in capabilities
+
+    if known:
+        reasoning, coding, speed = known.reasoning_score, known.coding_score, known.speed_rating
+        display_name = known.name
+        supports_vision = supports_vision or known.supports_vision
+        supports_tools = supports_tools or known.supports_function_calling
+    else:
+        params_b = _parameter_count_b(meta.get("parameter_size", ""), name)
+        base = min(90.0, 50.0 + 10.0 * math.log2(max(params_b, 1.0)))
+        reasoning = coding = round(base, 1)
+        if any(k in name_lower for k in CODE_KEYWORDS):
+            coding = min(95.0, coding + 5.0)
+        if any(k in name_lower for k in REASONING_KEYWORDS):
+            reasoning = min(95.0, reasoning + 5.0)
+        speed = round(max(1.0, min(10.0, 10.0 - math.log2(max(params_b, 1.0)))), 1)
+        display_name = name
+
+    return ModelCapabilities(
+        name=display_name,
+        api_name=name,
+        provider=ModelProvider.OLLAMA,
+        context_window=context_window,
+        input_cost=0.0,
+        output_cost=0.0,
+        reasoning_score=reasoning,
+        coding_score=coding,
+        speed_rating=speed,
+        supports_vision=supports_vision,
+        supports_function_calling=supports_tools,
+        size_gb=size_gb,
+        quantization=meta.get("quantization"),
+    )
+
+
+class OllamaDiscovery:
+    """Discover installed Ollama models and cache their metadata"""
+
+    def __init__(self,
+                 base_url: Optional[str] = None,
+                 manifest_path: Optional[str] = None,
+                 timeout: float = 5.0):
+        base_url = base_url or os.getenv("OLLAMA_HOST", DEFAULT_OLLAMA_URL)
+        if not base_url.startswith("http"):
+            base_url = f"http://{base_url}"
+        self.base_url = base_url.rstrip("/")
+        self.manifest_path = Path(manifest_path) if manifest_path else DEFAULT_MANIFEST_PATH
+        self.timeout = timeout
+
+    def load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Load the cached manifest (name -> {digest, size, show})"""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("base_url") != self.base_url:
+            return {}
+        return data.get("models", {})
+
+    def _save_manifest(self, models: Dict[str, Dict[str, Any]]) -> None:
+        """Atomically persist the manifest"""
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_suffix(f".tmp{os.getpid()}")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"base_url": self.base_url, "models": models}, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            logger.warning(f"Could not write Ollama manifest to {self.manifest_path}: {e}")
+
+    async def _get_json(self, session: aiohttp.ClientSession, method: str, path: str,
+                        payload: Optional[Dict] = None) -> Dict[str, Any]:
+        async with session.request(method, f"{self.base_url}{path}", json=payload) as response:
+            if response.status != 200:
+                raise OllamaDiscoveryError(f"Ollama {path} returned {response.status}")
+            return await response.json()
+
+    async def discover(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Query /api/tags and /api/show (only for new or changed digests).
+
+        Returns:
+            Manifest mapping installed model name to {digest, size, show}
+        """
+        cached = self.load_manifest()
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        try:
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                tags = await self._get_json(session, "GET", "/api/tags")
+
+                manifest: Dict[str, Dict[str, Any]] = {}
+                pending = []
+                for tag in tags.get("models", []):
+                    name = tag.get("name") or tag.get("model")
+                    if not name:
+                        continue
+                    previous = cached.get(name)
+                    if previous and previous.get("digest") == tag.get("digest"):
+                        manifest[name] = previous
+                        continue
+                    manifest[name] = {"digest": tag.get("digest"), "size": tag.get("size", 0), "show": {}}
+                    pending.append(name)
+
+                shows = await asyncio.gather(
+                    *(self._get_json(session, "POST", "/api/show", {"model": n}) for n in pending),
+                    return_exceptions=True,
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            raise OllamaDiscoveryError(f"Ollama not reachable at {self.base_url}: {e}") from e
+
+        for name, show in zip(pending, shows):
+            if isinstance(show, Exception):
+                logger.warning(f"Could not read metadata for {name}: {show}")
+                manifest[name]["digest"] = None  # Retry on next discovery
+                continue
+            manifest[name]["show"] = _summarize_show(show)
+
+        if manifest != cached:
+            self._save_manifest(manifest)
+        return manifest
@@ -13,6 +13,7 @@ from pathlib import Path
 
 # Import RAM monitor
 from .ram_monitor import RAMMonitor, RAMStatus
+from .registry_snapshot import load_registry
 
 
 @dataclass
@@ -30,24 +31,6 @@ class LocalModelManager:
     Integrates with keep-alive system for optimal performance
     """
 
-    # Model size mapping (GB)
-    MODEL_SIZES = {
-        "deepseek-coder:1.3b": 0.776,
-        "llama3.2:3b": 2.0,
-        "magicoder:7b": 3.8,
-        "llama3.1:8b": 4.9,
-        "llama3:8b": 4.7,
-        "qwen2.5:7b-instruct": 4.7,
-        "codellama:13b": 7.4,
-        "codellama:13b-code": 7.4,
-        "gemma:7b": 5.0,
-        "qwen2.5:32b": 19.0,
-        "mistral:7b": 4.4,
-        "codellama:34b": 19.0,
-        "llama3.1:70b": 42.0,
-        "deepseek-r1:70b": 42.0,
-    }
-
     # Keep-alive models (based on optimized-keep-alive.py)
     KEEP_ALIVE_MODELS = [
         "deepseek-coder:1.3b",
@@ -61,6 +44,8 @@ class LocalModelManager:
 
     def __init__(self):
         self.ram_monitor = RAMMonitor()
+        # Model size mapping (GB), compiled from model_definitions/ollama.yaml
+        self.MODEL_SIZES: Dict[str, float] = load_registry().local_sizes
 
     def get_installed_models(self) -> List[str]:
         """Get list of installed Ollama models"""
@@ -0,0 +1,395 @@
+"""
+Mason Runner
+Generates the implementation files locked by a lattice
+(research/lattice_lock_llm_specification.txt) in parallel. Each file is
+generated through ModelOrchestrator.route_request as soon as the files it
+depends on are accepted, checked by the Sheriff, and retried with the
+violations as feedback. Repeated failures escalate to a stronger model.
+Per-file and total cost caps bound the spend; the report gives throughput
+(files/minute) and cost per accepted file.
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Type
+
+from . import tracing
+from .types import APIResponse, ModelCapabilities, ModelProvider, TaskType
+from .lattice_compiler import compile_lattice, load_lattice
+from .sheriff import DEFAULT_RULES, Rule, Sheriff, SheriffConfig
+
+logger = logging.getLogger(__name__)
+
+MASON_PROMPT = """\
+Implement the interface {interface} in {file_path}.
+You MUST:
+- Import ONLY from {types_module}
+- Use Decimal for money
+- Follow the golden pattern style exactly
+- Add return type hints to every function
+Your code will be rejected instantly if it violates any rule.
+Reply with the complete file in a single ```python block.
+
+Interface (from {types_module}):
+```python
+{contract}
+```
+"""
+
+GOLDEN_SECTION = """
+Golden pattern:
+```python
+{golden}
+```
+"""
+
+RETRY_SECTION = """
+Your previous attempt was rejected by the Sheriff:
+{feedback}
+
+Previous attempt:
+```python
+{code}
+```
+Fix every violation and reply with the complete corrected file.
+"""
+
+_CODE_BLOCK = re.compile(r"```(?:python|py)?[ \t]*\n(.*?)```", re.DOTALL)
+
+
+@dataclass
+class MasonTask:
+    """One implementation file locked to an interface"""
+    file_path: str
+    interface: str
+    depends_on: List[str] = field(default_factory=list)  # Files
+
+
+@dataclass
+class FileOutcome:
+    """Result of generating one file"""
+    file_path: str
+    status: str = "pending"  # accepted | rejected | blocked | over_budget
+    attempts: int = 0
+    models: List[str] = field(default_factory=list)
+    cost: float = 0.0
+    feedback: str = ""      # Last Sheriff feedback or error
+    elapsed_s: float = 0.0
+
+
+@dataclass
+class MasonReport:
+    """Outcome of a Mason run"""
+    outcomes: Dict[str, FileOutcome]
+    elapsed_s: float
+
+    @property
+    def accepted(self) -> List[str]:
+        return [path for path, o in self.outcomes.items() if o.status == "accepted"]
+
+    @property
+    def total_cost(self) -> float:
+        return sum(o.cost for o in self.outcomes.values())
+
+    @property
+    def files_per_minute(self) -> float:
+        return len(self.accepted) / (self.elapsed_s / 60) if self.elapsed_s > 0 else 0.0
+
+    @property
+    def cost_per_accepted_file(self) -> Optional[float]:
+        return self.total_cost / len(self.accepted) if self.accepted else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for outcome in self.outcomes.values():
+            statuses[outcome.status] = statuses.get(outcome.status, 0) + 1
+        cost_per_file = self.cost_per_accepted_file
+        return {
+            "elapsed_s": round(self.elapsed_s, 3),
+            "statuses": statuses,
+            "attempts": sum(o.attempts for o in self.outcomes.values()),
+            "files_per_minute": round(self.files_per_minute, 2),
+            "total_cost": round(self.total_cost, 6),
+            "cost_per_accepted_file": round(cost_per_file, 6) if cost_per_file is not None else None,
+            "files": {path: asdict(o) for path, o in self.outcomes.items()},
+        }
+
+
+def plan_tasks(lattice: Dict[str, Any]) -> Dict[str, MasonTask]:
+    """Files from file_structure_lock, with dependencies from interface depends_on"""
+    interfaces = lattice.get("interfaces") or {}
+    locked = dict(lattice.get("file_structure_lock") or {})
+    for name, defn in interfaces.items():
+        if (defn or {}).get("file") and defn["file"] not in locked:
+            locked[defn["file"]] = name
+    file_of = {iface: path for path, iface in locked.items()}
+
+    tasks = {}
+    for path, iface in locked.items():
+        deps = []
+        for dep in (interfaces.get(iface) or {}).get("depends_on") or []:
+            dep_file = dep if dep in locked else file_of.get(dep)
+            if dep_file and dep_file != path and dep_file not in deps:
+                deps.append(dep_file)
+        tasks[path] = MasonTask(path, iface, deps)
+    _break_cycles(tasks)
+    return tasks
+
+
+def _break_cycles(tasks: Dict[str, MasonTask]) -> None:
+    """
+    Drop dependency back-edges so generation order is acyclic. The lattice
+    allows interfaces to reference each other (every contract is in the
+    generated types module), so a cycle only needs an order, not a block.
+    """
+    visiting, finished = set(), set()
+
+    def visit(path: str):
+        visiting.add(path)
+        task = tasks[path]
+        for dep in list(task.depends_on):
+            if dep in visiting:
+                logger.info(f"Dependency cycle: {path} -> {dep}; generating {dep} first")
+                task.depends_on.remove(dep)
+            elif dep not in finished and dep in tasks:
+                visit(dep)
+        visiting.discard(path)
+        finished.add(path)
+
+    for path in tasks:
+        if path not in finished:
+            visit(path)
+
+
+def extract_code(text: str) -> str:
+    """Code from the longest fenced block, or the whole reply if unfenced"""
+    blocks = _CODE_BLOCK.findall(text)
+    code = max(blocks, key=len) if blocks else text
+    return code.strip() + "\n"
+
+
+class MasonRunner:
+    """Parallel generate → Sheriff → retry loop over a lattice's locked files"""
+
+    def __init__(self,
+                 orchestrator,
+                 lattice_path: Path,
+                 project_root: Optional[Path] = None,
+                 model_id: Optional[str] = None,
+                 escalation_model: Optional[str] = None,
+                 max_attempts: int = 3,
+                 escalate_after: int = 2,
+                 concurrency: int = 4,
+                 file_cost_cap: Optional[float] = None,
+                 budget: Optional[float] = None,
+                 golden_path: Optional[Path] = None,
+                 rules: Sequence[Type[Rule]] = DEFAULT_RULES,
+                 write: bool = True):
+        self.orchestrator = orchestrator
+        self.lattice_path = Path(lattice_path)
+        self.project_root = Path(project_root) if project_root else self.lattice_path.parent
+        self.model_id = model_id
+        self.escalation_model = escalation_model
+        self.max_attempts = max_attempts
+        self.escalate_after = escalate_after
+        self.concurrency = concurrency
+        self.file_cost_cap = file_cost_cap
+        self.budget = budget
+        self.golden = Path(golden_path).read_text() if golden_path else None
+        self.rules = rules
+        self.write = write
+        self._spent = 0.0
+
+    async def run(self, files: Optional[Iterable[str]] = None) -> MasonReport:
+        """
+        Generate the lattice's files (or a subset, e.g. CompileResult.affected_files).
+
+        Files outside the subset are treated as already implemented.
+        """
+        start = time.perf_counter()
+        compiled = compile_lattice(self.lattice_path)
+        lattice = load_lattice(self.lattice_path)
+        contracts = self._contracts(compiled.output_path, compiled.manifest_path)
+        sheriff = Sheriff(SheriffConfig.from_dict(lattice), self.rules)
+
+        tasks = plan_tasks(lattice)
+        selected = list(tasks) if files is None else [f for f in files if f in tasks]
+        outcomes = {path: FileOutcome(path) for path in selected}
+        done = {path: asyncio.get_running_loop().create_future() for path in selected}
+        slots = asyncio.Semaphore(self.concurrency)
+        self._spent = 0.0
+
+        async def build(path: str):
+            task = tasks[path]
+            try:
+                for dep in task.depends_on:
+                    if dep in done and not await done[dep]:
+                        outcomes[path].status = "blocked"
+                        outcomes[path].feedback = f"Dependency not accepted: {dep}"
+                        return
+                await self._build_file(task, contracts.get(task.interface, ""), sheriff, slots, outcomes[path])
+            finally:
+                if not done[path].done():
+                    done[path].set_result(outcomes[path].status == "accepted")
+
+        with tracing.span("mason.run", {"files": len(selected)}) as span:
+            await asyncio.gather(*(build(path) for path in selected))
+            elapsed = time.perf_counter() - start
+            report = MasonReport(outcomes, elapsed)
+            span.set_attributes({"accepted": len(report.accepted), "cost": report.total_cost})
+
+        logger.info(f"Mason: {len(report.accepted)}/{len(selected)} files accepted in {elapsed:.1f}s "
+                    f"({report.files_per_minute:.1f} files/min, ${report.total_cost:.4f})")
+        return report
+
+    @staticmethod
+    def _contracts(output_path: Path, manifest_path: Path) -> Dict[str, str]:
+        """Interface source text by name, sliced from the compiled types module"""
+        text = output_path.read_text(encoding="utf-8")
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        return {name: text[info["span"][0]:info["span"][1]]
+                for name, info in manifest["sections"].items() if info["kind"] == "interface"}
+
+    def _prompt(self, task: MasonTask, contract: str, types_module: str,
+                code: Optional[str], feedback: Optional[str]) -> str:
+        prompt = MASON_PROMPT.format(interface=task.interface, file_path=task.file_path,
+                                     types_module=types_module, contract=contract)
+        if self.golden:
+            prompt += GOLDEN_SECTION.format(golden=self.golden)
+        if feedback:
+            prompt += RETRY_SECTION.format(feedback=feedback, code=code or "")
+        return prompt
+
+    def _stronger_model(self, current: Optional[str]) -> Optional[str]:
+        """Escalation target: configured model, else the best coding model above the current one"""
+        if self.escalation_model:
+            return self.escalation_model
+        registry = self.orchestrator.registry
+        floor = registry.get_model(current).coding_score if current and registry.get_model(current) else 0
+        candidates = [(m.coding_score, mid) for mid, m in registry.models.items()
+                      if m.coding_score > floor and m.provider != ModelProvider.OLLAMA]
+        return max(candidates)[1] if candidates else None
+
+    async def _build_file(self, task: MasonTask, contract: str, sheriff: Sheriff,
+                          slots: asyncio.Semaphore, outcome: FileOutcome):
+        start = time.perf_counter()
+        model_id, failures_on_model = self.model_id, 0
+        code, result = None, None
+        with tracing.span("mason.file", {"file": task.file_path}) as span:
+            while outcome.attempts < self.max_attempts:
+                if self.budget is not None and self._spent >= self.budget:
+                    outcome.status, outcome.feedback = "over_budget", "Run budget exhausted"
+                    break
+                if self.file_cost_cap is not None and outcome.cost >= self.file_cost_cap:
+                    outcome.status, outcome.feedback = "rejected", "File cost cap reached"
+                    break
+                if failures_on_model >= self.escalate_after:
+                    stronger = self._stronger_model(model_id or (outcome.models[-1] if outcome.models else None))
+                    if stronger and stronger != model_id:
+                        logger.info(f"Mason: escalating {task.file_path} to {stronger}")
+                        span.add_event("escalate", model=stronger)
+                        model_id, failures_on_model = stronger, 0
+
+                prompt = self._prompt(task, contract, sheriff.config.types_module, code,
+                                      result.feedback() if result else None)
+                outcome.attempts += 1
+                try:
+                    async with slots:
+                        response = await self.orchestrator.route_request(
+                            prompt, model_id=model_id, task_type=TaskType.CODE_GENERATION)
+                except Exception as e:
+                    logger.warning(f"Mason: generation failed for {task.file_path}: {e}")
+                    outcome.feedback = str(e)
+                    failures_on_model += 1
+                    continue
+
+                used = self._charge(response, model_id, outcome)
+                code = extract_code(response.content)
+                result = sheriff.check_source(code, task.file_path)
+                if result.passed:
+                    outcome.status, outcome.feedback = "accepted", ""
+                    if self.write:
+                        self._write(task.file_path, code)
+                    break
+                outcome.feedback = result.feedback()
+                failures_on_model += 1
+                model_id = model_id or used
+            else:
+                outcome.status = "rejected"
+            outcome.elapsed_s = time.perf_counter() - start
+            span.set_attributes({"status": outcome.status, "attempts": outcome.attempts, "cost": outcome.cost})
+
+    def _charge(self, response: APIResponse, model_id: Optional[str], outcome: FileOutcome) -> Optional[str]:
+        """Add the response's cost to the file and run totals; returns the registry id used"""
+        registry = self.orchestrator.registry
+        model: Optional[ModelCapabilities] = registry.get_model(model_id) if model_id else None
+        used = model_id
+        if model is None:
+            used, model = next(((mid, m) for mid, m in registry.models.items()
+                                if m.api_name == response.model), (response.model, None))
+        outcome.models.append(used)
+        if model is not None:
+            cost = model.cost(response.usage.get("input_tokens") or 0, response.usage.get("output_tokens") or 0)
+            outcome.cost += cost
+            self._spent += cost
+        return used
+
+    def _write(self, file_path: str, code: str):
+        """Write an accepted file, leaving it untouched if the content is identical"""
+        path = self.project_root / file_path
+        data = code.encode("utf-8")
+        try:
+            if path.read_bytes() == data:
+                return
+        except OSError:
+            pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+
+def main():
+    """CLI: generate a lattice's implementation files"""
+    import argparse
+    from .core import ModelOrchestrator
+
+    parser = argparse.ArgumentParser(description="Generate lattice implementation files with Mason agents")
+    parser.add_argument("lattice", nargs="?", default="lattice_project/lattice.yaml", help="Path to lattice.yaml")
+    parser.add_argument("--model", help="Model id (default: orchestrator selection)")
+    parser.add_argument("--escalation-model", help="Model used after repeated failures")
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("-j", "--concurrency", type=int, default=4, help="Concurrent generations")
+    parser.add_argument("--file-cost-cap", type=float, help="Max USD spent on one file")
+    parser.add_argument("--budget", type=float, help="Max USD spent on the run")
+    parser.add_argument("--golden", type=Path, help="Golden pattern file to imitate")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="Only regenerate files affected by the last lattice change")
+    args = parser.parse_args()
+
+    async def run():
+        orchestrator = ModelOrchestrator()
+        runner = MasonRunner(orchestrator, Path(args.lattice), model_id=args.model,
+                             escalation_model=args.escalation_model, max_attempts=args.max_attempts,
+                             concurrency=args.concurrency, file_cost_cap=args.file_cost_cap,
+                             budget=args.budget, golden_path=args.golden)
+        files = compile_lattice(Path(args.lattice)).affected_files if args.changed_only else None
+        try:
+            return await runner.run(files)
+        finally:
+            for client in orchestrator.clients.values():
+                if client.session:
+                    await client.session.close()
+
+    report = asyncio.run(run())
+    print(json.dumps(report.to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
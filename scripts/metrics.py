@@ -0,0 +1,261 @@
+"""
+Orchestrator Metrics
+Prometheus-style counters and histograms for a running ModelOrchestrator.
+
+Updates never take a lock: every thread writes to its own shard of each
+metric and readers merge the shards when a snapshot is taken. Expose the
+registry with `start_metrics_server()` (text format on /metrics) or read
+`REGISTRY.snapshot()` directly.
+"""
+
+import math
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Metric:
+    """Metric whose values live in per-thread shards keyed by label values"""
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._labelset = frozenset(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[Tuple, Any]] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict[Tuple, Any]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values: Dict[Tuple, Any] = {}
+            self._local.values = values
+            # Only taken once per thread, when the shard is created
+            with self._shards_lock:
+                self._shards.append(values)
+            return values
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple:
+        if labels.keys() != self._labelset:
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _copies(self) -> List[Dict[Tuple, Any]]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        # dict.copy() is atomic under the GIL; writers never resize another thread's shard
+        return [shard.copy() for shard in shards]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def collect(self) -> Dict[Tuple, float]:
+        totals: Dict[Tuple, float] = {}
+        for shard in self._copies():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def value(self, **labels) -> float:
+        return self.collect().get(self._key(labels), 0.0)
+
+
+class Histogram(_Metric):
+    """Bucketed distribution with sum and count"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        state = shard.get(key)
+        if state is None:
+            # [per-bucket counts (+Inf last), sum, count]
+            state = shard[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def collect(self) -> Dict[Tuple, Dict[str, Any]]:
+        merged: Dict[Tuple, Dict[str, Any]] = {}
+        for shard in self._copies():
+            for key, (counts, total, count) in shard.items():
+                entry = merged.setdefault(key, {"counts": [0] * len(counts), "sum": 0.0, "count": 0})
+                entry["counts"] = [a + b for a, b in zip(entry["counts"], counts)]
+                entry["sum"] += total
+                entry["count"] += count
+        return merged
+
+    def quantile(self, q: float, **labels) -> float:
+        """Estimate a quantile from bucket boundaries (upper bound of the bucket)"""
+        entry = self.collect().get(self._key(labels))
+        if not entry or not entry["count"]:
+            return 0.0
+        rank = q * entry["count"]
+        seen = 0
+        for bound, count in zip(self.buckets + (math.inf,), entry["counts"]):
+            seen += count
+            if seen >= rank:
+                return bound
+        return math.inf
+
+
+class MetricsRegistry:
+    """Named collection of metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different shape")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current values: {name: {"type", "help", "samples": [{"labels", ...values}]}}"""
+        result = {}
+        for name, metric in list(self._metrics.items()):
+            samples = []
+            for key, value in sorted(metric.collect().items()):
+                labels = dict(zip(metric.labelnames, key))
+                if metric.kind == "counter":
+                    samples.append({"labels": labels, "value": value})
+                else:
+                    samples.append({"labels": labels, "buckets": dict(zip(metric.buckets + (math.inf,),
+                                                                           value["counts"])),
+                                    "sum": value["sum"], "count": value["count"]})
+            result[name] = {"type": metric.kind, "help": metric.documentation, "samples": samples}
+        return result
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        def fmt_labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+            items = list(labels.items()) + ([extra] if extra else [])
+            if not items:
+                return ""
+            escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+        def fmt_value(v: float) -> str:
+            return "+Inf" if v == math.inf else repr(float(v))
+
+        lines = []
+        for name, data in self.snapshot().items():
+            lines.append(f"# HELP {name} {data['help']}")
+            lines.append(f"# TYPE {name} {data['type']}")
+            for sample in data["samples"]:
+                labels = sample["labels"]
+                if data["type"] == "counter":
+                    lines.append(f"{name}{fmt_labels(labels)} {fmt_value(sample['value'])}")
+                    continue
+                cumulative = 0
+                for bound, count in sample["buckets"].items():
+                    cumulative += count
+                    lines.append(f"{name}_bucket{fmt_labels(labels, ('le', fmt_value(bound)))} {cumulative}")
+                lines.append(f"{name}_sum{fmt_labels(labels)} {fmt_value(sample['sum'])}")
+                lines.append(f"{name}_count{fmt_labels(labels)} {sample['count']}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Orchestrator-level metrics
+ROUTE_REQUESTS = REGISTRY.counter(
+    "orchestrator_requests_total", "Requests handled by route_request", ("status",))
+ROUTE_LATENCY = REGISTRY.histogram(
+    "orchestrator_request_duration_seconds", "End-to-end route_request latency")
+MODEL_CALLS = REGISTRY.counter(
+    "orchestrator_model_calls_total", "Model calls by outcome", ("model", "provider", "status"))
+MODEL_LATENCY = REGISTRY.histogram(
+    "orchestrator_model_call_duration_seconds", "Model call latency", ("model", "provider"))
+TOKENS = REGISTRY.counter(
+    "orchestrator_tokens_total", "Tokens processed", ("model", "direction"))
+COST = REGISTRY.counter(
+    "orchestrator_cost_usd_total", "Estimated spend in USD", ("model",))
+FALLBACKS = REGISTRY.counter(
+    "orchestrator_fallbacks_total", "Fallbacks after a failed primary model", ("failed_model", "outcome"))
+CASCADE_ATTEMPTS = REGISTRY.counter(
+    "orchestrator_cascade_attempts_total", "Cascade rungs tried by verification outcome",
+    ("task_type", "model", "outcome"))
+CONSENSUS_RUNS = REGISTRY.counter(
+    "orchestrator_consensus_runs_total", "Consensus votes by outcome", ("outcome",))
+CONSENSUS_CALLS = REGISTRY.counter(
+    "orchestrator_consensus_calls_total", "Consensus model calls (cancelled ones stop early)", ("status",))
+
+# Client-level metrics
+HTTP_REQUESTS = REGISTRY.counter(
+    "orchestrator_http_requests_total", "Provider HTTP requests (each retry attempt counts)", ("client", "status"))
+HTTP_RETRIES = REGISTRY.counter(
+    "orchestrator_http_retries_total", "Provider HTTP attempts retried, by the failed status", ("client", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "orchestrator_http_request_duration_seconds", "Provider HTTP request latency", ("client",))
+
+# Server metrics
+SERVER_REQUESTS = REGISTRY.counter(
+    "orchestrator_server_requests_total", "Requests served by the orchestrator server", ("endpoint", "status"))
+SERVER_COALESCED = REGISTRY.counter(
+    "orchestrator_server_coalesced_total", "Requests answered by joining an identical in-flight request")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"metrics: {format % args}")
+
+
+def start_metrics_server(port: int = 9464, host: str = "127.0.0.1",
+                         registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread; call .shutdown() on the result to stop"""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Mock Provider Server
+Local asyncio server emulating the OpenAI, xAI, Azure OpenAI, Anthropic,
+Gemini and Ollama wire formats for offline load testing. Per-model profiles
+control latency distribution, token rate, SSE streaming, 429s with
+Retry-After, slow time-to-first-token and truncated streams.
+
+Point a client at it by overriding its base URL:
+    server = await MockProviderServer().start()
+    client = OpenAIAPIClient(api_key="test")
+    client.base_url = server.base_url("openai")
+"""
+
+import json
+import time
+import random
+import asyncio
+import logging
+from collections import Counter
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional, Any, AsyncIterator
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelProfile:
+    """Behaviour of one mocked model"""
+    ttft_ms: float = 50.0                 # Time to first token (median)
+    ttft_distribution: str = "fixed"      # fixed | uniform | lognormal
+    ttft_spread: float = 0.0              # uniform: +/- ms, lognormal: sigma
+    tokens_per_second: float = 200.0      # Output rate; 0 = instant
+    output_tokens: int = 64
+    error_rate: float = 0.0               # Probability of a 500
+    rate_limit_rate: float = 0.0          # Probability of a 429
+    retry_after_s: float = 1.0            # Retry-After sent with 429s
+    slow_ttft_rate: float = 0.0           # Probability of a stalled first token
+    slow_ttft_ms: float = 5000.0
+    truncate_rate: float = 0.0            # Probability a stream is cut mid-way
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ModelProfile":
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown profile keys: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+
+@dataclass
+class ServerStats:
+    """Counters for requests served"""
+    requests: Counter = field(default_factory=Counter)       # by provider
+    models: Counter = field(default_factory=Counter)         # by model
+    statuses: Counter = field(default_factory=Counter)       # by HTTP status
+    streams_truncated: int = 0
+    output_tokens: int = 0
+
+
+def _estimate_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Rough prompt size: ~4 characters per token"""
+    chars = 0
+    for msg in messages:
+        content = msg.get("content", "")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        chars += len(str(content))
+    return max(1, chars // 4)
+
+
+class MockProviderServer:
+    """Single server exposing every provider's API under its native paths"""
+
+    def __init__(self,
+                 profiles: Optional[Dict[str, ModelProfile]] = None,
+                 default_profile: Optional[ModelProfile] = None,
+                 seed: Optional[int] = None):
+        self.profiles = profiles or {}
+        self.default_profile = default_profile or ModelProfile()
+        self.rng = random.Random(seed)
+        self.stats = ServerStats()
+        self.url = ""
+        self._runner: Optional[web.AppRunner] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def _build_app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 ** 2)
+        app.router.add_post("/v1/chat/completions", self._openai_chat)
+        app.router.add_post("/{provider:xai|dial|local}/v1/chat/completions", self._openai_chat)
+        app.router.add_post("/openai/deployments/{deployment}/chat/completions", self._azure_chat)
+        app.router.add_post("/v1/images/generations", self._image_generation)
+        app.router.add_post("/{provider:xai}/v1/images/generations", self._image_generation)
+        app.router.add_post("/v1/messages", self._anthropic_messages)
+        app.router.add_post("/v1beta/models/{model_action}", self._gemini_generate)
+        app.router.add_post("/api/chat", self._ollama_chat)
+        app.router.add_post("/api/generate", self._ollama_generate)
+        app.router.add_get("/api/tags", self._ollama_tags)
+        app.router.add_post("/api/show", self._ollama_show)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> "MockProviderServer":
+        """Start serving; port 0 picks a free port"""
+        self._runner = web.AppRunner(self._build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{bound_port}"
+        return self
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def base_url(self, provider: str) -> str:
+        """Base URL to assign to a client for the given provider"""
+        suffixes = {
+            "openai": "/v1",
+            "xai": "/xai/v1",
+            "dial": "/dial/v1",
+            "local": "/local/v1",
+            "anthropic": "/v1",
+            "google": "/v1beta",
+            "azure": "",
+            "ollama": "",
+        }
+        if provider not in suffixes:
+            raise ValueError(f"Unknown provider: {provider}")
+        return f"{self.url}{suffixes[provider]}"
+
+    # ------------------------------------------------------------------
+    # Behaviour helpers
+    # ------------------------------------------------------------------
+
+    def profile_for(self, model: str) -> ModelProfile:
+        return self.profiles.get(model, self.default_profile)
+
+    def _ttft_seconds(self, profile: ModelProfile) -> float:
+        if profile.slow_ttft_rate and self.rng.random() < profile.slow_ttft_rate:
+            return profile.slow_ttft_ms / 1000
+        if profile.ttft_distribution == "uniform":
+            ms = profile.ttft_ms + self.rng.uniform(-profile.ttft_spread, profile.ttft_spread)
+        elif profile.ttft_distribution == "lognormal":
+            ms = self.rng.lognormvariate(0.0, profile.ttft_spread) * profile.ttft_ms
+        else:
+            ms = profile.ttft_ms
+        return max(0.0, ms) / 1000
+
+    def _failure(self, provider: str, model: str, profile: ModelProfile) -> Optional[web.Response]:
+        """Record the request and decide on an injected 429/500"""
+        self.stats.requests[provider] += 1
+        self.stats.models[model] += 1
+        if profile.rate_limit_rate and self.rng.random() < profile.rate_limit_rate:
+            self.stats.statuses[429] += 1
+            return web.json_response(
+                {"error": {"type": "rate_limit_error", "message": "Rate limit exceeded (mock)"}},
+                status=429,
+                headers={"Retry-After": f"{profile.retry_after_s:g}"},
+            )
+        if profile.error_rate and self.rng.random() < profile.error_rate:
+            self.stats.statuses[500] += 1
+            return web.json_response(
+                {"error": {"type": "server_error", "message": "Internal error (mock)"}},
+                status=500,
+            )
+        self.stats.statuses[200] += 1
+        return None
+
+    async def _tokens(self, profile: ModelProfile) -> AsyncIterator[str]:
+        """Yield output tokens at the profile's rate"""
+        interval = 1.0 / profile.tokens_per_second if profile.tokens_per_second else 0.0
+        for i in range(profile.output_tokens):
+            if interval and i:
+                await asyncio.sleep(interval)
+            yield f"tok{i} "
+        self.stats.output_tokens += profile.output_tokens
+
+    async def _complete_text(self, profile: ModelProfile) -> str:
+        """Wait out TTFT plus generation time and return the full text"""
+        await asyncio.sleep(self._ttft_seconds(profile))
+        return "".join([t async for t in self._tokens(profile)])
+
+    def _truncate_at(self, profile: ModelProfile) -> Optional[int]:
+        """Token index at which to cut the stream, if it should be truncated"""
+        if profile.truncate_rate and self.rng.random() < profile.truncate_rate:
+            self.stats.streams_truncated += 1
+            return profile.output_tokens // 2
+        return None
+
+    async def _stream(self, request: web.Request, profile: ModelProfile, content_type: str,
+                      frame, first=None, last=None) -> web.StreamResponse:
+        """
+        Stream frames for each token.
+
+        `frame(token)` renders one token; `first()` / `last()` render the
+        opening and closing frames. Truncated streams drop the connection
+        without sending `last()`.
+        """
+        response = web.StreamResponse(headers={"Content-Type": content_type, "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        await asyncio.sleep(self._ttft_seconds(profile))
+        if first:
+            await response.write(first())
+
+        cut = self._truncate_at(profile)
+        index = 0
+        async for token in self._tokens(profile):
+            if cut is not None and index >= cut:
+                request.transport.close()
+                return response
+            await response.write(frame(token))
+            index += 1
+
+        if last:
+            await response.write(last())
+        await response.write_eof()
+        return response
+
+    # ------------------------------------------------------------------
+    # OpenAI / xAI / Azure / Ollama OpenAI-compatible
+    # ------------------------------------------------------------------
+
+    async def _openai_like(self, request: web.Request, provider: str, model: str) -> web.StreamResponse:
+        body = await request.json()
+        profile = self.profile_for(model)
+        failure = self._failure(provider, model, profile)
+        if failure:
+            return failure
+
+        prompt_tokens = _estimate_tokens(body.get("messages", []))
+        created = int(time.time())
+
+        if body.get("stream"):
+            def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> bytes:
+                payload = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created,
+                           "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+                return f"data: {json.dumps(payload)}\n\n".encode()
+
+            return await self._stream(
+                request, profile, "text/event-stream",
+                frame=lambda token: chunk({"content": token}),
+                first=lambda: chunk({"role": "assistant"}),
+                last=lambda: chunk({}, "stop") + b"data: [DONE]\n\n",
+            )
+
+        text = await self._complete_text(profile)
+        return web.json_response({
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": profile.output_tokens,
+                      "total_tokens": prompt_tokens + profile.output_tokens},
+        })
+
+    async def _openai_chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        provider = request.match_info.get("provider", "openai")
+        return await self._openai_like(request, provider, body.get("model", "unknown"))
+
+    async def _azure_chat(self, request: web.Request) -> web.StreamResponse:
+        return await self._openai_like(request, "azure", request.match_info["deployment"])
+
+    async def _image_generation(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        model = body.get("model", "unknown")
+        profile = self.profile_for(model)
+        failure = self._failure(request.match_info.get("provider", "openai"), model, profile)
+        if failure:
+            return failure
+        await asyncio.sleep(self._ttft_seconds(profile))
+        return web.json_response({
+            "created": int(time.time()),
+            "data": [{"url": f"https://mock.invalid/{model}/{i}.png", "revised_prompt": body.get("prompt", "")}
+                     for i in range(body.get("n", 1))],
+        })
+
+    # ------------------------------------------------------------------
+    # Anthropic
+    # ------------------------------------------------------------------
+
+    async def _anthropic_messages(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        model = body.get("model", "unknown")
+        profile = self.profile_for(model)
+        failure = self._failure("anthropic", model, profile)
+        if failure:
+            return failure
+
+        input_tokens = _estimate_tokens(body.get("messages", []))
+
+        if body.get("stream"):
+            def event(name: str, data: Dict[str, Any]) -> bytes:
+                return f"event: {name}\ndata: {json.dumps(data)}\n\n".encode()
+
+            def first() -> bytes:
+                return event("message_start", {"type": "message_start", "message": {
+                    "id": "msg_mock", "type": "message", "role": "assistant", "model": model, "content": [],
+                    "usage": {"input_tokens": input_tokens, "output_tokens": 0}}}) + \
+                    event("content_block_start", {"type": "content_block_start", "index": 0,
+                                                  "content_block": {"type": "text", "text": ""}})
+
+            def last() -> bytes:
+                return event("content_block_stop", {"type": "content_block_stop", "index": 0}) + \
+                    event("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                                            "usage": {"output_tokens": profile.output_tokens}}) + \
+                    event("message_stop", {"type": "message_stop"})
+
+            return await self._stream(
+                request, profile, "text/event-stream",
+                frame=lambda token: event("content_block_delta", {
+                    "type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": token}}),
+                first=first,
+                last=last,
+            )
+
+        text = await self._complete_text(profile)
+        return web.json_response({
+            "id": "msg_mock",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": input_tokens, "output_tokens": profile.output_tokens},
+        })
+
+    # ------------------------------------------------------------------
+    # Gemini
+    # ------------------------------------------------------------------
+
+    async def _gemini_generate(self, request: web.Request) -> web.StreamResponse:
+        model, _, action = request.match_info["model_action"].partition(":")
+        body = await request.json()
+        profile = self.profile_for(model)
+        failure = self._failure("google", model, profile)
+        if failure:
+            return failure
+
+        prompt_tokens = _estimate_tokens([
+            {"content": " ".join(p.get("text", "") for p in c.get("parts", []))}
+            for c in body.get("contents", [])
+        ])
+
+        def payload(text: str, final: bool) -> Dict[str, Any]:
+            data = {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}],
+                    "usageMetadata": {"promptTokenCount": prompt_tokens,
+                                      "candidatesTokenCount": profile.output_tokens if final else 0,
+                                      "totalTokenCount": prompt_tokens + (profile.output_tokens if final else 0)}}
+            if final:
+                data["candidates"][0]["finishReason"] = "STOP"
+            return data
+
+        if action == "streamGenerateContent":
+            return await self._stream(
+                request, profile, "text/event-stream",
+                frame=lambda token: f"data: {json.dumps(payload(token, False))}\r\n\r\n".encode(),
+                last=lambda: f"data: {json.dumps(payload('', True))}\r\n\r\n".encode(),
+            )
+        if action != "generateContent":
+            return web.json_response({"error": {"message": f"Unknown action {action}"}}, status=404)
+
+        text = await self._complete_text(profile)
+        return web.json_response(payload(text, True))
+
+    # ------------------------------------------------------------------
+    # Ollama native API
+    # ------------------------------------------------------------------
+
+    async def _ollama_native(self, request: web.Request, chat: bool) -> web.StreamResponse:
+        body = await request.json()
+        model = body.get("model", "unknown")
+        profile = self.profile_for(model)
+        failure = self._failure("ollama", model, profile)
+        if failure:
+            return failure
+
+        messages = body.get("messages", []) if chat else [{"content": body.get("prompt", "")}]
+        prompt_tokens = _estimate_tokens(messages)
+
+        def record(token: str, done: bool) -> Dict[str, Any]:
+            data = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "done": done}
+            if chat:
+                data["message"] = {"role": "assistant", "content": token}
+            else:
+                data["response"] = token
+            if done:
+                data.update({"done_reason": "stop", "prompt_eval_count": prompt_tokens,
+                             "eval_count": profile.output_tokens})
+            return data
+
+        if body.get("stream", True):
+            return await self._stream(
+                request, profile, "application/x-ndjson",
+                frame=lambda token: (json.dumps(record(token, False)) + "\n").encode(),
+                last=lambda: (json.dumps(record("", True)) + "\n").encode(),
+            )
+
+        text = await self._complete_text(profile)
+        return web.json_response(record(text, True))
+
+    async def _ollama_chat(self, request: web.Request) -> web.StreamResponse:
+        return await self._ollama_native(request, chat=True)
+
+    async def _ollama_generate(self, request: web.Request) -> web.StreamResponse:
+        return await self._ollama_native(request, chat=False)
+
+    async def _ollama_tags(self, request: web.Request) -> web.Response:
+        models = [{"name": name, "model": name, "digest": f"mock-{name}", "size": 1024 ** 3,
+                   "details": {"parameter_size": "7B", "quantization_level": "Q4_K_M"}}
+                  for name in self.profiles]
+        return web.json_response({"models": models})
+
+    async def _ollama_show(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if body.get("model") not in self.profiles:
+            return web.json_response({"error": "model not found"}, status=404)
+        return web.json_response({
+            "details": {"parameter_size": "7B", "quantization_level": "Q4_K_M", "family": "llama"},
+            "model_info": {"llama.context_length": 8192},
+            "capabilities": ["completion"],
+        })
+
+
+def load_profiles(path: str) -> Dict[str, ModelProfile]:
+    """Load per-model profiles from YAML ({model: {field: value}}; 'default' applies to the rest)"""
+    import yaml
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    return {model: ModelProfile.from_dict(values or {}) for model, values in data.items()}
+
+
+async def _serve(host: str, port: int, profiles: Dict[str, ModelProfile]):
+    default = profiles.pop("default", None)
+    server = await MockProviderServer(profiles, default).start(host, port)
+    print(f"Mock provider server listening on {server.url}")
+    for provider in ("openai", "xai", "azure", "anthropic", "google", "ollama"):
+        print(f"  {provider:<10} {server.base_url(provider)}")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.stop()
+
+
+def main():
+    """CLI entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mock LLM provider server for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profiles", help="YAML file of per-model profiles")
+    args = parser.parse_args()
+
+    profiles = load_profiles(args.profiles) if args.profiles else {}
+    try:
+        asyncio.run(_serve(args.host, args.port, profiles))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,8 @@ from rich import print as rprint
 # Import orchestration components
 from model_orchestrator import ModelOrchestrator, TaskType
 
+from model_orchestrator.consensus import ConsensusEngine
+
 try:
     from model_orchestrator.zen_mcp_bridge import ZenMCPBridge, ModelRouter
 except ImportError:
@@ -251,44 +253,50 @@ Requires Functions: [magenta]{'Yes' if requirements.require_functions else 'No'}
             
         #     console.print(table)
     
-    def create_consensus_group(self, prompt: str, num_models: int = 3):
-        """Create a consensus group for the prompt"""
-        console.print("[yellow]Consensus groups not yet implemented in v3.1[/yellow]")
-        return
-
-        # models = self.orchestrator.create_consensus_group(prompt, num_models, diverse=True)
-        
-        console.print(f"\n[bold]Consensus Group ({num_models} models):[/bold]\n")
+    async def create_consensus_group(self, prompt: str, num_models: int = 3, quorum: Optional[int] = None):
+        """Run a consensus vote for the prompt across diverse models"""
+        models = self.orchestrator.create_consensus_group(prompt, num_models, diverse=True)
+        if not models:
+            console.print("[red]No models available for consensus[/red]")
+            return
+        
+        console.print(f"\n[bold]Consensus Group ({len(models)} models):[/bold]\n")
+        
+        engine = ConsensusEngine(self.orchestrator, quorum=quorum)
+        try:
+            result = await engine.run(prompt, models=[model_id for model_id, _ in models])
+        finally:
+            for client in self.orchestrator.clients.values():
+                if client.session:
+                    await client.session.close()
         
         table = Table(show_header=True)
         table.add_column("#", justify="center", style="cyan")
         table.add_column("Model", style="green")
         table.add_column("Provider", style="blue")
-        table.add_column("Strength", style="yellow")
-        
-        for i, (model_id, model) in enumerate(models, 1):
-            # Determine model's main strength
-            strength = "General"
-            if model.supports_reasoning:
-                strength = "Reasoning"
-            elif model.code_specialized:
-                strength = "Code"
-            elif model.speed > 0.8:
-                strength = "Speed"
-            elif model.accuracy > 0.85:
-                strength = "Accuracy"
-            
-            table.add_row(str(i), model_id, model.provider.value, strength)
+        table.add_column("Status", style="yellow")
+        table.add_column("Answer")
+        table.add_column("Latency", justify="right")
+        table.add_column("Cost", justify="right", style="red")
         
-        console.print(table)
+        for i, ((model_id, model), answer) in enumerate(zip(models, result.answers), 1):
+            latency = f"{answer.latency_s:.2f}s" if answer.latency_s is not None else "-"
+            text = answer.normalized[:60] if answer.status == "answered" else (answer.error or "")[:60]
+            table.add_row(str(i), model_id, model.provider.value, answer.status, text, latency, f"${answer.cost:.4f}")
         
-        # Show estimated consensus cost
-        total_cost = sum(
-            self.orchestrator.estimate_cost(m[0], 1000, 500) 
-            for m in models
-        )
+        console.print(table)
         
-        console.print(f"\n[red]Estimated consensus cost:[/red] ${total_cost:.4f}")
+        verdict = "[green]Agreed[/green]" if result.agreed else "[yellow]No consensus[/yellow]"
+        console.print(f"\n{verdict}: {result.votes}/{result.quorum} votes, {result.cancelled} calls cancelled")
+        if result.response:
+            console.print(Panel(result.response.content, title="Consensus Answer", border_style="green"))
+        
+        single = result.single_model
+        console.print(f"[red]Consensus cost:[/red] ${result.cost:.4f} in {result.elapsed_s:.2f}s")
+        if single.get("cost") is not None:
+            estimated = " (estimated)" if single["estimated"] else ""
+            latency = f" in {single['latency_s']:.2f}s" if single.get("latency_s") else ""
+            console.print(f"[blue]Single model ({single['model']}):[/blue] ${single['cost']:.4f}{latency}{estimated}")
     
     def test_integration(self):
         """Test the complete integration"""
@@ -364,6 +372,7 @@ async def main():
     consensus_parser = subparsers.add_parser("consensus", help="Create consensus group")
     consensus_parser.add_argument("prompt", help="Prompt for consensus")
     consensus_parser.add_argument("--num", type=int, default=3, help="Number of models")
+    consensus_parser.add_argument("--quorum", type=int, help="Agreeing answers needed (default: majority)")
     
     # Cost report command
     cost_parser = subparsers.add_parser("cost", help="Show cost report")
@@ -389,7 +398,7 @@ async def main():
         await cli.route_request(args.prompt, args.mode, args.strategy)
     
     elif args.command == "consensus":
-        cli.create_consensus_group(args.prompt, args.num)
+        await cli.create_consensus_group(args.prompt, args.num, args.quorum)
     
     elif args.command == "cost":
         cli.show_cost_report()
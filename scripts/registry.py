@@ -1,194 +1,146 @@
-from typing import Dict, List, Optional
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Any
 from .types import ModelCapabilities, ModelProvider, TaskType
+from .registry_snapshot import load_registry, source_fingerprint, DEFAULT_SOURCE_DIR
+from .local_discovery import OllamaDiscovery, OllamaDiscoveryError, build_capabilities
+
+logger = logging.getLogger(__name__)
 
 class ModelRegistry:
-    """Centralized model registry with all model definitions"""
+    """Centralized model registry backed by the compiled model definitions"""
 
-    def __init__(self):
+    def __init__(self,
+                 source_dir: Optional[str] = None,
+                 snapshot_path: Optional[str] = None,
+                 discovery: Optional[OllamaDiscovery] = None):
+        self.source_dir = Path(source_dir) if source_dir else DEFAULT_SOURCE_DIR
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.discovery = discovery or OllamaDiscovery()
         self.models: Dict[str, ModelCapabilities] = {}
+        self.aliases: Dict[str, str] = {}
+        self.local_sizes: Dict[str, float] = {}
+        self.catalog: Dict[str, Dict[str, Any]] = {}
+        self._fingerprint = ""
+        self._local_definitions: Dict[str, ModelCapabilities] = {}
+        self._local_manifest: Optional[Dict[str, Dict[str, Any]]] = None
         self._load_all_models()
 
+        # Use the last discovered set of installed models until discovery reruns
+        cached_manifest = self.discovery.load_manifest()
+        if cached_manifest:
+            self.apply_local_manifest(cached_manifest)
+
     def _load_all_models(self):
-        """Load all models across all providers"""
-        self._load_grok_models()
-        self._load_openai_models()
-        self._load_google_models()
-        self._load_anthropic_models()
-        self._load_local_models()
-
-    def _load_grok_models(self):
-        """Load xAI Grok models"""
-        self.models.update({
-            "grok-4-fast-reasoning": ModelCapabilities(
-                name="Grok 4 Fast Reasoning",
-                api_name="grok-4-fast-reasoning",
-                provider=ModelProvider.XAI,
-                context_window=2000000,
-                supports_function_calling=True,
-                supports_vision=False, # Assuming false based on previous file
-                input_cost=2.0,
-                output_cost=6.0,
-                reasoning_score=95.0,
-                coding_score=85.0,
-                speed_rating=7.0,
-                # task_scores logic will be handled by scorer based on capabilities
-            ),
-            "grok-code-fast-1": ModelCapabilities(
-                name="Grok Code Fast 1",
-                api_name="grok-code-fast-1",
-                provider=ModelProvider.XAI,
-                context_window=256000,
-                supports_function_calling=False,
-                supports_vision=False,
-                input_cost=1.5,
-                output_cost=4.5,
-                reasoning_score=85.0,
-                coding_score=90.0,
-                speed_rating=8.0,
-            ),
-            "grok-3": ModelCapabilities(
-                name="Grok 3",
-                api_name="grok-3",
-                provider=ModelProvider.XAI,
-                context_window=131072,
-                supports_function_calling=False,
-                supports_vision=False,
-                input_cost=1.0,
-                output_cost=3.0,
-                reasoning_score=80.0,
-                coding_score=75.0,
-                speed_rating=6.0,
-            ),
-        })
-
-    def _load_openai_models(self):
-        """Load OpenAI models"""
-        self.models.update({
-            "o1-pro": ModelCapabilities(
-                name="O1 Pro",
-                api_name="o1-pro",
-                provider=ModelProvider.OPENAI,
-                context_window=200000,
-                supports_function_calling=False,
-                supports_vision=False,
-                input_cost=60.0,
-                output_cost=240.0,
-                reasoning_score=99.0,
-                coding_score=98.0,
-                speed_rating=3.0,
-            ),
-            "gpt-4o": ModelCapabilities(
-                name="GPT-4o",
-                api_name="gpt-4o",
-                provider=ModelProvider.OPENAI,
-                context_window=128000,
-                supports_function_calling=True,
-                supports_vision=True,
-                input_cost=5.0,
-                output_cost=15.0,
-                reasoning_score=90.0,
-                coding_score=85.0,
-                speed_rating=8.0,
-            ),
-        })
-
-    def _load_google_models(self):
-        """Load Google Gemini models"""
-        self.models.update({
-            "gemini-2.5-pro": ModelCapabilities(
-                name="Gemini 2.5 Pro",
-                api_name="gemini-2.5-pro",
-                provider=ModelProvider.GOOGLE,
-                context_window=1000000,
-                supports_function_calling=True,
-                supports_vision=True, # Assuming true for Gemini
-                input_cost=1.25,
-                output_cost=5.0,
-                reasoning_score=85.0,
-                coding_score=85.0,
-                speed_rating=7.0,
-            ),
-            "gemini-2.5-flash": ModelCapabilities(
-                name="Gemini 2.5 Flash",
-                api_name="gemini-2.5-flash",
-                provider=ModelProvider.GOOGLE,
-                context_window=1000000,
-                supports_function_calling=True,
-                supports_vision=True,
-                input_cost=0.075,
-                output_cost=0.3,
-                reasoning_score=80.0,
-                coding_score=80.0,
-                speed_rating=9.0,
-            ),
-        })
-
-    def _load_anthropic_models(self):
-        """Load Anthropic Claude models"""
-        self.models.update({
-            "claude-3-5-sonnet": ModelCapabilities(
-                name="Claude 3.5 Sonnet",
-                api_name="claude-3-5-sonnet-20240620",
-                provider=ModelProvider.ANTHROPIC,
-                context_window=200000,
-                supports_function_calling=True,
-                supports_vision=True,
-                input_cost=3.0,
-                output_cost=15.0,
-                reasoning_score=95.0,
-                coding_score=95.0,
-                speed_rating=7.0,
-            ),
-             "claude-3-opus": ModelCapabilities(
-                name="Claude 3 Opus",
-                api_name="claude-3-opus-20240229",
-                provider=ModelProvider.ANTHROPIC,
-                context_window=200000,
-                supports_function_calling=True,
-                supports_vision=True,
-                input_cost=15.0,
-                output_cost=75.0,
-                reasoning_score=98.0,
-                coding_score=92.0,
-                speed_rating=5.0,
-            ),
-        })
-
-    def _load_local_models(self):
-        """Load local Ollama models"""
-        # These are placeholders, actual available models are detected by LocalManager
-        self.models.update({
-            "codellama:34b": ModelCapabilities(
-                name="CodeLlama 34B",
-                api_name="codellama:34b",
-                provider=ModelProvider.OLLAMA,
-                context_window=16384,
-                supports_function_calling=False,
-                supports_vision=False,
-                input_cost=0.0,
-                output_cost=0.0,
-                reasoning_score=85.0,
-                coding_score=95.0,
-                speed_rating=5.0,
-            ),
-            "qwen2.5:32b": ModelCapabilities(
-                name="Qwen 2.5 32B",
-                api_name="qwen2.5:32b-instruct-q4_K_M",
-                provider=ModelProvider.OLLAMA,
-                context_window=32768,
-                supports_function_calling=True,
-                supports_vision=False,
-                input_cost=0.0,
-                output_cost=0.0,
-                reasoning_score=88.0,
-                coding_score=85.0,
-                speed_rating=6.0,
-            ),
-        })
+        """Load all models across all providers from the registry snapshot"""
+        snapshot = load_registry(self.source_dir, self.snapshot_path)
+        self._local_definitions = {
+            mid: m for mid, m in snapshot.models.items() if m.provider == ModelProvider.OLLAMA
+        }
+        # Swap whole dicts so concurrent readers never see a half-built registry
+        self.models = snapshot.models
+        self.aliases = snapshot.aliases
+        self.local_sizes = snapshot.local_sizes
+        self.catalog = snapshot.catalog
+        self._fingerprint = snapshot.fingerprint
+        if self._local_manifest is not None:
+            self.apply_local_manifest(self._local_manifest)
+
+    def apply_local_manifest(self, manifest: Dict[str, Dict[str, Any]]):
+        """
+        Replace local models with the installed set from an Ollama manifest.
+
+        Installed models that match a curated definition (by id or api_name)
+        keep its id and scores; anything else is registered under its Ollama
+        name with estimated scores. Definitions that are not installed are dropped.
+        """
+        by_name = {}
+        for mid, model in self._local_definitions.items():
+            by_name[mid] = mid
+            by_name[model.api_name] = mid
+
+        local_models = {}
+        local_sizes = dict(self.local_sizes)
+        for name, entry in manifest.items():
+            model_id = by_name.get(name, name)
+            model = build_capabilities(name, entry, self._local_definitions.get(model_id))
+            local_models[model_id] = model
+            if model.size_gb:
+                local_sizes[model_id] = model.size_gb
+
+        models = {mid: m for mid, m in self.models.items() if m.provider != ModelProvider.OLLAMA}
+        models.update(local_models)
+        self.models = models
+        self.local_sizes = local_sizes
+        self._local_manifest = manifest
+
+    async def discover_local_models(self) -> int:
+        """
+        Discover installed Ollama models and register them.
+
+        If Ollama is unreachable, local models are removed so routing never
+        selects a model that cannot be served.
+
+        Returns:
+            Number of local models registered
+        """
+        try:
+            manifest = await self.discovery.discover()
+        except OllamaDiscoveryError as e:
+            logger.warning(f"Local model discovery failed: {e}")
+            manifest = {}
+        self.apply_local_manifest(manifest)
+        logger.info(f"Discovered {len(manifest)} local models")
+        return len(manifest)
+
+    def reload_if_changed(self) -> bool:
+        """Reload definitions if any source file changed; returns True on reload"""
+        if source_fingerprint(self.source_dir) == self._fingerprint:
+            return False
+        try:
+            self._load_all_models()
+        except Exception as e:
+            logger.error(f"Registry reload failed, keeping previous models: {e}")
+            return False
+        logger.info(f"Model registry reloaded ({len(self.models)} models)")
+        return True
+
+    async def watch(self, interval: float = 2.0):
+        """Poll the definition sources off the event loop and hot-reload on change"""
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.reload_if_changed)
 
     def get_model(self, model_id: str) -> Optional[ModelCapabilities]:
-        """Get model by ID"""
-        return self.models.get(model_id)
+        """Get model by ID or alias"""
+        model = self.models.get(model_id)
+        if model is None and model_id in self.aliases:
+            model = self.models.get(self.aliases[model_id])
+        return model
+
+    def resolve_id(self, model_id: str) -> Optional[str]:
+        """Registry ID for a model ID or alias, or None if unknown"""
+        if model_id in self.models:
+            return model_id
+        target = self.aliases.get(model_id)
+        return target if target in self.models else None
+
+    def api_name(self, model_id: str) -> str:
+        """Provider API name for a model ID or alias (catalog-only and unknown names pass through)"""
+        model = self.get_model(model_id)
+        if model is not None:
+            return model.api_name
+        return self.aliases.get(model_id, model_id)
+
+    def catalog_entry(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """Catalog display metadata for a model ID or alias, including models that are not routed"""
+        return self.catalog.get(self.resolve_id(model_id) or self.aliases.get(model_id, model_id))
+
+    def get_catalog(self, provider: ModelProvider, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Catalog entries of a provider in definition order, optionally for one category"""
+        return [e for e in self.catalog.values()
+                if e["provider"] == provider.value and (category is None or e["category"] == category)]
 
     def get_models_by_provider(self, provider: ModelProvider) -> List[ModelCapabilities]:
         """Get all models for a provider"""
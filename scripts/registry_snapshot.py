@@ -0,0 +1,304 @@
+"""
+Model Registry Snapshot Compiler
+Compiles the declarative model definitions (YAML/TOML) into a validated
+binary snapshot so that registry startup never parses YAML on the hot path.
+"""
+
+import os
+import pickle
+import hashlib
+import logging
+import dataclasses
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any
+
+import yaml
+
+from .types import ModelCapabilities, ModelProvider
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 2
+DEFAULT_SOURCE_DIR = Path(__file__).parent / "model_definitions"
+DEFAULT_SNAPSHOT_PATH = Path.home() / ".cache" / "model_orchestrator" / "model_registry.snapshot"
+SOURCE_SUFFIXES = (".yaml", ".yml", ".toml")
+
+_MODEL_FIELDS = [f.name for f in dataclasses.fields(ModelCapabilities)]
+_REQUIRED_KEYS = {
+    "id": str,
+    "name": str,
+    "api_name": str,
+    "context_window": int,
+    "input_cost": (int, float),
+    "output_cost": (int, float),
+    "reasoning_score": (int, float),
+    "coding_score": (int, float),
+    "speed_rating": (int, float),
+}
+_OPTIONAL_KEYS = {
+    "supports_vision": bool,
+    "supports_function_calling": bool,
+    "size_gb": (int, float),
+    "rate_limits": dict,
+}
+_RATE_LIMIT_KEYS = ("requests_per_minute", "tokens_per_minute")
+
+
+class RegistryValidationError(ValueError):
+    """Raised when a model definition source fails validation."""
+
+
+@dataclass
+class RegistrySnapshot:
+    """Compiled, validated view of all model definition sources."""
+    models: Dict[str, ModelCapabilities]
+    aliases: Dict[str, str] = field(default_factory=dict)
+    local_sizes: Dict[str, float] = field(default_factory=dict)
+    catalog: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # Display metadata by model id
+    fingerprint: str = ""
+
+
+def schema_hash() -> str:
+    """Hash of the ModelCapabilities layout; snapshots from other layouts are discarded."""
+    layout = ",".join(f"{f.name}:{f.type}" for f in dataclasses.fields(ModelCapabilities))
+    return hashlib.sha256(f"v{SNAPSHOT_VERSION}|{layout}".encode()).hexdigest()[:16]
+
+
+def list_sources(source_dir: Path) -> List[Path]:
+    """List definition files in a stable order"""
+    if not source_dir.is_dir():
+        return []
+    return sorted(p for p in source_dir.iterdir() if p.suffix in SOURCE_SUFFIXES)
+
+
+def source_fingerprint(source_dir: Path) -> str:
+    """Fingerprint sources by name, size and mtime (stat only, no parsing)"""
+    digest = hashlib.sha256()
+    for path in list_sources(source_dir):
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+
+def _read_source(path: Path) -> Dict[str, Any]:
+    """Parse a single YAML or TOML definition file"""
+    if path.suffix == ".toml":
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def _validate_entry(entry: Any, source: str) -> None:
+    """Validate a model entry against the definition schema"""
+    if not isinstance(entry, dict):
+        raise RegistryValidationError(f"{source}: model entry must be a mapping")
+    model_id = entry.get("id", "<missing id>")
+
+    for key, expected in _REQUIRED_KEYS.items():
+        if key not in entry:
+            raise RegistryValidationError(f"{source}: {model_id} missing '{key}'")
+        value = entry[key]
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise RegistryValidationError(f"{source}: {model_id}.{key} has invalid type")
+
+    for key, expected in _OPTIONAL_KEYS.items():
+        if key in entry and not isinstance(entry[key], expected):
+            raise RegistryValidationError(f"{source}: {model_id}.{key} has invalid type")
+
+    unknown = set(entry) - set(_REQUIRED_KEYS) - set(_OPTIONAL_KEYS)
+    if unknown:
+        raise RegistryValidationError(f"{source}: {model_id} has unknown keys: {', '.join(sorted(unknown))}")
+
+    if entry["context_window"] <= 0:
+        raise RegistryValidationError(f"{source}: {model_id}.context_window must be positive")
+    if entry["input_cost"] < 0 or entry["output_cost"] < 0:
+        raise RegistryValidationError(f"{source}: {model_id} costs must not be negative")
+    for key in ("reasoning_score", "coding_score"):
+        if not 0 <= entry[key] <= 100:
+            raise RegistryValidationError(f"{source}: {model_id}.{key} must be within 0-100")
+    if not 0 <= entry["speed_rating"] <= 10:
+        raise RegistryValidationError(f"{source}: {model_id}.speed_rating must be within 0-10")
+
+    for key, value in entry.get("rate_limits", {}).items():
+        if key not in _RATE_LIMIT_KEYS or not isinstance(value, int) or value <= 0:
+            raise RegistryValidationError(f"{source}: {model_id}.rate_limits.{key} is invalid")
+
+
+def _build_model(entry: Dict[str, Any], provider: ModelProvider) -> ModelCapabilities:
+    """Build ModelCapabilities from a validated entry"""
+    rate_limits = entry.get("rate_limits", {})
+    return ModelCapabilities(
+        name=entry["name"],
+        api_name=entry["api_name"],
+        provider=provider,
+        context_window=entry["context_window"],
+        input_cost=float(entry["input_cost"]),
+        output_cost=float(entry["output_cost"]),
+        reasoning_score=float(entry["reasoning_score"]),
+        coding_score=float(entry["coding_score"]),
+        speed_rating=float(entry["speed_rating"]),
+        supports_vision=entry.get("supports_vision", False),
+        supports_function_calling=entry.get("supports_function_calling", False),
+        size_gb=float(entry["size_gb"]) if "size_gb" in entry else None,
+        requests_per_minute=rate_limits.get("requests_per_minute"),
+        tokens_per_minute=rate_limits.get("tokens_per_minute"),
+    )
+
+
+def _catalog_entries(data: Dict[str, Any], source: str) -> List[Dict[str, Any]]:
+    """Validate the optional catalog section: category -> list of entries with an id"""
+    catalog = data.get("catalog") or {}
+    if not isinstance(catalog, dict):
+        raise RegistryValidationError(f"{source}: catalog must be a mapping of categories")
+    entries = []
+    for category, items in catalog.items():
+        if not isinstance(items, list):
+            raise RegistryValidationError(f"{source}: catalog.{category} must be a list")
+        for item in items:
+            if not isinstance(item, dict) or not isinstance(item.get("id"), str):
+                raise RegistryValidationError(f"{source}: catalog.{category} entries need a string id")
+            entries.append({**item, "category": str(category)})
+    return entries
+
+
+def compile_sources(source_dir: Path = DEFAULT_SOURCE_DIR) -> RegistrySnapshot:
+    """Parse and validate all definition sources into a snapshot"""
+    source_dir = Path(source_dir)
+    snapshot = RegistrySnapshot(models={}, fingerprint=source_fingerprint(source_dir))
+
+    for path in list_sources(source_dir):
+        data = _read_source(path)
+        try:
+            provider = ModelProvider(data.get("provider"))
+        except ValueError:
+            raise RegistryValidationError(f"{path.name}: unknown provider '{data.get('provider')}'")
+
+        for entry in data.get("models", []):
+            _validate_entry(entry, path.name)
+            if entry["id"] in snapshot.models:
+                raise RegistryValidationError(f"{path.name}: duplicate model id '{entry['id']}'")
+            model = _build_model(entry, provider)
+            snapshot.models[entry["id"]] = model
+            if model.size_gb is not None:
+                snapshot.local_sizes[entry["id"]] = model.size_gb
+
+        for entry in _catalog_entries(data, path.name):
+            if entry["id"] in snapshot.catalog:
+                raise RegistryValidationError(f"{path.name}: duplicate catalog id '{entry['id']}'")
+            model = snapshot.models.get(entry["id"])
+            if model is not None:
+                entry.setdefault("name", model.name)
+                entry.setdefault("context_window", model.context_window)
+            entry["provider"] = provider.value
+            snapshot.catalog[entry["id"]] = entry
+
+        for name, size in (data.get("sizes") or {}).items():
+            if isinstance(size, bool) or not isinstance(size, (int, float)) or size <= 0:
+                raise RegistryValidationError(f"{path.name}: size for '{name}' is invalid")
+            snapshot.local_sizes.setdefault(name, float(size))
+
+        snapshot.aliases.update(data.get("aliases") or {})
+
+    for alias, target in snapshot.aliases.items():
+        if target not in snapshot.models and target not in snapshot.catalog:
+            raise RegistryValidationError(f"Alias '{alias}' points to unknown model '{target}'")
+
+    return snapshot
+
+
+def write_snapshot(snapshot: RegistrySnapshot, path: Path = DEFAULT_SNAPSHOT_PATH) -> None:
+    """Atomically write a snapshot as plain tuples (no class pickling)"""
+    path = Path(path)
+    rows = {}
+    for model_id, model in snapshot.models.items():
+        row = dataclasses.astuple(model)
+        rows[model_id] = tuple(v.value if isinstance(v, ModelProvider) else v for v in row)
+
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "schema": schema_hash(),
+        "fingerprint": snapshot.fingerprint,
+        "models": rows,
+        "aliases": snapshot.aliases,
+        "local_sizes": snapshot.local_sizes,
+        "catalog": snapshot.catalog,
+    }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: Path, fingerprint: Optional[str] = None) -> Optional[RegistrySnapshot]:
+    """Load a snapshot; returns None if missing, stale or from another schema"""
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+    if not isinstance(payload, dict) or payload.get("schema") != schema_hash():
+        return None
+    if fingerprint is not None and payload.get("fingerprint") != fingerprint:
+        return None
+
+    provider_index = _MODEL_FIELDS.index("provider")
+    models = {}
+    for model_id, row in payload["models"].items():
+        row = list(row)
+        row[provider_index] = ModelProvider(row[provider_index])
+        models[model_id] = ModelCapabilities(*row)
+
+    return RegistrySnapshot(
+        models=models,
+        aliases=payload["aliases"],
+        local_sizes=payload["local_sizes"],
+        catalog=payload["catalog"],
+        fingerprint=payload["fingerprint"],
+    )
+
+
+def load_registry(source_dir: Optional[Path] = None,
+                  snapshot_path: Optional[Path] = None) -> RegistrySnapshot:
+    """
+    Load the registry from the compiled snapshot, recompiling only when the
+    sources changed since the snapshot was written.
+    """
+    source_dir = Path(source_dir) if source_dir else DEFAULT_SOURCE_DIR
+    snapshot_path = Path(snapshot_path) if snapshot_path else DEFAULT_SNAPSHOT_PATH
+
+    fingerprint = source_fingerprint(source_dir)
+    snapshot = read_snapshot(snapshot_path, fingerprint)
+    if snapshot is not None:
+        return snapshot
+
+    logger.info(f"Compiling model registry from {source_dir}")
+    snapshot = compile_sources(source_dir)
+    try:
+        write_snapshot(snapshot, snapshot_path)
+    except OSError as e:
+        logger.warning(f"Could not write registry snapshot to {snapshot_path}: {e}")
+    return snapshot
+
+
+def main():
+    """CLI: compile model definitions into a snapshot"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile model definitions into a registry snapshot")
+    parser.add_argument("--source", default=str(DEFAULT_SOURCE_DIR), help="Definitions directory")
+    parser.add_argument("--output", default=str(DEFAULT_SNAPSHOT_PATH), help="Snapshot path")
+    args = parser.parse_args()
+
+    snapshot = compile_sources(Path(args.source))
+    write_snapshot(snapshot, Path(args.output))
+    print(f"Compiled {len(snapshot.models)} models ({len(snapshot.local_sizes)} local sizes) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
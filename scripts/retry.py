@@ -0,0 +1,202 @@
+"""
+Retry Policy Engine
+Retries provider calls only when retrying can help. Errors are classified:
+rate limits, 5xx responses, timeouts and dropped connections are retried;
+other 4xx responses (bad requests, auth, not found) and malformed bodies fail
+on the first attempt. Waits follow the server's Retry-After or rate-limit
+reset headers when given, otherwise jittered exponential backoff, and never
+run past the request's deadline (see deadline.py) or the policy's budget. Every attempt is reported to an
+optional callback, and the error finally raised carries a note summarising
+the attempts.
+"""
+
+import re
+import time
+import random
+import asyncio
+import logging
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, FrozenSet, Mapping, Optional, TypeVar
+
+import aiohttp
+
+from .deadline import DeadlineExceeded, current as current_deadline
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUSES = frozenset({408, 409, 425, 429, 500, 502, 503, 504, 529})
+
+# Rate-limit reset headers, in order of preference, after Retry-After
+_RESET_HEADERS = (
+    "retry-after-ms",                        # OpenAI / Azure OpenAI (milliseconds)
+    "x-ratelimit-reset-requests",            # OpenAI / xAI ("1s", "6m0s", "20ms")
+    "x-ratelimit-reset-tokens",
+    "anthropic-ratelimit-requests-reset",    # Anthropic (RFC 3339 timestamp)
+    "anthropic-ratelimit-tokens-reset",
+)
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class APIError(RuntimeError):
+    """Non-200 response from a provider"""
+
+    def __init__(self, status: int, body: str, retry_after: Optional[float] = None):
+        super().__init__(f"API Error {status}: {body}")
+        self.status = status
+        self.body = body
+        self.retry_after = retry_after  # Seconds the server asked us to wait, if it said
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Seconds in '1.5', '20ms', '6m0s' or '1h2m3s' form"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(n + u for n, u in parts) != value.replace(" ", ""):
+        return None
+    return sum(float(n) * _UNIT_SECONDS[u] for n, u in parts)
+
+
+def _parse_timestamp(value: str, now: float) -> Optional[float]:
+    """Seconds until an HTTP date or RFC 3339 timestamp"""
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.timestamp() - now
+
+
+def retry_after_from_headers(headers: Mapping[str, str], rate_limited: bool = True,
+                             now: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds to wait before retrying, from Retry-After or (for rate-limited
+    responses) the provider's reset headers.
+    """
+    now = time.time() if now is None else now
+    lower = {k.lower(): v.strip() for k, v in headers.items()}
+    for name in ("retry-after",) + (_RESET_HEADERS if rate_limited else ()):
+        value = lower.get(name)
+        if value is None:
+            continue
+        seconds = _parse_duration(f"{value}ms" if name == "retry-after-ms" else value)
+        if seconds is None:
+            seconds = _parse_timestamp(value, now)
+        if seconds is not None:
+            return max(0.0, seconds)
+    return None
+
+
+@dataclass
+class Attempt:
+    """One try of a retried call"""
+    number: int                     # 1-based
+    elapsed_s: float                # Duration of this attempt
+    error: Optional[str] = None     # None when the attempt succeeded
+    status: Optional[int] = None    # HTTP status of a failed attempt, when there was one
+    retryable: bool = False
+    delay_s: float = 0.0            # Wait before the next attempt (0 when giving up)
+
+
+@dataclass
+class RetryPolicy:
+    """When and how long to wait before retrying a provider call"""
+    max_attempts: int = 3
+    base_delay_s: float = 0.5       # Backoff before the second attempt, doubled per attempt
+    max_delay_s: float = 10.0       # Cap on computed backoff
+    max_retry_after_s: float = 60.0  # Server-requested waits longer than this are not honoured
+    budget_s: Optional[float] = 60.0  # Total time for all attempts and waits
+    jitter: bool = True             # Full jitter: a uniform draw up to the backoff
+    retryable_statuses: FrozenSet[int] = RETRYABLE_STATUSES
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """Whether another attempt could succeed where this one failed"""
+        if isinstance(error, DeadlineExceeded):
+            return False
+        if isinstance(error, APIError):
+            return error.status in self.retryable_statuses
+        # Timeouts, refused/reset connections and disconnects mid-response
+        return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError,
+                                  aiohttp.ClientPayloadError))
+
+    def backoff(self, attempt: int, rng: random.Random = random) -> float:
+        """Wait after failed attempt number `attempt` when the server gave no hint"""
+        ceiling = min(self.max_delay_s, self.base_delay_s * 2 ** (attempt - 1))
+        return rng.uniform(0, ceiling) if self.jitter else ceiling
+
+    def delay(self, attempt: int, error: BaseException, rng: random.Random = random) -> Optional[float]:
+        """Wait before the next attempt, or None when the server asks for longer than we allow"""
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is None:
+            return self.backoff(attempt, rng)
+        if retry_after > self.max_retry_after_s:
+            return None
+        # A little jitter on top, so clients told the same time do not return in lockstep
+        return retry_after + (rng.uniform(0, self.base_delay_s) if self.jitter else 0.0)
+
+
+async def call_with_retry(func: Callable[[], Awaitable[T]],
+                          policy: RetryPolicy,
+                          deadline: Optional[float] = None,
+                          on_attempt: Optional[Callable[[Attempt], Any]] = None) -> T:
+    """
+    Await `func()` until it succeeds or the policy gives up.
+
+    `deadline` is a time.monotonic() instant (default: the current request
+    deadline); the earlier of it and the policy's budget bounds the whole call. The last error is re-raised with a
+    note saying how many attempts were made and why retrying stopped.
+    """
+    start = time.monotonic()
+    if deadline is None and (bound := current_deadline()) is not None:
+        deadline = bound.expires_at
+    if policy.budget_s is not None:
+        deadline = min(deadline, start + policy.budget_s) if deadline is not None else start + policy.budget_s
+
+    attempt = 0
+    while True:
+        attempt += 1
+        attempt_start = time.monotonic()
+        try:
+            result = await func()
+        except Exception as e:
+            record = Attempt(attempt, time.monotonic() - attempt_start, f"{type(e).__name__}: {e}",
+                             getattr(e, "status", None), policy.is_retryable(e))
+            reason = _give_up_reason(policy, record, e, deadline)
+            if on_attempt:
+                on_attempt(record)
+            if reason:
+                e.add_note(f"Gave up after {attempt} attempt(s) in {time.monotonic() - start:.2f}s: {reason}")
+                raise
+            logger.warning(f"Attempt {attempt} failed ({record.error}); retrying in {record.delay_s:.2f}s")
+            await asyncio.sleep(record.delay_s)
+            continue
+        if on_attempt:
+            on_attempt(Attempt(attempt, time.monotonic() - attempt_start))
+        return result
+
+
+def _give_up_reason(policy: RetryPolicy, record: Attempt, error: BaseException,
+                    deadline: Optional[float]) -> Optional[str]:
+    """Why not to retry (None to retry); sets the record's delay when retrying"""
+    if not record.retryable:
+        return "not retryable"
+    if record.number >= policy.max_attempts:
+        return "attempts exhausted"
+    delay = policy.delay(record.number, error)
+    if delay is None:
+        return f"server asked to wait {error.retry_after:g}s"
+    if deadline is not None and time.monotonic() + delay >= deadline:
+        return "deadline budget exhausted"
+    record.delay_s = delay
+    return None
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Orchestrator Server
+A long-running local service that puts one ModelOrchestrator in front of
+every agent on the host. Clients use OpenAI's chat completions API:
+POST /v1/chat/completions, with `model` set to a registry model id or
+"auto" to let the orchestrator route, over TCP or a Unix socket. Because
+every request goes through one orchestrator, clients share the model
+registry, the provider connection pools, the compiled guide and agent
+index, and a single ResourceLimiter. The registry and guide are hot-reloaded
+in the background.
+
+Identical non-streaming requests that are in flight together are coalesced
+(singleflight): the first starts the upstream call and the others wait for
+its result. Each caller still applies its own deadline to its wait.
+
+Orchestrator-specific request fields (optional):
+    task_type   TaskType name overriding prompt analysis
+    agent       Agent name or id (routes by the agent's strategies)
+    deadline_s  Time limit for the request (DeadlineExceeded -> 504)
+
+Point an OpenAI client at it:
+    client = OpenAI(base_url="http://127.0.0.1:8766/v1", api_key="unused")
+"""
+
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+import contextvars
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from aiohttp import web
+
+from . import wire
+from . import deadline
+from . import metrics
+from .core import ModelOrchestrator
+from .deadline import DeadlineExceeded
+from .retry import APIError
+from .types import APIResponse, TaskType
+from .workflow import ResourceLimiter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_PORT = 8766
+AUTO_MODEL = "auto"
+# Request fields passed through to the provider client
+SAMPLING_FIELDS = ("temperature", "max_tokens")
+
+
+class RequestError(ValueError):
+    """A client request the server cannot serve; carries the HTTP status"""
+
+    def __init__(self, message: str, status: int = 400, code: str = "invalid_request_error"):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+@dataclass
+class _Flight(Generic[T]):
+    task: "asyncio.Task[T]"
+    waiters: int = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one.
+
+    The shared call runs in a fresh context, so no caller's deadline applies
+    to it. Each caller bounds only its own wait, and the call is cancelled
+    once every caller has gone. Results are not cached: a key is free again
+    as soon as its call finishes.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Result of `func()`, shared with concurrent callers of the same key; True if joined"""
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            task = asyncio.get_running_loop().create_task(func(), context=contextvars.Context())
+            flight = self._flights[key] = _Flight(task)
+            task.add_done_callback(lambda _: self._release(key, flight))
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Free the key now: a request arriving before the task unwinds starts a new call
+                self._release(key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _release(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+@dataclass
+class ChatCall:
+    """A parsed /v1/chat/completions request"""
+    messages: List[Dict[str, Any]]
+    prompt: str                               # Text routing is analysed on (last user message)
+    model_id: Optional[str] = None            # None routes automatically
+    task_type: Optional[TaskType] = None
+    agent: Optional[str] = None
+    deadline_s: Optional[float] = None
+    stream: bool = False
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+    def key(self) -> str:
+        """Identity for coalescing: everything that shapes the reply (not the deadline)"""
+        spec = {
+            "messages": self.messages,
+            "model": self.model_id,
+            "task_type": self.task_type.name if self.task_type else None,
+            "agent": self.agent,
+            "kwargs": self.kwargs,
+        }
+        return hashlib.sha256(wire.dumps(spec)).hexdigest()
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content
+                        if isinstance(part, dict) and part.get("type", "text") == "text")
+    return str(content)
+
+
+def parse_chat_call(body: Any, resolve_model: Callable[[str], Optional[str]]) -> ChatCall:
+    """Validate a request body; `resolve_model` maps a model name to a registry id (or None)"""
+    if not isinstance(body, dict):
+        raise RequestError("Request body must be a JSON object")
+    messages = body.get("messages")
+    if not isinstance(messages, list) or not messages or not all(isinstance(m, dict) for m in messages):
+        raise RequestError("'messages' must be a non-empty list of message objects")
+    user_messages = [m for m in messages if m.get("role") == "user"]
+    prompt = _message_text(user_messages[-1] if user_messages else messages[-1])
+
+    model_id = None
+    model = body.get("model") or AUTO_MODEL
+    if model != AUTO_MODEL:
+        model_id = resolve_model(model)
+        if model_id is None:
+            raise RequestError(f"The model '{model}' does not exist", 404, "model_not_found")
+
+    task_type = None
+    if body.get("task_type"):
+        try:
+            task_type = TaskType[str(body["task_type"]).upper()]
+        except KeyError:
+            raise RequestError(f"Unknown task_type: {body['task_type']}") from None
+
+    deadline_s = body.get("deadline_s")
+    if deadline_s is not None and (not isinstance(deadline_s, (int, float)) or deadline_s <= 0):
+        raise RequestError("'deadline_s' must be a positive number")
+
+    kwargs = {name: body[name] for name in SAMPLING_FIELDS if body.get(name) is not None}
+    if "max_tokens" not in kwargs and body.get("max_completion_tokens") is not None:
+        kwargs["max_tokens"] = body["max_completion_tokens"]
+    return ChatCall(messages=messages, prompt=prompt, model_id=model_id, task_type=task_type,
+                    agent=body.get("agent"), deadline_s=deadline_s, stream=bool(body.get("stream")),
+                    kwargs=kwargs)
+
+
+def _error_body(message: str, code: str) -> Dict[str, Any]:
+    return {"error": {"message": message, "type": code, "code": code}}
+
+
+def _classify(error: Exception) -> Tuple[int, str]:
+    """HTTP status and OpenAI-style error type for a failed request"""
+    if isinstance(error, RequestError):
+        return error.status, error.code
+    if isinstance(error, DeadlineExceeded):
+        return 504, "timeout"
+    if isinstance(error, ValueError):
+        return 400, "invalid_request_error"
+    if isinstance(error, APIError):
+        return 502, "upstream_error"
+    return 500, "server_error"
+
+
+class OrchestratorServer:
+    """OpenAI-compatible HTTP front end sharing one orchestrator across clients"""
+
+    def __init__(self,
+                 orchestrator: Optional[ModelOrchestrator] = None,
+                 limiter: Optional[ResourceLimiter] = None,
+                 coalesce: bool = True,
+                 default_deadline_s: Optional[float] = None,
+                 watch_interval: Optional[float] = 2.0):
+        self._owns_orchestrator = orchestrator is None  # Close its client sessions on stop
+        self.orchestrator = orchestrator or ModelOrchestrator()
+        self.limiter = limiter or ResourceLimiter.from_ram_monitor()
+        self.coalesce = coalesce
+        self.default_deadline_s = default_deadline_s
+        self.watch_interval = watch_interval
+        self.flights = SingleFlight()
+        self.url = ""
+        self._runner: Optional[web.AppRunner] = None
+        self._watchers: List[asyncio.Task] = []
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def _build_app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 ** 2)
+        app.router.add_post("/v1/chat/completions", self._chat_completions)
+        app.router.add_get("/v1/models", self._models)
+        app.router.add_get("/health", self._health)
+        app.router.add_get("/metrics", self._metrics)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0,
+                    unix_path: Optional[str] = None) -> "OrchestratorServer":
+        """Start serving on a Unix socket if `unix_path` is given, else TCP (port 0 picks a free port)"""
+        # Know which local models are installed before routing the first request
+        await self.orchestrator.start_local_discovery()
+        if self.watch_interval:
+            self._watchers = [
+                asyncio.create_task(self.orchestrator.registry.watch(self.watch_interval)),
+                asyncio.create_task(self.orchestrator.guide.watch(self.watch_interval)),
+            ]
+        self._runner = web.AppRunner(self._build_app(), access_log=None)
+        await self._runner.setup()
+        if unix_path:
+            await web.UnixSite(self._runner, unix_path).start()
+            self.url = f"unix:{unix_path}"
+        else:
+            site = web.TCPSite(self._runner, host, port)
+            await site.start()
+            self.url = f"http://{host}:{site._server.sockets[0].getsockname()[1]}"
+        logger.info(f"Orchestrator server listening on {self.url}")
+        return self
+
+    async def stop(self):
+        for task in self._watchers:
+            task.cancel()
+        await asyncio.gather(*self._watchers, return_exceptions=True)
+        self._watchers = []
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._owns_orchestrator:
+            for client in self.orchestrator.clients.values():
+                if client.session:
+                    await client.session.close()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    # ------------------------------------------------------------------
+    # Handlers
+    # ------------------------------------------------------------------
+
+    def _respond(self, endpoint: str, status: int, body: Dict[str, Any],
+                 headers: Optional[Dict[str, str]] = None) -> web.Response:
+        metrics.SERVER_REQUESTS.inc(endpoint=endpoint, status=str(status))
+        return web.Response(body=wire.dumps(body), status=status, content_type="application/json",
+                            headers=headers)
+
+    async def _chat_completions(self, request: web.Request) -> web.StreamResponse:
+        try:
+            call = parse_chat_call(wire.loads(await request.read()), self.orchestrator.registry.resolve_id)
+        except RequestError as e:
+            return self._respond("chat", e.status, _error_body(str(e), e.code))
+        except ValueError:
+            return self._respond("chat", 400, _error_body("Request body is not valid JSON",
+                                                          "invalid_request_error"))
+        if call.stream:
+            return await self._stream(request, call)
+
+        bound = deadline.start(call.deadline_s or self.default_deadline_s)
+        shared = False
+        try:
+            async with deadline.enforce(bound):
+                if self.coalesce:
+                    response, shared = await self.flights.do(call.key(), lambda: self._complete(call))
+                else:
+                    response = await self._complete(call)
+        except Exception as e:
+            status, code = _classify(e)
+            logger.error(f"Chat completion failed ({status}): {e}")
+            return self._respond("chat", status, _error_body(str(e), code))
+
+        if shared:
+            metrics.SERVER_COALESCED.inc()
+        return self._respond("chat", 200, self._completion_body(response),
+                             {"X-Orchestrator-Coalesced": "true" if shared else "false"})
+
+    def _select(self, call: ChatCall):
+        """Model id and capabilities for a call (routing it when no model was named)"""
+        model_id = call.model_id or self.orchestrator.select_model(call.prompt, call.task_type, call.agent,
+                                                                   messages=call.messages, **call.kwargs)
+        model = self.orchestrator.registry.get_model(model_id) if model_id else None
+        if model is None:
+            raise ValueError("No suitable model found for request")
+        return model_id, model
+
+    async def _complete(self, call: ChatCall) -> APIResponse:
+        model_id, _ = self._select(call)
+        # Slots are taken per attempted model, so a fallback is admitted against its own limits
+        async with deadline.enforce():
+            return await self.orchestrator.route_request(call.prompt, model_id=model_id, task_type=call.task_type,
+                                                         agent=call.agent, admit=self.limiter.slot,
+                                                         messages=call.messages, **call.kwargs)
+
+    @staticmethod
+    def _completion_body(response: APIResponse) -> Dict[str, Any]:
+        prompt_tokens = response.usage.get("input_tokens") or 0
+        completion_tokens = response.usage.get("output_tokens") or 0
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": response.model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": response.content},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    async def _stream(self, request: web.Request, call: ChatCall) -> web.StreamResponse:
+        """Stream as OpenAI chat.completion.chunk events; errors after the first byte become an error event"""
+        bound = deadline.start(call.deadline_s or self.default_deadline_s)
+        try:
+            model_id, model = self._select(call)
+        except Exception as e:
+            status, code = _classify(e)
+            return self._respond("chat_stream", status, _error_body(str(e), code))
+
+        completion_id, created = f"chatcmpl-{uuid.uuid4().hex}", int(time.time())
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> bytes:
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                       "model": model.api_name, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+            return b"data: " + wire.dumps(payload) + b"\n\n"
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        status = "200"
+        try:
+            async with deadline.enforce(bound):
+                await response.write(chunk({"role": "assistant"}))
+                async for text in self.orchestrator.stream_request(call.prompt, model_id=model_id,
+                                                                   task_type=call.task_type, agent=call.agent,
+                                                                   admit=self.limiter.slot,
+                                                                   messages=call.messages, **call.kwargs):
+                    await response.write(chunk({"content": text}))
+            await response.write(chunk({}, "stop"))
+        except (ConnectionResetError, asyncio.CancelledError):
+            status = "disconnected"
+            raise
+        except Exception as e:
+            code_status, code = _classify(e)
+            status = str(code_status)
+            logger.error(f"Streamed chat completion failed ({status}): {e}")
+            await response.write(b"data: " + wire.dumps(_error_body(str(e), code)) + b"\n\n")
+        finally:
+            metrics.SERVER_REQUESTS.inc(endpoint="chat_stream", status=status)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def _models(self, request: web.Request) -> web.Response:
+        data = [{"id": AUTO_MODEL, "object": "model", "owned_by": "orchestrator"}]
+        data += [{"id": model_id, "object": "model", "owned_by": model.provider.value}
+                 for model_id, model in sorted(self.orchestrator.registry.models.items())]
+        return self._respond("models", 200, {"object": "list", "data": data})
+
+    async def _health(self, request: web.Request) -> web.Response:
+        return self._respond("health", 200, {"status": "ok",
+                                             "models": len(self.orchestrator.registry.models),
+                                             "in_flight": self.flights.in_flight})
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=metrics.REGISTRY.render_prometheus().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+async def _serve(host: str, port: int, unix_path: Optional[str], coalesce: bool,
+                 default_deadline_s: Optional[float]):
+    server = OrchestratorServer(coalesce=coalesce, default_deadline_s=default_deadline_s)
+    await server.start(host, port, unix_path)
+    print(f"Orchestrator server listening on {server.url}")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.stop()
+
+
+def main():
+    """CLI entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shared OpenAI-compatible model orchestrator service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="Serve on this Unix socket path instead of TCP")
+    parser.add_argument("--no-coalesce", action="store_true", help="Send every request upstream")
+    parser.add_argument("--deadline", type=float, help="Default per-request time limit in seconds")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve(args.host, args.port, args.unix, not args.no_coalesce, args.deadline))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
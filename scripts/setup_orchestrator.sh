@@ -24,7 +24,7 @@ echo -e "\nInstalling dependencies..."
 pip3 install -q --upgrade pip
 
 # Core dependencies
-pip3 install -q requests aiohttp pyyaml numpy rich tenacity
+pip3 install -q requests aiohttp pyyaml numpy rich
 
 echo "✓ Dependencies installed"
 
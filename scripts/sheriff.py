@@ -0,0 +1,382 @@
+"""
+Sheriff AST Engine
+Enforces Lattice-Lock rules (research/lattice_lock_llm_specification.txt) on
+generated implementation files. All rules run in a single AST pass: each rule
+declares the node types it inspects and the engine dispatches every node once.
+Rules are pluggable Rule subclasses. Many files are checked across a process
+pool, and results are cached by (file hash, lattice version, rule set hash).
+
+Usage:
+    python3 -m scripts.sheriff src/ --lattice lattice_project/lattice.yaml
+"""
+
+import os
+import ast
+import sys
+import json
+import time
+import hashlib
+import importlib
+import logging
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+from .lattice_compiler import load_lattice
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "model_orchestrator" / "sheriff.json"
+CACHE_VERSION = 1
+CACHE_MAX_ENTRIES = 20000
+IGNORE_MARKER = "# lattice:ignore"
+
+# Below this many files the pool start-up costs more than it saves
+PARALLEL_THRESHOLD = 32
+
+
+@dataclass(frozen=True)
+class SheriffConfig:
+    """Lattice settings the rules enforce"""
+    generated_module: str
+    lattice_version: str = ""
+    forbidden_imports: Tuple[str, ...] = ()
+    types_package: str = "src.shared"
+
+    @classmethod
+    def from_lattice(cls, path: Path) -> "SheriffConfig":
+        data = load_lattice(path)
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SheriffConfig":
+        return cls(
+            generated_module=data["generated_module"],
+            lattice_version=str(data.get("version", "")),
+            forbidden_imports=tuple(str(f).strip() for f in data.get("forbidden_imports") or ()),
+        )
+
+    @property
+    def types_module(self) -> str:
+        return f"{self.types_package}.{self.generated_module}"
+
+    def fingerprint(self) -> str:
+        return hashlib.sha256(json.dumps(asdict(self), sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class Violation:
+    """One rule failure"""
+    rule: str
+    message: str
+    line: int = 0
+    col: int = 0
+
+
+@dataclass
+class SheriffResult:
+    """Verdict for one file"""
+    path: str
+    passed: bool
+    violations: List[Violation] = field(default_factory=list)
+    cached: bool = False
+    elapsed_ms: float = 0.0
+
+    def feedback(self) -> str:
+        """Violations formatted for a retry prompt"""
+        return "\n".join(f"{self.path}:{v.line}: [{v.rule}] {v.message}" for v in self.violations)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class FileContext:
+    """State shared by the rules while one file is checked"""
+
+    def __init__(self, path: str, source: str, config: SheriffConfig):
+        self.path = path
+        self.lines = source.splitlines()
+        self.config = config
+        self.violations: List[Violation] = []
+        self.state: Dict[str, Any] = {}  # Per-file rule state; rule instances are shared
+
+    def report(self, rule: "Rule", message: str, node: Optional[ast.AST] = None):
+        line = getattr(node, "lineno", 0)
+        if line and IGNORE_MARKER in self.lines[line - 1]:
+            return
+        self.violations.append(Violation(rule.name, message, line, getattr(node, "col_offset", 0)))
+
+
+class Rule:
+    """
+    Base class for Sheriff rules.
+
+    Subclasses set name and node_types, and implement visit() for those nodes.
+    start() and finish() run before and after the pass for file-level checks.
+    Bump version when a rule's behaviour changes so cached verdicts are dropped.
+    """
+    name = ""
+    version = 1
+    node_types: Tuple[Type[ast.AST], ...] = ()
+
+    def start(self, ctx: FileContext):
+        pass
+
+    def visit(self, node: ast.AST, ctx: FileContext):
+        pass
+
+    def finish(self, ctx: FileContext):
+        pass
+
+
+def _imported_names(node: ast.AST) -> List[str]:
+    if isinstance(node, ast.Import):
+        return [alias.name for alias in node.names]
+    module = node.module or ""
+    return [module] + [f"{module}.{alias.name}" if module else alias.name for alias in node.names]
+
+
+class TypesImportRule(Rule):
+    """Files must import from the current versioned types module"""
+    name = "types-import"
+    node_types = (ast.Import, ast.ImportFrom)
+
+    def visit(self, node: ast.AST, ctx: FileContext):
+        if ctx.config.types_module in _imported_names(node):
+            ctx.state[self.name] = True
+
+    def finish(self, ctx: FileContext):
+        if not ctx.state.get(self.name):
+            ctx.report(self, f"Must import from '{ctx.config.types_module}' (current lattice version)")
+
+
+class ForbiddenImportRule(Rule):
+    """Imports listed in the lattice's forbidden_imports"""
+    name = "forbidden-import"
+    node_types = (ast.Import, ast.ImportFrom)
+
+    def visit(self, node: ast.AST, ctx: FileContext):
+        for name in _imported_names(node):
+            for forbidden in ctx.config.forbidden_imports:
+                if name == forbidden or name.startswith(forbidden + "."):
+                    ctx.report(self, f"Forbidden import '{name}'. Use approved alternative.", node)
+                    return
+
+
+class ReturnHintRule(Rule):
+    """Every function except __init__ declares its return type"""
+    name = "return-hints"
+    node_types = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+    def visit(self, node: ast.AST, ctx: FileContext):
+        if node.returns is None and node.name != "__init__":
+            ctx.report(self, f"Function '{node.name}' missing return type hint", node)
+
+
+DEFAULT_RULES: Tuple[Type[Rule], ...] = (TypesImportRule, ForbiddenImportRule, ReturnHintRule)
+
+
+def load_rule(spec: str) -> Type[Rule]:
+    """Import a rule class from 'package.module:ClassName'"""
+    module_name, _, class_name = spec.partition(":")
+    rule = getattr(importlib.import_module(module_name), class_name, None)
+    if not (isinstance(rule, type) and issubclass(rule, Rule)):
+        raise ValueError(f"{spec} is not a Sheriff Rule")
+    return rule
+
+
+def ruleset_hash(rules: Sequence[Type[Rule]]) -> str:
+    names = sorted(f"{r.__module__}.{r.__qualname__}:{r.name}:{r.version}" for r in rules)
+    return hashlib.sha256("\n".join(names).encode("utf-8")).hexdigest()[:16]
+
+
+class Sheriff:
+    """Checks source files against a rule set in one AST pass per file"""
+
+    def __init__(self, config: SheriffConfig, rules: Sequence[Type[Rule]] = DEFAULT_RULES):
+        self.config = config
+        self.rule_classes = tuple(rules)
+        self.rules = [cls() for cls in self.rule_classes]
+        self.dispatch: Dict[type, List[Callable[[ast.AST, FileContext], None]]] = {}
+        for rule in self.rules:
+            for node_type in rule.node_types:
+                self.dispatch.setdefault(node_type, []).append(rule.visit)
+        self.cache_salt = f"{config.fingerprint()}:{ruleset_hash(self.rule_classes)}"
+
+    def cache_key(self, source: bytes) -> str:
+        return f"{hashlib.sha256(source).hexdigest()}:{self.cache_salt}"
+
+    def check_source(self, source: Any, path: str = "<string>") -> SheriffResult:
+        """Check source text or bytes"""
+        start = time.perf_counter()
+        if isinstance(source, bytes):
+            source = source.decode("utf-8", errors="replace")
+        ctx = FileContext(path, source, self.config)
+        try:
+            tree = ast.parse(source, filename=path)
+        except SyntaxError as e:
+            ctx.violations.append(Violation("syntax", f"Syntax Error: {e.msg}", e.lineno or 0, e.offset or 0))
+        else:
+            for rule in self.rules:
+                rule.start(ctx)
+            dispatch = self.dispatch
+            for node in ast.walk(tree):
+                handlers = dispatch.get(type(node))
+                if handlers:
+                    for handler in handlers:
+                        handler(node, ctx)
+            for rule in self.rules:
+                rule.finish(ctx)
+        ctx.violations.sort(key=lambda v: (v.line, v.col, v.rule))
+        return SheriffResult(path, not ctx.violations, ctx.violations,
+                             elapsed_ms=round((time.perf_counter() - start) * 1000, 3))
+
+    def check_file(self, path: Path) -> SheriffResult:
+        return self.check_source(Path(path).read_bytes(), str(path))
+
+
+_worker_sheriff: Optional[Sheriff] = None
+
+
+def _init_worker(config: SheriffConfig, rules: Sequence[Type[Rule]]):
+    """Build the rule set once per process"""
+    global _worker_sheriff
+    _worker_sheriff = Sheriff(config, rules)
+
+
+def _check_worker(task: Tuple[str, bytes]) -> SheriffResult:
+    path, source = task
+    return _worker_sheriff.check_source(source, path)
+
+
+def find_python_files(paths: Iterable[Path]) -> List[Path]:
+    """Expand directories into the Python files below them"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(p for p in path.rglob("*.py") if p.is_file())
+        elif path.exists():
+            files.append(path)
+    return sorted(set(files))
+
+
+def _load_cache(cache_path: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get("entries", {}) if data.get("version") == CACHE_VERSION else {}
+
+
+def _save_cache(cache_path: Path, entries: Dict[str, Dict[str, Any]]):
+    if len(entries) > CACHE_MAX_ENTRIES:
+        entries = dict(list(entries.items())[-CACHE_MAX_ENTRIES:])
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "entries": entries}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write Sheriff cache {cache_path}: {e}")
+
+
+def check_paths(paths: Iterable[Path],
+                config: SheriffConfig,
+                rules: Sequence[Type[Rule]] = DEFAULT_RULES,
+                jobs: Optional[int] = None,
+                cache_path: Optional[Path] = DEFAULT_CACHE_PATH) -> Dict[str, Any]:
+    """
+    Check Python files, reusing cached verdicts for unchanged content.
+
+    Returns:
+        {"files": [per-file results], "summary": {...counts and timings}}
+    """
+    start = time.perf_counter()
+    sheriff = Sheriff(config, rules)
+    cache = _load_cache(cache_path) if cache_path else {}
+    files = find_python_files(paths)
+
+    results: Dict[str, SheriffResult] = {}
+    keys: Dict[str, str] = {}
+    tasks: List[Tuple[str, bytes]] = []
+    for path in files:
+        source = path.read_bytes()
+        key = sheriff.cache_key(source)
+        entry = cache.get(key)
+        if entry is not None:
+            violations = [Violation(**v) for v in entry["violations"]]
+            results[str(path)] = SheriffResult(str(path), not violations, violations, cached=True)
+        else:
+            keys[str(path)] = key
+            tasks.append((str(path), source))
+
+    jobs = jobs or os.cpu_count() or 1
+    parallel = jobs > 1 and len(tasks) >= PARALLEL_THRESHOLD
+    if parallel:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(config, sheriff.rule_classes)) as pool:
+            fresh = list(pool.map(_check_worker, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+    else:
+        fresh = [sheriff.check_source(source, path) for path, source in tasks]
+
+    for result in fresh:
+        results[result.path] = result
+        cache[keys[result.path]] = {"violations": [asdict(v) for v in result.violations]}
+    if cache_path and fresh:
+        _save_cache(cache_path, cache)
+
+    ordered = [results[str(path)] for path in files]
+    passed = sum(1 for r in ordered if r.passed)
+    return {
+        "files": [r.to_dict() for r in ordered],
+        "summary": {
+            "total": len(ordered),
+            "passed": passed,
+            "failed": len(ordered) - passed,
+            "cached": sum(1 for r in ordered if r.cached),
+            "checked": len(fresh),
+            "check_ms": round(sum(r.elapsed_ms for r in fresh), 3),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+            "jobs": jobs if parallel else 1,
+            "rules": [r.name for r in sheriff.rules],
+        },
+    }
+
+
+def main():
+    """CLI: check files against the lattice rules"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Enforce Lattice-Lock rules on Python files")
+    parser.add_argument("paths", nargs="+", type=Path, help="Files or directories")
+    parser.add_argument("--lattice", type=Path, default=Path("lattice_project/lattice.yaml"), help="lattice.yaml")
+    parser.add_argument("--rule", action="append", default=[], help="Extra rule as module:Class (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the result cache")
+    args = parser.parse_args()
+
+    rules = DEFAULT_RULES + tuple(load_rule(spec) for spec in args.rule)
+    report = check_paths(args.paths, SheriffConfig.from_lattice(args.lattice), rules, args.jobs,
+                         None if args.no_cache else DEFAULT_CACHE_PATH)
+    summary = report["summary"]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for result in report["files"]:
+            if not result["passed"]:
+                print(f"FAILED {result['path']}")
+                for v in result["violations"]:
+                    print(f"  {v['line']}: [{v['rule']}] {v['message']}")
+        print(f"{summary['passed']}/{summary['total']} passed ({summary['cached']} cached, "
+              f"{summary['elapsed_ms']:.0f} ms, {summary['jobs']} job(s))")
+
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled agent definition index
+"""
+
+import shutil
+import pytest
+
+from model_orchestrator import agent_index
+from model_orchestrator.agent_index import (
+    DEFAULT_AGENT_DIR,
+    AgentEntry,
+    compile_agents,
+    compile_scope_patterns,
+    load_agent_index,
+    read_index,
+    write_index,
+)
+
+
+@pytest.fixture
+def agent_dir(tmp_path):
+    root = tmp_path / "agents"
+    for name in ("engineering_agent", "research_agent"):
+        shutil.copytree(DEFAULT_AGENT_DIR / name, root / name)
+    return root
+
+
+class TestCompileAgents:
+    """Index contents built from agent_definitions/"""
+
+    def test_agents_subagents_and_strategies(self, agent_dir):
+        index = compile_agents(agent_dir)
+        engineering = index.get("engineering_agent")
+
+        assert engineering.parent is None
+        assert "engineering_agent/backend_developer" in engineering.subagents
+        assert engineering.strategies["code_generation"].primary == "codellama:34b"
+        assert engineering.strategies["code_generation"].fallback == "claude-3.5-sonnet"
+        assert engineering.cost_limits["hard_limit"] == 1.0
+        assert engineering.force_local_if_offline is True
+
+        backend = index.get("backend_developer")
+        assert backend.id == "engineering_agent/backend_developer"
+        assert backend.parent == "engineering_agent"
+        assert index.can_delegate("engineering_agent", "backend_developer")
+        assert not index.can_delegate("research_agent", "backend_developer")
+
+    def test_sections_nested_under_agent_are_indexed(self, agent_dir):
+        security = compile_agents(agent_dir).get("security_engineer")
+        assert security.strategies
+        assert security.can_modify("/src/security/policy.py")
+
+    def test_scope_rules(self, agent_dir):
+        engineering = compile_agents(agent_dir).get("engineering_agent")
+        assert engineering.can_access("/src/app/main.py")
+        assert engineering.can_access("/docs")
+        assert not engineering.can_access("/srcfoo")
+        assert not engineering.can_access("/secrets/key")
+        assert engineering.can_modify("/tests/test_a.py")
+        assert not engineering.can_modify("/docs/readme.md")
+
+    def test_scope_globs(self):
+        import re
+        pattern = re.compile(compile_scope_patterns(["/src/**/*.py", "/docs/"]))
+        assert pattern.match("/src/pkg/mod.py")
+        assert not pattern.match("/src/pkg/mod.js")
+        assert pattern.match("/docs/guide.md")
+
+    @pytest.mark.parametrize("old, new", [
+        ("max_depth: 2", "max_depth: unlimited"),
+        ("agent:\n  identity:", "agent: research\nunused:\n  identity:"),
+        ("  strategies:\n", "  strategies: [research]\n  unused:\n"),
+    ])
+    def test_malformed_definition_is_skipped(self, agent_dir, old, new):
+        definition = agent_dir / "research_agent" / "research_agent.yaml"
+        assert old in definition.read_text()
+        definition.write_text(definition.read_text().replace(old, new, 1))
+        index = compile_agents(agent_dir)
+        assert index.get("research_agent") is None
+        assert index.get("engineering_agent") is not None
+
+
+class TestIndexSnapshot:
+    """Snapshot round trip and staleness"""
+
+    def test_round_trip(self, agent_dir, tmp_path):
+        index = compile_agents(agent_dir)
+        path = tmp_path / "agents.snapshot"
+        write_index(index, path)
+
+        loaded = read_index(path, index.fingerprint)
+        assert loaded.agents.keys() == index.agents.keys()
+        assert loaded.names == index.names
+        assert loaded.get("engineering_agent") == index.get("engineering_agent")
+        assert read_index(path, "stale") is None
+
+    def test_recompiles_when_sources_change(self, agent_dir, tmp_path, monkeypatch):
+        path = tmp_path / "agents.snapshot"
+        first = load_agent_index(agent_dir, path)
+
+        calls = []
+        monkeypatch.setattr(agent_index, "compile_agents", lambda d: calls.append(d) or first)
+        agent_index._loaded.clear()
+        assert load_agent_index(agent_dir, path).agents.keys() == first.agents.keys()
+        assert calls == []  # Served from the snapshot
+
+        monkeypatch.undo()
+        definition = agent_dir / "research_agent" / "research_agent.yaml"
+        definition.write_text(definition.read_text().replace("hard_limit: 1.0", "hard_limit: 2.5"))
+        assert load_agent_index(agent_dir, path).get("research_agent").cost_limits["hard_limit"] == 2.5
+
+    def test_snapshot_from_another_layout_is_discarded(self, agent_dir, tmp_path, monkeypatch):
+        index = compile_agents(agent_dir)
+        path = tmp_path / "agents.snapshot"
+        write_index(index, path)
+
+        fields = dict(AgentEntry.__dataclass_fields__)
+        del fields["role"]
+        monkeypatch.setattr(AgentEntry, "__dataclass_fields__", fields)
+        assert read_index(path, index.fingerprint) is None
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Tests for routing by per-agent model_selection strategies
+"""
+
+import shutil
+import pytest
+import pytest_asyncio
+
+from model_orchestrator import tracing
+from model_orchestrator.core import ModelOrchestrator
+from model_orchestrator.agent_index import DEFAULT_AGENT_DIR
+from model_orchestrator.types import TaskType
+from model_orchestrator.mock_server import MockProviderServer, ModelProfile
+from model_orchestrator.api_clients import (
+    GrokAPIClient,
+    OpenAIAPIClient,
+    GoogleAPIClient,
+    AnthropicAPIClient,
+    LocalModelClient,
+)
+
+
+class FailingClient:
+    """Client whose every call fails immediately"""
+    session = None
+
+    async def chat_completion(self, **kwargs):
+        raise RuntimeError("provider down")
+
+    def stream_completion(self, **kwargs):
+        raise RuntimeError("provider down")
+
+
+@pytest.fixture
+def exporter():
+    exporter = tracing.InMemorySpanExporter()
+    tracing.configure_tracing(exporter)
+    yield exporter
+    tracing.configure_tracing()
+
+
+@pytest_asyncio.fixture
+async def server():
+    # Installed local models: the engineering agent's code_generation and quick_response primaries
+    profile = ModelProfile(ttft_ms=0, tokens_per_second=0, output_tokens=5)
+    server = await MockProviderServer(
+        profiles={"codellama:34b": profile, "llama3.1:8b": profile}, default_profile=profile, seed=3).start()
+    yield server
+    await server.stop()
+
+
+@pytest_asyncio.fixture
+async def orchestrator(tmp_path, monkeypatch, server):
+    agent_dir = tmp_path / "agents"
+    shutil.copytree(DEFAULT_AGENT_DIR / "engineering_agent", agent_dir / "engineering_agent")
+    monkeypatch.setenv("OLLAMA_HOST", server.base_url("ollama"))
+    monkeypatch.delenv("ORCHESTRATOR_OFFLINE", raising=False)
+
+    orchestrator = ModelOrchestrator(guide_path=str(tmp_path / "missing.md"), agent_dir=str(agent_dir))
+    clients = {
+        "xai": GrokAPIClient(api_key="test"),
+        "openai": OpenAIAPIClient(api_key="test"),
+        "google": GoogleAPIClient(api_key="test"),
+        "anthropic": AnthropicAPIClient(api_key="test"),
+        "ollama": LocalModelClient(),
+    }
+    for provider, client in clients.items():
+        client.base_url = server.base_url("local" if provider == "ollama" else provider)
+        orchestrator.clients[provider] = client
+    await orchestrator.start_local_discovery()
+    yield orchestrator
+    for client in orchestrator.clients.values():
+        if client.session:
+            await client.session.close()
+
+
+class TestAgentStrategies:
+    """Strategy selection for a named agent"""
+
+    @pytest.mark.asyncio
+    async def test_strategy_primary_without_analysis(self, exporter, orchestrator, server):
+        response = await orchestrator.route_request(
+            "Write a parser", agent="engineering_agent", task_type=TaskType.CODE_GENERATION)
+
+        assert response.model == "codellama:34b"
+        assert server.stats.models["codellama:34b"] == 1
+        names = [s.name for s in exporter.spans]
+        assert "analyze" not in names and "select" not in names
+        select = next(s for s in exporter.spans if s.name == "select.agent")
+        assert select.attributes["strategy"] == "code_generation"
+
+    @pytest.mark.asyncio
+    async def test_candidates_resolve_aliases_and_skip_missing(self, orchestrator):
+        entry = orchestrator.get_agent("engineering_agent")
+        # deepseek-r1:70b is not installed; claude-3.5-sonnet is an alias
+        assert orchestrator._agent_candidates(entry, "reasoning") == ["claude-3-5-sonnet"]
+        assert orchestrator._agent_candidates(entry, "quick_response") == \
+            ["llama3.1:8b", "gpt-4o-mini", "claude-3-5-sonnet"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_agent(self, orchestrator):
+        with pytest.raises(ValueError, match="Unknown agent"):
+            await orchestrator.route_request("hi", agent="no_such_agent")
+
+    @pytest.mark.asyncio
+    async def test_fallback_uses_agent_chain(self, orchestrator, server):
+        orchestrator.clients["ollama"] = FailingClient()
+        response = await orchestrator.route_request(
+            "Write a parser", agent="engineering_agent", task_type=TaskType.CODE_GENERATION)
+        assert response.model == "claude-3-5-sonnet-20240620"
+        assert server.stats.requests["anthropic"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_fallback_keeps_agent_limits(self, orchestrator, server):
+        orchestrator.clients["ollama"] = FailingClient()
+        chunks = [c async for c in orchestrator.stream_request(
+            "Write a parser", agent="engineering_agent", task_type=TaskType.CODE_GENERATION,
+            max_tokens=100_000)]
+        assert chunks
+        # The strategy fallback (claude-3-5-sonnet, ~$1.50) is over the agent's $1.00 hard limit
+        assert server.stats.requests["anthropic"] == 0
+
+
+class TestAgentPolicies:
+    """Cost hard limits and offline overrides"""
+
+    @pytest.mark.asyncio
+    async def test_cost_hard_limit_excludes_expensive_models(self, orchestrator):
+        entry = orchestrator.get_agent("engineering_agent")
+        allowed = orchestrator._agent_model_filter(entry, "hi", {"max_tokens": 100_000})
+        assert not allowed(orchestrator.registry.get_model("claude-3-5-sonnet"))  # ~$1.50 > $1.00
+        assert allowed(orchestrator.registry.get_model("gpt-4o-mini"))
+
+        with pytest.raises(ValueError, match="not allowed"):
+            await orchestrator.route_request(
+                "hi", model_id="claude-3-opus", agent="engineering_agent", max_tokens=100_000)
+        with pytest.raises(ValueError, match="not allowed"):
+            async for _ in orchestrator.stream_request(
+                    "hi", model_id="claude-3-opus", agent="engineering_agent", max_tokens=100_000):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_reasoning_over_budget_falls_back_to_scoring(self, orchestrator):
+        response = await orchestrator.route_request(
+            "Explain the design", agent="engineering_agent",
+            task_type=TaskType.REASONING, max_tokens=100_000)
+        model = orchestrator.registry.get_model(response.model) or next(
+            m for m in orchestrator.registry.models.values() if m.api_name == response.model)
+        assert (100_000 * model.output_cost) / 1_000_000 <= 1.0
+
+    @pytest.mark.asyncio
+    async def test_offline_forces_local(self, orchestrator, server):
+        orchestrator.offline = True
+        await orchestrator.route_request(
+            "Explain the design", agent="engineering_agent", task_type=TaskType.REASONING)
+        assert server.stats.requests["ollama"] + server.stats.requests["local"] == 1
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Tests for cheap-model-first cascade routing
+"""
+
+import asyncio
+import threading
+import pytest
+import pytest_asyncio
+
+from model_orchestrator import metrics
+from model_orchestrator.core import ModelOrchestrator
+from model_orchestrator.types import APIResponse, TaskType
+from model_orchestrator.mock_server import MockProviderServer, ModelProfile
+from model_orchestrator.cascade import (
+    AcceptanceTracker,
+    JudgeVerifier,
+    SheriffVerifier,
+    Verdict,
+    Verifier,
+    pytest_verifier,
+)
+
+LADDER = ["deepseek-coder:1.3b", "gemini-2.5-flash", "claude-3-5-sonnet", "o1-pro"]
+
+GOOD = "```python\ndef add(a: int, b: int) -> int:\n    return a + b\n```"
+BROKEN = "```python\ndef add(a, b):\n    return a +\n```"
+WRONG = "```python\ndef add(a: int, b: int) -> int:\n    return a - b\n```"
+
+
+def _reply(content, model="m"):
+    return APIResponse(content=content, model=model, provider="fake",
+                       usage={"input_tokens": 1000, "output_tokens": 1000}, latency_ms=0)
+
+
+@pytest_asyncio.fixture
+async def orchestrator(tmp_path, monkeypatch):
+    profile = ModelProfile(ttft_ms=0, tokens_per_second=0, output_tokens=5)
+    server = await MockProviderServer(profiles={"deepseek-coder:1.3b": profile}, default_profile=profile).start()
+    monkeypatch.setenv("OLLAMA_HOST", server.base_url("ollama"))
+
+    orchestrator = ModelOrchestrator(guide_path=str(tmp_path / "missing.md"))
+    orchestrator.acceptance = AcceptanceTracker(tmp_path / "stats.json", min_samples=4, explore_every=3)
+    orchestrator.replies = {}
+    orchestrator.called = []
+
+    async def call_model(model, prompt, **kwargs):
+        model_id = next(mid for mid, m in orchestrator.registry.models.items() if m is model)
+        orchestrator.called.append(model_id)
+        reply = orchestrator.replies.get(model_id, GOOD)
+        if isinstance(reply, Exception):
+            raise reply
+        return _reply(reply, model.api_name)
+
+    orchestrator._call_model = call_model
+    yield orchestrator
+    await server.stop()
+
+
+class TestCascade:
+    """Escalation up the ladder on verification failure"""
+
+    @pytest.mark.asyncio
+    async def test_cheapest_rung_answers(self, orchestrator):
+        result = await orchestrator.route_cascade("Write a Python add function", task_type=TaskType.CODE_GENERATION)
+        assert result.accepted and result.model_id == "deepseek-coder:1.3b"
+        assert orchestrator.called == ["deepseek-coder:1.3b"]
+        assert result.cost == 0.0
+
+    @pytest.mark.asyncio
+    async def test_escalates_on_failed_verification(self, orchestrator):
+        orchestrator.replies = {"deepseek-coder:1.3b": BROKEN, "gemini-2.5-flash": BROKEN}
+        before = metrics.CASCADE_ATTEMPTS.value(task_type="CODE_GENERATION", model="gemini-2.5-flash",
+                                                outcome="rejected")
+        result = await orchestrator.route_cascade("Write a Python add function", task_type=TaskType.CODE_GENERATION)
+
+        assert result.accepted and result.model_id == "claude-3-5-sonnet"
+        assert [a.model_id for a in result.attempts] == LADDER[:3]
+        assert "[syntax]" in result.attempts[0].verdict.feedback
+        assert result.cost == pytest.approx(result.attempts[1].cost + result.attempts[2].cost) and result.cost > 0
+        assert metrics.CASCADE_ATTEMPTS.value(task_type="CODE_GENERATION", model="gemini-2.5-flash",
+                                              outcome="rejected") == before + 1
+        stats = orchestrator.acceptance.snapshot()["CODE_GENERATION"]
+        assert stats["deepseek-coder:1.3b"]["accepted"] == 0 and stats["claude-3-5-sonnet"]["accepted"] == 1
+
+    @pytest.mark.asyncio
+    async def test_exhausted_ladder_returns_best_answer(self, orchestrator):
+        orchestrator.replies = {mid: BROKEN for mid in LADDER}
+        orchestrator.replies["gemini-2.5-flash"] = RuntimeError("provider down")
+        result = await orchestrator.route_cascade("Write add", ladder=["deepseek-coder:1.3b", "gemini-2.5-flash",
+                                                                        "o1-pro"], task_type=TaskType.CODE_GENERATION)
+        assert not result.accepted
+        assert result.model_id == "o1-pro"  # Ties go to the stronger rung
+        assert result.attempts[1].error == "provider down"
+        # Provider errors say nothing about answer quality
+        assert "gemini-2.5-flash" not in orchestrator.acceptance.snapshot()["CODE_GENERATION"]
+
+    @pytest.mark.asyncio
+    async def test_verifier_error_keeps_paid_answers(self, orchestrator):
+        class FlakyVerifier(Verifier):
+            name = "flaky"
+            calls = 0
+
+            async def verify(self, prompt, response):
+                self.calls += 1
+                if self.calls == 1:
+                    return Verdict(False, 0.5, "close", self.name)
+                raise FileNotFoundError("pytest")
+
+        result = await orchestrator.route_cascade("Write add", ladder=["deepseek-coder:1.3b", "gemini-2.5-flash"],
+                                                  task_type=TaskType.CODE_GENERATION, verifier=FlakyVerifier())
+        assert not result.accepted and result.model_id == "deepseek-coder:1.3b"
+        failed = result.attempts[1].verdict
+        assert not failed.passed and failed.feedback == "Verifier error: FileNotFoundError: pytest"
+        assert "gemini-2.5-flash" not in orchestrator.acceptance.snapshot()["CODE_GENERATION"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_cascade_keeps_shared_discovery(self, orchestrator, monkeypatch):
+        started = asyncio.Event()
+
+        async def discover():
+            started.set()
+            await asyncio.sleep(0.1)
+            return 0
+
+        monkeypatch.setattr(orchestrator.registry, "discover_local_models", discover)
+        cascade = asyncio.create_task(orchestrator.route_cascade(
+            "Capital of France?", ladder=["unknown-model", "gemini-2.5-flash"]))
+        await started.wait()
+        discovery = orchestrator._discovery_task
+        cascade.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cascade
+        assert await discovery == 0
+
+    @pytest.mark.asyncio
+    async def test_stats_saved_off_the_event_loop(self, orchestrator, monkeypatch):
+        save_threads = []
+        monkeypatch.setattr(orchestrator.acceptance, "save", lambda: save_threads.append(threading.get_ident()))
+        await orchestrator.route_cascade("Write a Python add function", task_type=TaskType.CODE_GENERATION)
+        assert save_threads and threading.get_ident() not in save_threads
+
+    def test_verifier_is_abstract(self):
+        with pytest.raises(TypeError):
+            Verifier()
+
+    @pytest.mark.asyncio
+    async def test_custom_ladder_and_no_verifier(self, orchestrator):
+        orchestrator.replies = {"gemini-2.5-flash": "Paris"}
+        result = await orchestrator.route_cascade("Capital of France?", task_type=TaskType.GENERAL,
+                                                  ladder=["unknown-model", "gemini-2.5-flash"])
+        assert result.accepted and result.response.content == "Paris"
+        assert orchestrator.acceptance.snapshot() == {}
+        with pytest.raises(ValueError, match="No model in the cascade ladder"):
+            await orchestrator.route_cascade("x", ladder=["unknown-model"])
+
+
+class TestAcceptanceTracking:
+    """Ladder tuning from acceptance rates"""
+
+    @pytest.mark.asyncio
+    async def test_rarely_accepted_rung_is_skipped(self, orchestrator, tmp_path):
+        orchestrator.replies = {"deepseek-coder:1.3b": BROKEN}
+        for _ in range(4):
+            await orchestrator.route_cascade("Write add", task_type=TaskType.CODE_GENERATION)
+        assert orchestrator.acceptance.rate(TaskType.CODE_GENERATION, "deepseek-coder:1.3b") == 0.0
+
+        orchestrator.called.clear()
+        for _ in range(3):
+            result = await orchestrator.route_cascade("Write add", task_type=TaskType.CODE_GENERATION)
+            assert result.accepted and result.model_id == "gemini-2.5-flash"
+        # Skipped twice, then probed once to keep the rate current
+        assert orchestrator.called.count("deepseek-coder:1.3b") == 1
+
+        # Other task types keep their own statistics
+        assert not orchestrator.acceptance.should_skip(TaskType.DEBUGGING, "deepseek-coder:1.3b")
+
+        reloaded = AcceptanceTracker(tmp_path / "stats.json", min_samples=4)
+        assert reloaded.rate(TaskType.CODE_GENERATION, "deepseek-coder:1.3b") == 0.0
+
+    def test_top_rung_is_never_skipped(self, tmp_path):
+        tracker = AcceptanceTracker(None, min_samples=1)
+        tracker.record(TaskType.GENERAL, "a", False)
+        tracker.record(TaskType.GENERAL, "b", False)
+        assert tracker.tune(TaskType.GENERAL, ["a", "b"]) == ["b"]
+
+
+class FakeJudge:
+    def __init__(self, reply):
+        self.reply = reply
+
+    async def route_request(self, prompt, model_id=None, **kwargs):
+        return _reply(self.reply)
+
+
+class TestVerifiers:
+    """Sheriff, test-command and judge verifiers"""
+
+    @pytest.mark.asyncio
+    async def test_sheriff_rules(self):
+        from model_orchestrator.sheriff import ReturnHintRule
+        verifier = SheriffVerifier(rules=(ReturnHintRule,))
+        verdict = await verifier.verify("", _reply("```python\ndef f(x):\n    return x\n```"))
+        assert not verdict.passed and verdict.score == 0.75 and "return-hints" in verdict.feedback
+
+    @pytest.mark.asyncio
+    async def test_pytest_verifier(self):
+        tests = "from solution import add\n\ndef test_add():\n    assert add(2, 3) == 5\n"
+        verifier = pytest_verifier(tests)
+        assert (await verifier.verify("", _reply(GOOD))).passed
+        verdict = await verifier.verify("", _reply(WRONG))
+        assert not verdict.passed and "assert" in verdict.feedback
+
+    @pytest.mark.asyncio
+    async def test_judge(self):
+        verdict = await JudgeVerifier(FakeJudge("SCORE: 8\nCorrect"), "o1-pro").verify("q", _reply("a"))
+        assert verdict.passed and verdict.score == 0.8
+        verdict = await JudgeVerifier(FakeJudge("Looks fine"), "o1-pro").verify("q", _reply("a"))
+        assert not verdict.passed
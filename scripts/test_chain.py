@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Tests for the streamed model-chain pipeline and provider streaming
+"""
+
+import asyncio
+import pytest
+import pytest_asyncio
+from contextlib import aclosing
+
+from model_orchestrator.chain import ChainPipeline, ChainStage
+from model_orchestrator.core import ModelOrchestrator
+from model_orchestrator.mock_server import MockProviderServer, ModelProfile
+from model_orchestrator.api_clients import (
+    GrokAPIClient,
+    OpenAIAPIClient,
+    GoogleAPIClient,
+    AnthropicAPIClient,
+    LocalModelClient,
+)
+
+PARAGRAPHS = ["alpha", "beta", "gamma", "delta"]
+
+
+class FakeOrchestrator:
+    """drafter streams paragraphs; reviewer answers each prompt after a delay"""
+
+    def __init__(self, delay=0.05, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.produced = 0
+        self.prompts = []
+        self.closed = []
+
+    async def start_local_discovery(self):
+        pass
+
+    def select_model(self, prompt, task_type=None, agent=None, **kwargs):
+        return "auto-model"
+
+    async def stream_request(self, prompt, model_id=None, **kwargs):
+        self.prompts.append((model_id, prompt))
+        try:
+            if model_id == "drafter":
+                for text in PARAGRAPHS:
+                    await asyncio.sleep(self.delay)
+                    self.produced += 1
+                    yield text + "\n\n"
+            else:
+                await asyncio.sleep(self.delay)
+                if self.fail_on and self.fail_on in prompt:
+                    raise RuntimeError("reviewer down")
+                yield f"[{prompt.split(': ', 1)[-1].strip()}]"
+        except (GeneratorExit, asyncio.CancelledError):
+            self.closed.append(model_id)
+            raise
+
+
+def _stages(segment="\n\n", queue_size=None):
+    return [ChainStage("draft", "Draft: {input}", model_id="drafter"),
+            ChainStage("review", "Review: {input}", model_id="reviewer", segment=segment)]
+
+
+class TestPipeline:
+    """Overlap, ordering, back-pressure and cancellation"""
+
+    @pytest.mark.asyncio
+    async def test_segments_overlap_with_upstream(self):
+        result = await ChainPipeline(FakeOrchestrator(), _stages()).run("topic")
+
+        assert result.output == "[alpha]\n\n[beta]\n\n[gamma]\n\n[delta]"
+        draft, review = result.stages
+        assert review.calls == 4
+        # The reviewer starts before the drafter finishes, so the chain beats the serial latency
+        assert review.started_at < draft.finished_at
+        assert result.elapsed_s < 0.8 * result.serial_s
+
+    @pytest.mark.asyncio
+    async def test_whole_input_stage(self):
+        orchestrator = FakeOrchestrator()
+        result = await ChainPipeline(orchestrator, _stages(segment=None)).run("topic")
+        assert result.stages[1].calls == 1
+        assert orchestrator.prompts[-1] == ("reviewer", "Review: alpha\n\nbeta\n\ngamma\n\ndelta\n\n")
+
+    @pytest.mark.asyncio
+    async def test_stage_model_selection(self):
+        orchestrator = FakeOrchestrator()
+        stages = [ChainStage("draft", "Draft: {input}", model_id="drafter"), ChainStage("summarize", "Summarize")]
+        result = await ChainPipeline(orchestrator, stages).run("topic")
+        assert result.stages[1].model_id == "auto-model"
+        assert orchestrator.prompts[-1][1].startswith("Summarize\n\nalpha")
+
+    @pytest.mark.asyncio
+    async def test_back_pressure(self):
+        orchestrator = FakeOrchestrator(delay=0)
+        pipeline = ChainPipeline(orchestrator, [ChainStage("draft", model_id="drafter")], queue_size=1)
+        consumed = 0
+        async for _ in pipeline.stream("topic"):
+            consumed += 1
+            await asyncio.sleep(0.02)
+            # The drafter can only run a bounded distance ahead of a slow consumer
+            assert orchestrator.produced - consumed <= 2
+
+    @pytest.mark.asyncio
+    async def test_stage_failure_cancels_chain(self):
+        orchestrator = FakeOrchestrator(fail_on="beta")
+        with pytest.raises(RuntimeError, match="reviewer down"):
+            await ChainPipeline(orchestrator, _stages()).run("topic")
+        await asyncio.sleep(0)
+        assert "drafter" in orchestrator.closed
+
+    @pytest.mark.asyncio
+    async def test_closing_stream_cancels_stages(self):
+        orchestrator = FakeOrchestrator()
+        async with aclosing(ChainPipeline(orchestrator, _stages()).stream("topic")) as stream:
+            async for chunk in stream:
+                assert chunk == "[alpha]"
+                break
+        assert "drafter" in orchestrator.closed
+        assert orchestrator.produced < len(PARAGRAPHS)
+
+
+@pytest_asyncio.fixture
+async def orchestrator(tmp_path, monkeypatch):
+    profile = ModelProfile(ttft_ms=0, tokens_per_second=0, output_tokens=5)
+    server = await MockProviderServer(profiles={"codellama:34b": profile}, default_profile=profile).start()
+    monkeypatch.setenv("OLLAMA_HOST", server.base_url("ollama"))
+    orchestrator = ModelOrchestrator(guide_path=str(tmp_path / "missing.md"))
+    clients = {
+        "xai": GrokAPIClient(api_key="test"),
+        "openai": OpenAIAPIClient(api_key="test"),
+        "google": GoogleAPIClient(api_key="test"),
+        "anthropic": AnthropicAPIClient(api_key="test"),
+        "ollama": LocalModelClient(),
+    }
+    for provider, client in clients.items():
+        client.base_url = server.base_url("local" if provider == "ollama" else provider)
+        orchestrator.clients[provider] = client
+    await orchestrator.start_local_discovery()
+    yield orchestrator
+    for client in orchestrator.clients.values():
+        if client.session:
+            await client.session.close()
+    await server.stop()
+
+
+class TestProviderStreaming:
+    """stream_request against each provider's wire format"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("model_id", ["grok-3", "gpt-4o-mini", "gemini-2.5-flash", "claude-3-5-sonnet",
+                                          "codellama:34b"])
+    async def test_stream_request(self, orchestrator, model_id):
+        chunks = [c async for c in orchestrator.stream_request("hi", model_id=model_id)]
+        assert chunks == [f"tok{i} " for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_chain_end_to_end(self, orchestrator):
+        stages = [ChainStage("draft", model_id="gpt-4o-mini"),
+                  ChainStage("review", "Review: {input}", model_id="claude-3-5-sonnet", segment=" ")]
+        result = await ChainPipeline(orchestrator, stages).run("Write a haiku")
+        assert result.stages[1].calls == 5
+        assert result.output == " ".join(["tok0 tok1 tok2 tok3 tok4 "] * 5)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Tests for the multi-model consensus engine
+"""
+
+import asyncio
+import pytest
+from contextlib import aclosing
+
+from model_orchestrator.core import ModelOrchestrator
+from model_orchestrator.consensus import ConsensusEngine, normalize_answer, token_similarity
+from model_orchestrator.types import APIResponse, ModelCapabilities, ModelProvider
+
+
+def _model(name, provider=ModelProvider.OPENAI, cost=1.0):
+    return ModelCapabilities(name, name, provider, 128000, cost, cost, 80, 80, 5)
+
+
+class FakeRegistry:
+    def __init__(self, names):
+        self.models = {name: _model(name) for name in names}
+
+    def get_model(self, model_id):
+        return self.models.get(model_id)
+
+
+class FakeOrchestrator:
+    """Scripted (answer, delay) per model; an Exception answer raises"""
+
+    def __init__(self, script):
+        self.script = script
+        self.registry = FakeRegistry(script)
+        self.cancelled = []
+
+    def create_consensus_group(self, prompt, num_models=3, diverse=True):
+        return list(self.registry.models.items())[:num_models]
+
+    async def _call_model(self, model, prompt, **kwargs):
+        answer, delay = self.script[model.name]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(model.name)
+            raise
+        if isinstance(answer, Exception):
+            raise answer
+        return APIResponse(content=f"Reasoning...\nANSWER: {answer}", model=model.name, provider="fake",
+                           usage={"input_tokens": 1000, "output_tokens": 1000}, latency_ms=0)
+
+
+class TestNormalization:
+    """Answer extraction and similarity"""
+
+    def test_normalize_answer(self):
+        assert normalize_answer("Let me think.\nANSWER: The Paris!") == "paris"
+        assert normalize_answer("Final answer: 3.14.") == "3.14"
+        assert normalize_answer("Paris, France") == "paris france"
+        assert normalize_answer("ANSWER: (A)") == "a"
+
+    def test_token_similarity(self):
+        assert token_similarity("paris france", "paris") == 0.5
+        assert token_similarity("", "") == 1.0
+
+
+class TestConsensus:
+    """Quorum, early termination and reporting"""
+
+    @pytest.mark.asyncio
+    async def test_quorum_cancels_outstanding_calls(self):
+        orchestrator = FakeOrchestrator({
+            "m1": ("42", 0.01), "m2": ("Forty-two", 0.02), "m3": ("42", 0.02),
+            "m4": ("42", 0.03), "m5": ("41", 5.0), "m6": ("42", 5.0),
+        })
+        result = await ConsensusEngine(orchestrator, quorum=3).run("What is 6 * 7?", num_models=6)
+
+        assert result.agreed and result.answer == "42" and result.votes == 3
+        assert result.response.model in ("m3", "m1")
+        assert sorted(orchestrator.cancelled) == ["m5", "m6"]
+        assert result.cancelled == 2 and result.elapsed_s < 1
+        statuses = {a.model_id: a.status for a in result.answers}
+        assert statuses == {"m1": "answered", "m2": "answered", "m3": "answered", "m4": "answered",
+                            "m5": "cancelled", "m6": "cancelled"}
+
+        data = result.to_dict()
+        assert data["cost"] == pytest.approx(4 * 0.002)
+        assert data["single_model"] == {"model": "m1", "cost": 0.002, "latency_s": result.answers[0].latency_s,
+                                        "estimated": False}
+        assert data["cost_ratio"] == 4.0
+
+    @pytest.mark.asyncio
+    async def test_unreachable_quorum_stops_early(self):
+        orchestrator = FakeOrchestrator({"m1": ("yes", 0.01), "m2": ("no", 0.01), "m3": ("yes", 5.0)})
+        result = await ConsensusEngine(orchestrator, quorum=3).run("Is it?")
+        assert not result.agreed and result.votes == 1
+        assert orchestrator.cancelled == ["m3"]
+
+    @pytest.mark.asyncio
+    async def test_errors_and_estimated_baseline(self):
+        orchestrator = FakeOrchestrator({"m1": ("x", 5.0), "m2": (RuntimeError("down"), 0.01),
+                                         "m3": ("paris", 0.01), "m4": ("paris", 0.02)})
+        result = await ConsensusEngine(orchestrator, quorum=2).run("Capital?", num_models=4)
+        assert result.agreed and result.answer == "paris"
+        assert result.answers[1].status == "error" and result.answers[1].error == "down"
+        # The top model was cancelled, so its cost is estimated from the others' token counts
+        assert result.single_model == {"model": "m1", "cost": 0.002, "latency_s": None, "estimated": True}
+
+    @pytest.mark.asyncio
+    async def test_similarity_clustering(self):
+        orchestrator = FakeOrchestrator({"m1": ("Paris", 0.01), "m2": ("Paris, France", 0.02),
+                                         "m3": ("Lyon", 5.0)})
+        assert (await ConsensusEngine(orchestrator, similarity_threshold=0.5).run("Capital?")).agreed
+
+        async def embed(text):
+            return [1.0, 0.0] if "paris" in text else [0.0, 1.0]
+        engine = ConsensusEngine(FakeOrchestrator({"m1": ("Paris", 0.01), "m2": ("It is Paris", 0.02),
+                                                   "m3": ("Lyon", 5.0)}), embed=embed)
+        assert (await engine.run("Capital?")).votes == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_partial_answers(self):
+        orchestrator = FakeOrchestrator({"m1": ("a", 0.01), "m2": ("b", 0.02), "m3": ("a", 5.0)})
+        events = []
+        async with aclosing(ConsensusEngine(orchestrator).stream("?")) as stream:
+            async for event in stream:
+                events.append((event.answer.model_id, event.leading, event.votes, event.pending))
+                break
+        assert events == [("m1", "a", 1, 2)]
+        # Stopping the stream cancels the calls still running
+        assert sorted(orchestrator.cancelled) == ["m2", "m3"]
+
+
+class TestConsensusGroup:
+    """Model selection for a vote"""
+
+    def test_diverse_group(self, tmp_path):
+        orchestrator = ModelOrchestrator(guide_path=str(tmp_path / "missing.md"))
+        group = orchestrator.create_consensus_group("Explain why the sky is blue", 4)
+        assert len(group) == 4
+        assert len({model.provider for _, model in group}) == 4
+
+        ranked = orchestrator.create_consensus_group("Explain why the sky is blue", 4, diverse=False)
+        assert group[0][0] == ranked[0][0]
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for request deadlines
+"""
+
+import time
+import asyncio
+import pytest
+import pytest_asyncio
+
+from model_orchestrator import deadline
+from model_orchestrator.deadline import DeadlineExceeded
+from model_orchestrator.retry import APIError, RetryPolicy, call_with_retry
+from model_orchestrator.core import ModelOrchestrator
+from model_orchestrator.mock_server import MockProviderServer, ModelProfile
+from model_orchestrator.api_clients import (
+    GrokAPIClient, OpenAIAPIClient, GoogleAPIClient, AnthropicAPIClient, LocalModelClient,
+)
+
+SLOW = ModelProfile(ttft_ms=3000, tokens_per_second=0, output_tokens=5)
+DRIP = ModelProfile(ttft_ms=0, tokens_per_second=20, output_tokens=100)
+
+
+class TestDeadline:
+    """Binding and enforcement"""
+
+    def test_start(self):
+        assert deadline.start(None) is None
+        outer = deadline.start(10)
+        assert 9 < outer.remaining <= 10 and not outer.expired
+
+    @pytest.mark.asyncio
+    async def test_enforce_cancels_and_raises(self):
+        bound = deadline.start(0.05)
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded, match="Deadline of 0.05s exceeded"):
+            async with deadline.enforce(bound):
+                assert deadline.current() is bound
+                await asyncio.sleep(5)
+        assert time.monotonic() - start < 1
+        assert deadline.current() is None
+
+        # Already expired: raises before running anything
+        with pytest.raises(DeadlineExceeded):
+            async with deadline.enforce(bound):
+                pytest.fail("should not run")
+
+    @pytest.mark.asyncio
+    async def test_inner_deadline_cannot_extend_outer(self):
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            async with deadline.enforce(deadline.start(0.05)):
+                assert deadline.start(60) is deadline.current()
+                async with deadline.enforce(deadline.start(60)):
+                    await asyncio.sleep(5)
+        assert time.monotonic() - start < 1
+
+    @pytest.mark.asyncio
+    async def test_other_timeouts_pass_through(self):
+        with pytest.raises(TimeoutError) as info:
+            async with deadline.enforce(deadline.start(10)):
+                await asyncio.wait_for(asyncio.sleep(5), 0.01)
+        assert not isinstance(info.value, DeadlineExceeded)
+
+    @pytest.mark.asyncio
+    async def test_bounded_closes_iterator(self):
+        closed = []
+
+        async def ticks():
+            try:
+                for i in range(100):
+                    await asyncio.sleep(0.02)
+                    yield i
+            finally:
+                closed.append(True)
+
+        seen = []
+        with pytest.raises(DeadlineExceeded):
+            async for i in deadline.bounded(ticks(), deadline.start(0.1)):
+                seen.append(i)
+        assert 0 < len(seen) < 100 and closed == [True]
+
+    @pytest.mark.asyncio
+    async def test_retries_stop_at_the_deadline(self):
+        calls = []
+
+        async def rate_limited():
+            calls.append(1)
+            raise APIError(429, "slow down", retry_after=1.0)
+
+        with pytest.raises(APIError) as info:
+            async with deadline.enforce(deadline.start(0.5)):
+                await call_with_retry(rate_limited, RetryPolicy())
+        assert len(calls) == 1 and "deadline budget exhausted" in info.value.__notes__[0]
+
+
+@pytest_asyncio.fixture
+async def orchestrator(tmp_path, monkeypatch):
+    server = await MockProviderServer(profiles={"grok-3": SLOW, "gpt-4o": DRIP},
+                                      default_profile=ModelProfile(ttft_ms=0, tokens_per_second=0,
+                                                                   output_tokens=5), seed=3).start()
+    monkeypatch.setenv("OLLAMA_HOST", server.base_url("ollama"))
+    orchestrator = ModelOrchestrator(guide_path=str(tmp_path / "missing.md"))
+    clients = {
+        "xai": GrokAPIClient(api_key="test"),
+        "openai": OpenAIAPIClient(api_key="test"),
+        "google": GoogleAPIClient(api_key="test"),
+        "anthropic": AnthropicAPIClient(api_key="test"),
+        "ollama": LocalModelClient(),
+    }
+    for provider, client in clients.items():
+        client.base_url = server.base_url("local" if provider == "ollama" else provider)
+        orchestrator.clients[provider] = client
+    await orchestrator.start_local_discovery()
+    yield orchestrator, server
+    for client in orchestrator.clients.values():
+        if client.session:
+            await client.session.close()
+    await server.stop()
+
+
+class TestOrchestratorDeadlines:
+    """Deadlines through route_request, stream_request and route_cascade"""
+
+    @pytest.mark.asyncio
+    async def test_route_request_times_out_without_fallback(self, orchestrator):
+        orchestrator, server = orchestrator
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            await orchestrator.route_request("Write a function", model_id="grok-3", deadline_s=0.2)
+        assert time.monotonic() - start < 1
+        assert sum(server.stats.requests.values()) == 1
+
+        response = await orchestrator.route_request("Write a function", model_id="gpt-4o-mini", deadline_s=5)
+        assert response.content
+
+    @pytest.mark.asyncio
+    async def test_deadline_during_fallback_is_not_swallowed(self, orchestrator, monkeypatch):
+        orchestrator, _ = orchestrator
+        calls = []
+
+        async def call_model(model, prompt, **kwargs):
+            calls.append(model.api_name)
+            if len(calls) == 1:
+                raise RuntimeError("primary down")
+            raise deadline.current().exceeded()
+
+        monkeypatch.setattr(orchestrator, "_call_model", call_model)
+        with pytest.raises(DeadlineExceeded):
+            await orchestrator.route_request("Write a function", model_id="grok-3", deadline_s=5)
+        assert len(calls) == 2  # Remaining fallback models are not tried
+
+    @pytest.mark.asyncio
+    async def test_cascade_stops_at_the_deadline(self, orchestrator):
+        orchestrator, server = orchestrator
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            await orchestrator.route_cascade("Write a function", ladder=["grok-3", "gpt-4o-mini"],
+                                             deadline_s=0.2)
+        assert time.monotonic() - start < 1
+        assert sum(server.stats.requests.values()) == 1  # Later rungs are not tried
+
+    @pytest.mark.asyncio
+    async def test_cascade_does_not_swallow_a_nested_deadline(self, orchestrator, monkeypatch):
+        orchestrator, _ = orchestrator
+        calls = []
+
+        async def call_model(model, prompt, **kwargs):
+            calls.append(model.api_name)
+            raise deadline.current().exceeded()
+
+        monkeypatch.setattr(orchestrator, "_call_model", call_model)
+        with pytest.raises(DeadlineExceeded):
+            await orchestrator.route_cascade("Write a function", ladder=["grok-3", "gpt-4o-mini"],
+                                             deadline_s=5)
+        assert calls == ["grok-3"]
+
+    @pytest.mark.asyncio
+    async def test_stream_returns_partial_output(self, orchestrator):
+        orchestrator, _ = orchestrator
+        received = []
+        with pytest.raises(DeadlineExceeded) as info:
+            async for chunk in orchestrator.stream_request("Write a function", model_id="gpt-4o", deadline_s=0.3):
+                received.append(chunk)
+        assert received and info.value.partial == "".join(received)
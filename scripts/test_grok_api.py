@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the async Grok client and its blocking GrokAPI facade
+"""
+
+import shutil
+import asyncio
+import threading
+import pytest
+import pytest_asyncio
+
+from model_orchestrator.mock_server import MockProviderServer, ModelProfile
+from model_orchestrator.api_clients import GrokAPIClient
+from model_orchestrator.grok_api import GrokAPI, GrokCatalog, load_catalog
+from model_orchestrator.registry import ModelRegistry
+from model_orchestrator.registry_snapshot import DEFAULT_SOURCE_DIR
+
+FAST = ModelProfile(ttft_ms=0, tokens_per_second=0, output_tokens=4)
+MESSAGES = [{"role": "user", "content": "Describe this"}]
+
+
+@pytest_asyncio.fixture
+async def client():
+    async with MockProviderServer(default_profile=FAST) as server:
+        client = GrokAPIClient(api_key="test")
+        client.base_url = server.base_url("xai")
+        yield client, server
+        if client.session:
+            await client.session.close()
+
+
+@pytest.fixture
+def threaded_server():
+    """Mock server on a background loop, so the facade can block on its own loop"""
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(MockProviderServer(default_profile=FAST).start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+@pytest.fixture
+def api(threaded_server):
+    api = GrokAPI(api_key="test")
+    api.client.base_url = threaded_server.base_url("xai")
+    yield api
+    api.close()
+
+
+class TestGrokAPIClient:
+    """Vision and image generation on the pooled async session"""
+
+    @pytest.mark.asyncio
+    async def test_vision_and_image_generation(self, client, tmp_path):
+        client, server = client
+        image = tmp_path / "shot.jpg"
+        image.write_bytes(b"jpeg")
+
+        response = await client.vision_completion("grok-2-vision-1212", MESSAGES, str(image))
+        assert response.content == "tok0 tok1 tok2 tok3 "
+
+        result = await client.image_generation("A lighthouse", n=2)
+        assert [d["url"] for d in result["data"]] == ["https://mock.invalid/grok-2-image-1212/0.png",
+                                                      "https://mock.invalid/grok-2-image-1212/1.png"]
+        assert server.stats.requests["xai"] == 2
+
+
+class TestGrokAPIFacade:
+    """Blocking calls for the CLI"""
+
+    def test_chat_resolves_aliases(self, api, threaded_server):
+        response = api.chat_completion("grok", MESSAGES)
+        assert response["choices"][0]["message"]["content"] == "tok0 tok1 tok2 tok3 "
+        assert threaded_server.stats.models["grok-3"] == 1
+        assert api.get_model_info("grok-mini")["id"] == "grok-3-mini"
+
+    def test_stream_and_image(self, api):
+        assert list(api.stream_completion("grok4", MESSAGES)) == ["tok0 ", "tok1 ", "tok2 ", "tok3 "]
+        assert api.image_generation("A lighthouse", "grok-image")["data"][0]["url"].endswith("/0.png")
+
+    def test_session_reused(self, api):
+        api.chat_completion("grok-3", MESSAGES)
+        session = api.client.session
+        list(api.stream_completion("grok-3", MESSAGES))
+        assert api.client.session is session
+
+    def test_catalog_loaded_once(self):
+        assert GrokAPI(api_key="test").catalog is GrokAPI(api_key="test").catalog is load_catalog()
+
+    def test_aliases_resolve_through_registry(self, tmp_path):
+        source_dir = tmp_path / "model_definitions"
+        shutil.copytree(DEFAULT_SOURCE_DIR, source_dir)
+        xai = source_dir / "xai.yaml"
+        xai.write_text(xai.read_text().replace("api_name: grok-3\n", "api_name: grok-3-beta\n"))
+        catalog = GrokCatalog(ModelRegistry(source_dir, tmp_path / "registry.snapshot"))
+
+        assert catalog.resolve("grok") == catalog.resolve("grok-3") == "grok-3-beta"
+        assert catalog.resolve("grok-image") == "grok-2-image-1212"  # Catalog-only model
+        assert catalog.resolve("grok-9") == "grok-9"
+
+    @pytest.mark.asyncio
+    async def test_refuses_running_loop(self, api):
+        with pytest.raises(RuntimeError, match="GrokAPIClient"):
+            api.chat_completion("grok-3", MESSAGES)
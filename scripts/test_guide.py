@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled, cached and hot-reloaded model guide
+"""
+
+import os
+import asyncio
+import pytest
+
+from model_orchestrator import guide as guide_module
+from model_orchestrator.guide import ModelGuideParser, load_guide, read_snapshot, cache_path_for
+
+GUIDE = """# Model Selection Guide
+
+### Code Tasks
+- **Code Generation**: grok-code-fast-1 > gpt-4o
+- **Reasoning**: o1-pro > grok-4-fast-reasoning
+
+### Blocked Models
+- llama3.2: poor performance
+- gpt-3.5-turbo: retired
+
+## Chains
+
+### Fallback Chains
+- reasoning: o1-pro → grok-4-fast-reasoning → gpt-4o
+
+### End
+"""
+
+
+@pytest.fixture
+def guide_file(tmp_path):
+    path = tmp_path / "MODELS.md"
+    path.write_text(GUIDE, encoding="utf-8")
+    return path
+
+
+def _bump_mtime(path, seconds=10):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 1_000_000_000))
+
+
+class TestCompiledGuide:
+    """Parsing and lookups"""
+
+    def test_lookups(self, guide_file, tmp_path):
+        parser = ModelGuideParser(str(guide_file), cache_path=str(tmp_path / "guide.snapshot"))
+        assert parser.get_recommended_models("code_generation") == ("grok-code-fast-1", "gpt-4o")
+        assert parser.get_recommended_models("CODE_GENERATION") == ("grok-code-fast-1", "gpt-4o")
+        assert parser.get_recommended_models("Code Generation") == ("grok-code-fast-1", "gpt-4o")
+        assert parser.get_recommended_models("translation") == ()
+        assert parser.get_fallback_chain("REASONING") == ("o1-pro", "grok-4-fast-reasoning", "gpt-4o")
+        assert parser.is_model_blocked("llama3.2") and parser.is_model_blocked("gpt-3.5-turbo")
+        assert not parser.is_model_blocked("gpt-4o")
+        assert parser.rules == {
+            "task_mappings": {"code_generation": ["grok-code-fast-1", "gpt-4o"],
+                              "reasoning": ["o1-pro", "grok-4-fast-reasoning"]},
+            "fallback_chains": {"reasoning": ["o1-pro", "grok-4-fast-reasoning", "gpt-4o"]},
+            "blocked_models": ["gpt-3.5-turbo", "llama3.2"],
+        }
+
+    def test_missing_guide_uses_defaults(self, tmp_path):
+        parser = ModelGuideParser(str(tmp_path / "missing.md"))
+        assert parser.is_model_blocked("llama3.2")
+        assert "o1-pro" in parser.get_recommended_models("REASONING")
+
+
+class TestCache:
+    """On-disk snapshot and in-process memo"""
+
+    def test_snapshot_reused_across_processes(self, guide_file, tmp_path, monkeypatch):
+        cache = tmp_path / "guide.snapshot"
+        first = load_guide(guide_file, cache)
+        assert read_snapshot(cache)["fingerprint"] == first.fingerprint
+
+        # A new process: nothing in memory, the snapshot answers without parsing
+        monkeypatch.setattr(guide_module, "_loaded", {})
+        monkeypatch.setattr(guide_module, "parse_guide_text", lambda text: pytest.fail("re-parsed"))
+        assert load_guide(guide_file, cache).blocked == first.blocked
+
+        # Touched but unchanged: the content hash still matches
+        monkeypatch.setattr(guide_module, "_loaded", {})
+        _bump_mtime(guide_file)
+        touched = load_guide(guide_file, cache)
+        assert touched.fingerprint != first.fingerprint and touched.task_mappings == first.task_mappings
+
+    def test_repeated_loads_served_from_memory(self, guide_file, tmp_path):
+        cache = tmp_path / "guide.snapshot"
+        assert load_guide(guide_file, cache) is load_guide(guide_file, cache)
+
+    def test_default_cache_path_is_per_guide(self, tmp_path):
+        assert cache_path_for(tmp_path / "a.md") != cache_path_for(tmp_path / "b.md")
+
+
+class TestHotReload:
+    """Watching MODELS.md"""
+
+    def test_reload_swaps_guide(self, guide_file, tmp_path):
+        parser = ModelGuideParser(str(guide_file), cache_path=str(tmp_path / "guide.snapshot"))
+        assert not parser.reload_if_changed()
+
+        guide_file.write_text(GUIDE.replace("- gpt-3.5-turbo: retired\n", ""), encoding="utf-8")
+        _bump_mtime(guide_file)
+        assert parser.reload_if_changed()
+        assert not parser.is_model_blocked("gpt-3.5-turbo") and parser.is_model_blocked("llama3.2")
+
+    def test_missing_guide_picked_up_when_created(self, tmp_path):
+        path = tmp_path / "MODELS.md"
+        parser = ModelGuideParser(str(path), cache_path=str(tmp_path / "guide.snapshot"))
+        assert not parser.is_model_blocked("gpt-3.5-turbo")
+        path.write_text(GUIDE, encoding="utf-8")
+        assert parser.reload_if_changed() and parser.is_model_blocked("gpt-3.5-turbo")
+
+    @pytest.mark.asyncio
+    async def test_watch(self, guide_file, tmp_path):
+        parser = ModelGuideParser(str(guide_file), cache_path=str(tmp_path / "guide.snapshot"))
+        task = asyncio.create_task(parser.watch(interval=0.02))
+        guide_file.write_text(GUIDE.replace("llama3.2", "llama3.3"), encoding="utf-8")
+        _bump_mtime(guide_file)
+        for _ in range(100):
+            if parser.is_model_blocked("llama3.3"):
+                break
+            await asyncio.sleep(0.02)
+        task.cancel()
+        assert parser.is_model_blocked("llama3.3") and not parser.is_model_blocked("llama3.2")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental lattice compiler
+"""
+
+import ast
+import json
+import os
+import pytest
+
+from model_orchestrator.lattice_compiler import LatticeError, _BlockCache, _parse, compile_lattice, load_lattice
+
+LATTICE = """\
+version: v2
+generated_module: types_v2
+
+forbidden_imports:
+  - requests
+
+entities:
+  Side:
+    enum: [buy, sell]
+  LimitOrder:
+    description: "A priced order on an exchange"
+    fields:
+      order_id: uuid
+      price: decimal
+      side: Side
+      status: { enum: [pending, filled, cancelled], default: pending }
+      note: { type: string, optional: true }
+  ExecutionReport:
+    fields:
+      order_id: uuid
+      executed_price: decimal
+      fills: list[LimitOrder]
+  AuditRecord:
+    fields:
+      at: datetime
+
+interfaces:
+  IExecutionService:
+    depends_on: [src/models/order_repository.py]
+    methods:
+      place_order:
+        params: { order: LimitOrder }
+        returns: ExecutionReport
+      cancel_order:
+        params: "order_id: uuid"
+        returns: bool
+  IOrderRepository:
+    methods:
+      save:
+        params: { order: LimitOrder }
+        returns: None
+  IAuditLog:
+    methods:
+      record:
+        params: { entry: AuditRecord }
+
+file_structure_lock:
+  src/services/execution_service.py: IExecutionService
+  src/models/order_repository.py: IOrderRepository
+  src/audit/log.py: IAuditLog
+"""
+
+
+@pytest.fixture
+def lattice(tmp_path):
+    path = tmp_path / "lattice.yaml"
+    path.write_text(LATTICE)
+    return path
+
+
+class TestCompile:
+    """Generated module and manifest"""
+
+    def test_generated_module(self, lattice):
+        result = compile_lattice(lattice)
+        assert result.output_path == lattice.parent / "src" / "shared" / "types_v2.py"
+        source = result.output_path.read_text()
+        ast.parse(source)
+
+        assert "class LimitOrderStatusEnum(str, Enum):" in source
+        assert "    status: LimitOrderStatusEnum = LimitOrderStatusEnum.pending" in source
+        assert "    note: Optional[str] = None" in source
+        assert "    fills: List[LimitOrder]" in source
+        assert "    def place_order(self, order: LimitOrder) -> ExecutionReport: ..." in source
+        assert "    def cancel_order(self, order_id: UUID) -> bool: ..." in source
+        # Definitions precede their users
+        assert source.index("class Side(") < source.index("class LimitOrder(")
+        assert source.index("class IOrderRepository(") < source.index("class IExecutionService(")
+
+    def test_manifest(self, lattice):
+        result = compile_lattice(lattice)
+        sections = json.loads(result.manifest_path.read_text())["sections"]
+        assert sections["LimitOrder"]["depends_on"] == ["Side"]
+        assert sections["IExecutionService"]["depends_on"] == ["ExecutionReport", "IOrderRepository", "LimitOrder"]
+        assert "IExecutionService" in sections["IOrderRepository"]["dependents"]
+        assert sections["IAuditLog"]["file"] == "src/audit/log.py"
+
+    def test_block_parse_matches_full_parse(self, lattice):
+        text = LATTICE.replace("  AuditRecord:\n", "  # Audit trail\n  AuditRecord:\n    description: |\n      Multi\n\n      line\n")
+        lattice.write_text(text)
+        assert _parse(text.encode(), lattice, _BlockCache(None)) == load_lattice(lattice)
+        # Anchors fall back to a whole-file parse
+        anchored = text.replace("  Side:\n    enum: [buy, sell]", "  Side:\n    enum: &sides [buy, sell]")
+        lattice.write_text(anchored)
+        assert _parse(anchored.encode(), lattice, _BlockCache(None)) == load_lattice(lattice)
+
+    def test_invalid_lattice(self, lattice):
+        lattice.write_text(LATTICE.replace("[src/models/order_repository.py]", "[IMissing]"))
+        with pytest.raises(LatticeError, match="unknown interface IMissing"):
+            compile_lattice(lattice)
+
+
+class TestIncremental:
+    """Section reuse, change propagation and unchanged outputs"""
+
+    def test_unchanged_lattice_does_not_write(self, lattice):
+        first = compile_lattice(lattice)
+        os.utime(first.output_path, ns=(0, 0))
+
+        second = compile_lattice(lattice)
+        assert not second.written and second.changed == []
+        assert first.output_path.stat().st_mtime_ns == 0
+
+    def test_change_reports_affected_files(self, lattice):
+        compile_lattice(lattice)
+        lattice.write_text(LATTICE.replace("      side: Side\n", "      side: Side\n      venue: string\n"))
+
+        result = compile_lattice(lattice)
+        assert result.written
+        assert result.changed == ["LimitOrder"]
+        assert result.reused == 6
+        assert result.affected_files == ["src/models/order_repository.py", "src/services/execution_service.py"]
+        assert "    venue: str" in result.output_path.read_text()
+        assert result.output_path.read_text() == compile_lattice(lattice, force=True).output_path.read_text()
+
+    def test_comment_only_edit_keeps_output(self, lattice):
+        first = compile_lattice(lattice)
+        before = first.output_path.read_bytes()
+        lattice.write_text("# reviewed\n" + LATTICE)
+
+        result = compile_lattice(lattice)
+        assert not result.written and result.changed == []
+        assert result.output_path.read_bytes() == before
+
+    def test_removed_section_is_dropped(self, lattice):
+        compile_lattice(lattice)
+        start = LATTICE.index("interfaces:\n")
+        lattice.write_text(LATTICE[:start] + LATTICE[LATTICE.index("file_structure_lock:"):])
+
+        result = compile_lattice(lattice)
+        assert result.written
+        assert result.removed == ["IAuditLog", "IExecutionService", "IOrderRepository"]
+        assert "Protocol):" not in result.output_path.read_text()
+
+    def test_hand_edited_output_is_regenerated(self, lattice):
+        output = compile_lattice(lattice).output_path
+        output.write_text(output.read_text().replace("price: Decimal", "price: float"))
+
+        result = compile_lattice(lattice)
+        assert result.written and result.reused == 0
+        assert "price: float" not in output.read_text()
+
+    def test_large_lattice_recompiles_one_section(self, tmp_path):
+        entities = "".join(f"  Entity{i}:\n    fields:\n      id: uuid\n      ref: Entity{max(i - 1, 0)}\n"
+                           for i in range(400))
+        path = tmp_path / "lattice.yaml"
+        path.write_text(f"version: v9\ngenerated_module: types_v9\nentities:\n{entities}")
+        compile_lattice(path)
+
+        path.write_text(path.read_text().replace("  Entity200:\n    fields:\n",
+                                                 "  Entity200:\n    fields:\n      extra: int\n"))
+        result = compile_lattice(path)
+        assert result.changed == ["Entity200"] and result.reused == 399
+        assert result.elapsed_ms < 500
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for Ollama auto-discovery and its integration with ModelRegistry
+"""
+
+import asyncio
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from model_orchestrator.core import ModelOrchestrator
+from model_orchestrator.local_discovery import OllamaDiscovery, build_capabilities
+from model_orchestrator.registry import ModelRegistry
+from model_orchestrator.types import ModelProvider
+
+TAGS = {
+    "models": [
+        {"name": "qwen2.5:32b-instruct-q4_K_M", "digest": "aaa", "size": 19 * 1024 ** 3},
+        {"name": "deepseek-coder:1.3b", "digest": "bbb", "size": 776 * 1024 ** 2},
+    ]
+}
+SHOW = {
+    "qwen2.5:32b-instruct-q4_K_M": {
+        "details": {"parameter_size": "32.8B", "quantization_level": "Q4_K_M", "family": "qwen2"},
+        "model_info": {"qwen2.context_length": 32768},
+        "capabilities": ["completion", "tools"],
+    },
+    "deepseek-coder:1.3b": {
+        "details": {"parameter_size": "1B", "quantization_level": "Q4_0", "family": "llama"},
+        "model_info": {"llama.context_length": 16384},
+        "capabilities": ["completion"],
+    },
+}
+
+
+@pytest_asyncio.fixture
+async def ollama_server():
+    """Minimal fake Ollama API that counts /api/show calls"""
+    calls = {"show": 0}
+
+    async def tags(request):
+        return web.json_response(TAGS)
+
+    async def show(request):
+        calls["show"] += 1
+        body = await request.json()
+        return web.json_response(SHOW[body["model"]])
+
+    app = web.Application()
+    app.router.add_get("/api/tags", tags)
+    app.router.add_post("/api/show", show)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}", calls
+    await runner.cleanup()
+
+
+class TestOllamaDiscovery:
+    """Discovery against a fake Ollama API"""
+
+    @pytest.mark.asyncio
+    async def test_discover_and_cache_manifest(self, ollama_server, tmp_path):
+        url, calls = ollama_server
+        discovery = OllamaDiscovery(url, tmp_path / "manifest.json")
+
+        manifest = await discovery.discover()
+        assert set(manifest) == {"qwen2.5:32b-instruct-q4_K_M", "deepseek-coder:1.3b"}
+        assert manifest["deepseek-coder:1.3b"]["show"]["context_length"] == 16384
+        assert calls["show"] == 2
+
+        # Unchanged digests are served from the manifest without /api/show
+        await discovery.discover()
+        assert calls["show"] == 2
+        assert discovery.load_manifest() == manifest
+
+    @pytest.mark.asyncio
+    async def test_registry_registers_installed_models_only(self, ollama_server, tmp_path):
+        url, _ = ollama_server
+        registry = ModelRegistry(
+            snapshot_path=tmp_path / "registry.snapshot",
+            discovery=OllamaDiscovery(url, tmp_path / "manifest.json"),
+        )
+        assert registry.get_model("codellama:34b") is not None  # Placeholder until discovery
+
+        count = await registry.discover_local_models()
+        assert count == 2
+        assert registry.get_model("codellama:34b") is None
+
+        qwen = registry.get_model("qwen2.5:32b")
+        assert qwen.api_name == "qwen2.5:32b-instruct-q4_K_M"
+        assert qwen.coding_score == 85.0  # Curated score kept
+        assert qwen.quantization == "Q4_K_M"
+
+        coder = registry.get_model("deepseek-coder:1.3b")
+        assert coder.provider == ModelProvider.OLLAMA
+        assert coder.context_window == 16384
+        assert coder.coding_score > coder.reasoning_score
+
+    @pytest.mark.asyncio
+    async def test_unreachable_ollama_drops_local_models(self, tmp_path):
+        registry = ModelRegistry(
+            snapshot_path=tmp_path / "registry.snapshot",
+            discovery=OllamaDiscovery("http://127.0.0.1:9", tmp_path / "manifest.json", timeout=1.0),
+        )
+        assert await registry.discover_local_models() == 0
+        assert not registry.get_models_by_provider(ModelProvider.OLLAMA)
+        assert registry.get_model("gpt-4o") is not None
+
+
+def test_build_capabilities_estimates_unknown_models():
+    small = build_capabilities("tiny:1b", {"size": 0, "show": {"parameter_size": "1B"}})
+    large = build_capabilities("big:70b", {"size": 0, "show": {"parameter_size": "70B"}})
+    assert large.reasoning_score > small.reasoning_score
+    assert large.speed_rating < small.speed_rating
+
+
+def test_discovery_restarts_on_a_new_event_loop(tmp_path, monkeypatch):
+    orchestrator = ModelOrchestrator(guide_path=str(tmp_path / "missing.md"))
+    runs = []
+
+    async def discover():
+        runs.append(1)
+        await asyncio.sleep(5 if len(runs) == 1 else 0)
+        return 0
+
+    monkeypatch.setattr(orchestrator.registry, "discover_local_models", discover)
+
+    async def start_and_leave():
+        orchestrator.start_local_discovery()
+        await asyncio.sleep(0)
+
+    async def wait_for_discovery():
+        return await orchestrator.start_local_discovery()
+
+    asyncio.run(start_and_leave())  # Shutdown cancels the pending discovery
+    assert asyncio.run(wait_for_discovery()) == 0
+    assert len(runs) == 2
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Tests for the parallel Mason runner
+"""
+
+import asyncio
+import pytest
+
+from model_orchestrator.mason import MasonRunner, extract_code, plan_tasks
+from model_orchestrator.lattice_compiler import load_lattice
+from model_orchestrator.types import APIResponse, ModelCapabilities, ModelProvider
+
+LATTICE = """\
+version: v2
+generated_module: types_v2
+
+forbidden_imports:
+  - requests
+
+entities:
+  LimitOrder:
+    fields:
+      order_id: uuid
+      price: decimal
+
+interfaces:
+  IOrderRepository:
+    methods:
+      save:
+        params: { order: LimitOrder }
+        returns: None
+  IExecutionService:
+    depends_on: [IOrderRepository]
+    methods:
+      place_order:
+        params: { order: LimitOrder }
+        returns: bool
+  IAuditLog:
+    methods:
+      record:
+        params: { order: LimitOrder }
+        returns: None
+
+file_structure_lock:
+  src/models/order_repository.py: IOrderRepository
+  src/services/execution_service.py: IExecutionService
+  src/audit/log.py: IAuditLog
+"""
+
+# IOrderRepository <-> IExecutionService (the lattice compiler allows forward references)
+CYCLIC_LATTICE = LATTICE.replace("  IOrderRepository:\n",
+                                 "  IOrderRepository:\n    depends_on: [IExecutionService]\n")
+
+GOOD = """```python
+from src.shared.types_v2 import LimitOrder
+
+
+class {name}:
+    def run(self, order: LimitOrder) -> bool:
+        return True
+```"""
+
+BAD = """```python
+import requests
+
+
+def run(order):
+    return requests.post("/orders")
+```"""
+
+
+def _model(name, coding, cost):
+    return ModelCapabilities(name, name, ModelProvider.OPENAI, 128000, cost, cost, 80, coding, 5)
+
+
+class FakeRegistry:
+    def __init__(self):
+        self.models = {"cheap": _model("cheap", 70, 1.0), "strong": _model("strong", 95, 10.0)}
+
+    def get_model(self, model_id):
+        return self.models.get(model_id)
+
+
+class FakeOrchestrator:
+    """Returns scripted replies per file; unscripted files get compliant code"""
+
+    def __init__(self, script=None, delay=0.02):
+        self.registry = FakeRegistry()
+        self.script = script or {}
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def route_request(self, prompt, model_id=None, **kwargs):
+        path = prompt.split(" in ", 1)[1].split(".\n", 1)[0]
+        self.calls.append((path, model_id, prompt))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        replies = self.script.get(path) or []
+        attempt = sum(1 for p, _, _ in self.calls if p == path) - 1
+        reply = replies[attempt] if attempt < len(replies) else GOOD.format(name="Impl")
+        return APIResponse(content=reply, model=model_id or "cheap", provider="fake",
+                           usage={"input_tokens": 1000, "output_tokens": 1000}, latency_ms=0)
+
+
+@pytest.fixture
+def lattice(tmp_path):
+    path = tmp_path / "lattice.yaml"
+    path.write_text(LATTICE)
+    return path
+
+
+class TestPlan:
+    """Task planning and reply parsing"""
+
+    def test_plan_tasks(self, lattice):
+        tasks = plan_tasks(load_lattice(lattice))
+        assert tasks["src/services/execution_service.py"].depends_on == ["src/models/order_repository.py"]
+        assert tasks["src/audit/log.py"].depends_on == []
+
+    def test_dependency_cycle_is_broken(self, lattice):
+        lattice.write_text(CYCLIC_LATTICE)
+        tasks = plan_tasks(load_lattice(lattice))
+        repo, service = "src/models/order_repository.py", "src/services/execution_service.py"
+        assert (tasks[repo].depends_on, tasks[service].depends_on) == ([service], [])
+
+    def test_extract_code(self):
+        assert extract_code("Here:\n```python\nx = 1\n```\nDone") == "x = 1\n"
+        assert extract_code("x = 1") == "x = 1\n"
+
+
+class TestRunner:
+    """Generate, check, retry and escalate"""
+
+    @pytest.mark.asyncio
+    async def test_all_files_accepted_and_written(self, lattice):
+        orchestrator = FakeOrchestrator()
+        report = await MasonRunner(orchestrator, lattice, model_id="cheap").run()
+
+        assert sorted(report.accepted) == sorted(plan_tasks(load_lattice(lattice)))
+        assert (lattice.parent / "src/audit/log.py").read_text().startswith("from src.shared.types_v2 import")
+        # Independent files run concurrently; the dependent waits for its dependency
+        assert orchestrator.max_active == 2
+        order = [path for path, _, _ in orchestrator.calls]
+        assert order.index("src/services/execution_service.py") > order.index("src/models/order_repository.py")
+        # Contract text comes from the compiled module
+        assert "class IAuditLog(Protocol):" in orchestrator.calls[order.index("src/audit/log.py")][2]
+
+        data = report.to_dict()
+        assert data["statuses"] == {"accepted": 3}
+        assert report.total_cost == pytest.approx(3 * 0.002)
+        assert report.cost_per_accepted_file == pytest.approx(0.002)
+        assert report.files_per_minute > 0
+
+    @pytest.mark.asyncio
+    async def test_cyclic_interfaces_complete(self, lattice):
+        lattice.write_text(CYCLIC_LATTICE)
+        report = await asyncio.wait_for(MasonRunner(FakeOrchestrator(), lattice, model_id="cheap").run(), 5)
+        assert report.to_dict()["statuses"] == {"accepted": 3}
+
+    @pytest.mark.asyncio
+    async def test_retry_with_feedback(self, lattice):
+        orchestrator = FakeOrchestrator({"src/audit/log.py": [BAD]})
+        report = await MasonRunner(orchestrator, lattice, model_id="cheap").run(["src/audit/log.py"])
+
+        outcome = report.outcomes["src/audit/log.py"]
+        assert outcome.status == "accepted" and outcome.attempts == 2
+        retry_prompt = orchestrator.calls[-1][2]
+        assert "[forbidden-import] Forbidden import 'requests'" in retry_prompt
+        assert "import requests" in retry_prompt
+
+    @pytest.mark.asyncio
+    async def test_escalation_after_repeated_failure(self, lattice):
+        orchestrator = FakeOrchestrator({"src/audit/log.py": [BAD, BAD]})
+        runner = MasonRunner(orchestrator, lattice, model_id="cheap", max_attempts=3, escalate_after=2)
+        outcome = (await runner.run(["src/audit/log.py"])).outcomes["src/audit/log.py"]
+
+        assert outcome.status == "accepted"
+        assert outcome.models == ["cheap", "cheap", "strong"]
+        assert outcome.cost == pytest.approx(2 * 0.002 + 0.02)
+
+    @pytest.mark.asyncio
+    async def test_rejected_file_blocks_dependents(self, lattice):
+        orchestrator = FakeOrchestrator({"src/models/order_repository.py": [BAD] * 3})
+        report = await MasonRunner(orchestrator, lattice, model_id="cheap", escalate_after=5).run()
+
+        assert report.outcomes["src/models/order_repository.py"].status == "rejected"
+        assert report.outcomes["src/services/execution_service.py"].status == "blocked"
+        assert report.outcomes["src/audit/log.py"].status == "accepted"
+        assert not (lattice.parent / "src/models/order_repository.py").exists()
+
+    @pytest.mark.asyncio
+    async def test_budget_and_file_cap(self, lattice):
+        orchestrator = FakeOrchestrator({"src/audit/log.py": [BAD] * 3})
+        capped = await MasonRunner(orchestrator, lattice, model_id="cheap", file_cost_cap=0.003,
+                                   escalate_after=5).run(["src/audit/log.py"])
+        outcome = capped.outcomes["src/audit/log.py"]
+        assert outcome.status == "rejected" and outcome.attempts == 2
+
+        report = await MasonRunner(FakeOrchestrator(), lattice, model_id="strong", concurrency=1,
+                                   budget=0.015, write=False).run()
+        assert report.to_dict()["statuses"] == {"accepted": 2, "over_budget": 1}
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the metrics registry and orchestrator instrumentation
+"""
+
+import threading
+import urllib.request
+import pytest
+import pytest_asyncio
+
+from model_orchestrator import metrics
+from model_orchestrator.metrics import MetricsRegistry, start_metrics_server
+from model_orchestrator.core import ModelOrchestrator
+from model_orchestrator.mock_server import MockProviderServer, ModelProfile
+from model_orchestrator.api_clients import GrokAPIClient, AnthropicAPIClient
+
+
+class TestMetricsRegistry:
+    """Sharded counters and histograms"""
+
+    def test_counter_merges_thread_shards(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("hits_total", "Hits", ("route",))
+
+        def work():
+            for _ in range(10_000):
+                counter.inc(route="a")
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert counter.value(route="a") == 80_000
+
+    def test_histogram_buckets_and_quantile(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe(value)
+
+        sample = registry.snapshot()["latency_seconds"]["samples"][0]
+        assert list(sample["buckets"].values()) == [2, 1, 1]
+        assert sample["count"] == 4
+        assert histogram.quantile(0.5) == 0.1
+
+    def test_label_mismatch_rejected(self):
+        counter = MetricsRegistry().counter("x_total", "X", ("model",))
+        with pytest.raises(ValueError):
+            counter.inc(provider="openai")
+
+    def test_prometheus_endpoint(self):
+        registry = MetricsRegistry()
+        registry.counter("calls_total", "Calls", ("model",)).inc(3, model='we"ird')
+        registry.histogram("wait_seconds", "Wait", buckets=(1.0,)).observe(0.5)
+
+        server = start_metrics_server(port=0, registry=registry)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            text = urllib.request.urlopen(url).read().decode()
+        finally:
+            server.shutdown()
+        assert "# TYPE calls_total counter" in text
+        assert 'calls_total{model="we\\"ird"} 3.0' in text
+        assert 'wait_seconds_bucket{le="1.0"} 1' in text
+        assert 'wait_seconds_bucket{le="+Inf"} 1' in text
+        assert "wait_seconds_count 1" in text
+
+
+@pytest_asyncio.fixture
+async def orchestrator(tmp_path, monkeypatch):
+    server = await MockProviderServer(
+        default_profile=ModelProfile(ttft_ms=0, tokens_per_second=0, output_tokens=10), seed=5).start()
+    monkeypatch.setenv("OLLAMA_HOST", server.base_url("ollama"))
+    orchestrator = ModelOrchestrator(guide_path=str(tmp_path / "missing.md"))
+    for provider, cls in (("xai", GrokAPIClient), ("anthropic", AnthropicAPIClient)):
+        client = cls(api_key="test")
+        client.base_url = server.base_url(provider)
+        orchestrator.clients[provider] = client
+    await orchestrator.start_local_discovery()
+    yield orchestrator
+    for client in orchestrator.clients.values():
+        if client.session:
+            await client.session.close()
+    await server.stop()
+
+
+class TestOrchestratorMetrics:
+    """route_request, _call_model and client instrumentation"""
+
+    @pytest.mark.asyncio
+    async def test_successful_request_is_counted(self, orchestrator):
+        requests_before = metrics.ROUTE_REQUESTS.value(status="success")
+        calls_before = metrics.MODEL_CALLS.value(model="grok-3", provider="xai", status="success")
+        tokens_before = metrics.TOKENS.value(model="grok-3", direction="output")
+        cost_before = metrics.COST.value(model="grok-3")
+        http_before = metrics.HTTP_REQUESTS.value(client="GrokAPIClient", status="200")
+
+        await orchestrator.route_request("Write a function", model_id="grok-3")
+
+        assert metrics.ROUTE_REQUESTS.value(status="success") == requests_before + 1
+        assert metrics.MODEL_CALLS.value(model="grok-3", provider="xai", status="success") == calls_before + 1
+        assert metrics.TOKENS.value(model="grok-3", direction="output") == tokens_before + 10
+        assert metrics.COST.value(model="grok-3") > cost_before
+        assert metrics.HTTP_REQUESTS.value(client="GrokAPIClient", status="200") == http_before + 1
+
+        snapshot = metrics.REGISTRY.snapshot()
+        assert snapshot["orchestrator_request_duration_seconds"]["samples"][0]["count"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_model_counts_as_error(self, orchestrator):
+        errors_before = metrics.ROUTE_REQUESTS.value(status="error")
+        with pytest.raises(ValueError):
+            await orchestrator.route_request("hello", model_id="no-such-model")
+        assert metrics.ROUTE_REQUESTS.value(status="error") == errors_before + 1
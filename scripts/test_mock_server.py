@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for the mock provider server using the real API clients
+"""
+
+import json
+import time
+import pytest
+import pytest_asyncio
+import aiohttp
+
+from model_orchestrator.mock_server import MockProviderServer, ModelProfile
+from model_orchestrator.api_clients import (
+    OpenAIAPIClient,
+    GrokAPIClient,
+    AnthropicAPIClient,
+    GoogleAPIClient,
+    AzureOpenAIClient,
+)
+
+FAST = ModelProfile(ttft_ms=0, tokens_per_second=0, output_tokens=8)
+MESSAGES = [{"role": "user", "content": "Say hello"}]
+
+
+@pytest_asyncio.fixture
+async def server():
+    server = MockProviderServer(
+        profiles={
+            "fast-model": FAST,
+            "limited-model": ModelProfile(rate_limit_rate=1.0, retry_after_s=7),
+            "flaky-stream": ModelProfile(ttft_ms=0, tokens_per_second=0, output_tokens=10, truncate_rate=1.0),
+            "slow-model": ModelProfile(ttft_ms=150, tokens_per_second=0, output_tokens=4),
+        },
+        default_profile=FAST,
+        seed=1,
+    )
+    async with server:
+        yield server
+
+
+def _client(cls, server, provider, **kwargs):
+    client = cls(**kwargs)
+    client.base_url = server.base_url(provider)
+    return client
+
+
+class TestMockWireFormats:
+    """Each client parses the mocked provider format"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("cls,provider,kwargs", [
+        (OpenAIAPIClient, "openai", {"api_key": "test"}),
+        (GrokAPIClient, "xai", {"api_key": "test"}),
+        (AnthropicAPIClient, "anthropic", {"api_key": "test"}),
+        (GoogleAPIClient, "google", {"api_key": "test"}),
+        (AzureOpenAIClient, "azure", {"api_key": "test", "endpoint": "http://unused"}),
+    ])
+    async def test_chat_completion(self, server, cls, provider, kwargs):
+        client = _client(cls, server, provider, **kwargs)
+        async with client:
+            response = await client.chat_completion(model="fast-model", messages=MESSAGES)
+        assert response.content.startswith("tok0 ")
+        assert response.usage["output_tokens"] == 8
+        assert server.stats.requests[provider] == 1
+
+    @pytest.mark.asyncio
+    async def test_grok_streaming(self, server):
+        client = _client(GrokAPIClient, server, "xai", api_key="test")
+        async with client:
+            chunks = [c async for c in await client.chat_completion(
+                model="fast-model", messages=MESSAGES, stream=True)]
+        assert "".join(chunks) == "".join(f"tok{i} " for i in range(8))
+
+
+class TestMockFailureModes:
+    """Injected 429s, slow TTFT and truncated streams"""
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_with_retry_after(self, server):
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"{server.base_url('openai')}/chat/completions",
+                                    json={"model": "limited-model", "messages": MESSAGES}) as response:
+                assert response.status == 429
+                assert response.headers["Retry-After"] == "7"
+        assert server.stats.statuses[429] == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_ttft(self, server):
+        async with aiohttp.ClientSession() as session:
+            start = time.perf_counter()
+            async with session.post(f"{server.base_url('anthropic')}/messages",
+                                    json={"model": "slow-model", "messages": MESSAGES}) as response:
+                await response.json()
+        assert time.perf_counter() - start >= 0.15
+
+    @pytest.mark.asyncio
+    async def test_truncated_stream_has_no_terminator(self, server):
+        lines = []
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"{server.base_url('openai')}/chat/completions",
+                                    json={"model": "flaky-stream", "messages": MESSAGES, "stream": True}) as response:
+                try:
+                    async for line in response.content:
+                        lines.append(line)
+                except aiohttp.ClientPayloadError:
+                    pass
+        assert b"data: [DONE]\n" not in lines
+        assert server.stats.streams_truncated == 1
+
+    @pytest.mark.asyncio
+    async def test_ollama_native_stream(self, server):
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"{server.base_url('ollama')}/api/chat",
+                                    json={"model": "fast-model", "messages": MESSAGES}) as response:
+                records = [json.loads(line) async for line in response.content if line.strip()]
+        assert records[-1]["done"] is True
+        assert records[-1]["eval_count"] == 8
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the declarative model registry and its compiled snapshot
+"""
+
+import shutil
+import asyncio
+import threading
+import pytest
+from pathlib import Path
+
+from model_orchestrator.registry import ModelRegistry
+from model_orchestrator.registry_snapshot import (
+    DEFAULT_SOURCE_DIR,
+    RegistryValidationError,
+    compile_sources,
+    load_registry,
+    read_snapshot,
+    source_fingerprint,
+)
+from model_orchestrator.types import ModelProvider
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    """Copy of the shipped model definitions"""
+    target = tmp_path / "model_definitions"
+    shutil.copytree(DEFAULT_SOURCE_DIR, target)
+    return target
+
+
+class TestRegistryCompiler:
+    """Compile and validate definition sources"""
+
+    def test_compiles_all_providers(self, source_dir):
+        snapshot = compile_sources(source_dir)
+        providers = {m.provider for m in snapshot.models.values()}
+        assert {ModelProvider.XAI, ModelProvider.OPENAI, ModelProvider.GOOGLE,
+                ModelProvider.ANTHROPIC, ModelProvider.OLLAMA} <= providers
+        assert snapshot.models["claude-3-5-sonnet"].api_name == "claude-3-5-sonnet-20240620"
+        assert snapshot.models["grok-4-fast-reasoning"].requests_per_minute == 480
+
+    def test_local_sizes_include_routed_and_catalog_models(self, source_dir):
+        snapshot = compile_sources(source_dir)
+        assert snapshot.local_sizes["codellama:34b"] == 19.0
+        assert snapshot.local_sizes["deepseek-coder:1.3b"] == 0.776
+
+    def test_invalid_entry_rejected(self, source_dir):
+        (source_dir / "broken.yaml").write_text(
+            "provider: openai\nmodels:\n  - id: bad\n    name: Bad\n    api_name: bad\n"
+            "    context_window: 0\n    input_cost: 1\n    output_cost: 1\n"
+            "    reasoning_score: 50\n    coding_score: 50\n    speed_rating: 5\n"
+        )
+        with pytest.raises(RegistryValidationError):
+            compile_sources(source_dir)
+
+    def test_toml_sources_supported(self, source_dir):
+        (source_dir / "extra.toml").write_text(
+            'provider = "azure"\n[[models]]\nid = "gpt-4o-azure"\nname = "GPT-4o (Azure)"\n'
+            'api_name = "gpt-4o"\ncontext_window = 128000\ninput_cost = 5.0\noutput_cost = 15.0\n'
+            'reasoning_score = 90.0\ncoding_score = 85.0\nspeed_rating = 8.0\n'
+        )
+        snapshot = compile_sources(source_dir)
+        assert snapshot.models["gpt-4o-azure"].provider == ModelProvider.AZURE
+
+
+class TestRegistrySnapshot:
+    """Snapshot round-trip, staleness and hot reload"""
+
+    def test_snapshot_round_trip(self, source_dir, tmp_path):
+        snapshot_path = tmp_path / "registry.snapshot"
+        compiled = load_registry(source_dir, snapshot_path)
+        loaded = read_snapshot(snapshot_path, source_fingerprint(source_dir))
+        assert loaded is not None
+        assert loaded.models == compiled.models
+        assert loaded.aliases == compiled.aliases
+
+    def test_stale_snapshot_is_ignored(self, source_dir, tmp_path):
+        snapshot_path = tmp_path / "registry.snapshot"
+        load_registry(source_dir, snapshot_path)
+        (source_dir / "openai.yaml").write_text("provider: openai\nmodels: []\n")
+        assert read_snapshot(snapshot_path, source_fingerprint(source_dir)) is None
+        assert "gpt-4o" not in load_registry(source_dir, snapshot_path).models
+
+    def test_registry_hot_reload(self, source_dir, tmp_path):
+        registry = ModelRegistry(source_dir, tmp_path / "registry.snapshot")
+        assert registry.get_model("o1-pro") is not None
+        assert registry.reload_if_changed() is False
+
+        (source_dir / "openai.yaml").write_text("provider: openai\nmodels: []\n")
+        assert registry.reload_if_changed() is True
+        assert registry.get_model("o1-pro") is None
+
+    @pytest.mark.asyncio
+    async def test_watch_reloads_off_the_event_loop(self, source_dir, tmp_path):
+        registry = ModelRegistry(source_dir, tmp_path / "registry.snapshot")
+        reload_threads = []
+        reload = registry.reload_if_changed
+        registry.reload_if_changed = lambda: reload_threads.append(threading.get_ident()) or reload()
+
+        task = asyncio.create_task(registry.watch(interval=0.01))
+        (source_dir / "openai.yaml").write_text("provider: openai\nmodels: []\n")
+        for _ in range(100):
+            if registry.get_model("o1-pro") is None:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        assert registry.get_model("o1-pro") is None
+        assert reload_threads and threading.get_ident() not in reload_threads
+
+    def test_alias_lookup(self, source_dir, tmp_path):
+        registry = ModelRegistry(source_dir, tmp_path / "registry.snapshot")
+        assert registry.get_model("grok-code").api_name == "grok-code-fast-1"
+
+    def test_catalog_includes_unrouted_models(self, source_dir, tmp_path):
+        registry = ModelRegistry(source_dir, tmp_path / "registry.snapshot")
+        assert registry.catalog_entry("grok-mini")["id"] == "grok-3-mini"
+        assert registry.get_model("grok-mini") is None and registry.resolve_id("grok-image") is None
+        assert registry.catalog_entry("grok")["context_window"] == registry.get_model("grok-3").context_window
+        assert [e["id"] for e in registry.get_catalog(ModelProvider.XAI, "vision")] == ["grok-2-vision-1212"]
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for the retry policy engine and its use by the API clients
+"""
+
+import time
+import asyncio
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from model_orchestrator.retry import APIError, RetryPolicy, call_with_retry, retry_after_from_headers
+from model_orchestrator.api_clients import OpenAIAPIClient
+
+FAST = RetryPolicy(base_delay_s=0.01, max_delay_s=0.02)
+MESSAGES = [{"role": "user", "content": "hi"}]
+OK = {"choices": [{"message": {"content": "ok"}}], "usage": {"prompt_tokens": 1, "completion_tokens": 1}}
+
+
+def _failing(*errors, result="done"):
+    """Coroutine function raising each error in turn, then returning `result`"""
+    calls = []
+
+    async def func():
+        calls.append(time.monotonic())
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return func, calls
+
+
+class TestRetryAfter:
+    """Server-requested waits"""
+
+    @pytest.mark.parametrize("headers, expected", [
+        ({"Retry-After": "7"}, 7.0),
+        ({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}, 10.0),
+        ({"retry-after-ms": "250"}, 0.25),
+        ({"x-ratelimit-reset-requests": "6m0s"}, 360.0),
+        ({"x-ratelimit-reset-tokens": "20ms"}, 0.02),
+        ({"anthropic-ratelimit-tokens-reset": "2015-10-21T07:28:00Z"}, 10.0),
+        ({"Retry-After": "soon"}, None),
+        ({}, None),
+    ])
+    def test_headers(self, headers, expected):
+        assert retry_after_from_headers(headers, now=1445412470) == expected
+
+    def test_reset_headers_only_for_rate_limits(self):
+        headers = {"x-ratelimit-reset-requests": "1s"}
+        assert retry_after_from_headers(headers, rate_limited=False) is None
+        assert retry_after_from_headers({**headers, "Retry-After": "2"}, rate_limited=False) == 2.0
+
+
+class TestPolicy:
+    """Classification and backoff"""
+
+    def test_classification(self):
+        policy = RetryPolicy()
+        for error in (APIError(429, ""), APIError(503, ""), asyncio.TimeoutError()):
+            assert policy.is_retryable(error)
+        for error in (APIError(400, ""), APIError(401, ""), APIError(404, ""), ValueError("bad json")):
+            assert not policy.is_retryable(error)
+
+    def test_backoff_is_capped_and_jittered(self):
+        policy = RetryPolicy(base_delay_s=1.0, max_delay_s=4.0, jitter=False)
+        assert [policy.backoff(n) for n in range(1, 5)] == [1.0, 2.0, 4.0, 4.0]
+        jittered = RetryPolicy(base_delay_s=1.0, max_delay_s=4.0)
+        assert all(0 <= jittered.backoff(3) <= 4.0 for _ in range(50))
+
+    def test_delay_honours_retry_after(self):
+        policy = RetryPolicy(jitter=False, max_retry_after_s=30)
+        assert policy.delay(1, APIError(429, "", retry_after=3)) == 3
+        assert policy.delay(1, APIError(429, "", retry_after=120)) is None
+
+
+class TestCallWithRetry:
+    """The retry loop"""
+
+    @pytest.mark.asyncio
+    async def test_retries_until_success(self):
+        func, calls = _failing(APIError(500, "boom"), asyncio.TimeoutError())
+        attempts = []
+        assert await call_with_retry(func, FAST, on_attempt=attempts.append) == "done"
+        assert len(calls) == 3
+        assert [(a.number, a.retryable, a.error is None) for a in attempts] == \
+            [(1, True, False), (2, True, False), (3, False, True)]
+
+    @pytest.mark.asyncio
+    async def test_fatal_error_fails_fast(self):
+        func, calls = _failing(APIError(401, "bad key"))
+        with pytest.raises(APIError) as info:
+            await call_with_retry(func, FAST)
+        assert len(calls) == 1
+        assert "not retryable" in info.value.__notes__[0]
+
+    @pytest.mark.asyncio
+    async def test_attempts_exhausted(self):
+        func, calls = _failing(*[APIError(503, "")] * 5)
+        with pytest.raises(APIError) as info:
+            await call_with_retry(func, FAST)
+        assert len(calls) == 3 and "attempts exhausted" in info.value.__notes__[0]
+
+    @pytest.mark.asyncio
+    async def test_waits_for_retry_after_within_budget(self):
+        func, calls = _failing(APIError(429, "", retry_after=0.1))
+        assert await call_with_retry(func, RetryPolicy(jitter=False)) == "done"
+        assert calls[1] - calls[0] >= 0.1
+
+        func, calls = _failing(APIError(429, "", retry_after=5))
+        with pytest.raises(APIError) as info:
+            await call_with_retry(func, RetryPolicy(budget_s=1.0))
+        assert len(calls) == 1 and "deadline budget exhausted" in info.value.__notes__[0]
+
+
+@pytest_asyncio.fixture
+async def provider():
+    """Chat endpoint answering with a scripted sequence of (status, headers)"""
+    script = []
+    hits = []
+
+    async def handler(request):
+        hits.append(request.path)
+        status, headers = script.pop(0) if script else (200, {})
+        if status == 200:
+            return web.json_response(OK)
+        return web.json_response({"error": {"message": f"status {status}"}}, status=status, headers=headers)
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    client = OpenAIAPIClient(api_key="test")
+    client.base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v1"
+    client.retry_policy = FAST
+    yield client, script, hits
+    if client.session:
+        await client.session.close()
+    await runner.cleanup()
+
+
+class TestClients:
+    """Retries against a real HTTP endpoint"""
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_then_success(self, provider):
+        client, script, hits = provider
+        script.extend([(429, {"Retry-After": "0"}), (502, {})])
+        response = await client.chat_completion("gpt-4o-mini", MESSAGES)
+        assert response.content == "ok" and len(hits) == 3
+
+    @pytest.mark.asyncio
+    async def test_bad_request_is_not_retried(self, provider):
+        client, script, hits = provider
+        script.append((400, {}))
+        start = time.monotonic()
+        with pytest.raises(APIError) as info:
+            await client.chat_completion("gpt-4o-mini", MESSAGES)
+        assert info.value.status == 400 and len(hits) == 1
+        assert time.monotonic() - start < 1
+
+    @pytest.mark.asyncio
+    async def test_stream_open_is_retried(self, provider):
+        client, script, hits = provider
+        script.extend([(503, {}), (400, {})])
+        stream = await client.chat_completion("gpt-4o-mini", MESSAGES, stream=True)
+        with pytest.raises(APIError) as info:
+            await stream.__anext__()
+        assert info.value.status == 400 and len(hits) == 2
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared orchestrator server and request coalescing
+"""
+
+import json
+import asyncio
+import aiohttp
+import pytest
+import pytest_asyncio
+
+from model_orchestrator.core import ModelOrchestrator
+from model_orchestrator.server import OrchestratorServer, SingleFlight, parse_chat_call, RequestError
+from model_orchestrator.workflow import ResourceLimiter
+from model_orchestrator.mock_server import MockProviderServer, ModelProfile
+from model_orchestrator.api_clients import (
+    GrokAPIClient, OpenAIAPIClient, GoogleAPIClient, AnthropicAPIClient, LocalModelClient,
+)
+
+SLOW = ModelProfile(ttft_ms=300, tokens_per_second=0, output_tokens=5)
+
+
+def _chat(content="Explain list vs tuple", **fields):
+    return {"messages": [{"role": "user", "content": content}], **fields}
+
+
+class TestSingleFlight:
+    """Coalescing primitive"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_result(self):
+        flights, calls = SingleFlight(), []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "done"
+
+        results = await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+        assert [r for r, _ in results] == ["done"] * 5
+        assert sorted(shared for _, shared in results) == [False] + [True] * 4
+        assert len(calls) == 1 and flights.in_flight == 0
+
+        # Not cached: the next call runs again
+        await flights.do("k", work)
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_when_every_caller_leaves(self):
+        flights, cancelled = SingleFlight(), []
+
+        async def work():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        waiters = [asyncio.create_task(flights.do("k", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        waiters[0].cancel()
+        await asyncio.sleep(0.01)
+        assert not cancelled
+        waiters[1].cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        assert cancelled == [True] and flights.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_caller_after_cancellation_starts_a_new_call(self):
+        flights, calls = SingleFlight(), []
+
+        async def work():
+            calls.append(1)
+            try:
+                await asyncio.sleep(0.05 if len(calls) > 1 else 5)
+            except asyncio.CancelledError:
+                await asyncio.sleep(0.05)  # Slow to unwind
+                raise
+            return "done"
+
+        waiter = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert await flights.do("k", work) == ("done", False)
+        assert len(calls) == 2
+
+
+class TestParse:
+    """Request validation"""
+
+    def test_parse(self):
+        call = parse_chat_call(_chat(model="gpt-4o", temperature=0.2, max_completion_tokens=50,
+                                     task_type="reasoning", deadline_s=5), lambda m: m)
+        assert call.model_id == "gpt-4o" and call.prompt == "Explain list vs tuple"
+        assert call.kwargs == {"temperature": 0.2, "max_tokens": 50}
+        assert call.task_type.name == "REASONING" and call.deadline_s == 5
+        assert parse_chat_call(_chat(model="auto"), lambda m: None).model_id is None
+
+    def test_key_ignores_deadline(self):
+        a = parse_chat_call(_chat(deadline_s=1), lambda m: m)
+        b = parse_chat_call(_chat(deadline_s=9), lambda m: m)
+        c = parse_chat_call(_chat("Other"), lambda m: m)
+        assert a.key() == b.key() != c.key()
+
+    @pytest.mark.parametrize("body, status", [
+        ([], 400),
+        ({"messages": []}, 400),
+        (_chat(model="no-such-model"), 404),
+        (_chat(task_type="juggling"), 400),
+        (_chat(deadline_s=-1), 400),
+    ])
+    def test_invalid(self, body, status):
+        with pytest.raises(RequestError) as info:
+            parse_chat_call(body, lambda m: None)
+        assert info.value.status == status
+
+
+@pytest_asyncio.fixture
+async def served(tmp_path, monkeypatch):
+    upstream = await MockProviderServer(profiles={"gpt-4o": SLOW},
+                                        default_profile=ModelProfile(ttft_ms=0, tokens_per_second=0,
+                                                                     output_tokens=5), seed=3).start()
+    monkeypatch.setenv("OLLAMA_HOST", upstream.base_url("ollama"))
+    orchestrator = ModelOrchestrator(guide_path=str(tmp_path / "missing.md"))
+    clients = {
+        "xai": GrokAPIClient(api_key="test"),
+        "openai": OpenAIAPIClient(api_key="test"),
+        "google": GoogleAPIClient(api_key="test"),
+        "anthropic": AnthropicAPIClient(api_key="test"),
+        "ollama": LocalModelClient(),
+    }
+    for provider, client in clients.items():
+        client.base_url = upstream.base_url("local" if provider == "ollama" else provider)
+        orchestrator.clients[provider] = client
+    server = await OrchestratorServer(orchestrator, limiter=ResourceLimiter(64.0),
+                                      watch_interval=None).start()
+    session = aiohttp.ClientSession()
+    yield server, upstream, session
+    await session.close()
+    await server.stop()
+    for client in orchestrator.clients.values():
+        if client.session:
+            await client.session.close()
+    await upstream.stop()
+
+
+class TestServer:
+    """OpenAI-compatible endpoints"""
+
+    @pytest.mark.asyncio
+    async def test_chat_completion(self, served):
+        server, _, session = served
+        async with session.post(f"{server.url}/v1/chat/completions", json=_chat(model="gpt-4o-mini")) as resp:
+            assert resp.status == 200
+            body = await resp.json()
+        assert body["object"] == "chat.completion" and body["model"] == "gpt-4o-mini"
+        assert body["choices"][0]["message"]["content"]
+        assert body["usage"]["total_tokens"] == body["usage"]["prompt_tokens"] + 5
+
+        async with session.post(f"{server.url}/v1/chat/completions", json=_chat()) as resp:
+            assert resp.status == 200 and (await resp.json())["model"]
+
+    @pytest.mark.asyncio
+    async def test_errors(self, served):
+        server, _, session = served
+        async with session.post(f"{server.url}/v1/chat/completions", json=_chat(model="nope")) as resp:
+            assert resp.status == 404 and (await resp.json())["error"]["code"] == "model_not_found"
+        async with session.post(f"{server.url}/v1/chat/completions", data=b"{not json") as resp:
+            assert resp.status == 400
+
+    @pytest.mark.asyncio
+    async def test_stream(self, served):
+        server, _, session = served
+        async with session.post(f"{server.url}/v1/chat/completions",
+                                json=_chat(model="gpt-4o-mini", stream=True)) as resp:
+            assert resp.headers["Content-Type"].startswith("text/event-stream")
+            events = [line[6:] for line in (await resp.text()).splitlines() if line.startswith("data: ")]
+        assert events[-1] == "[DONE]"
+        chunks = [json.loads(e) for e in events[:-1]]
+        assert chunks[0]["choices"][0]["delta"] == {"role": "assistant"}
+        assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+        assert "".join(c["choices"][0]["delta"].get("content", "") for c in chunks)
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_are_coalesced(self, served):
+        server, upstream, session = served
+
+        async def post(content):
+            async with session.post(f"{server.url}/v1/chat/completions",
+                                    json=_chat(content, model="gpt-4o")) as resp:
+                return resp.headers["X-Orchestrator-Coalesced"], await resp.json()
+
+        results = await asyncio.gather(*(post("Same prompt") for _ in range(10)), post("Other prompt"))
+        assert upstream.stats.models["gpt-4o"] == 2
+        assert sorted(flag for flag, _ in results) == ["false"] * 2 + ["true"] * 9
+        assert len({body["choices"][0]["message"]["content"] for _, body in results[:10]}) == 1
+
+    @pytest.mark.asyncio
+    async def test_follower_deadline_does_not_cancel_shared_call(self, served):
+        server, upstream, session = served
+        url = f"{server.url}/v1/chat/completions"
+
+        async def post(body):
+            async with session.post(url, json=body) as resp:
+                return resp.status
+
+        leader = asyncio.create_task(post(_chat(model="gpt-4o")))
+        await asyncio.sleep(0.05)
+        assert await post(_chat(model="gpt-4o", deadline_s=0.05)) == 504
+        assert await leader == 200
+        assert upstream.stats.models["gpt-4o"] == 1
+
+    @pytest.mark.asyncio
+    async def test_models_health_metrics(self, served):
+        server, _, session = served
+        async with session.get(f"{server.url}/v1/models") as resp:
+            ids = [m["id"] for m in (await resp.json())["data"]]
+        assert ids[0] == "auto" and "gpt-4o" in ids
+        async with session.get(f"{server.url}/health") as resp:
+            assert (await resp.json())["status"] == "ok"
+        async with session.get(f"{server.url}/metrics") as resp:
+            assert "orchestrator_server_requests_total" in await resp.text()
+
+    @pytest.mark.asyncio
+    async def test_unix_socket(self, served, tmp_path):
+        server, _, _ = served
+        path = str(tmp_path / "orchestrator.sock")
+        unix_server = await OrchestratorServer(server.orchestrator, limiter=server.limiter,
+                                               watch_interval=None).start(unix_path=path)
+        try:
+            async with aiohttp.ClientSession(connector=aiohttp.UnixConnector(path=path)) as session:
+                async with session.post("http://orchestrator/v1/chat/completions",
+                                        json=_chat(model="gpt-4o-mini")) as resp:
+                    assert resp.status == 200
+        finally:
+            await unix_server.stop()
+
+    @pytest.mark.asyncio
+    async def test_fallback_model_takes_its_own_slot(self, served, monkeypatch):
+        server, _, session = served
+
+        class Down:
+            session = None
+
+            async def chat_completion(self, **kwargs):
+                raise RuntimeError("provider down")
+
+            def stream_completion(self, **kwargs):
+                raise RuntimeError("provider down")
+
+        admitted, slot = [], server.limiter.slot
+
+        def recording_slot(model_id, model, size_gb=None):
+            admitted.append(model_id)
+            return slot(model_id, model, size_gb)
+
+        monkeypatch.setattr(server.limiter, "slot", recording_slot)
+        monkeypatch.setitem(server.orchestrator.clients, "openai", Down())
+        server.orchestrator.guide.get_fallback_chain = lambda task_type: ("claude-3-5-sonnet",)
+        for stream in (False, True):
+            async with session.post(f"{server.url}/v1/chat/completions",
+                                    json=_chat(model="gpt-4o-mini", stream=stream)) as resp:
+                assert resp.status == 200 and "error" not in await resp.text()
+        assert admitted == ["gpt-4o-mini", "claude-3-5-sonnet"] * 2
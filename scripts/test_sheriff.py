@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass Sheriff engine
+"""
+
+import ast
+import pytest
+
+from model_orchestrator import sheriff as sheriff_module
+from model_orchestrator.sheriff import (
+    DEFAULT_RULES,
+    Rule,
+    Sheriff,
+    SheriffConfig,
+    check_paths,
+    load_rule,
+)
+
+CONFIG = SheriffConfig(generated_module="types_v2", lattice_version="v2", forbidden_imports=("requests", "sqlite3"))
+
+GOOD = """\
+from src.shared.types_v2 import LimitOrder, ExecutionReport
+
+
+class ExecutionService:
+    def __init__(self):
+        self.orders = []
+
+    def place_order(self, order: LimitOrder) -> ExecutionReport:
+        return ExecutionReport(order_id=order.order_id)
+"""
+
+BAD = """\
+import requests
+from sqlite3 import connect
+import json  # lattice:ignore
+
+
+def place_order(order):
+    return requests.post("/orders", json=order)
+
+
+async def cancel(order_id) -> bool:
+    return True
+"""
+
+
+class NoPrintRule(Rule):
+    """Example plugin rule"""
+    name = "no-print"
+    node_types = (ast.Call,)
+
+    def visit(self, node, ctx):
+        if isinstance(node.func, ast.Name) and node.func.id == "print":
+            ctx.report(self, "print() is not allowed", node)
+
+
+class TestRules:
+    """Built-in rules in one pass"""
+
+    def test_compliant_file_passes(self):
+        result = Sheriff(CONFIG).check_source(GOOD, "service.py")
+        assert result.passed and result.violations == []
+
+    def test_violations(self):
+        result = Sheriff(CONFIG).check_source(BAD, "service.py")
+        assert not result.passed
+        found = [(v.rule, v.line) for v in result.violations]
+        assert found == [
+            ("types-import", 0),
+            ("forbidden-import", 1),
+            ("forbidden-import", 2),
+            ("return-hints", 6),
+        ]
+        assert "service.py:6: [return-hints] Function 'place_order' missing return type hint" in result.feedback()
+
+    def test_ignore_marker_and_prefix_matching(self):
+        config = SheriffConfig(generated_module="types_v2", forbidden_imports=("json", "requests"))
+        source = "from src.shared.types_v2 import X\nimport json  # lattice:ignore\nimport requests_toolbelt\n"
+        assert Sheriff(config).check_source(source).passed
+
+    def test_syntax_error(self):
+        result = Sheriff(CONFIG).check_source("def broken(:\n")
+        assert [v.rule for v in result.violations] == ["syntax"]
+
+    def test_plugin_rule(self):
+        rules = DEFAULT_RULES + (load_rule(f"{__name__}:NoPrintRule"),)
+        result = Sheriff(CONFIG, rules).check_source(GOOD + "\nprint('x')\n")
+        assert [v.rule for v in result.violations] == ["no-print"]
+        with pytest.raises(ValueError):
+            load_rule("model_orchestrator.sheriff:SheriffConfig")
+
+    def test_config_from_lattice(self, tmp_path):
+        path = tmp_path / "lattice.yaml"
+        path.write_text("version: v3\ngenerated_module: types_v3\nforbidden_imports:\n  - psycopg2\n")
+        config = SheriffConfig.from_lattice(path)
+        assert config.types_module == "src.shared.types_v3"
+        assert config.forbidden_imports == ("psycopg2",)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "src"
+    root.mkdir()
+    for i in range(40):
+        (root / f"good_{i}.py").write_text(GOOD)
+    (root / "bad.py").write_text(BAD)
+    return root
+
+
+class TestCheckPaths:
+    """Result cache and process pool"""
+
+    def test_cache(self, tree, tmp_path):
+        cache = tmp_path / "sheriff.json"
+        first = check_paths([tree], CONFIG, jobs=1, cache_path=cache)["summary"]
+        assert (first["total"], first["failed"], first["checked"]) == (41, 1, 41)
+
+        second = check_paths([tree], CONFIG, jobs=1, cache_path=cache)
+        assert second["summary"]["cached"] == 41 and second["summary"]["checked"] == 0
+        bad = next(r for r in second["files"] if r["path"].endswith("bad.py"))
+        assert not bad["passed"] and len(bad["violations"]) == 4
+
+        # A new lattice version or rule set invalidates cached verdicts
+        bumped = SheriffConfig("types_v3", "v3", CONFIG.forbidden_imports)
+        assert check_paths([tree], bumped, jobs=1, cache_path=cache)["summary"]["cached"] == 0
+        rules = DEFAULT_RULES + (NoPrintRule,)
+        assert check_paths([tree], CONFIG, rules, jobs=1, cache_path=cache)["summary"]["cached"] == 0
+
+    def test_process_pool_matches_serial(self, tree, monkeypatch):
+        serial = check_paths([tree], CONFIG, jobs=1, cache_path=None)
+        monkeypatch.setattr(sheriff_module, "PARALLEL_THRESHOLD", 1)
+        parallel = check_paths([tree], CONFIG, jobs=2, cache_path=None)
+        assert parallel["summary"]["jobs"] == 2
+        strip = lambda report: [(r["path"], r["passed"], r["violations"]) for r in report["files"]]
+        assert strip(parallel) == strip(serial)
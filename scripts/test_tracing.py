@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Tests for request tracing spans across the routing pipeline
+"""
+
+import json
+import pytest
+import pytest_asyncio
+
+from model_orchestrator import tracing
+from model_orchestrator.core import ModelOrchestrator
+from model_orchestrator.mock_server import MockProviderServer, ModelProfile
+from model_orchestrator.api_clients import (
+    GrokAPIClient,
+    OpenAIAPIClient,
+    GoogleAPIClient,
+    AnthropicAPIClient,
+    LocalModelClient,
+)
+
+
+class FailingClient:
+    """Client whose every call fails immediately"""
+    session = None
+
+    async def chat_completion(self, **kwargs):
+        raise RuntimeError("provider down")
+
+
+@pytest.fixture
+def exporter():
+    exporter = tracing.InMemorySpanExporter()
+    tracing.configure_tracing(exporter)
+    yield exporter
+    tracing.configure_tracing()
+
+
+@pytest_asyncio.fixture
+async def orchestrator(tmp_path, monkeypatch):
+    server = await MockProviderServer(
+        default_profile=ModelProfile(ttft_ms=0, tokens_per_second=0, output_tokens=5), seed=3).start()
+    monkeypatch.setenv("OLLAMA_HOST", server.base_url("ollama"))
+    orchestrator = ModelOrchestrator(guide_path=str(tmp_path / "missing.md"))
+    clients = {
+        "xai": GrokAPIClient(api_key="test"),
+        "openai": OpenAIAPIClient(api_key="test"),
+        "google": GoogleAPIClient(api_key="test"),
+        "anthropic": AnthropicAPIClient(api_key="test"),
+        "ollama": LocalModelClient(),
+    }
+    for provider, client in clients.items():
+        client.base_url = server.base_url("local" if provider == "ollama" else provider)
+        orchestrator.clients[provider] = client
+    await orchestrator.start_local_discovery()
+    yield orchestrator
+    for client in orchestrator.clients.values():
+        if client.session:
+            await client.session.close()
+    await server.stop()
+
+
+def _by_name(spans):
+    return {s.name: s for s in spans}
+
+
+class TestRoutingSpans:
+    """Span tree emitted by ModelOrchestrator.route_request"""
+
+    @pytest.mark.asyncio
+    async def test_span_tree(self, exporter, orchestrator):
+        await orchestrator.route_request("Write a function", model_id="grok-3")
+
+        spans = _by_name(exporter.spans)
+        root = spans["route_request"]
+        assert root.parent_span_id is None
+        assert root.attributes["model"] == "grok-3"
+        assert root.attributes["fallback.used"] is False
+        assert {s.trace_id for s in exporter.spans} == {root.trace_id}
+
+        assert spans["analyze"].parent_span_id == root.span_id
+        assert spans["select"].attributes["model"] == "grok-3"
+
+        call = spans["model.call"]
+        assert call.attributes["tokens.output"] == 5
+        assert call.attributes["retry.count"] == 0
+
+        request = spans["http.request"]
+        assert request.parent_span_id == call.span_id
+        assert request.attributes["http.status_code"] == 200
+        assert spans["http.connect"].parent_span_id == request.span_id
+
+    @pytest.mark.asyncio
+    async def test_url_omits_api_key(self, exporter, orchestrator):
+        client = orchestrator.clients["google"]
+        client.api_key = "secret-google-key"
+        await client.chat_completion(model="gemini-2.5-flash", messages=[{"role": "user", "content": "hi"}])
+
+        request = _by_name(exporter.spans)["http.request"]
+        assert request.attributes["http.url"].endswith("models/gemini-2.5-flash:generateContent")
+        assert "secret-google-key" not in json.dumps(tracing.to_otlp(exporter.spans, "test"))
+
+    @pytest.mark.asyncio
+    async def test_fallback_span(self, exporter, orchestrator):
+        orchestrator.clients["xai"] = FailingClient()
+        await orchestrator.route_request("Write a function", model_id="grok-3")
+
+        spans = exporter.spans
+        failed = next(s for s in spans if s.name == "model.call" and s.status == tracing.STATUS_ERROR)
+        assert "provider down" in failed.status_message
+
+        fallback = _by_name(spans)["fallback"]
+        assert fallback.attributes["model.failed"] == "grok-3"
+        assert fallback.events and fallback.events[0]["name"] == "fallback.attempt"
+        assert _by_name(spans)["route_request"].attributes["fallback.used"] is True
+
+    @pytest.mark.asyncio
+    async def test_stream_records_ttft(self, exporter, orchestrator):
+        client = orchestrator.clients["xai"]
+        stream = await client.chat_completion(model="grok-3", messages=[{"role": "user", "content": "hi"}],
+                                              stream=True)
+        assert len([c async for c in stream]) == 5
+
+        stream_span = _by_name(exporter.spans)["http.stream"]
+        assert stream_span.attributes["ttft_ms"] >= 0
+        assert [e["name"] for e in stream_span.events] == ["first_token"]
+
+
+def test_disabled_tracing_is_noop():
+    tracing.configure_tracing()
+    with tracing.span("anything", {"a": 1}) as span:
+        span.set_attribute("b", 2)
+    assert span is tracing.NOOP_SPAN
+    assert tracing.aiohttp_trace_configs() == []
+
+
+def test_file_exporter_writes_otlp_json(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracing.configure_tracing(file_path=str(path))
+    try:
+        with tracing.span("root", {"model": "grok-3"}):
+            with tracing.span("child", {"tokens": 3}):
+                pass
+    finally:
+        tracing.configure_tracing()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    child, root = spans
+    assert child["parentSpanId"] == root["spanId"]
+    assert len(root["traceId"]) == 32 and len(root["spanId"]) == 16
+    assert child["attributes"] == [{"key": "tokens", "value": {"intValue": "3"}}]
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared data types
+"""
+
+import dataclasses
+import pytest
+
+from model_orchestrator.types import APIResponse, ModelCapabilities, ModelProvider, TaskRequirements, TaskType
+
+
+class TestTypes:
+    """Slotted layouts and hashable requirements"""
+
+    def test_slotted(self):
+        model = ModelCapabilities("m", "m", ModelProvider.OPENAI, 8000, 1.0, 2.0, 50.0, 50.0, 5.0)
+        response = APIResponse("hi", "m", "openai", {"input_tokens": 1, "output_tokens": 1}, 10)
+        for obj in (model, response, TaskRequirements(TaskType.GENERAL)):
+            assert not hasattr(obj, "__dict__")
+        assert model.blended_cost == 1.25 and response.raw_response is None
+        assert dataclasses.astuple(model)[:3] == ("m", "m", ModelProvider.OPENAI)
+
+    def test_requirements_are_frozen_cache_keys(self):
+        requirements = TaskRequirements(TaskType.CODE_GENERATION, min_coding=80.0)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            requirements.priority = "speed"
+
+        cache = {requirements: "gpt-4o"}
+        assert cache[TaskRequirements(TaskType.CODE_GENERATION, min_coding=80.0)] == "gpt-4o"
+        reasoning = dataclasses.replace(requirements, task_type=TaskType.REASONING)
+        assert reasoning not in cache and requirements.task_type == TaskType.CODE_GENERATION
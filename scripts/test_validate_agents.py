@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the schema-based agent definition validator
+"""
+
+import os
+import shutil
+import pytest
+
+from model_orchestrator import validate_agents
+from model_orchestrator.validate_agents import (
+    DEFAULT_ROOT,
+    compile_schema,
+    validate_agent_file,
+    validate_paths,
+)
+
+ENGINEERING_AGENT = DEFAULT_ROOT / "engineering_agent" / "engineering_agent.yaml"
+
+
+def _errors(schema, value):
+    errors = []
+    compile_schema(schema)(value, "$", errors)
+    return errors
+
+
+class TestCompileSchema:
+    """Compiled JSON Schema keywords"""
+
+    def test_type_required_and_enum(self):
+        schema = {
+            "type": "object",
+            "required": ["name", "level"],
+            "properties": {"level": {"enum": ["High", "Low"]}, "count": {"type": "integer", "minimum": 0}},
+        }
+        assert _errors(schema, {"name": "x", "level": "High", "count": 2}) == []
+        errors = _errors(schema, {"level": "Mid", "count": -1})
+        assert "$: missing name" in errors
+        assert any(e.startswith("$.level:") for e in errors)
+        assert any("violates minimum" in e for e in errors)
+        assert _errors({"type": "integer"}, True) == ["$: expected integer, got bool"]
+
+    def test_refs_items_and_additional_properties(self):
+        schema = {
+            "type": "object",
+            "additionalProperties": {"$ref": "#/$defs/names"},
+            "$defs": {"names": {"type": "array", "minItems": 1, "items": {"type": "string", "pattern": "^[a-z]+$"}}},
+        }
+        assert _errors(schema, {"a": ["ok"]}) == []
+        errors = _errors(schema, {"a": ["Bad", 3], "b": []})
+        assert len(errors) == 3
+
+
+class TestAgentDefinitions:
+    """Validation of the repository's agent definitions"""
+
+    def test_repo_agent_is_valid(self):
+        assert validate_agent_file(ENGINEERING_AGENT) == (True, "Valid")
+
+    def test_reports_schema_errors(self, tmp_path):
+        path = tmp_path / "broken.yaml"
+        text = ENGINEERING_AGENT.read_text().replace("criticality: High", "criticality: Urgent", 1)
+        path.write_text(text.replace("  strategies:", "  no_strategies:", 1))
+        valid, message = validate_agent_file(path)
+        assert not valid
+        assert "$.responsibilities[0].criticality" in message
+        assert "$.model_selection: missing strategies" in message
+
+
+@pytest.fixture
+def agent_tree(tmp_path):
+    root = tmp_path / "agents"
+    shutil.copytree(DEFAULT_ROOT / "engineering_agent", root / "engineering_agent")
+    return root
+
+
+class TestIncrementalValidation:
+    """Content-hash cache and process pool"""
+
+    def test_unchanged_files_are_skipped(self, agent_tree, tmp_path):
+        cache = tmp_path / "cache.json"
+        first = validate_paths([agent_tree], cache_path=cache)["summary"]
+        assert first["parsed"] == first["total"] == 9
+        assert first["invalid"] == 1  # security_engineer nests its sections under agent:
+
+        second = validate_paths([agent_tree], cache_path=cache)["summary"]
+        assert second["cached"] == 9 and second["parsed"] == 0
+        assert second["invalid"] == 1
+
+        # A touched but unchanged file is hashed, not re-parsed
+        touched = agent_tree / "engineering_agent" / "engineering_agent.yaml"
+        os.utime(touched, ns=(0, 0))
+        # An edited file is re-validated
+        edited = agent_tree / "engineering_agent" / "subagents" / "api_designer.yaml"
+        edited.write_text(edited.read_text() + "\n# edited\n")
+
+        third = validate_paths([agent_tree], cache_path=cache)
+        by_name = {os.path.basename(r["path"]): r for r in third["files"]}
+        assert by_name["engineering_agent.yaml"]["cached"] is True
+        assert by_name["api_designer.yaml"]["cached"] is False
+        assert third["summary"]["parsed"] == 1
+
+    def test_process_pool_matches_serial(self, agent_tree, monkeypatch):
+        serial = validate_paths([agent_tree], jobs=1, cache_path=None)
+        monkeypatch.setattr(validate_agents, "PARALLEL_THRESHOLD", 1)
+        parallel = validate_paths([agent_tree], jobs=2, cache_path=None)
+        assert parallel["summary"]["jobs"] == 2
+        assert [(r["path"], r["valid"], r["errors"]) for r in parallel["files"]] == \
+            [(r["path"], r["valid"], r["errors"]) for r in serial["files"]]
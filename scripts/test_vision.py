@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tests for the vision input pipeline
+"""
+
+import json
+import base64
+import threading
+import pytest
+from aiohttp import web
+
+from model_orchestrator import vision
+from model_orchestrator.vision import ImagePreparer, PreparedImage, StreamedJSON, attach_image
+from model_orchestrator.api_clients import GrokAPIClient
+
+MESSAGES = [{"role": "user", "content": "Describe this"}]
+
+
+class FakeImage:
+    """Stands in for PIL.Image: the file holds 'WIDTHxHEIGHT'"""
+    opened = 0
+
+    def __init__(self, path):
+        FakeImage.opened += 1
+        with open(path) as f:
+            self.size = tuple(int(n) for n in f.read().split("x"))
+        self.mode = "RGBA"
+
+    @classmethod
+    def open(cls, path):
+        return cls(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def thumbnail(self, box):
+        scale = min(box[0] / self.size[0], box[1] / self.size[1])
+        self.size = (int(self.size[0] * scale), int(self.size[1] * scale))
+
+    def convert(self, mode):
+        self.mode = mode
+        return self
+
+    def save(self, path, fmt, **kwargs):
+        with open(path, "w") as f:
+            f.write(f"{self.size[0]}x{self.size[1]} {fmt} {self.mode}")
+
+
+def _image(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return path
+
+
+class TestEncoding:
+    """Chunked base64 and streamed bodies"""
+
+    @pytest.mark.parametrize("size", [0, 1, 5, 6, 100])
+    def test_iter_base64_matches_whole_file(self, tmp_path, size):
+        data = bytes(range(256))[:size]
+        path = _image(tmp_path, "a.png", data)
+        image = PreparedImage(path, "image/png", "d", size)
+        assert b"".join(image.iter_base64(chunk_size=6)) == base64.b64encode(data)
+        assert image.encoded_size == len(base64.b64encode(data))
+
+    @pytest.mark.asyncio
+    async def test_streamed_json(self, tmp_path):
+        data = b"\x89PNG" * 1000
+        image = PreparedImage(_image(tmp_path, "a.png", data), "image/png", "abc", len(data))
+        payload = {"model": "m", "messages": attach_image(MESSAGES, image.url_template)}
+        body = StreamedJSON(payload, [image])
+
+        sent = b"".join([chunk async for chunk in body.chunks()])
+        assert len(sent) == body.size
+        url = json.loads(sent)["messages"][0]["content"][1]["image_url"]["url"]
+        assert url == "data:image/png;base64," + base64.b64encode(data).decode()
+        # Chunks can be produced again for a retry
+        assert b"".join([chunk async for chunk in body.chunks()]) == sent
+
+    def test_attach_image_copies(self):
+        messages = attach_image(MESSAGES, "data:x")
+        assert MESSAGES[0]["content"] == "Describe this"
+        assert messages[0]["content"] == [{"type": "text", "text": "Describe this"},
+                                          {"type": "image_url", "image_url": {"url": "data:x"}}]
+        assert attach_image([], "data:x") == [{"role": "user", "content": [
+            {"type": "image_url", "image_url": {"url": "data:x"}}]}]
+
+    @pytest.mark.asyncio
+    async def test_request_carries_content_length(self, tmp_path):
+        received = {}
+
+        async def handler(request):
+            received["length"] = request.headers.get("Content-Length")
+            received["chunked"] = request.headers.get("Transfer-Encoding")
+            received["body"] = await request.json()
+            return web.json_response({"choices": [{"message": {"content": "ok"}}],
+                                      "usage": {"prompt_tokens": 1, "completion_tokens": 1}})
+
+        app = web.Application(client_max_size=64 * 1024 ** 2)
+        app.router.add_post("/v1/chat/completions", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        client = GrokAPIClient(api_key="test")
+        client.base_url = f"http://127.0.0.1:{port}/v1"
+        client.images = ImagePreparer(cache_dir=str(tmp_path / "cache"))
+        data = b"\xff\xd8" * 300_000
+        try:
+            response = await client.vision_completion("grok-2-vision-1212", MESSAGES,
+                                                      str(_image(tmp_path, "big.jpg", data)))
+        finally:
+            await client.session.close()
+            await runner.cleanup()
+
+        assert response.content == "ok"
+        assert received["chunked"] is None and int(received["length"]) > len(data)
+        url = received["body"]["messages"][0]["content"][1]["image_url"]["url"]
+        assert base64.b64decode(url.split(",", 1)[1]) == data
+
+
+class TestPreparer:
+    """Hashing, downsizing and caching"""
+
+    def test_without_pillow_sends_source(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(vision, "Image", None)
+        path = _image(tmp_path, "shot.png", b"pixels")
+        image = ImagePreparer(cache_dir=str(tmp_path / "cache")).prepare(str(path))
+        assert image.path == path and not image.resized
+        assert image.media_type == "image/png" and image.size == 6
+
+    def test_downsizes_and_caches_by_content(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(vision, "Image", FakeImage)
+        FakeImage.opened = 0
+        cache = tmp_path / "cache"
+        preparer = ImagePreparer(max_side=1000, cache_dir=str(cache))
+
+        first = preparer.prepare(str(_image(tmp_path, "a.png", b"4000x2000")))
+        assert first.resized and first.path.parent == cache
+        assert first.path.read_text() == "1000x500 PNG RGBA"
+
+        # Same file again: remembered without rehashing or reopening
+        assert preparer.prepare(str(tmp_path / "a.png")) is first
+        # Same content under another name, in a new process: served from the disk cache
+        again = ImagePreparer(max_side=1000, cache_dir=str(cache)).prepare(
+            str(_image(tmp_path, "b.png", b"4000x2000")))
+        assert again.path == first.path and FakeImage.opened == 1
+
+        # JPEGs stay JPEG (converted to RGB); small images are sent as they are
+        jpeg = preparer.prepare(str(_image(tmp_path, "c.jpg", b"3000x3000")))
+        assert jpeg.media_type == "image/jpeg" and jpeg.path.read_text() == "1000x1000 JPEG RGB"
+        small = _image(tmp_path, "d.png", b"800x600")
+        assert preparer.prepare(str(small)).path == small
+
+    def test_cache_is_pruned(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(vision, "Image", FakeImage)
+        preparer = ImagePreparer(max_side=10, cache_dir=str(tmp_path / "cache"), max_cache_bytes=20)
+        for i in range(4):
+            preparer.prepare(str(_image(tmp_path, f"{i}.png", f"{100 + i}x100".encode())))
+        assert sum(p.stat().st_size for p in (tmp_path / "cache").iterdir()) <= 20
+
+    def test_concurrent_prepares_of_one_image(self, tmp_path, monkeypatch):
+        both_saved = threading.Barrier(2, timeout=5)
+
+        class SlowImage(FakeImage):
+            def save(self, path, fmt, **kwargs):
+                super().save(path, fmt, **kwargs)
+                both_saved.wait()  # Neither renames its file before the other has written
+
+        monkeypatch.setattr(vision, "Image", SlowImage)
+        source = str(_image(tmp_path, "shot.png", b"4000x2000"))
+        results, errors = [], []
+
+        def prepare():
+            try:
+                results.append(ImagePreparer(max_side=1000, cache_dir=str(tmp_path / "cache")).prepare(source))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=prepare) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        assert [r.path.read_text() for r in results] == ["1000x500 PNG RGBA"] * 2
+        assert [p.name for p in (tmp_path / "cache").iterdir()] == [results[0].path.name]
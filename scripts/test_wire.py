@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for response decoding and SSE framing
+"""
+
+import json
+import pytest
+import pytest_asyncio
+
+from model_orchestrator import wire
+from model_orchestrator.wire import SSEFramer, ResponseFormatError, decode_completion, delta_decoder
+from model_orchestrator.mock_server import MockProviderServer, ModelProfile
+from model_orchestrator.api_clients import OpenAIAPIClient, AnthropicAPIClient
+
+BODIES = {
+    "openai": ({"id": "x", "choices": [{"index": 0, "message": {"role": "assistant", "content": "hi"}}],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}}, ("hi", 3, 2)),
+    "anthropic": ({"id": "m", "content": [{"type": "text", "text": "hi"}],
+                   "usage": {"input_tokens": 3, "output_tokens": 2}}, ("hi", 3, 2)),
+    "gemini": ({"candidates": [{"content": {"parts": [{"text": "h"}, {"text": "i"}], "role": "model"}}],
+                "usageMetadata": {"promptTokenCount": 3, "candidatesTokenCount": 2}}, ("hi", 3, 2)),
+    "ollama": ({"model": "m", "response": "hi", "done": True, "prompt_eval_count": 3, "eval_count": 2},
+               ("hi", 3, 2)),
+}
+
+
+@pytest.fixture(params=["msgspec", "orjson", "json"])
+def backend(request, monkeypatch):
+    """Run a test with each JSON backend, skipping ones that are not installed"""
+    if request.param == "msgspec":
+        pytest.importorskip("msgspec")
+    else:
+        monkeypatch.setattr(wire, "msgspec", None)
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    elif request.param == "json":
+        monkeypatch.setattr(wire, "orjson", None)
+    return request.param
+
+
+class TestDecoding:
+    """Typed completion and delta decoding"""
+
+    @pytest.mark.parametrize("fmt", sorted(BODIES))
+    def test_decode_completion(self, backend, fmt):
+        data, (content, input_tokens, output_tokens) = BODIES[fmt]
+        body = json.dumps(data).encode()
+
+        completion, raw = decode_completion(body, fmt)
+        assert (completion.content, completion.input_tokens, completion.output_tokens) == \
+            (content, input_tokens, output_tokens)
+        assert raw is None
+
+        assert decode_completion(body, fmt, keep_raw=True)[1] == data
+
+    def test_missing_usage_and_bad_bodies(self, backend):
+        completion, _ = decode_completion(b'{"choices": [{"message": {"content": null}}]}', "openai")
+        assert (completion.content, completion.input_tokens) == ("", 0)
+        for body in (b'{"choices": []}', b'{"error": "overloaded"}', b"<html>", b'{"choices": [{}]}'):
+            with pytest.raises(ResponseFormatError):
+                decode_completion(body, "openai")
+
+    def test_delta_decoder(self, backend):
+        openai = delta_decoder("openai")
+        assert openai(b'{"choices": [{"index": 0, "delta": {"content": "tok"}}]}') == "tok"
+        assert openai(b'{"choices": [{"index": 0, "delta": {"role": "assistant"}}]}') is None
+        anthropic = delta_decoder("anthropic")
+        assert anthropic(b'{"type": "content_block_delta", "delta": {"type": "text_delta", "text": "tok"}}') == "tok"
+        assert anthropic(b'{"type": "message_start", "message": {"id": "m"}}') is None
+        assert delta_decoder("gemini")(b'{"candidates": [{"content": {"parts": [{"text": "tok"}]}}]}') == "tok"
+
+    def test_dumps_round_trip(self, backend):
+        payload = {"model": "m", "messages": [{"role": "user", "content": "héllo"}]}
+        assert json.loads(wire.dumps(payload)) == payload
+
+
+class TestSSEFramer:
+    """Incremental event framing"""
+
+    STREAM = (b": keep-alive\r\n\r\n"
+              b"event: message\r\ndata: {\"a\": 1}\r\n\r\n"
+              b"data:{\"b\": 2}\n\n"
+              b"data: line one\ndata: line two\nid: 7\n\n"
+              b"data: [DONE]\n\n")
+    EVENTS = [b'{"a": 1}', b'{"b": 2}', b"line one\nline two", b"[DONE]"]
+
+    @pytest.mark.parametrize("size", [1, 2, 7, 1000])
+    def test_arbitrary_chunk_boundaries(self, size):
+        framer = SSEFramer()
+        events = []
+        for i in range(0, len(self.STREAM), size):
+            events.extend(framer.feed(self.STREAM[i:i + size]))
+        events.extend(framer.close())
+        assert events == self.EVENTS
+
+    def test_unterminated_final_event(self):
+        framer = SSEFramer()
+        assert framer.feed(b"data: one\n\ndata: two") == [b"one"]
+        assert framer.close() == [b"two"]
+
+    @pytest.mark.asyncio
+    async def test_events(self):
+        async def chunks():
+            yield self.STREAM[:10]
+            yield self.STREAM[10:]
+        assert [e async for e in SSEFramer().events(chunks())] == self.EVENTS
+
+
+@pytest_asyncio.fixture
+async def server():
+    async with MockProviderServer(default_profile=ModelProfile(ttft_ms=0, tokens_per_second=0,
+                                                               output_tokens=3)) as server:
+        yield server
+
+
+class TestClients:
+    """Raw response retention"""
+
+    @pytest.mark.asyncio
+    async def test_raw_response_opt_in(self, server, monkeypatch):
+        client = OpenAIAPIClient(api_key="test")
+        client.base_url = server.base_url("openai")
+        messages = [{"role": "user", "content": "hi"}]
+        try:
+            response = await client.chat_completion("gpt-4o-mini", messages)
+            assert response.raw_response is None
+            assert response.content == "tok0 tok1 tok2 " and response.usage["output_tokens"] == 3
+
+            client.keep_raw_response = True
+            kept = await client.chat_completion("gpt-4o-mini", messages)
+            assert kept.raw_response["object"] == "chat.completion"
+        finally:
+            await client.session.close()
+
+        monkeypatch.setenv("ORCHESTRATOR_RAW_RESPONSES", "1")
+        assert AnthropicAPIClient(api_key="test").keep_raw_response
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Tests for the workflow DAG executor
+"""
+
+import json
+import asyncio
+import pytest
+import pytest_asyncio
+
+from model_orchestrator import tracing
+from model_orchestrator.deadline import DeadlineExceeded
+from model_orchestrator.core import ModelOrchestrator
+from model_orchestrator.types import APIResponse, ModelCapabilities, ModelProvider, TaskType
+from model_orchestrator.mock_server import MockProviderServer, ModelProfile
+from model_orchestrator.api_clients import AnthropicAPIClient, LocalModelClient
+from model_orchestrator.workflow import (
+    CheckpointLog,
+    ResourceLimiter,
+    WorkflowError,
+    WorkflowExecutor,
+    WorkflowNode,
+    load_workflow,
+    topological_order,
+)
+
+
+def _model(name, provider, size_gb=None):
+    return ModelCapabilities(name=name, api_name=name, provider=provider, context_window=8192,
+                             input_cost=0.0, output_cost=0.0, reasoning_score=80, coding_score=80,
+                             speed_rating=5, size_gb=size_gb)
+
+
+class FakeRegistry:
+    def __init__(self):
+        self.models = {
+            "local-a": _model("local-a", ModelProvider.OLLAMA, 10.0),
+            "local-b": _model("local-b", ModelProvider.OLLAMA, 10.0),
+            "cloud": _model("cloud", ModelProvider.ANTHROPIC),
+        }
+        self.local_sizes = {}
+
+    def get_model(self, model_id):
+        return self.models.get(model_id)
+
+
+class FakeOrchestrator:
+    """Records calls; each call sleeps for its prompt's first token in ms"""
+
+    def __init__(self, fail=(), time_out=()):
+        self.registry = FakeRegistry()
+        self.fail = set(fail)
+        self.time_out = set(time_out)
+        self.prompts = {}
+        self.active = 0
+        self.max_active = 0
+
+    def select_model(self, prompt, task_type=None, agent=None, **kwargs):
+        return "cloud"
+
+    async def route_request(self, prompt, model_id=None, admit=None, **kwargs):
+        node = kwargs.get("node")
+        self.prompts[node] = prompt
+        async with admit(model_id, self.registry.get_model(model_id), None):
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            try:
+                await asyncio.sleep(kwargs.get("ms", 20) / 1000)
+            finally:
+                self.active -= 1
+        if node in self.fail:
+            raise RuntimeError(f"{node} failed")
+        if node in self.time_out:
+            raise DeadlineExceeded(f"{node} timed out")
+        return APIResponse(content=f"output of {node}", model=model_id, provider="fake",
+                           usage={}, latency_ms=0)
+
+
+def _node(nid, deps=(), model="cloud", ms=20, **extra):
+    return WorkflowNode(nid, f"do {nid}", depends_on=list(deps), model_id=model,
+                        kwargs={"node": nid, "ms": ms}, **extra)
+
+
+def _limiter(**kwargs):
+    kwargs.setdefault("ram_budget_gb", 64.0)
+    return ResourceLimiter(**kwargs)
+
+
+class TestGraph:
+    """Graph validation"""
+
+    def test_topological_order(self):
+        order = topological_order([_node("c", ["a", "b"]), _node("a"), _node("b", ["a"])])
+        assert order.index("a") < order.index("b") < order.index("c")
+
+    def test_cycles_and_unknown_deps(self):
+        with pytest.raises(WorkflowError, match="cycle"):
+            topological_order([_node("a", ["b"]), _node("b", ["a"])])
+        with pytest.raises(WorkflowError, match="unknown node"):
+            topological_order([_node("a", ["missing"])])
+
+    def test_load_workflow(self, tmp_path):
+        path = tmp_path / "flow.yaml"
+        path.write_text(
+            "nodes:\n"
+            "  - {id: design, prompt: Design it, agent: engineering_agent, task_type: reasoning}\n"
+            "  - {id: build, prompt: Build it, depends_on: [design], model: codellama:34b, max_tokens: 50}\n")
+        design, build = load_workflow(str(path))
+        assert design.task_type == TaskType.REASONING and design.agent == "engineering_agent"
+        assert build.model_id == "codellama:34b" and build.kwargs == {"max_tokens": 50}
+
+
+class TestExecution:
+    """Scheduling, handoffs and failure handling"""
+
+    @pytest.mark.asyncio
+    async def test_independent_tracks_run_in_parallel(self):
+        orchestrator = FakeOrchestrator()
+        nodes = [_node("plan", ms=10), _node("track_a", ["plan"], ms=60),
+                 _node("track_b", ["plan"], ms=20), _node("integrate", ["track_a", "track_b"], ms=10)]
+        result = await WorkflowExecutor(orchestrator, _limiter()).run(nodes)
+
+        assert result.succeeded
+        assert orchestrator.max_active == 2
+        assert "## Handoff from track_a\noutput of track_a" in orchestrator.prompts["integrate"]
+        assert result.critical_path == ["plan", "track_a", "integrate"]
+        assert result.elapsed_s < 0.075 + 0.05  # Not the 0.1s sequential sum
+        assert result.report()["critical_path"][1]["node"] == "track_a"
+
+    @pytest.mark.asyncio
+    async def test_failure_skips_dependents_only(self):
+        orchestrator = FakeOrchestrator(fail={"track_a"})
+        nodes = [_node("track_a"), _node("review_a", ["track_a"]), _node("final", ["review_a"]),
+                 _node("track_b")]
+        result = await WorkflowExecutor(orchestrator, _limiter()).run(nodes)
+
+        statuses = result.report()["statuses"]
+        assert statuses == {"track_a": "failed", "review_a": "skipped", "final": "skipped",
+                            "track_b": "success"}
+        assert "review_a" not in orchestrator.prompts
+
+    @pytest.mark.asyncio
+    async def test_failed_node_is_exported(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        tracing.configure_tracing(file_path=str(path))
+        try:
+            result = await WorkflowExecutor(FakeOrchestrator(fail={"track_a"}), _limiter()).run([_node("track_a")])
+        finally:
+            tracing.configure_tracing()
+
+        assert result.report()["statuses"] == {"track_a": "failed"}
+        spans = json.loads(path.read_text().splitlines()[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        node = next(s for s in spans if s["name"] == "workflow.node")
+        assert node["status"]["message"].startswith("RuntimeError: ")
+
+    @pytest.mark.asyncio
+    async def test_fail_fast_cancels_running_nodes(self):
+        orchestrator = FakeOrchestrator(fail={"quick"})
+        nodes = [_node("quick", ms=5), _node("slow", ms=500)]
+        result = await WorkflowExecutor(orchestrator, _limiter(), fail_fast=True).run(nodes)
+        assert result.results["slow"].status == "cancelled"
+        assert result.elapsed_s < 0.4
+
+    @pytest.mark.asyncio
+    async def test_fail_fast_stops_on_timeout(self):
+        orchestrator = FakeOrchestrator(time_out={"quick"})
+        nodes = [_node("quick", ms=5), _node("slow", ms=500)]
+        result = await WorkflowExecutor(orchestrator, _limiter(), fail_fast=True).run(nodes)
+        assert result.results["quick"].status == "timeout"
+        assert result.results["slow"].status == "cancelled"
+
+    @pytest.mark.asyncio
+    async def test_handoff_gate(self):
+        nodes = [_node("draft", gate=lambda r: "approved" in r.content), _node("publish", ["draft"])]
+        result = await WorkflowExecutor(FakeOrchestrator(), _limiter()).run(nodes)
+        assert result.results["draft"].status == "failed"
+        assert "gate" in result.results["draft"].error
+        assert result.results["publish"].status == "skipped"
+
+
+class TestResourceLimits:
+    """RAM and provider admission"""
+
+    @pytest.mark.asyncio
+    async def test_ram_budget_serializes_local_models(self):
+        orchestrator = FakeOrchestrator()
+        limiter = _limiter(ram_budget_gb=15.0)
+        nodes = [_node("a1", model="local-a"), _node("a2", model="local-a"), _node("b", model="local-b")]
+        result = await WorkflowExecutor(orchestrator, limiter).run(nodes)
+
+        assert result.succeeded
+        assert orchestrator.max_active == 2  # a1 and a2 share local-a; local-b waits for it
+        assert result.results["b"].wait_s > 0.01
+        assert limiter.loaded_gb == 0
+
+    @pytest.mark.asyncio
+    async def test_provider_limit(self):
+        orchestrator = FakeOrchestrator()
+        limiter = _limiter(provider_limits={"anthropic": 1})
+        result = await WorkflowExecutor(orchestrator, limiter).run([_node(f"n{i}") for i in range(3)])
+        assert orchestrator.max_active == 1
+        assert sorted(r.wait_s > 0.01 for r in result.results.values()) == [False, True, True]
+
+    @pytest.mark.asyncio
+    async def test_deadline_covers_slot_waits(self):
+        orchestrator = FakeOrchestrator()
+        limiter = _limiter(provider_limits={"anthropic": 1})
+        nodes = [_node("quick", ms=5), _node("slow", ms=5000), _node("queued", ms=5),
+                 _node("after", ["slow"])]
+        result = await WorkflowExecutor(orchestrator, limiter).run(nodes, deadline_s=0.2)
+
+        statuses = result.report()["statuses"]
+        assert statuses["quick"] == "success" and statuses["after"] == "skipped"
+        # One timed out mid-call, the other while waiting for the provider slot
+        assert statuses["slow"] == statuses["queued"] == "timeout"
+        assert result.elapsed_s < 1 and orchestrator.active == 0
+
+
+class TestCheckpoints:
+    """Append-only checkpoint log and resume"""
+
+    @pytest.mark.asyncio
+    async def test_resume_replays_completed_nodes(self, tmp_path):
+        path = tmp_path / "run.jsonl"
+        nodes = [_node("plan"), _node("build", ["plan"]), _node("review", ["build"])]
+
+        first = FakeOrchestrator(fail={"build"})
+        result = await WorkflowExecutor(first, _limiter(), checkpoint=CheckpointLog(path)).run(nodes)
+        assert result.report()["statuses"]["review"] == "skipped"
+
+        second = FakeOrchestrator()
+        result = await WorkflowExecutor(second, _limiter(), checkpoint=CheckpointLog(path)).run(nodes)
+        assert result.succeeded
+        assert result.report()["replayed"] == ["plan"]
+        assert set(second.prompts) == {"build", "review"}
+        assert "output of plan" in second.prompts["build"]  # Handoff restored from the log
+
+        third = FakeOrchestrator()
+        result = await WorkflowExecutor(third, _limiter(), checkpoint=CheckpointLog(path)).run(nodes)
+        assert result.report()["replayed"] == ["plan", "build", "review"]
+        assert third.prompts == {}
+        assert result.results["review"].response.content == "output of review"
+
+    @pytest.mark.asyncio
+    async def test_changed_inputs_rerun(self, tmp_path):
+        path = tmp_path / "run.jsonl"
+        nodes = [_node("plan"), _node("build", ["plan"]), _node("review", ["build"])]
+        await WorkflowExecutor(FakeOrchestrator(), _limiter(), checkpoint=CheckpointLog(path)).run(nodes)
+
+        # plan re-runs; build's handed-off input is byte-identical so it replays
+        nodes[0].prompt = "do plan differently"
+        nodes[2].kwargs["max_tokens"] = 10
+        orchestrator = FakeOrchestrator()
+        result = await WorkflowExecutor(orchestrator, _limiter(), checkpoint=CheckpointLog(path)).run(nodes)
+        assert set(orchestrator.prompts) == {"plan", "review"}
+        assert result.report()["replayed"] == ["build"]
+
+    @pytest.mark.asyncio
+    async def test_torn_last_line(self, tmp_path):
+        path = tmp_path / "run.jsonl"
+        nodes = [_node("plan"), _node("build", ["plan"])]
+        await WorkflowExecutor(FakeOrchestrator(), _limiter(), checkpoint=CheckpointLog(path)).run(nodes)
+        with open(path, "ab") as f:
+            f.write(b'{"version": 1, "key": "abc", "sta')  # Crash mid-write
+
+        log = CheckpointLog(path)
+        assert len(log) == 2
+        nodes.append(_node("ship", ["build"]))
+        await WorkflowExecutor(FakeOrchestrator(), _limiter(), checkpoint=log).run(nodes)
+        assert len(CheckpointLog(path)) == 3
+
+
+@pytest_asyncio.fixture
+async def orchestrator(tmp_path, monkeypatch):
+    profile = ModelProfile(ttft_ms=0, tokens_per_second=0, output_tokens=5)
+    server = await MockProviderServer(profiles={"codellama:34b": profile}, default_profile=profile).start()
+    monkeypatch.setenv("OLLAMA_HOST", server.base_url("ollama"))
+    orchestrator = ModelOrchestrator(guide_path=str(tmp_path / "missing.md"))
+    orchestrator.clients["anthropic"] = AnthropicAPIClient(api_key="test")
+    orchestrator.clients["ollama"] = LocalModelClient()
+    orchestrator.clients["anthropic"].base_url = server.base_url("anthropic")
+    orchestrator.clients["ollama"].base_url = server.base_url("local")
+    await orchestrator.start_local_discovery()
+    yield orchestrator
+    for client in orchestrator.clients.values():
+        if client.session:
+            await client.session.close()
+    await server.stop()
+
+
+class TestWithOrchestrator:
+    """End to end through ModelOrchestrator and the mock provider server"""
+
+    @pytest.mark.asyncio
+    async def test_agent_nodes(self, orchestrator):
+        nodes = [
+            WorkflowNode("design", "Design the API", model_id="claude-3-5-sonnet"),
+            WorkflowNode("build", "Implement the API", depends_on=["design"],
+                         agent="engineering_agent", task_type=TaskType.CODE_GENERATION),
+        ]
+        result = await WorkflowExecutor(orchestrator, _limiter()).run(nodes)
+        assert result.succeeded
+        assert result.results["build"].model_id == "codellama:34b"
+        assert result.results["build"].provider == "ollama"
+
+    @pytest.mark.asyncio
+    async def test_fallback_model_takes_its_own_slot(self, orchestrator):
+        class Down:
+            session = None
+
+            async def chat_completion(self, **kwargs):
+                raise RuntimeError("provider down")
+
+        class RecordingLimiter(ResourceLimiter):
+            def slot(self, model_id, model, size_gb=None):
+                admitted.append(model_id)
+                return super().slot(model_id, model, size_gb)
+
+        admitted = []
+        orchestrator.clients["anthropic"] = Down()
+        orchestrator.guide.get_fallback_chain = lambda task_type: ("codellama:34b",)
+        nodes = [WorkflowNode("build", "Implement the API", model_id="claude-3-5-sonnet",
+                              task_type=TaskType.CODE_GENERATION)]
+        result = await WorkflowExecutor(orchestrator, RecordingLimiter(ram_budget_gb=64.0)).run(nodes)
+        assert result.succeeded
+        assert admitted == ["claude-3-5-sonnet", "codellama:34b"]
+        assert result.results["build"].model_id == "codellama:34b"
+        assert result.results["build"].provider == "ollama"
@@ -0,0 +1,361 @@
+"""
+Request Tracing
+Lightweight OpenTelemetry-compatible spans for the routing pipeline.
+
+Tracing is off by default: `span()` then returns a shared no-op object, so
+instrumented code pays one global lookup per span. Enable it with
+`configure_tracing()` or the environment:
+
+    ORCHESTRATOR_TRACE_FILE=/tmp/traces.jsonl      # OTLP/JSON lines on disk
+    OTEL_EXPORTER_OTLP_ENDPOINT=http://localhost:4318   # OTLP/HTTP collector
+
+Span ids, timestamps and the export encoding follow the OTLP/JSON trace
+format, so files can be replayed into any OpenTelemetry collector.
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import secrets
+import threading
+import contextvars
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str] = None
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    status: int = STATUS_UNSET
+    status_message: str = ""
+    _tracer: Optional["Tracer"] = field(default=None, repr=False)
+    _token: Any = field(default=None, repr=False)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes) -> None:
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def set_error(self, message: str) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def end(self, exc: Optional[BaseException] = None) -> None:
+        """Finish the span; used directly for spans that are never entered (streams)"""
+        if exc is not None:
+            self.set_error(f"{type(exc).__name__}: {exc}")
+            self.add_event("exception", **{"exception.type": type(exc).__name__,
+                                           "exception.message": str(exc)})
+        elif self.status == STATUS_UNSET:
+            self.status = STATUS_OK
+        self.end_ns = time.time_ns()
+        self._tracer._finish(self)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _current_span.reset(self._token)
+        self.end(exc_val)
+        return False
+
+
+class _NoopSpan:
+    """Shared span used while tracing is disabled"""
+    attributes: Dict[str, Any] = {}
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def add_event(self, name: str, **attributes) -> None:
+        pass
+
+    def set_error(self, message: str) -> None:
+        pass
+
+    def end(self, exc: Optional[BaseException] = None) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter:
+    """Base exporter; receives batches of finished spans"""
+
+    def export(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+def to_otlp(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """Encode spans as an OTLP/JSON ExportTraceServiceRequest"""
+    def value(v: Any) -> Dict[str, Any]:
+        if isinstance(v, bool):
+            return {"boolValue": v}
+        if isinstance(v, int):
+            return {"intValue": str(v)}
+        if isinstance(v, float):
+            return {"doubleValue": v}
+        return {"stringValue": str(v)}
+
+    def attrs(d: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [{"key": k, "value": value(v)} for k, v in d.items() if v is not None]
+
+    return {"resourceSpans": [{
+        "resource": {"attributes": attrs({"service.name": service_name})},
+        "scopeSpans": [{
+            "scope": {"name": "model_orchestrator"},
+            "spans": [{
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                **({"parentSpanId": s.parent_span_id} if s.parent_span_id else {}),
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": attrs(s.attributes),
+                "events": [{"name": e["name"], "timeUnixNano": str(e["time_ns"]),
+                            "attributes": attrs(e["attributes"])} for e in s.events],
+                "status": {"code": s.status, **({"message": s.status_message} if s.status_message else {})},
+            } for s in spans],
+        }],
+    }]}
+
+
+class FileSpanExporter(SpanExporter):
+    """Append one OTLP/JSON document per batch to a local file"""
+
+    def __init__(self, path: str, service_name: str = "model-orchestrator"):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        line = json.dumps(to_otlp(spans, self.service_name), separators=(",", ":"))
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """POST OTLP/JSON batches to a collector from a background thread"""
+
+    def __init__(self, endpoint: str, service_name: str = "model-orchestrator", timeout: float = 5.0):
+        endpoint = endpoint.rstrip("/")
+        self.url = endpoint if endpoint.endswith("/v1/traces") else f"{endpoint}/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+        self._queue: "queue.Queue[Optional[List[Span]]]" = queue.Queue(maxsize=1000)
+        self._worker = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._worker.start()
+
+    def export(self, spans: List[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            logger.warning("OTLP export queue full, dropping spans")
+
+    def _run(self):
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                return
+            body = json.dumps(to_otlp(spans, self.service_name)).encode()
+            request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+            try:
+                urllib.request.urlopen(request, timeout=self.timeout).close()
+            except Exception as e:
+                logger.warning(f"OTLP export to {self.url} failed: {e}")
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._worker.join(timeout=self.timeout)
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keep finished spans in memory (tests and ad-hoc analysis)"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]) -> None:
+        self.spans.extend(spans)
+
+
+class Tracer:
+    """Creates spans and hands finished ones to an exporter in batches"""
+
+    def __init__(self, exporter: SpanExporter, batch_size: int = 64):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self._buffer: List[Span] = []
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Span:
+        parent = _current_span.get()
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_span_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=dict(attributes) if attributes else {},
+            _tracer=self,
+        )
+
+    def record_span(self, name: str, start_ns: int, end_ns: int,
+                    attributes: Optional[Dict[str, Any]] = None) -> None:
+        """Record an already-finished span (e.g. timed by aiohttp trace hooks)"""
+        span = self.start_span(name, attributes)
+        span.start_ns, span.end_ns, span.status = start_ns, end_ns, STATUS_OK
+        self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            self._buffer.append(span)
+            # Export whole traces together once the root span ends
+            if span.parent_span_id is not None and len(self._buffer) < self.batch_size:
+                return
+            batch, self._buffer = self._buffer, []
+        self.exporter.export(batch)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if batch:
+            self.exporter.export(batch)
+
+    def shutdown(self) -> None:
+        self.flush()
+        self.exporter.shutdown()
+
+
+_tracer: Optional[Tracer] = None
+
+
+def span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Start a span as a context manager (no-op while tracing is disabled)"""
+    if _tracer is None:
+        return NOOP_SPAN
+    return _tracer.start_span(name, attributes)
+
+
+def current_span():
+    """Innermost active span, or the no-op span"""
+    if _tracer is None:
+        return NOOP_SPAN
+    return _current_span.get() or NOOP_SPAN
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def is_enabled() -> bool:
+    return _tracer is not None
+
+
+def configure_tracing(exporter: Optional[SpanExporter] = None,
+                      file_path: Optional[str] = None,
+                      otlp_endpoint: Optional[str] = None,
+                      service_name: str = "model-orchestrator") -> Optional[Tracer]:
+    """
+    Enable tracing with the given exporter (or a file / OTLP exporter).
+    Calling with no arguments disables tracing.
+    """
+    global _tracer
+    if _tracer is not None:
+        _tracer.shutdown()
+        _tracer = None
+
+    if exporter is None and file_path:
+        exporter = FileSpanExporter(file_path, service_name)
+    elif exporter is None and otlp_endpoint:
+        exporter = OTLPHttpSpanExporter(otlp_endpoint, service_name)
+    if exporter is None:
+        return None
+
+    _tracer = Tracer(exporter)
+    return _tracer
+
+
+def configure_from_env() -> Optional[Tracer]:
+    """Enable tracing from ORCHESTRATOR_TRACE_FILE / OTEL_EXPORTER_OTLP_ENDPOINT if set"""
+    if _tracer is not None:
+        return _tracer
+    file_path = os.getenv("ORCHESTRATOR_TRACE_FILE")
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    if not file_path and not endpoint:
+        return None
+    service_name = os.getenv("OTEL_SERVICE_NAME", "model-orchestrator")
+    return configure_tracing(file_path=file_path, otlp_endpoint=endpoint, service_name=service_name)
+
+
+def aiohttp_trace_configs() -> list:
+    """aiohttp TraceConfig list recording connection setup as 'http.connect' spans"""
+    if _tracer is None:
+        return []
+
+    import aiohttp
+
+    async def on_create_start(session, ctx, params):
+        ctx.connect_start_ns = time.time_ns()
+
+    async def on_create_end(session, ctx, params):
+        if _tracer is not None:
+            _tracer.record_span("http.connect", ctx.connect_start_ns, time.time_ns())
+
+    async def on_reuse(session, ctx, params):
+        current_span().set_attribute("http.connection_reused", True)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_start.append(on_create_start)
+    trace_config.on_connection_create_end.append(on_create_end)
+    trace_config.on_connection_reuseconn.append(on_reuse)
+    return [trace_config]
+
+
+@atexit.register
+def _flush_at_exit():
+    if _tracer is not None:
+        _tracer.flush()
@@ -23,7 +23,7 @@ class ModelProvider(Enum):
     AZURE = "azure"
     BEDROCK = "bedrock"
 
-@dataclass
+@dataclass(slots=True)
 class ModelCapabilities:
     """Defines the capabilities and costs of a specific model."""
     name: str
@@ -37,15 +37,23 @@ class ModelCapabilities:
     speed_rating: float # 0-10
     supports_vision: bool = False
     supports_function_calling: bool = False
-    
+    size_gb: Optional[float] = None  # Resident footprint for local models
+    quantization: Optional[str] = None  # e.g. Q4_K_M for local models
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+
     @property
     def blended_cost(self) -> float:
         """Average cost per 1M tokens (assuming 3:1 input:output ratio)."""
         return (self.input_cost * 3 + self.output_cost) / 4
 
-@dataclass
+    def cost(self, input_tokens: int, output_tokens: int) -> float:
+        """USD cost of a call with the given token counts."""
+        return (input_tokens * self.input_cost + output_tokens * self.output_cost) / 1_000_000
+
+@dataclass(frozen=True, slots=True)
 class TaskRequirements:
-    """Defines the requirements for a specific task."""
+    """Defines the requirements for a specific task (immutable, usable as a cache key)."""
     task_type: TaskType
     min_context: int = 4000
     max_cost: Optional[float] = None # Max blended cost per 1M tokens
@@ -55,7 +63,7 @@ class TaskRequirements:
     require_vision: bool = False
     require_functions: bool = False
 
-@dataclass
+@dataclass(slots=True)
 class APIResponse:
     """Standardized API response format."""
     content: str
@@ -63,5 +71,5 @@ class APIResponse:
     provider: str
     usage: Dict[str, int]  # input_tokens, output_tokens
     latency_ms: int
-    raw_response: Optional[Dict] = None
+    raw_response: Optional[Dict] = None  # Only kept when the client opts in
     error: Optional[str] = None
@@ -1,79 +1,385 @@
 #!/usr/bin/env python3
+"""
+Agent Definition Validator
+Validates agent YAML files against the v2.1 JSON Schema
+(agent_specifications/agent_definition_v2_1.schema.json).
+
+Files are parsed with the libyaml C loader when available and validated in a
+process pool. Results are cached by content hash so unchanged files are
+skipped on the next run.
+
+Usage:
+    python3 scripts/validate_agents.py                  # agent_definitions/
+    python3 scripts/validate_agents.py path/to/a.yaml --json
+"""
+
 import os
-import yaml
+import re
 import sys
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_ROOT = REPO_ROOT / "agent_definitions"
+SCHEMA_PATH = REPO_ROOT / "agent_specifications" / "agent_definition_v2_1.schema.json"
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "model_orchestrator" / "agent_validation.json"
+CACHE_VERSION = 1
+
+# Below this many files the pool start-up costs more than it saves
+PARALLEL_THRESHOLD = 32
+
+Validator = Callable[[Any, str, List[str]], None]
+
+_TYPES = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+
+def compile_schema(schema: Dict[str, Any], root: Optional[Dict[str, Any]] = None,
+                   _refs: Optional[Dict[str, Validator]] = None) -> Validator:
+    """
+    Compile a JSON Schema into a validator function.
+
+    Supports the keywords the agent schema uses: type, enum, required,
+    properties, additionalProperties, minProperties, items, minItems,
+    minLength, pattern, minimum, maximum and local $ref.
+    """
+    root = root if root is not None else schema
+    refs = _refs if _refs is not None else {}
+    checks: List[Validator] = []
+
+    if "$ref" in schema:
+        ref = schema["$ref"]
+        if ref not in refs:
+            target = root
+            for part in ref.lstrip("#/").split("/"):
+                target = target[part]
+            refs[ref] = None  # Guard against recursive references
+            refs[ref] = compile_schema(target, root, refs)
+        return lambda value, path, errors: refs[ref](value, path, errors)
+
+    if "type" in schema:
+        names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        tests = [_TYPES[n] for n in names]
+        expected = " or ".join(names)
+
+        def check_type(value, path, errors):
+            if not any(t(value) for t in tests):
+                errors.append(f"{path}: expected {expected}, got {type(value).__name__}")
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(f"{path}: {value!r} is not one of {allowed}")
+        checks.append(check_enum)
+
+    if "required" in schema:
+        required = schema["required"]
+
+        def check_required(value, path, errors):
+            if isinstance(value, dict):
+                missing = [k for k in required if k not in value]
+                if missing:
+                    errors.append(f"{path}: missing {', '.join(missing)}")
+        checks.append(check_required)
+
+    if "minProperties" in schema:
+        min_props = schema["minProperties"]
+
+        def check_min_properties(value, path, errors):
+            if isinstance(value, dict) and len(value) < min_props:
+                errors.append(f"{path}: expected at least {min_props} entries")
+        checks.append(check_min_properties)
+
+    properties = {k: compile_schema(v, root, refs) for k, v in schema.get("properties", {}).items()}
+    additional = schema.get("additionalProperties", True)
+    additional_check = compile_schema(additional, root, refs) if isinstance(additional, dict) else None
+    if properties or additional is not True:
+        def check_properties(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for key, item in value.items():
+                check = properties.get(key)
+                if check is not None:
+                    check(item, f"{path}.{key}", errors)
+                elif additional_check is not None:
+                    additional_check(item, f"{path}.{key}", errors)
+                elif additional is False:
+                    errors.append(f"{path}: unexpected property {key!r}")
+        checks.append(check_properties)
+
+    if "items" in schema:
+        item_check = compile_schema(schema["items"], root, refs)
+
+        def check_items(value, path, errors):
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    item_check(item, f"{path}[{i}]", errors)
+        checks.append(check_items)
+
+    if "minItems" in schema:
+        min_items = schema["minItems"]
+
+        def check_min_items(value, path, errors):
+            if isinstance(value, list) and len(value) < min_items:
+                errors.append(f"{path}: expected at least {min_items} items")
+        checks.append(check_min_items)
+
+    if "minLength" in schema:
+        min_length = schema["minLength"]
+
+        def check_min_length(value, path, errors):
+            if isinstance(value, str) and len(value) < min_length:
+                errors.append(f"{path}: shorter than {min_length}")
+        checks.append(check_min_length)
+
+    if "pattern" in schema:
+        pattern = re.compile(schema["pattern"])
+
+        def check_pattern(value, path, errors):
+            if isinstance(value, str) and not pattern.search(value):
+                errors.append(f"{path}: {value!r} does not match {pattern.pattern!r}")
+        checks.append(check_pattern)
+
+    for keyword, fails in (("minimum", lambda v, b: v < b), ("maximum", lambda v, b: v > b)):
+        if keyword in schema:
+            def check_bound(value, path, errors, bound=schema[keyword], keyword=keyword, fails=fails):
+                if _TYPES["number"](value) and fails(value, bound):
+                    errors.append(f"{path}: {value} violates {keyword} {bound}")
+            checks.append(check_bound)
+
+    def validate(value, path, errors):
+        for check in checks:
+            check(value, path, errors)
+    return validate
+
+
+def load_schema(path: Path = SCHEMA_PATH) -> Tuple[Dict[str, Any], str]:
+    """Load the schema and its content hash"""
+    raw = path.read_bytes()
+    return json.loads(raw), hashlib.sha256(raw).hexdigest()
+
+
+_validator: Optional[Validator] = None
+
+
+def _get_validator() -> Validator:
+    """Compile the schema once per process"""
+    global _validator
+    if _validator is None:
+        _validator = compile_schema(load_schema()[0])
+    return _validator
+
+
+def _validate_worker(task: Tuple[str, Optional[str]]) -> Dict[str, Any]:
+    """Read, hash, parse and validate one file; skip parsing if the hash is unchanged"""
+    filepath, known_hash = task
+    result = {"path": filepath, "valid": False, "errors": [], "cached": False, "parse_ms": 0.0, "validate_ms": 0.0}
+    try:
+        raw = Path(filepath).read_bytes()
+    except OSError as e:
+        result["errors"] = [f"Read error: {e}"]
+        return result
+
+    result["sha256"] = hashlib.sha256(raw).hexdigest()
+    if result["sha256"] == known_hash:
+        result["cached"] = True
+        return result
+
+    start = time.perf_counter()
+    try:
+        data = yaml.load(raw, Loader=SafeLoader)
+    except yaml.YAMLError as e:
+        result["errors"] = [f"YAML Error: {e}"]
+        return result
+    finally:
+        result["parse_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+    start = time.perf_counter()
+    errors: List[str] = []
+    if not data:
+        errors.append("Empty file")
+    else:
+        _get_validator()(data, "$", errors)
+    result["validate_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    result["errors"] = errors
+    result["valid"] = not errors
+    return result
+
 
 def validate_agent_file(filepath):
     """Validates a single agent YAML file against v2.1 spec requirements."""
-    try:
-        with open(filepath, 'r') as f:
-            data = yaml.safe_load(f)
-            
-        if not data:
-            return False, "Empty file"
-            
-        # Check root keys
-        required_sections = [
-            "agent", "directive", "responsibilities", "scope", "context",
-            "planning", "estimation", "model_selection", "delegation",
-            "workflow", "output", "error_handling", "interaction",
-            "metrics", "guardrails", "examples", "tests", "metadata", "versioning"
-        ]
-        
-        missing = [sec for sec in required_sections if sec not in data]
-        if missing:
-            return False, f"Missing sections: {', '.join(missing)}"
-            
-        # Check identity
-        if "identity" not in data.get("agent", {}):
-            return False, "Missing agent.identity"
-            
-        # Check model selection
-        if "strategies" not in data.get("model_selection", {}):
-            return False, "Missing model_selection.strategies"
-            
+    result = _validate_worker((str(filepath), None))
+    if result["valid"]:
         return True, "Valid"
-        
-    except Exception as e:
-        return False, f"YAML Error: {str(e)}"
+    return False, "; ".join(result["errors"])
+
+
+def find_agent_files(paths: List[Path]) -> List[Path]:
+    """Expand directories into the YAML files below them"""
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(p for p in path.rglob("*") if p.suffix in (".yaml", ".yml") and p.is_file())
+        elif path.exists():
+            files.append(path)
+    return sorted(set(files))
+
+
+def _load_cache(cache_path: Path, schema_hash: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CACHE_VERSION or data.get("schema") != schema_hash:
+        return {}
+    return data.get("files", {})
+
+
+def _save_cache(cache_path: Path, schema_hash: str, files: Dict[str, Dict[str, Any]]) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "schema": schema_hash, "files": files}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: could not write validation cache {cache_path}: {e}", file=sys.stderr)
+
+
+def validate_paths(paths: List[Path],
+                   jobs: Optional[int] = None,
+                   cache_path: Optional[Path] = DEFAULT_CACHE_PATH) -> Dict[str, Any]:
+    """
+    Validate agent files, reusing cached results for unchanged content.
+
+    Returns:
+        {"files": [per-file results], "summary": {...counts and timings}}
+    """
+    start = time.perf_counter()
+    _, schema_hash = load_schema()
+    cache = _load_cache(cache_path, schema_hash) if cache_path else {}
+    files = find_agent_files(paths)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    tasks: List[Tuple[str, Optional[str]]] = []
+    for path in files:
+        key = str(path.resolve())
+        entry = cache.get(key)
+        stat = path.stat()
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            results[key] = {"path": str(path), "valid": entry["valid"], "errors": entry["errors"],
+                            "cached": True, "parse_ms": 0.0, "validate_ms": 0.0}
+            continue
+        tasks.append((key, entry["sha256"] if entry else None))
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(tasks) >= PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_get_validator) as pool:
+            fresh = list(pool.map(_validate_worker, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+    else:
+        fresh = [_validate_worker(task) for task in tasks]
+
+    for result in fresh:
+        key = result["path"]
+        if result["cached"]:
+            # Touched but unchanged: keep the previous verdict
+            result["valid"], result["errors"] = cache[key]["valid"], cache[key]["errors"]
+        results[key] = result
+        if "sha256" in result:
+            stat = os.stat(key)
+            cache[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": result.pop("sha256"),
+                          "valid": result["valid"], "errors": result["errors"]}
+
+    if cache_path:
+        live = {str(p.resolve()) for p in files}
+        _save_cache(cache_path, schema_hash, {k: v for k, v in cache.items() if k in live or os.path.exists(k)})
+
+    ordered = []
+    for path in files:
+        result = results[str(path.resolve())]
+        result["path"] = str(path)
+        ordered.append(result)
+    valid = sum(1 for r in ordered if r["valid"])
+    return {
+        "files": ordered,
+        "summary": {
+            "total": len(ordered),
+            "valid": valid,
+            "invalid": len(ordered) - valid,
+            "cached": sum(1 for r in ordered if r["cached"]),
+            "parsed": sum(1 for r in ordered if not r["cached"]),
+            "parse_ms": round(sum(r["parse_ms"] for r in ordered), 3),
+            "validate_ms": round(sum(r["validate_ms"] for r in ordered), 3),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+            "yaml_loader": SafeLoader.__name__,
+            "jobs": jobs if len(tasks) >= PARALLEL_THRESHOLD else 1,
+        },
+    }
+
 
 def main():
-    root_dir = "Agents-v3"
-    if not os.path.exists(root_dir):
-        print(f"Error: {root_dir} does not exist.")
-        sys.exit(1)
-        
-    total_files = 0
-    valid_files = 0
-    errors = []
-    
-    print(f"Scanning {root_dir}...")
-    
-    for dirpath, _, filenames in os.walk(root_dir):
-        for filename in filenames:
-            if filename.endswith(".yaml") or filename.endswith(".yml"):
-                total_files += 1
-                filepath = os.path.join(dirpath, filename)
-                is_valid, message = validate_agent_file(filepath)
-                
-                if is_valid:
-                    valid_files += 1
-                else:
-                    errors.append(f"{filepath}: {message}")
-                    
-    print(f"\nValidation Complete.")
-    print(f"Total Agent Files: {total_files}")
-    print(f"Valid Files: {valid_files}")
-    print(f"Invalid Files: {len(errors)}")
-    
-    if errors:
-        print("\nErrors found:")
-        for err in errors:
-            print(f" - {err}")
+    parser = argparse.ArgumentParser(description="Validate agent definition YAML against the v2.1 schema")
+    parser.add_argument("paths", nargs="*", type=Path, help=f"Files or directories (default: {DEFAULT_ROOT})")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the result cache")
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE_PATH, help="Result cache location")
+    args = parser.parse_args()
+
+    paths = args.paths or [DEFAULT_ROOT]
+    missing = [p for p in paths if not p.exists()]
+    if missing:
+        print(f"Error: {', '.join(map(str, missing))} does not exist.")
         sys.exit(1)
+
+    report = validate_paths(paths, jobs=args.jobs, cache_path=None if args.no_cache else args.cache)
+    summary = report["summary"]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
     else:
-        print("\nAll files passed validation! ✅")
-        sys.exit(0)
+        print(f"Scanning {', '.join(map(str, paths))}...")
+        print(f"\nValidation Complete.")
+        print(f"Total Agent Files: {summary['total']}")
+        print(f"Valid Files: {summary['valid']}")
+        print(f"Invalid Files: {summary['invalid']}")
+        print(f"Cached: {summary['cached']}, parsed: {summary['parsed']} "
+              f"({summary['elapsed_ms']:.0f} ms, {summary['yaml_loader']}, {summary['jobs']} job(s))")
+
+        invalid = [r for r in report["files"] if not r["valid"]]
+        if invalid:
+            print("\nErrors found:")
+            for result in invalid:
+                for error in result["errors"]:
+                    print(f" - {result['path']}: {error}")
+        else:
+            print("\nAll files passed validation! ✅")
+
+    sys.exit(1 if summary["invalid"] else 0)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,213 @@
+"""
+Vision Input Pipeline
+Prepares image attachments for vision requests without holding whole files
+in memory. Images are memory-mapped and hashed; those larger than a maximum
+resolution are downsized and re-encoded in a worker thread (when Pillow is
+installed) and cached by content hash, so repeated screenshots are prepared
+once. The request body is streamed, base64-encoding the image chunk by chunk
+from the mapped file as it is sent.
+"""
+
+import os
+import re
+import mmap
+import base64
+import hashlib
+import logging
+import tempfile
+import mimetypes
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import wire
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIDE = 2048  # Longest edge, in pixels, sent to the model
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "model_orchestrator" / "images"
+DEFAULT_CACHE_BYTES = 512 * 1024 ** 2
+CHUNK_SIZE = 3 * 64 * 1024  # A multiple of 3, so chunks encode without padding
+
+# Media type -> Pillow format and cache suffix for downsized copies; anything else becomes PNG
+_FORMATS = {"image/jpeg": ("JPEG", ".jpg"), "image/webp": ("WEBP", ".webp"), "image/png": ("PNG", ".png")}
+
+
+@dataclass
+class PreparedImage:
+    """An image ready to send: the source file or a downsized copy in the cache"""
+    path: Path
+    media_type: str
+    digest: str  # sha256 of the source file
+    size: int    # Bytes of `path`
+    resized: bool = False
+
+    @property
+    def encoded_size(self) -> int:
+        return 4 * ((self.size + 2) // 3)
+
+    @property
+    def placeholder(self) -> str:
+        """Stands in for the base64 data inside a JSON body until it is streamed"""
+        return f"@@image-{self.digest}@@"
+
+    @property
+    def url_template(self) -> str:
+        """Data URL with the placeholder in place of the base64 data"""
+        return f"data:{self.media_type};base64,{self.placeholder}"
+
+    def iter_base64(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Base64 of the file, encoded from the mapped pages one chunk at a time"""
+        if self.size == 0:
+            return
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for start in range(0, len(view), chunk_size):
+                    yield base64.b64encode(view[start:start + chunk_size])
+            finally:
+                view.release()
+
+
+class ImagePreparer:
+    """Hashes, downsizes and caches image attachments"""
+
+    def __init__(self,
+                 max_side: Optional[int] = DEFAULT_MAX_SIDE,
+                 cache_dir: Optional[str] = None,
+                 max_cache_bytes: int = DEFAULT_CACHE_BYTES,
+                 quality: int = 85):
+        self.max_side = max_side
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.max_cache_bytes = max_cache_bytes
+        self.quality = quality
+        # (path, size, mtime) -> prepared image, so a file seen before is not rehashed
+        self._seen: Dict[Tuple[str, int, int], PreparedImage] = {}
+        self._warned = False
+
+    def prepare(self, image_path: str) -> PreparedImage:
+        """Prepare an image for sending; blocking, so call it from a worker thread"""
+        path = Path(image_path)
+        stat = path.stat()
+        key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        prepared = self._seen.get(key)
+        if prepared is not None and prepared.path.exists():
+            return prepared
+
+        media_type = mimetypes.guess_type(path.name)[0] or "image/jpeg"
+        source = PreparedImage(path, media_type, _sha256(path, stat.st_size), stat.st_size)
+        prepared = self._downsized(source)
+        if len(self._seen) >= 1024:
+            self._seen.clear()
+        self._seen[key] = prepared
+        return prepared
+
+    def _downsized(self, source: PreparedImage) -> PreparedImage:
+        if not self.max_side:
+            return source
+        if Image is None:
+            if not self._warned:
+                logger.warning("Pillow is not installed; images are sent at full resolution")
+                self._warned = True
+            return source
+
+        media_type = source.media_type if source.media_type in _FORMATS else "image/png"
+        fmt, suffix = _FORMATS[media_type]
+        cached = self.cache_dir / f"{source.digest}-{self.max_side}{suffix}"
+        if cached.exists():
+            return PreparedImage(cached, media_type, source.digest, cached.stat().st_size, resized=True)
+
+        with Image.open(source.path) as img:
+            if max(img.size) <= self.max_side:
+                return source
+            img.thumbnail((self.max_side, self.max_side))
+            if fmt == "JPEG" and img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            # Unique per call: concurrent requests for the same image each write their own file
+            fd, tmp = tempfile.mkstemp(prefix=f".{cached.name}.", suffix=".tmp", dir=cached.parent)
+            os.close(fd)
+            try:
+                img.save(tmp, fmt, quality=self.quality, optimize=True)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        os.replace(tmp, cached)
+        logger.debug(f"Downsized {source.path} ({source.size} bytes) to {cached.stat().st_size} bytes")
+        self._prune()
+        return PreparedImage(cached, media_type, source.digest, cached.stat().st_size, resized=True)
+
+    def _prune(self):
+        """Drop the least recently written cache entries beyond the size cap"""
+        entries = []
+        for path in self.cache_dir.iterdir():
+            if not path.name.startswith("."):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue  # Pruned by a concurrent call
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_cache_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def _sha256(path: Path, size: int) -> str:
+    """Content hash, computed over the mapped file without copying it"""
+    if size == 0:
+        return hashlib.sha256().hexdigest()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return hashlib.sha256(mapped).hexdigest()
+
+
+def attach_image(messages: List[Dict[str, Any]], url: str) -> List[Dict[str, Any]]:
+    """Copy of `messages` with an image_url part added to the last user message"""
+    image_part = {"type": "image_url", "image_url": {"url": url}}
+    messages = [dict(msg) for msg in messages]
+    for msg in reversed(messages):
+        if msg['role'] == 'user':
+            content = msg['content']
+            parts = [{"type": "text", "text": content}] if isinstance(content, str) else list(content)
+            msg['content'] = parts + [image_part]
+            break
+    else:
+        messages.append({"role": "user", "content": [image_part]})
+    return messages
+
+
+class StreamedJSON:
+    """
+    JSON request body whose image placeholders are replaced by base64 data
+    while the body is sent.
+
+    The length is known up front, so the request carries a Content-Length
+    rather than chunked encoding. `chunks()` can be called again for a retry.
+    """
+
+    def __init__(self, payload: Dict[str, Any], images: Sequence[PreparedImage]):
+        self.payload = payload
+        self.images = {image.placeholder: image for image in images}
+        body = wire.dumps(payload)
+        if self.images:
+            pattern = re.compile(b"|".join(re.escape(p.encode()) for p in self.images))
+            self._parts = pattern.split(body)
+            self._order = [m.group().decode() for m in pattern.finditer(body)]
+        else:
+            self._parts, self._order = [body], []
+        self.size = sum(len(p) for p in self._parts) + sum(self.images[p].encoded_size for p in self._order)
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        for i, part in enumerate(self._parts):
+            yield part
+            if i < len(self._order):
+                for chunk in self.images[self._order[i]].iter_base64():
+                    yield chunk
@@ -0,0 +1,264 @@
+"""
+Wire Format Parsing
+Shared decoding for provider responses. JSON goes through orjson or msgspec
+when installed, falling back to the json module. Completion bodies are
+decoded into just the fields the orchestrator uses (typed msgspec structs
+skip everything else); the full dict is only built when the caller keeps it.
+SSE streams are framed incrementally from raw bytes.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+class ResponseFormatError(ValueError):
+    """Raised when a provider response lacks the fields we need"""
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON with the fastest available backend"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize JSON to UTF-8 bytes with the fastest available backend"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    if msgspec is not None:
+        return msgspec.json.encode(obj)
+    return json.dumps(obj, ensure_ascii=False).encode()
+
+
+@dataclass
+class Completion:
+    """The parts of a completion response the orchestrator uses"""
+    content: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+# ---------------------------------------------------------------------------
+# Field extraction from parsed dicts (used without msgspec, or to keep raw)
+# ---------------------------------------------------------------------------
+
+def _openai(data: Dict) -> Completion:
+    usage = data.get("usage") or {}
+    return Completion(data["choices"][0]["message"]["content"] or "",
+                      usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0)
+
+
+def _anthropic(data: Dict) -> Completion:
+    usage = data.get("usage") or {}
+    return Completion(data["content"][0]["text"], usage.get("input_tokens") or 0, usage.get("output_tokens") or 0)
+
+
+def _gemini(data: Dict) -> Completion:
+    usage = data.get("usageMetadata") or {}
+    parts = data["candidates"][0]["content"]["parts"]
+    return Completion("".join(p.get("text", "") for p in parts),
+                      usage.get("promptTokenCount") or 0, usage.get("candidatesTokenCount") or 0)
+
+
+def _ollama(data: Dict) -> Completion:
+    return Completion(data["response"], data.get("prompt_eval_count") or 0, data.get("eval_count") or 0)
+
+
+_EXTRACT: Dict[str, Callable[[Dict], Completion]] = {
+    "openai": _openai, "anthropic": _anthropic, "gemini": _gemini, "ollama": _ollama,
+}
+
+
+def _openai_delta(data: Dict) -> Optional[str]:
+    choices = data.get("choices")
+    return choices[0].get("delta", {}).get("content") if choices else None
+
+
+def _anthropic_delta(data: Dict) -> Optional[str]:
+    if data.get("type") == "content_block_delta":
+        return data["delta"].get("text")
+    return None
+
+
+def _gemini_delta(data: Dict) -> Optional[str]:
+    return "".join(p.get("text", "") for p in data["candidates"][0]["content"]["parts"])
+
+
+_EXTRACT_DELTA: Dict[str, Callable[[Dict], Optional[str]]] = {
+    "openai": _openai_delta, "anthropic": _anthropic_delta, "gemini": _gemini_delta,
+}
+
+
+# ---------------------------------------------------------------------------
+# Typed decoding: msgspec only materializes the declared fields
+# ---------------------------------------------------------------------------
+
+_TYPED: Dict[str, Tuple[Any, Callable[[Any], Completion]]] = {}
+_TYPED_DELTA: Dict[str, Tuple[Any, Callable[[Any], Optional[str]]]] = {}
+
+if msgspec is not None:
+    class _Text(msgspec.Struct):
+        text: str = ""
+
+    class _Message(msgspec.Struct):
+        content: Optional[str] = None
+
+    class _Choice(msgspec.Struct):
+        message: Optional[_Message] = None
+        delta: Optional[_Message] = None
+
+    class _OpenAIUsage(msgspec.Struct):
+        prompt_tokens: int = 0
+        completion_tokens: int = 0
+
+    class _OpenAI(msgspec.Struct):
+        choices: List[_Choice] = msgspec.field(default_factory=list)
+        usage: Optional[_OpenAIUsage] = None
+
+    class _AnthropicUsage(msgspec.Struct):
+        input_tokens: int = 0
+        output_tokens: int = 0
+
+    class _Anthropic(msgspec.Struct):
+        type: str = ""
+        content: List[_Text] = msgspec.field(default_factory=list)
+        delta: Optional[_Text] = None
+        usage: Optional[_AnthropicUsage] = None
+
+    class _GeminiContent(msgspec.Struct):
+        parts: List[_Text] = msgspec.field(default_factory=list)
+
+    class _GeminiCandidate(msgspec.Struct):
+        content: _GeminiContent
+
+    class _GeminiUsage(msgspec.Struct):
+        promptTokenCount: int = 0
+        candidatesTokenCount: int = 0
+
+    class _Gemini(msgspec.Struct):
+        candidates: List[_GeminiCandidate] = msgspec.field(default_factory=list)
+        usageMetadata: Optional[_GeminiUsage] = None
+
+    class _Ollama(msgspec.Struct):
+        response: str
+        prompt_eval_count: int = 0
+        eval_count: int = 0
+
+    def _typed_openai(r: _OpenAI) -> Completion:
+        usage = r.usage or _OpenAIUsage()
+        return Completion(r.choices[0].message.content or "", usage.prompt_tokens, usage.completion_tokens)
+
+    def _typed_anthropic(r: _Anthropic) -> Completion:
+        usage = r.usage or _AnthropicUsage()
+        return Completion(r.content[0].text, usage.input_tokens, usage.output_tokens)
+
+    def _typed_gemini(r: _Gemini) -> Completion:
+        usage = r.usageMetadata or _GeminiUsage()
+        return Completion("".join(p.text for p in r.candidates[0].content.parts),
+                          usage.promptTokenCount, usage.candidatesTokenCount)
+
+    _TYPED.update({
+        "openai": (msgspec.json.Decoder(_OpenAI), _typed_openai),
+        "anthropic": (msgspec.json.Decoder(_Anthropic), _typed_anthropic),
+        "gemini": (msgspec.json.Decoder(_Gemini), _typed_gemini),
+        "ollama": (msgspec.json.Decoder(_Ollama),
+                   lambda r: Completion(r.response, r.prompt_eval_count, r.eval_count)),
+    })
+    _TYPED_DELTA.update({
+        "openai": (msgspec.json.Decoder(_OpenAI),
+                   lambda r: r.choices[0].delta.content if r.choices and r.choices[0].delta else None),
+        "anthropic": (msgspec.json.Decoder(_Anthropic),
+                      lambda r: r.delta.text if r.type == "content_block_delta" and r.delta else None),
+        "gemini": (msgspec.json.Decoder(_Gemini),
+                   lambda r: "".join(p.text for p in r.candidates[0].content.parts)),
+    })
+
+
+def decode_completion(body: bytes, fmt: str, keep_raw: bool = False) -> Tuple[Completion, Optional[Dict]]:
+    """
+    Decode a completion response body.
+
+    Returns the completion and, when `keep_raw` is set, the full parsed dict.
+    """
+    try:
+        if msgspec is not None and not keep_raw:
+            decoder, convert = _TYPED[fmt]
+            return convert(decoder.decode(body)), None
+        data = loads(body)
+        return _EXTRACT[fmt](data), data if keep_raw else None
+    except (KeyError, IndexError, TypeError, AttributeError, ValueError) as e:
+        raise ResponseFormatError(f"Unexpected {fmt} response: {body[:200]!r}") from e
+
+
+def delta_decoder(fmt: str) -> Callable[[bytes], Optional[str]]:
+    """Function returning the text of one streamed event (None if it carries none)"""
+    if msgspec is not None:
+        decoder, convert = _TYPED_DELTA[fmt]
+        return lambda data: convert(decoder.decode(data))
+    extract = _EXTRACT_DELTA[fmt]
+    return lambda data: extract(loads(data))
+
+
+class SSEFramer:
+    """
+    Incremental Server-Sent Events parser over raw bytes.
+
+    Feed it network chunks as they arrive; it returns the data payload of
+    each complete event. Lines are split in a reused buffer and only the
+    data fields are copied out.
+    """
+
+    __slots__ = ("_buffer", "_data")
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._data: List[bytes] = []
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        buffer = self._buffer
+        buffer += chunk
+        events = []
+        start = 0
+        while (end := buffer.find(b"\n", start)) >= 0:
+            line_end = end - 1 if end > start and buffer[end - 1] == 13 else end  # Strip \r
+            if line_end == start:
+                self._dispatch(events)
+            elif buffer.startswith(b"data:", start, line_end):
+                offset = 6 if buffer[start + 5:start + 6] == b" " else 5
+                self._data.append(bytes(buffer[start + offset:line_end]))
+            # Other fields (event:, id:, retry:) and comments are ignored
+            start = end + 1
+        del buffer[:start]
+        return events
+
+    async def events(self, chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+        """Data payloads of the events in a stream of byte chunks"""
+        async for chunk in chunks:
+            for event in self.feed(chunk):
+                yield event
+        for event in self.close():
+            yield event
+
+    def close(self) -> List[bytes]:
+        """Events left when the stream ends without a trailing blank line"""
+        events = self.feed(b"\n") if self._buffer else []
+        self._dispatch(events)
+        return events
+
+    def _dispatch(self, events: List[bytes]):
+        if self._data:
+            events.append(self._data[0] if len(self._data) == 1 else b"\n".join(self._data))
+            self._data = []
@@ -0,0 +1,566 @@
+"""
+Workflow DAG Executor
+Runs agent workflows (agent_workflows/parallel_execution_workflow.md) as a
+dependency graph: each node is a model call routed through ModelOrchestrator,
+edges are handoffs, and a node starts as soon as its dependencies finish.
+Local models are admitted against a RAM budget and cloud providers against
+per-provider concurrency limits. Results include the critical path.
+With a CheckpointLog, each finished node is appended to an on-disk log and a
+re-run replays completed nodes instead of calling their models again.
+A run-wide deadline bounds slot waits and model calls alike.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import dataclasses
+from pathlib import Path
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from . import tracing
+from . import deadline
+from .deadline import DeadlineExceeded
+from .types import APIResponse, ModelCapabilities, ModelProvider, TaskType
+from .ram_monitor import RAMMonitor
+
+logger = logging.getLogger(__name__)
+
+# In-flight requests per cloud provider; local models are bounded by RAM instead
+DEFAULT_PROVIDER_CONCURRENCY = {
+    "openai": 8,
+    "anthropic": 4,
+    "google": 8,
+    "xai": 4,
+    "azure": 8,
+    "bedrock": 4,
+}
+
+# Footprint assumed for local models without a known size
+DEFAULT_LOCAL_MODEL_GB = 8.0
+
+CHECKPOINT_VERSION = 1
+DEFAULT_CHECKPOINT_DIR = Path.home() / ".cache" / "model_orchestrator" / "workflows"
+
+PromptSource = Union[str, Callable[[Dict[str, APIResponse]], str]]
+
+
+class WorkflowError(ValueError):
+    """Raised for an invalid workflow graph or an unroutable node."""
+
+
+class HandoffRejected(RuntimeError):
+    """Raised when a node's output fails its handoff gate."""
+
+
+@dataclass
+class WorkflowNode:
+    """One agent/model call in a workflow"""
+    id: str
+    prompt: PromptSource
+    depends_on: List[str] = field(default_factory=list)
+    agent: Optional[str] = None
+    model_id: Optional[str] = None
+    task_type: Optional[TaskType] = None
+    gate: Optional[Callable[[APIResponse], bool]] = None  # Handoff validation
+    kwargs: Dict[str, Any] = field(default_factory=dict)  # Passed to route_request
+
+
+@dataclass
+class NodeResult:
+    """Outcome and timing of one node (times are seconds from workflow start)"""
+    node_id: str
+    status: str  # success | failed | timeout | skipped | cancelled
+    response: Optional[APIResponse] = None
+    error: Optional[str] = None
+    model_id: Optional[str] = None
+    provider: Optional[str] = None
+    ready_at: float = 0.0     # Dependencies complete
+    started_at: float = 0.0   # Admitted by the resource limiter
+    finished_at: float = 0.0
+    replayed: bool = False    # Restored from a checkpoint, no model call
+
+    @property
+    def wait_s(self) -> float:
+        return max(0.0, self.started_at - self.ready_at)
+
+    @property
+    def run_s(self) -> float:
+        return max(0.0, self.finished_at - self.started_at)
+
+
+@dataclass
+class WorkflowResult:
+    """Results of a workflow run"""
+    results: Dict[str, NodeResult]
+    elapsed_s: float
+    critical_path: List[str]
+
+    @property
+    def succeeded(self) -> bool:
+        return all(r.status == "success" for r in self.results.values())
+
+    def report(self) -> Dict[str, Any]:
+        """Where wall-clock time went: critical path with queueing vs run time"""
+        busy_s = sum(r.run_s for r in self.results.values())
+        return {
+            "elapsed_s": round(self.elapsed_s, 3),
+            "sequential_s": round(busy_s, 3),
+            "speedup": round(busy_s / self.elapsed_s, 2) if self.elapsed_s > 0 else None,
+            "statuses": {nid: r.status for nid, r in self.results.items()},
+            "replayed": [nid for nid, r in self.results.items() if r.replayed],
+            "critical_path": [
+                {
+                    "node": nid,
+                    "model": self.results[nid].model_id,
+                    "wait_s": round(self.results[nid].wait_s, 3),
+                    "run_s": round(self.results[nid].run_s, 3),
+                }
+                for nid in self.critical_path
+            ],
+        }
+
+
+def topological_order(nodes: Iterable[WorkflowNode]) -> List[str]:
+    """Node ids in dependency order; raises WorkflowError on unknown deps or cycles"""
+    by_id: Dict[str, WorkflowNode] = {}
+    for node in nodes:
+        if node.id in by_id:
+            raise WorkflowError(f"Duplicate node id: {node.id}")
+        by_id[node.id] = node
+
+    pending = {}
+    dependents: Dict[str, List[str]] = {nid: [] for nid in by_id}
+    for node in by_id.values():
+        for dep in node.depends_on:
+            if dep not in by_id:
+                raise WorkflowError(f"Node {node.id} depends on unknown node {dep}")
+            dependents[dep].append(node.id)
+        pending[node.id] = len(set(node.depends_on))
+
+    order = [nid for nid, count in pending.items() if count == 0]
+    for nid in order:
+        for child in dependents[nid]:
+            pending[child] -= 1
+            if pending[child] == 0:
+                order.append(child)
+
+    if len(order) != len(by_id):
+        cyclic = sorted(nid for nid, count in pending.items() if count > 0)
+        raise WorkflowError(f"Workflow has a dependency cycle through: {', '.join(cyclic)}")
+    return order
+
+
+def critical_path(results: Dict[str, NodeResult], nodes: Dict[str, WorkflowNode]) -> List[str]:
+    """Chain of nodes that determined the finish time, from first to last"""
+    ran = {nid: r for nid, r in results.items() if r.status in ("success", "failed", "timeout")}
+    if not ran:
+        return []
+    path = [max(ran, key=lambda nid: ran[nid].finished_at)]
+    while True:
+        deps = [d for d in nodes[path[-1]].depends_on if d in ran]
+        if not deps:
+            break
+        path.append(max(deps, key=lambda d: ran[d].finished_at))
+    path.reverse()
+    return path
+
+
+def node_key(node: WorkflowNode, prompt: str) -> str:
+    """Identity of a node call: changes when its spec or handed-off inputs change"""
+    spec = {
+        "id": node.id,
+        "prompt": prompt,
+        "agent": node.agent,
+        "model": node.model_id,
+        "task_type": node.task_type.name if node.task_type else None,
+        "kwargs": node.kwargs,
+    }
+    encoded = json.dumps(spec, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class CheckpointLog:
+    """
+    Append-only JSON-lines log of finished workflow nodes.
+
+    One line is written (and fsynced) per node, so a crash loses at most the
+    node in flight; a torn last line is ignored on load. The latest successful
+    record for a node key is replayed on resume.
+    """
+
+    def __init__(self, path: Union[str, Path], durable: bool = True):
+        self.path = Path(path)
+        self.durable = durable
+        self._completed: Dict[str, Dict[str, Any]] = {}
+        self._torn_tail = False
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, "rb") as f:
+            for line_no, line in enumerate(f, 1):
+                self._torn_tail = not line.endswith(b"\n")
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Ignoring unreadable checkpoint line {line_no} in {self.path}")
+                    continue
+                if record.get("version") != CHECKPOINT_VERSION:
+                    continue
+                if record.get("status") == "success":
+                    self._completed[record["key"]] = record
+        logger.info(f"Loaded {len(self._completed)} completed nodes from {self.path}")
+
+    def __len__(self) -> int:
+        return len(self._completed)
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Completed record for a node key, if any"""
+        return self._completed.get(key)
+
+    def append(self, key: str, result: NodeResult):
+        """Record a finished node"""
+        response = None
+        if result.response is not None:
+            response = dataclasses.asdict(result.response)
+            response.pop("raw_response", None)
+        record = {
+            "version": CHECKPOINT_VERSION,
+            "key": key,
+            "node": result.node_id,
+            "status": result.status,
+            "model_id": result.model_id,
+            "provider": result.provider,
+            "response": response,
+            "error": result.error,
+            "run_s": round(result.run_s, 3),
+            "time": time.time(),
+        }
+        line = (json.dumps(record, default=str) + "\n").encode("utf-8")
+        if self._torn_tail:
+            # Terminate a line cut short by a crash so this record parses
+            line = b"\n" + line
+            self._torn_tail = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            if self.durable:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        if result.status == "success":
+            self._completed[key] = record
+
+    def reset(self):
+        """Discard all checkpoints"""
+        self._completed.clear()
+        if self.path.exists():
+            self.path.unlink()
+
+
+class ResourceLimiter:
+    """Admission control: RAM budget for local models, concurrency caps for cloud providers"""
+
+    def __init__(self,
+                 ram_budget_gb: float,
+                 max_local_models: Optional[int] = None,
+                 provider_limits: Optional[Dict[str, Optional[int]]] = None):
+        self.ram_budget_gb = ram_budget_gb
+        self.max_local_models = max_local_models
+        self.provider_limits = dict(DEFAULT_PROVIDER_CONCURRENCY, **(provider_limits or {}))
+        self._provider_slots: Dict[str, asyncio.Semaphore] = {}
+        self._loaded: Dict[str, int] = {}  # Local model -> nodes using it
+        self._loaded_gb = 0.0
+        self._changed = asyncio.Condition()
+
+    @classmethod
+    def from_ram_monitor(cls,
+                         monitor: Optional[RAMMonitor] = None,
+                         provider_limits: Optional[Dict[str, Optional[int]]] = None) -> "ResourceLimiter":
+        """Budget from the machine's RAM tier"""
+        capacity = (monitor or RAMMonitor()).get_model_capacity()
+        return cls(capacity.total_ram_budget_gb, capacity.max_concurrent_models, provider_limits)
+
+    @property
+    def loaded_gb(self) -> float:
+        return self._loaded_gb
+
+    def _fits(self, model_id: str, size_gb: float) -> bool:
+        if model_id in self._loaded or not self._loaded:
+            # Nodes share a loaded model; an oversized model may still run alone
+            return True
+        if self.max_local_models and len(self._loaded) >= self.max_local_models:
+            return False
+        return self._loaded_gb + size_gb <= self.ram_budget_gb
+
+    @asynccontextmanager
+    async def _local_slot(self, model_id: str, size_gb: float):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._fits(model_id, size_gb))
+            if model_id not in self._loaded:
+                self._loaded_gb += size_gb
+            self._loaded[model_id] = self._loaded.get(model_id, 0) + 1
+        try:
+            yield
+        finally:
+            async with self._changed:
+                self._loaded[model_id] -= 1
+                if not self._loaded[model_id]:
+                    del self._loaded[model_id]
+                    self._loaded_gb -= size_gb
+                self._changed.notify_all()
+
+    @asynccontextmanager
+    async def _provider_slot(self, provider: str):
+        limit = self.provider_limits.get(provider)
+        if not limit:
+            yield
+            return
+        slots = self._provider_slots.setdefault(provider, asyncio.Semaphore(limit))
+        async with slots:
+            yield
+
+    def slot(self, model_id: str, model: ModelCapabilities, size_gb: Optional[float] = None):
+        """Async context manager held while a node calls the model"""
+        if model.provider == ModelProvider.OLLAMA:
+            return self._local_slot(model_id, size_gb or model.size_gb or DEFAULT_LOCAL_MODEL_GB)
+        return self._provider_slot(model.provider.value)
+
+
+class WorkflowExecutor:
+    """Runs WorkflowNodes through a ModelOrchestrator as soon as their dependencies finish"""
+
+    def __init__(self,
+                 orchestrator,
+                 limiter: Optional[ResourceLimiter] = None,
+                 fail_fast: bool = False,
+                 checkpoint: Optional[CheckpointLog] = None):
+        self.orchestrator = orchestrator
+        self.limiter = limiter or ResourceLimiter.from_ram_monitor()
+        self.fail_fast = fail_fast
+        self.checkpoint = checkpoint
+
+    async def run(self, nodes: Iterable[WorkflowNode], deadline_s: Optional[float] = None) -> WorkflowResult:
+        """
+        Run the nodes; with `deadline_s`, nodes still waiting for a slot or a
+        model when it passes finish with status "timeout" (and their
+        dependents are skipped), so the result is partial rather than late.
+        """
+        bound = deadline.start(deadline_s)
+        nodes = list(nodes)
+        order = topological_order(nodes)
+        by_id = {n.id: n for n in nodes}
+        dependents: Dict[str, List[str]] = {nid: [] for nid in by_id}
+        pending = {}
+        for node in nodes:
+            for dep in set(node.depends_on):
+                dependents[dep].append(node.id)
+            pending[node.id] = len(set(node.depends_on))
+
+        results: Dict[str, NodeResult] = {}
+        running: Dict[asyncio.Task, str] = {}
+        start = time.perf_counter()
+
+        def launch(nid: str):
+            deps = {d: results[d].response for d in by_id[nid].depends_on}
+            task = asyncio.create_task(self._run_node(by_id[nid], deps, start, bound))
+            running[task] = nid
+
+        def resolve(nid: str):
+            """Release dependents of a finished node; skip those with a failed dependency"""
+            for child in dependents[nid]:
+                pending[child] -= 1
+                if pending[child]:
+                    continue
+                failed = [d for d in by_id[child].depends_on if results[d].status != "success"]
+                if failed:
+                    now = time.perf_counter() - start
+                    results[child] = NodeResult(child, "skipped", error=f"Dependency failed: {failed[0]}",
+                                                ready_at=now, started_at=now, finished_at=now)
+                    resolve(child)
+                else:
+                    launch(child)
+
+        with tracing.span("workflow", {"workflow.nodes": len(nodes)}) as span:
+            for nid in order:
+                if pending[nid] == 0:
+                    launch(nid)
+
+            try:
+                stop = False
+                while running and not stop:
+                    done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        nid = running.pop(task)
+                        results[nid] = task.result()
+                        if self.fail_fast and results[nid].status in ("failed", "timeout"):
+                            logger.warning(f"Workflow stopped after {nid} ended with status "
+                                           f"{results[nid].status} (fail_fast)")
+                            stop = True
+                        else:
+                            resolve(nid)
+            finally:
+                for task in running:
+                    task.cancel()
+                await asyncio.gather(*running, return_exceptions=True)
+
+            now = time.perf_counter() - start
+            for nid in order:
+                if nid not in results:
+                    results[nid] = NodeResult(nid, "cancelled", ready_at=now, started_at=now, finished_at=now)
+
+            elapsed = time.perf_counter() - start
+            path = critical_path(results, by_id)
+            span.set_attributes({"workflow.elapsed_s": elapsed, "workflow.critical_path": " > ".join(path)})
+
+        ordered = {nid: results[nid] for nid in order}
+        return WorkflowResult(ordered, elapsed, path)
+
+    @staticmethod
+    def _build_prompt(node: WorkflowNode, deps: Dict[str, APIResponse]) -> str:
+        """Node prompt with dependency outputs appended as handoffs"""
+        if callable(node.prompt):
+            return node.prompt(deps)
+        if not deps:
+            return node.prompt
+        handoffs = "\n\n".join(f"## Handoff from {nid}\n{resp.content}" for nid, resp in deps.items())
+        return f"{node.prompt}\n\n{handoffs}"
+
+    async def _run_node(self, node: WorkflowNode, deps: Dict[str, APIResponse], start: float,
+                        bound: Optional[deadline.Deadline] = None) -> NodeResult:
+        result = NodeResult(node.id, "failed", ready_at=time.perf_counter() - start)
+        key = None
+        with tracing.span("workflow.node", {"node": node.id, "agent": node.agent}) as span:
+            try:
+                prompt = self._build_prompt(node, deps)
+                key = node_key(node, prompt) if self.checkpoint is not None else None
+                record = self.checkpoint.lookup(key) if key else None
+                if record:
+                    span.set_attribute("replayed", True)
+                    return self._replay(result, record)
+
+                model_id = node.model_id or self.orchestrator.select_model(
+                    prompt, node.task_type, node.agent, **node.kwargs)
+                model = self.orchestrator.registry.get_model(model_id) if model_id else None
+                if model is None:
+                    raise WorkflowError(f"No model available for node {node.id}")
+                result.model_id, result.provider = model_id, model.provider.value
+                span.set_attributes({"model": model_id, "provider": model.provider.value})
+
+                @asynccontextmanager
+                async def admit(attempt_id: str, attempt: ModelCapabilities, size_gb: Optional[float] = None):
+                    # A slot per attempted model, so a fallback is admitted against its own limits
+                    async with self.limiter.slot(attempt_id, attempt, size_gb):
+                        if not result.started_at:
+                            result.started_at = time.perf_counter() - start
+                        result.model_id, result.provider = attempt_id, attempt.provider.value
+                        span.add_event("admitted", model=attempt_id, wait_s=result.wait_s)
+                        yield
+
+                async with deadline.enforce(bound):
+                    response = await self.orchestrator.route_request(
+                        prompt, model_id=model_id, task_type=node.task_type, agent=node.agent,
+                        admit=admit, **node.kwargs)
+
+                if node.gate and not node.gate(response):
+                    raise HandoffRejected(f"Handoff gate rejected output of {node.id}")
+                result.response, result.status = response, "success"
+            except asyncio.CancelledError:
+                raise
+            except DeadlineExceeded as e:
+                logger.error(f"Workflow node {node.id} timed out: {e}")
+                result.status, result.error = "timeout", str(e)
+                span.set_error(f"{type(e).__name__}: {e}")
+            except Exception as e:
+                logger.error(f"Workflow node {node.id} failed: {e}")
+                result.error = str(e)
+                span.set_error(f"{type(e).__name__}: {e}")
+            finally:
+                result.finished_at = time.perf_counter() - start
+                if not result.started_at:
+                    result.started_at = result.finished_at
+
+        if key and not result.replayed:
+            await asyncio.to_thread(self.checkpoint.append, key, result)
+        return result
+
+    @staticmethod
+    def _replay(result: NodeResult, record: Dict[str, Any]) -> NodeResult:
+        """Completed node restored from a checkpoint record"""
+        result.response = APIResponse(**record["response"])
+        result.model_id, result.provider = record["model_id"], record["provider"]
+        result.status, result.replayed = "success", True
+        logger.info(f"Replayed workflow node {result.node_id} from checkpoint")
+        return result
+
+
+def load_workflow(path: str) -> List[WorkflowNode]:
+    """Load nodes from YAML: {nodes: [{id, prompt, depends_on, agent, model, task_type, ...}]}"""
+    import yaml
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+
+    nodes = []
+    for entry in data.get("nodes", []):
+        entry = dict(entry)
+        task_type = entry.pop("task_type", None)
+        nodes.append(WorkflowNode(
+            id=entry.pop("id"),
+            prompt=entry.pop("prompt"),
+            depends_on=list(entry.pop("depends_on", [])),
+            agent=entry.pop("agent", None),
+            model_id=entry.pop("model", None),
+            task_type=TaskType[task_type.upper()] if task_type else None,
+            kwargs=entry,
+        ))
+    topological_order(nodes)
+    return nodes
+
+
+def main():
+    """CLI: run a workflow file and print the critical-path report"""
+    import argparse
+    from .core import ModelOrchestrator
+
+    parser = argparse.ArgumentParser(description="Run a workflow DAG through the model orchestrator")
+    parser.add_argument("workflow", help="Workflow YAML file")
+    parser.add_argument("--ram-budget", type=float, help="RAM budget for local models in GB")
+    parser.add_argument("--fail-fast", action="store_true", help="Stop after the first failed node")
+    parser.add_argument("--checkpoint", help="Checkpoint log (default: per workflow file under ~/.cache)")
+    parser.add_argument("--no-checkpoint", action="store_true", help="Run without checkpointing")
+    parser.add_argument("--restart", action="store_true", help="Discard checkpoints and run every node")
+    args = parser.parse_args()
+
+    checkpoint = None
+    if not args.no_checkpoint:
+        checkpoint_path = args.checkpoint or DEFAULT_CHECKPOINT_DIR / f"{Path(args.workflow).stem}.jsonl"
+        checkpoint = CheckpointLog(checkpoint_path)
+        if args.restart:
+            checkpoint.reset()
+
+    async def run():
+        orchestrator = ModelOrchestrator()
+        limiter = ResourceLimiter(args.ram_budget) if args.ram_budget else None
+        try:
+            executor = WorkflowExecutor(orchestrator, limiter, args.fail_fast, checkpoint)
+            return await executor.run(load_workflow(args.workflow))
+        finally:
+            for client in orchestrator.clients.values():
+                if client.session:
+                    await client.session.close()
+
+    result = asyncio.run(run())
+    print(json.dumps(result.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
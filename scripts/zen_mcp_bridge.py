@@ -11,6 +11,8 @@ import subprocess
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 from model_orchestrator import ModelOrchestrator, TaskType, ModelProvider
+from model_orchestrator.consensus import ConsensusEngine
+from model_orchestrator.chain import ChainPipeline, ChainStage
 
 class ZenMCPBridge:
     """Bridge between Model Orchestrator and Zen MCP tools"""
@@ -173,30 +175,17 @@ class ZenMCPBridge:
     
     async def multi_model_consensus(self,
                                    prompt: str,
-                                   num_models: int = 3) -> Dict[str, Any]:
-        """Use Zen consensus tool with intelligent model selection"""
+                                   num_models: int = 3,
+                                   quorum: Optional[int] = None) -> Dict[str, Any]:
+        """Vote across diverse models; stops once a quorum agrees"""
         
         # Select diverse models for consensus
         models = self.orchestrator.create_consensus_group(prompt, num_models, diverse=True)
         
-        # Prepare model configurations for Zen consensus
-        model_configs = []
-        for model_id, model in models:
-            model_configs.append({
-                "model": model_id,
-                "stance": "neutral",  # Can be for/against/neutral
-                "weight": model.accuracy  # Weight by accuracy
-            })
-        
-        # Call Zen consensus with selected models
-        result = await self.intelligent_zen_call(
-            "mcp__zen__consensus",
-            prompt,
-            auto_select_model=False,  # We're providing multiple models
-            models=model_configs
-        )
+        engine = ConsensusEngine(self.orchestrator, quorum=quorum)
+        result = await engine.run(prompt, models=[model_id for model_id, _ in models])
         
-        return result
+        return result.to_dict()
     
     async def adaptive_analysis(self,
                               prompt: str,
@@ -401,21 +390,14 @@ class ModelRouter:
         )
     
     async def _use_chain(self, prompt: str, tasks: List[str], **kwargs) -> Any:
-        """Use chain of thought across models"""
+        """Pipe the prompt through one model per task, each stage streaming into the next"""
         chain = self.orchestrator.create_model_chain(tasks)
-        results = []
-        
-        for task, (model_id, model) in zip(tasks, chain):
-            result = await self.bridge.intelligent_zen_call(
-                "mcp__zen__chat",
-                task,
-                auto_select_model=False,
-                model=model_id,
-                **kwargs
-            )
-            results.append(result)
-        
-        return results
+        stages = [
+            ChainStage(f"step_{i}", f"{task}\n\n{{input}}", model_id=model_id, kwargs=dict(kwargs))
+            for i, (task, (model_id, _)) in enumerate(zip(tasks, chain), 1)
+        ]
+        result = await ChainPipeline(self.orchestrator, stages).run(prompt)
+        return result.to_dict()
 
 async def main():
     """Demo the unified system"""